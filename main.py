@@ -3,8 +3,16 @@
 """
 SOXL 주식 데이터 분석 프로젝트
 2년간의 SOXL 데이터를 분석하는 메인 스크립트
+
+여러 종목 일괄 분석:
+    python main.py --batch data/                     # 디렉터리의 CSV / 바이너리 데이터셋 전체
+    python main.py --batch data/SOXL_2y.csv data/TQQQ_2y.csv --out summary.csv
 """
 
+import argparse
+import glob
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
@@ -15,15 +23,21 @@ import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import sys
 import io
+import os
+
+# scripts/ 의 공용 모듈 사용
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scripts'))
+from dataset import is_frame_dir, load_frame
+from instrument import count, timed
+from memory_profile import command_line, footprint_frame
 
-# 한글 인코딩 설정
-sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
 warnings.filterwarnings('ignore')
 
 # 한글 폰트 설정
 plt.rcParams['font.family'] = 'Malgun Gothic'
 plt.rcParams['axes.unicode_minus'] = False
 
+@timed('load_data')
 def load_data(file_path):
     """CSV 파일을 로드하고 데이터를 정리합니다."""
     print("데이터 로딩 중...")
@@ -49,10 +63,12 @@ def load_data(file_path):
     df = df.sort_values('date').reset_index(drop=True)
     
     print(f"데이터 로딩 완료: {len(df)}개 행, {len(df.columns)}개 컬럼")
+    count('rows_parsed', len(df))
     print(f"기간: {df['date'].min().strftime('%Y-%m-%d')} ~ {df['date'].max().strftime('%Y-%m-%d')}")
     
     return df
 
+@timed('basic_analysis')
 def basic_analysis(df):
     """기본 통계 분석을 수행합니다."""
     print("\n=== 기본 통계 정보 ===")
@@ -88,6 +104,7 @@ def basic_analysis(df):
     else:
         print("60일 이동평균을 계산하기에는 데이터가 부족합니다.")
 
+@timed('plot_price_trend')
 def plot_price_trend(df):
     """가격 추이를 시각화합니다."""
     plt.figure(figsize=(15, 10))
@@ -121,6 +138,7 @@ def plot_price_trend(df):
     plt.tight_layout()
     plt.show()
 
+@timed('plot_interactive_chart')
 def plot_interactive_chart(df):
     """인터랙티브 차트를 생성합니다 (마우스 오버 시 값 표시)."""
     # 서브플롯 생성
@@ -230,17 +248,162 @@ def plot_interactive_chart(df):
     # 차트 표시
     fig.show()
 
+# 일괄 분석 이동평균 창
+BATCH_WINDOWS = (5, 20, 60)
+
+def find_price_files(paths):
+    """
+    일괄 분석 대상 찾기
+
+    Args:
+        paths (list[str]): CSV 파일, 바이너리 데이터셋 디렉터리, 또는 그것들을 담은 디렉터리
+
+    Returns:
+        dict: 종목 이름(파일 이름의 첫 '_' 앞부분) → 경로
+    """
+    found = []
+    for path in paths:
+        if os.path.isdir(path) and not is_frame_dir(path):
+            entries = sorted(glob.glob(os.path.join(path, '*')))
+            found += [e for e in entries if e.lower().endswith('.csv') or is_frame_dir(e)]
+        else:
+            found.append(path)
+
+    files = {}
+    for path in found:
+        name = os.path.basename(os.path.normpath(path))
+        ticker = os.path.splitext(name)[0].split('_')[0]
+        if ticker in files:
+            raise ValueError(f"종목 이름이 겹칩니다: {ticker} ({files[ticker]}, {path})")
+        files[ticker] = path
+    return files
+
+def _load_series(path):
+    """작업 프로세스: 종목 하나의 날짜/종가/고가/저가 배열 (날짜 오름차순)"""
+    if is_frame_dir(path):
+        df = load_frame(path)
+    else:
+        # 요약에 필요한 날짜/종가/고가/저가 컬럼만 읽는다 (거래량/등락률 문자열 정리 생략)
+        df = pd.read_csv(path, usecols=[0, 1, 3, 4], thousands=',', encoding='utf-8')
+        df.columns = ['date', 'close', 'high', 'low']
+        df['date'] = pd.to_datetime(df['date'])
+        df = df.sort_values('date')
+    return {
+        'dates': df['date'].to_numpy(dtype='datetime64[ns]'),
+        'close': df['close'].to_numpy(dtype=np.float64),
+        'high': df['high'].to_numpy(dtype=np.float64),
+        'low': df['low'].to_numpy(dtype=np.float64),
+    }
+
+@timed('load_panel')
+def load_panel(files, max_workers=None):
+    """
+    여러 종목을 병렬로 읽어 봉 x 종목 패널 배열로 정리
+
+    종목마다 기간이 달라도 마지막 봉이 같은 행에 오도록 오른쪽으로 맞추고 앞쪽은 NaN 으로 채운다.
+
+    Returns:
+        dict: tickers, rows/start/end (종목별), close/high/low (봉 x 종목)
+    """
+    tickers = list(files)
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        series = list(executor.map(_load_series, [files[t] for t in tickers], chunksize=8))
+
+    rows = np.array([len(s['close']) for s in series], dtype=np.int64)
+    length = int(rows.max())
+    panel = {
+        'tickers': tickers,
+        'rows': rows,
+        'start': np.array([s['dates'][0] if len(s['dates']) else np.datetime64('NaT', 'ns') for s in series]),
+        'end': np.array([s['dates'][-1] if len(s['dates']) else np.datetime64('NaT', 'ns') for s in series]),
+    }
+    for column in ('close', 'high', 'low'):
+        values = np.full((length, len(tickers)), np.nan)
+        for i, s in enumerate(series):
+            values[length - rows[i]:, i] = s[column]
+        panel[column] = values
+    count('rows_parsed', int(rows.sum()))
+    return panel
+
+@timed('batch_analysis')
+def batch_analysis(panel):
+    """
+    basic_analysis 의 가격 통계와 이동평균 정보를 모든 종목에 대해 한 번에 계산
+
+    Returns:
+        DataFrame: 종목별 요약 (기간, 최고가/최저가/평균 종가/현재가, MA5/20/60, 60일선 이격, 추세)
+    """
+    close = panel['close']
+    with warnings.catch_warnings(), np.errstate(invalid='ignore', divide='ignore'):
+        # 봉이 없는 종목은 NaN (All-NaN slice 경고 무시)
+        warnings.simplefilter('ignore', RuntimeWarning)
+        current = close[-1]
+        summary = pd.DataFrame({
+            'ticker': panel['tickers'],
+            'start': pd.to_datetime(panel['start']),
+            'end': pd.to_datetime(panel['end']),
+            'rows': panel['rows'],
+            'high': np.nanmax(panel['high'], axis=0),
+            'low': np.nanmin(panel['low'], axis=0),
+            'mean_close': np.nanmean(close, axis=0),
+            'close': current,
+        })
+        # 마지막 window 봉의 평균 = rolling(window).mean() 의 마지막 값 (봉이 모자라면 NaN)
+        for window in BATCH_WINDOWS:
+            if len(close) >= window:
+                summary[f'MA{window}'] = close[-window:].mean(axis=0)
+            else:
+                summary[f'MA{window}'] = np.nan
+        ma60 = summary['MA60'].to_numpy()
+        summary['ma60_gap'] = current - ma60
+        summary['ma60_gap_pct'] = (current - ma60) / ma60 * 100
+    summary['trend'] = np.where(np.isnan(ma60), '데이터 부족',
+                                np.where(current > ma60, '상승 추세', '하락 추세'))
+    return summary
+
+def batch_main(paths, out=None, max_workers=None):
+    """여러 종목 일괄 분석 실행"""
+    files = find_price_files(paths)
+    if not files:
+        print("분석할 가격 데이터가 없습니다.")
+        return None
+    print(f"{len(files)}개 종목 일괄 분석")
+    summary = batch_analysis(load_panel(files, max_workers))
+
+    print("\n=== 종목별 요약 ===")
+    with pd.option_context('display.max_rows', None, 'display.width', 200):
+        print(summary.to_string(index=False, float_format=lambda v: f'{v:,.2f}'))
+    counts = summary['trend'].value_counts()
+    print("\n" + ", ".join(f"{trend}: {counts.get(trend, 0)}개"
+                           for trend in ('상승 추세', '하락 추세', '데이터 부족')))
+    if out:
+        summary.to_csv(out, index=False, encoding='utf-8-sig')
+        print(f"요약 저장: {out}")
+    return summary
+
+@timed('main')
 def main():
     """메인 실행 함수"""
+    parser = argparse.ArgumentParser(description='SOXL 주식 데이터 분석')
+    parser.add_argument('--batch', nargs='+', metavar='PATH',
+                        help='여러 종목 일괄 분석 (CSV, 바이너리 데이터셋 또는 그것들을 담은 디렉터리)')
+    parser.add_argument('--out', help='일괄 분석 요약 CSV 저장 경로')
+    parser.add_argument('--workers', type=int, default=None, help='일괄 분석 로드 프로세스 수')
+    args, _ = parser.parse_known_args()
+    if args.batch:
+        batch_main(args.batch, args.out, args.workers)
+        return
+
     print("SOXL 주식 데이터 분석 시작!")
     print("=" * 50)
     
     try:
         # 데이터 로드
-               df = load_data('data/SOXL_2y.csv')
+        df = load_data('data/SOXL_2y.csv')
         
         # 기본 분석
         basic_analysis(df)
+        footprint_frame(df)
         
         # 시각화
         print("\n=== 정적 차트 생성 중... ===")
@@ -257,4 +420,8 @@ def main():
         print(f"오류 발생: {e}")
 
 if __name__ == "__main__":
-    main()
+    # 한글 인코딩 설정 (다른 모듈에서 import 할 때는 stdout 을 건드리지 않는다)
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+    # --profile-memory: 단계별 메모리 보고
+    with command_line():
+        main()
@@ -0,0 +1,547 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+핫 패스 벤치마크
+다섯 개 진입점(main.py 와 시뮬레이터 4종)의 단계별 실행 시간과 최대 메모리를
+합성 데이터 크기(봉 수, 계좌 수)를 키워 가며 측정한다.
+결과는 실행 이력과 함께 JSON 으로 저장해 버전 간 성능 저하를 비교하고,
+log-log 기울기로 각 단계가 O(n) 인지 O(n·k) 인지 보여 주는 확장 곡선을 그린다.
+"""
+
+import argparse
+import contextlib
+import importlib.util
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+import warnings
+from datetime import datetime
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+
+from exit_engine import ExitBook
+from market_generator import MarketGenerator, write_investing_csv
+from range_runner import get_simulator_class
+warnings.filterwarnings('ignore')
+
+# 한글 폰트 설정 (없으면 기본 폰트 사용)
+plt.rcParams['font.family'] = ['Malgun Gothic', 'DejaVu Sans']
+plt.rcParams['axes.unicode_minus'] = False
+logging.getLogger('matplotlib.font_manager').setLevel(logging.ERROR)
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ENTRY_POINTS = ('main', 'trading', 'improved', 'january', 'january_v2')
+BAR_SIZES = (500, 5_000, 50_000, 500_000, 10_000_000)
+ACCOUNT_SIZES = (20, 100, 1_000, 10_000)
+
+# 계좌 수 확장 측정에 쓰는 고정 봉 수
+ACCOUNT_BARS = 500
+
+# 이보다 짧은 측정값은 잡음이 커서 기울기 계산에서 제외
+MIN_FIT_SECONDS = 1e-4
+
+
+# ---------------------------------------------------------------------------
+# 합성 데이터
+# ---------------------------------------------------------------------------
+
+def synthetic_prices(n_bars, seed=0):
+    """
+    합성 가격 데이터 (같은 seed 면 항상 같은 데이터)
+
+    1000만 봉까지 날짜를 표현할 수 있도록 1분봉으로 만든다.
+    """
+    return MarketGenerator(n_bars, freq='min', seed=seed, moving_averages=()).frame()
+
+
+def synthetic_csv(n_bars, seed, data_dir):
+    """합성 데이터 CSV 경로 (없으면 생성, 같은 크기/seed 는 재사용)"""
+    os.makedirs(data_dir, exist_ok=True)
+    path = os.path.join(data_dir, f'synthetic_{n_bars}_{seed}.csv')
+    if not os.path.exists(path):
+        write_investing_csv(synthetic_prices(n_bars, seed), path)
+    return path
+
+
+# ---------------------------------------------------------------------------
+# 단계 정의
+# ---------------------------------------------------------------------------
+
+def load_main_module():
+    """저장소 루트의 main.py 를 모듈로 로드 (main.py 의 폰트 설정은 벤치마크 그래프에 남기지 않는다)"""
+    spec = importlib.util.spec_from_file_location('soxl_main', os.path.join(ROOT_DIR, 'main.py'))
+    module = importlib.util.module_from_spec(spec)
+    with matplotlib.rc_context():
+        spec.loader.exec_module(module)
+    return module
+
+
+class BenchContext:
+    def __init__(self, entry, csv_path, n_bars, n_accounts):
+        """
+        한 측정 크기의 입력
+
+        Args:
+            entry (str): 진입점 이름
+            csv_path (str): 합성 데이터 CSV
+            n_bars (int): 봉 수
+            n_accounts (int): 계좌 수 (계좌 시뮬레이터만 사용)
+        """
+        self.entry = entry
+        self.csv_path = csv_path
+        self.n_bars = n_bars
+        self.n_accounts = n_accounts
+        self.frame = None  # load_data 결과 (다음 단계 입력)
+        self._signals = None
+
+    def simulator(self):
+        """계좌 수를 맞춘 새 시뮬레이터"""
+        simulator = get_simulator_class(self.entry)()
+        if hasattr(simulator, 'accounts') and self.n_accounts != len(simulator.accounts):
+            template = simulator.accounts[1]
+            simulator.accounts = {i: dict(template) for i in range(1, self.n_accounts + 1)}
+            simulator.exit_book = ExitBook(self.n_accounts, simulator.exit_book.order)
+        return simulator
+
+    def signal_frame(self):
+        """신호가 계산된 데이터 (execute_trading 입력, 한 번 계산해 복사본 반환)"""
+        if self._signals is None:
+            self._signals = self.simulator().calculate_signals(self.frame.copy())
+        return self._signals.copy()
+
+
+def _main_load(ctx):
+    module = load_main_module()
+    return lambda: module.load_data(ctx.csv_path)
+
+
+def _main_analysis(ctx):
+    module = load_main_module()
+    frame = ctx.frame.copy()
+    return lambda: module.basic_analysis(frame)
+
+
+def _sim_load(ctx):
+    simulator = ctx.simulator()
+    return lambda: simulator.load_data(ctx.csv_path)
+
+
+def _calculate_signals(ctx):
+    simulator, frame = ctx.simulator(), ctx.frame.copy()
+    return lambda: simulator.calculate_signals(frame)
+
+
+def _signal_trading(ctx):
+    simulator, frame = ctx.simulator(), ctx.signal_frame()
+    return lambda: simulator.execute_trading(frame)
+
+
+def _calculate_performance(ctx):
+    simulator = ctx.simulator()
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        simulator.execute_trading(ctx.signal_frame())
+    return simulator.calculate_performance
+
+
+def _account_trading(ctx):
+    simulator, frame = ctx.simulator(), ctx.frame
+    first, last = frame['date'].iloc[0], frame['date'].iloc[-1]
+    return lambda: simulator.execute_trading(frame, first, last)
+
+
+def _bar_prices(ctx):
+    frame = ctx.frame
+    return frame['date'].tolist(), frame['open'].tolist(), frame['high'].tolist(), frame['low'].tolist()
+
+
+def _buy_sequence(ctx):
+    """봉마다 등차수열 매수 호출 (첫 봉에 빈 계좌가 채워지고 이후는 빈 계좌 탐색 비용)"""
+    simulator = ctx.simulator()
+    dates, opens, _, _ = _bar_prices(ctx)
+
+    def run():
+        for date, open_price in zip(dates, opens):
+            simulator.execute_buy_sequence(open_price, round(open_price * 0.01, 1), date)
+    return run
+
+
+def _sell_condition(ctx):
+    """모든 계좌를 매수 상태로 두고 봉마다 매도 조건 확인 (조건은 충족되지 않음)"""
+    simulator = ctx.simulator()
+    for account in simulator.accounts.values():
+        account.update(status='filled', shares=1.0, avg_price=1.0)
+    dates, opens, _, _ = _bar_prices(ctx)
+
+    def run():
+        for date, open_price in zip(dates, opens):
+            simulator.execute_sell_condition(open_price, 0.09, date)
+    return run
+
+
+def _exit_orders(ctx):
+    """모든 계좌에 도달하지 않는 목표가/손절가를 걸고 봉마다 청산 확인"""
+    simulator = ctx.simulator()
+    for index in range(len(simulator.accounts)):
+        simulator.exit_book.arm(index, np.inf, 0.0, -1)
+    dates, opens, highs, lows = _bar_prices(ctx)
+
+    def run():
+        for date, open_price, high, low in zip(dates, opens, highs, lows):
+            simulator.bar_index += 1
+            simulator.execute_exit_orders(open_price, high, low, date)
+    return run
+
+
+def _daily_result(ctx):
+    simulator = ctx.simulator()
+    dates, opens, _, _ = _bar_prices(ctx)
+
+    def run():
+        for date, price in zip(dates, opens):
+            simulator.record_daily_result(date, price)
+    return run
+
+
+# 진입점 → [(단계, 확장 차원, 준비 함수)]
+# 준비 함수는 측정하지 않는 준비를 마치고 측정할 호출 하나를 돌려준다
+SIGNAL_STAGES = [
+    ('load_data', 'bars', _sim_load),
+    ('calculate_signals', 'bars', _calculate_signals),
+    ('execute_trading', 'bars', _signal_trading),
+    ('calculate_performance', 'bars', _calculate_performance),
+]
+ACCOUNT_STAGES = [
+    ('load_data', 'bars', _sim_load),
+    ('execute_trading', 'bars', _account_trading),
+    ('execute_trading', 'accounts', _account_trading),
+    ('execute_buy_sequence', 'accounts', _buy_sequence),
+    ('execute_sell_condition', 'accounts', _sell_condition),
+    ('execute_exit_orders', 'accounts', _exit_orders),
+    ('record_daily_result', 'accounts', _daily_result),
+]
+STAGES = {
+    'main': [('load_data', 'bars', _main_load), ('basic_analysis', 'bars', _main_analysis)],
+    'trading': SIGNAL_STAGES,
+    'improved': SIGNAL_STAGES,
+    'january': ACCOUNT_STAGES,
+    'january_v2': ACCOUNT_STAGES,
+}
+
+
+# ---------------------------------------------------------------------------
+# 측정
+# ---------------------------------------------------------------------------
+
+def measure(prepare, ctx, repeat=3, memory=True):
+    """
+    단계 하나 측정
+
+    호출마다 prepare 로 새 입력을 만들고(측정 제외), 시간은 repeat 회 중 최솟값을 쓴다.
+    한 번에 0.2초 이상 걸리는 단계는 반복하지 않는다.
+
+    Returns:
+        (float, int, object): 초, 최대 메모리(바이트, 미측정 시 None), 마지막 호출 결과
+    """
+    timings = []
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        for _ in range(max(repeat, 1)):
+            func = prepare(ctx)
+            start = time.perf_counter()
+            result = func()
+            timings.append(time.perf_counter() - start)
+            if timings[-1] >= 0.2:
+                break
+
+        peak = None
+        if memory:
+            func = prepare(ctx)
+            tracemalloc.start()
+            try:
+                func()
+                peak = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+    return min(timings), peak, result
+
+
+def run_benchmarks(entries=ENTRY_POINTS, bar_sizes=BAR_SIZES, account_sizes=ACCOUNT_SIZES,
+                   seed=0, data_dir=os.path.join('.cache', 'benchmark'), repeat=3,
+                   budget_seconds=60.0, memory=True):
+    """
+    모든 진입점의 단계별 확장 측정
+
+    Args:
+        budget_seconds (float): 다음 크기의 예상 시간(직전 시간 x 크기 비율)이 이 값을 넘으면 건너뜀
+
+    Returns:
+        list[dict]: entry, stage, dimension, bars, accounts, seconds, peak_bytes (건너뛴 측정은 skipped)
+    """
+    results = []
+    for entry in entries:
+        for dimension in ('bars', 'accounts'):
+            stages = [stage for stage in STAGES[entry] if stage[1] == dimension]
+            if not stages:
+                continue
+            sizes = bar_sizes if dimension == 'bars' else account_sizes
+            last = {}  # 단계 → (크기, 초)
+
+            for size in sizes:
+                n_bars = size if dimension == 'bars' else ACCOUNT_BARS
+                n_accounts = size if dimension == 'accounts' else 20
+                over_budget = {stage: stage in last and last[stage][1] * size / last[stage][0] > budget_seconds
+                               for stage, _, _ in stages}
+
+                ctx = None
+                if not all(over_budget.values()):
+                    ctx = BenchContext(entry, synthetic_csv(n_bars, seed, data_dir), n_bars, n_accounts)
+                    # 봉 수 확장이 아닌 단계는 load_data 결과를 측정 없이 준비
+                    if dimension == 'accounts':
+                        ctx.frame = measure(STAGES[entry][0][2], ctx, repeat=1, memory=False)[2]
+
+                for stage, _, prepare in stages:
+                    row = {'entry': entry, 'stage': stage, 'dimension': dimension,
+                           'bars': n_bars, 'accounts': n_accounts}
+                    if over_budget[stage] or ctx is None or (stage != 'load_data' and ctx.frame is None):
+                        row['skipped'] = True
+                        results.append(row)
+                        continue
+
+                    seconds, peak, result = measure(prepare, ctx, repeat, memory)
+                    if stage == 'load_data':
+                        ctx.frame = result
+                    last[stage] = (size, seconds)
+                    row.update(seconds=seconds, peak_bytes=peak)
+                    results.append(row)
+                    print(f"{entry:>10} {stage:<22} {dimension:<8} n={size:>10,}  "
+                          f"{seconds:10.4f}s  {_format_bytes(peak)}")
+    return results
+
+
+def _format_bytes(value):
+    if value is None:
+        return '-'
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if value < 1024 or unit == 'GB':
+            return f'{value:,.1f}{unit}'
+        value /= 1024
+
+
+# ---------------------------------------------------------------------------
+# 확장성 분석 / 이력
+# ---------------------------------------------------------------------------
+
+def scaling_exponents(results):
+    """
+    단계별 log-log 기울기 (시간 ∝ 크기^기울기, 측정한 가장 큰 두 크기 기준)
+
+    Returns:
+        DataFrame: entry, stage, bars_slope, accounts_slope, complexity
+    """
+    measured = pd.DataFrame([r for r in results if not r.get('skipped')])
+    if measured.empty:
+        return pd.DataFrame(columns=['entry', 'stage', 'bars_slope', 'accounts_slope', 'complexity'])
+
+    rows = {}
+    for (entry, stage, dimension), group in measured.groupby(['entry', 'stage', 'dimension'], sort=False):
+        # 작은 크기는 고정 비용이 커서 기울기가 낮게 나오므로 가장 큰 두 크기로 점근 기울기를 구한다
+        group = group[group['seconds'] >= MIN_FIT_SECONDS].sort_values(dimension).tail(2)
+        sizes = group[dimension].to_numpy(dtype=np.float64)
+        slope = np.nan
+        if len(np.unique(sizes)) == 2:
+            slope = np.polyfit(np.log(sizes), np.log(group['seconds'].to_numpy()), 1)[0]
+        rows.setdefault((entry, stage), {'entry': entry, 'stage': stage})[f'{dimension}_slope'] = slope
+
+    table = pd.DataFrame(list(rows.values())).reindex(
+        columns=['entry', 'stage', 'bars_slope', 'accounts_slope'])
+    table['complexity'] = [_complexity(b, a) for b, a in zip(table['bars_slope'], table['accounts_slope'])]
+    return table
+
+
+def _order(slope, symbol):
+    if pd.isna(slope):
+        return None
+    power = int(round(slope))
+    if power <= 0:
+        return ''
+    return symbol if power == 1 else f'{symbol}^{power}'
+
+
+def _complexity(bars_slope, accounts_slope):
+    """기울기를 O(...) 표기로 변환 (측정하지 않은 차원은 생략)"""
+    terms = [t for t in (_order(bars_slope, 'n'), _order(accounts_slope, 'k')) if t]
+    if not terms and pd.isna(bars_slope) and pd.isna(accounts_slope):
+        return '?'
+    return f"O({'·'.join(terms) or '1'})"
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _result_key(row):
+    return (row['entry'], row['stage'], row['dimension'], row['bars'], row['accounts'])
+
+
+def find_regressions(previous, current, threshold=0.2, min_seconds=0.01):
+    """
+    이전 실행 대비 느려진 측정 목록
+
+    Args:
+        threshold (float): 허용 증가율 (0.2 = 20%)
+        min_seconds (float): 이보다 짧은 측정은 잡음으로 보고 비교하지 않음
+    """
+    before = {_result_key(r): r for r in previous if not r.get('skipped')}
+    regressions = []
+    for row in current:
+        old = before.get(_result_key(row))
+        if row.get('skipped') or old is None or max(row['seconds'], old['seconds']) < min_seconds:
+            continue
+        ratio = row['seconds'] / old['seconds'] if old['seconds'] > 0 else np.inf
+        if ratio > 1 + threshold:
+            regressions.append(dict(row, previous_seconds=old['seconds'], ratio=ratio))
+    return regressions
+
+
+def load_history(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return []
+
+
+def save_run(path, results, config):
+    """측정 결과를 실행 이력 JSON 에 추가하고 저장한 실행 기록 반환"""
+    history = load_history(path)
+    run = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'config': config,
+        'results': results,
+    }
+    history.append(run)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    temp_path = f'{path}.{os.getpid()}.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(history, f, ensure_ascii=False, indent=1)
+    os.replace(temp_path, path)
+    return run
+
+
+def plot_scaling(results, out_dir):
+    """
+    차원별 확장 곡선(시간, 최대 메모리 vs 크기) PNG 저장
+
+    Returns:
+        list[str]: 저장한 파일 경로
+    """
+    measured = pd.DataFrame([r for r in results if not r.get('skipped')])
+    paths = []
+    if measured.empty:
+        return paths
+
+    for dimension, label in (('bars', '봉 수 (n)'), ('accounts', '계좌 수 (k)')):
+        data = measured[measured['dimension'] == dimension]
+        if data.empty:
+            continue
+        fig, (ax_time, ax_memory) = plt.subplots(1, 2, figsize=(15, 6))
+        for (entry, stage), group in data.groupby(['entry', 'stage'], sort=False):
+            ax_time.plot(group[dimension], group['seconds'], marker='o', label=f'{entry}.{stage}')
+            memory = group.dropna(subset=['peak_bytes'])
+            if not memory.empty:
+                ax_memory.plot(memory[dimension], memory['peak_bytes'] / 1024 ** 2, marker='o',
+                               label=f'{entry}.{stage}')
+
+        for ax, ylabel in ((ax_time, '시간 (초)'), (ax_memory, '최대 메모리 (MB)')):
+            ax.set_xscale('log')
+            ax.set_yscale('log')
+            ax.set_xlabel(label)
+            ax.set_ylabel(ylabel)
+            ax.grid(True, which='both', alpha=0.3)
+        ax_time.set_title(f'단계별 실행 시간 - {label}')
+        ax_memory.set_title(f'단계별 최대 메모리 - {label}')
+        ax_time.legend(fontsize=7)
+
+        fig.tight_layout()
+        path = os.path.join(out_dir, f'scaling_{dimension}.png')
+        fig.savefig(path, dpi=120)
+        plt.close(fig)
+        paths.append(path)
+    return paths
+
+
+def _parse_sizes(text):
+    return tuple(int(value.replace('_', '')) for value in text.split(','))
+
+
+def main():
+    """메인 실행 함수"""
+    parser = argparse.ArgumentParser(description='단계별 실행 시간/메모리 확장성 벤치마크')
+    parser.add_argument('--entry', action='append', choices=ENTRY_POINTS,
+                        help='대상 진입점 (여러 번 지정 가능, 기본: 전체)')
+    parser.add_argument('--bars', type=_parse_sizes, default=BAR_SIZES, help='봉 수 목록 (쉼표 구분)')
+    parser.add_argument('--accounts', type=_parse_sizes, default=ACCOUNT_SIZES, help='계좌 수 목록 (쉼표 구분)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3, help='짧은 단계 반복 횟수 (최솟값 사용)')
+    parser.add_argument('--budget', type=float, default=60.0, help='측정 하나의 예상 시간 한도(초)')
+    parser.add_argument('--no-memory', action='store_true', help='tracemalloc 메모리 측정 생략')
+    parser.add_argument('--data-dir', default=os.path.join('.cache', 'benchmark'), help='합성 데이터 저장 위치')
+    parser.add_argument('--out', default='benchmarks', help='이력 JSON 과 확장 곡선 저장 위치')
+    parser.add_argument('--threshold', type=float, default=0.2, help='성능 저하로 볼 시간 증가율')
+    parser.add_argument('--fail-on-regression', action='store_true', help='성능 저하가 있으면 종료 코드 1')
+    args = parser.parse_args()
+
+    config = {'entries': list(args.entry or ENTRY_POINTS), 'bars': list(args.bars),
+              'accounts': list(args.accounts), 'seed': args.seed, 'repeat': args.repeat,
+              'budget_seconds': args.budget, 'memory': not args.no_memory}
+    results = run_benchmarks(config['entries'], args.bars, args.accounts, args.seed, args.data_dir,
+                             args.repeat, args.budget, not args.no_memory)
+
+    history_path = os.path.join(args.out, 'history.json')
+    previous = load_history(history_path)
+    save_run(history_path, results, config)
+
+    print("\n=== 확장성 (log-log 기울기) ===")
+    print(scaling_exponents(results).to_string(index=False, float_format='{:.2f}'.format))
+
+    skipped = [r for r in results if r.get('skipped')]
+    if skipped:
+        print(f"\n시간 한도로 건너뛴 측정: {len(skipped)}개")
+
+    for path in plot_scaling(results, args.out):
+        print(f"확장 곡선 저장: {path}")
+
+    regressions = find_regressions(previous[-1]['results'], results, args.threshold) if previous else []
+    if regressions:
+        print(f"\n=== 성능 저하 ({previous[-1].get('commit')} 대비) ===")
+        for row in regressions:
+            print(f"{row['entry']}.{row['stage']} {row['dimension']} bars={row['bars']:,} "
+                  f"accounts={row['accounts']:,}: {row['previous_seconds']:.4f}s → "
+                  f"{row['seconds']:.4f}s (x{row['ratio']:.2f})")
+    print(f"\n결과 이력 저장: {history_path}")
+
+    if regressions and args.fail_on_regression:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+시뮬레이터 공용 데이터 유틸리티
+"""
+
+import contextlib
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+# 바이너리 데이터셋 형식 버전 (컬럼별 .npy + meta.json)
+FRAME_FORMAT_VERSION = 1
+FRAME_META = 'meta.json'
+
+# 압축 모드 컬럼 형식 (가격/지표/등락률, 거래량, 신호/포지션)
+COMPACT_FLOAT = np.float32
+COMPACT_VOLUME = np.int64
+COMPACT_SIGNAL = np.int8
+SIGNAL_COLUMNS = ('signal', 'position')
+
+# 내용 해시에 포함하는 가격 컬럼 (지표 컬럼은 있으면 함께 포함)
+HASH_COLUMNS = ('open', 'high', 'low', 'close')
+INDICATOR_PREFIX = 'MA'
+
+
+def content_hash(df, rows=None, indicators=True):
+    """
+    가격 데이터 앞부분의 내용 해시
+
+    Args:
+        df (DataFrame): load_data 결과 (날짜 오름차순)
+        rows (int): 해시할 앞쪽 행 수 (기본: 전체)
+        indicators (bool): 이동평균 컬럼 포함 여부 (False 면 날짜와 OHLC 만, 데이터셋 식별용)
+
+    Returns:
+        str: sha256 16진수 문자열
+    """
+    rows = len(df) if rows is None else rows
+    digest = hashlib.sha256()
+    digest.update(np.int64(rows).tobytes())
+    head = df.iloc[:rows]
+    digest.update(head['date'].to_numpy(dtype='datetime64[ns]').view(np.int64).tobytes())
+    indicators = sorted(c for c in df.columns if indicators and str(c).startswith(INDICATOR_PREFIX))
+    for column in list(HASH_COLUMNS) + indicators:
+        digest.update(str(column).encode('utf-8'))
+        digest.update(head[column].to_numpy(dtype=np.float64).tobytes())
+    return digest.hexdigest()
+
+
+def compact_frame(df):
+    """
+    압축 모드 데이터 (가격, 이동평균, 등락률 float32 / 거래량 int64 / 신호, 포지션 int8)
+
+    float32 는 $65,536 미만 가격을 센트 단위까지 보존한다. 이평선, 비율 같은 계산값은
+    유효 숫자 7자리로 줄어들므로 경계에 걸친 봉의 판단이 달라질 수 있다
+    (equivalence.py --engine compact 로 float64 결과와 비교).
+
+    Returns:
+        DataFrame: 같은 컬럼의 새 데이터
+    """
+    data = {}
+    for column in df.columns:
+        values = df[column]
+        if column in SIGNAL_COLUMNS:
+            data[column] = values.to_numpy(dtype=COMPACT_SIGNAL)
+        elif column == 'volume':
+            data[column] = np.rint(values.fillna(0).to_numpy(dtype=np.float64)).astype(COMPACT_VOLUME)
+        elif pd.api.types.is_float_dtype(values):
+            data[column] = values.to_numpy(dtype=COMPACT_FLOAT)
+        else:
+            data[column] = values.to_numpy()
+    return pd.DataFrame(data)
+
+
+def is_compact(df):
+    """압축 모드 데이터인지 (종가가 float32)"""
+    return 'close' in df.columns and df['close'].dtype == COMPACT_FLOAT
+
+
+def float_dtype(values):
+    """계산에 쓸 실수 형식 (float32 는 그대로, 나머지는 float64)"""
+    return COMPACT_FLOAT if values.dtype == COMPACT_FLOAT else np.float64
+
+
+class TradingCalendar:
+    """
+    거래일 달력 (날짜 오름차순 datetime64 배열)
+
+    구간 위치와 다음 거래일을 searchsorted 로 찾으므로, 긴 이력에서 구간 하나를
+    자르는 비용은 O(log n) 이고 잘라낸 구간은 복사 없는 iloc 슬라이스다.
+    """
+
+    def __init__(self, dates, check=True):
+        """
+        Args:
+            dates: 날짜 배열 또는 Series (load_data 결과의 date 컬럼)
+            check (bool): 오름차순 확인 (O(n), load_data 결과처럼 정렬이 보장되면 생략)
+        """
+        # 원래 단위(ns, us ...) 그대로 두어야 복사가 없다
+        self.dates = np.asarray(dates.to_numpy() if isinstance(dates, pd.Series) else dates)
+        if self.dates.dtype.kind != 'M':
+            self.dates = self.dates.astype('datetime64[ns]')
+        if check and len(self.dates) > 1 and (self.dates[1:] < self.dates[:-1]).any():
+            raise ValueError("거래일 달력: 날짜가 오름차순이 아닙니다")
+
+    @classmethod
+    def of(cls, df):
+        """load_data 결과(날짜 오름차순)의 달력"""
+        return cls(df['date'], check=False)
+
+    def __len__(self):
+        return len(self.dates)
+
+    @staticmethod
+    def _key(date):
+        return np.datetime64(pd.to_datetime(date))
+
+    def locate(self, start=None, end=None):
+        """
+        start ~ end (양 끝 포함) 구간의 위치
+
+        Returns:
+            (int, int): 시작 위치, 끝 다음 위치 (None 이면 데이터 처음/끝)
+        """
+        first = 0 if start is None else int(np.searchsorted(self.dates, self._key(start), side='left'))
+        last = len(self.dates) if end is None else int(np.searchsorted(self.dates, self._key(end), side='right'))
+        return first, max(first, last)
+
+    def view(self, df, start=None, end=None, warmup=0):
+        """
+        구간 데이터 (복사 없는 슬라이스, 인덱스는 0부터)
+
+        Args:
+            warmup (int): 구간 앞에 함께 자를 봉 수 (이평선 워밍업)
+
+        Returns:
+            (DataFrame, int): 잘라낸 데이터, 구간 시작 위치(앞에 붙은 워밍업 봉 수)
+        """
+        first, last = self.locate(start, end)
+        head = max(first - warmup, 0)
+        return df.iloc[head:last].reset_index(drop=True), first - head
+
+    def position(self, date):
+        """date 거래일의 위치 (거래일이 아니면 None)"""
+        index = int(np.searchsorted(self.dates, self._key(date), side='left'))
+        if index < len(self.dates) and self.dates[index] == self._key(date):
+            return index
+        return None
+
+    def next(self, date):
+        """date 다음 거래일 (없으면 None)"""
+        index = int(np.searchsorted(self.dates, self._key(date), side='right'))
+        return pd.Timestamp(self.dates[index]) if index < len(self.dates) else None
+
+
+def records_to_arrays(prefix, records, arrays):
+    """dict 목록(거래 기록)을 컬럼 배열로 변환"""
+    if not records:
+        return []
+    frame = pd.DataFrame(records)
+    for column in frame.columns:
+        values = frame[column]
+        if pd.api.types.is_datetime64_any_dtype(values):
+            arrays[f'{prefix}/{column}'] = values.to_numpy()
+        elif pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+            arrays[f'{prefix}/{column}'] = values.to_numpy()
+        else:
+            # 문자열 컬럼 (빈 값은 해당 키가 없던 기록)
+            arrays[f'{prefix}/{column}'] = values.fillna('').astype(str).to_numpy(dtype=str)
+    return list(frame.columns)
+
+
+def arrays_to_records(prefix, columns, arrays):
+    """컬럼 배열을 dict 목록으로 복원"""
+    if not columns:
+        return []
+    data = {}
+    for column in columns:
+        values = arrays[f'{prefix}/{column}']
+        if values.dtype.kind == 'M':
+            data[column] = list(pd.to_datetime(values))
+        else:
+            data[column] = values.tolist()
+    records = []
+    for row in zip(*data.values()):
+        records.append({key: value for key, value in zip(columns, row) if value != ''})
+    return records
+
+
+class FrameWriter:
+    def __init__(self, directory, rows, columns):
+        """
+        바이너리 데이터셋 쓰기 (컬럼별 .npy 파일을 메모리 맵으로 열어 구간 단위로 채운다)
+
+        meta.json 은 close() 에서 마지막에 쓰므로, meta.json 이 있으면 완성된 데이터셋이다.
+
+        Args:
+            directory (str): 데이터셋 디렉터리
+            rows (int): 전체 행 수
+            columns (dict): 컬럼 이름 → numpy dtype ('date' 는 datetime64[ns])
+        """
+        self.directory = directory
+        self.rows = rows
+        self.columns = dict(columns)
+        os.makedirs(directory, exist_ok=True)
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(os.path.join(directory, FRAME_META))
+        self.arrays = {
+            name: np.lib.format.open_memmap(os.path.join(directory, f'{name}.npy'), mode='w+',
+                                            dtype=np.dtype(dtype), shape=(rows,))
+            for name, dtype in self.columns.items()
+        }
+
+    def write(self, offset, data):
+        """offset 행부터 컬럼 배열 기록 (정수 컬럼에 실수를 쓰면 반올림)"""
+        for name, values in data.items():
+            target = self.arrays[name]
+            if target.dtype.kind in 'iu' and np.asarray(values).dtype.kind == 'f':
+                values = np.rint(values)
+            target[offset:offset + len(values)] = values
+
+    def close(self, **attrs):
+        """파일을 닫고 meta.json 기록 (attrs 는 메타에 함께 저장)"""
+        for array in self.arrays.values():
+            array.flush()
+        self.arrays = {}
+        meta = {'version': FRAME_FORMAT_VERSION, 'rows': self.rows,
+                'columns': {name: np.dtype(dtype).str for name, dtype in self.columns.items()}}
+        meta.update(attrs)
+        temp_path = os.path.join(self.directory, f'{FRAME_META}.tmp')
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, os.path.join(self.directory, FRAME_META))
+
+
+def save_frame(df, directory, **attrs):
+    """DataFrame 을 바이너리 데이터셋으로 저장"""
+    columns = {name: ('datetime64[ns]' if name == 'date' else df[name].to_numpy().dtype)
+               for name in df.columns}
+    writer = FrameWriter(directory, len(df), columns)
+    writer.write(0, {name: df[name].to_numpy(dtype=dtype) for name, dtype in columns.items()})
+    writer.close(**attrs)
+
+
+def is_frame_dir(path):
+    return os.path.isfile(os.path.join(path, FRAME_META))
+
+
+def read_frame_meta(directory):
+    with open(os.path.join(directory, FRAME_META), encoding='utf-8') as f:
+        return json.load(f)
+
+
+def load_frame(directory, mmap=True):
+    """
+    바이너리 데이터셋 로드
+
+    Args:
+        mmap (bool): 파일을 메모리 맵으로 열어 필요한 부분만 읽음 (복사 없음, 읽기 전용)
+
+    Returns:
+        DataFrame: 저장한 컬럼 그대로 (load_data 결과와 같은 형식)
+    """
+    meta = read_frame_meta(directory)
+    if meta.get('version') != FRAME_FORMAT_VERSION:
+        raise ValueError(f"지원하지 않는 데이터셋 형식 버전: {meta.get('version')} ({directory})")
+    data = {name: np.load(os.path.join(directory, f'{name}.npy'), mmap_mode='r' if mmap else None)
+            for name in meta['columns']}
+    return pd.DataFrame(data, copy=False)
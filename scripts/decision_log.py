@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+판단 기록 (레벨별 구조화 로그)
+분할 엔진의 봉별 판단과 계좌별 체결을 이벤트로 남긴다. 메시지는 형식 문자열(또는 함수)과
+인자로 받아 실제로 출력하거나 조회할 때만 문자열로 만들고, 최근 이벤트는 크기 제한
+링 버퍼에, 감사용 기록은 JSON lines 파일에 남긴다.
+
+레벨:
+    DEBUG    계좌별 매수/매도/청산
+    INFO     봉별 판단 (국면, 매수 여부, 매수 기준가, 매도 확인)
+    WARNING  판단할 수 없는 상황 (예: 빈 계좌 없음)
+    OFF      기록하지 않음 (기본)
+
+엔진은 enabled() 로 먼저 확인하고 이벤트를 만들므로, 꺼져 있으면 인자도 만들지 않는다.
+콘솔 출력(verbose)은 레벨과 관계없이 모든 이벤트를 출력한다.
+환경 변수로 켠다:
+    SOXL_LOG_LEVEL=info          링 버퍼 / 감사 기록 레벨 (debug, info, warning, off)
+    SOXL_LOG_JSONL=audit.jsonl   JSON lines 감사 기록 경로
+    SOXL_LOG_RING=1000           링 버퍼 크기 (0 이면 보관하지 않음)
+"""
+
+import json
+import os
+import time
+from collections import deque
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+OFF = 100
+
+LEVELS = {'debug': DEBUG, 'info': INFO, 'warning': WARNING, 'off': OFF}
+LEVEL_NAMES = {value: name.upper() for name, value in LEVELS.items()}
+
+ENV_LEVEL = 'SOXL_LOG_LEVEL'
+ENV_JSONL = 'SOXL_LOG_JSONL'
+ENV_RING = 'SOXL_LOG_RING'
+
+DEFAULT_RING = 1000
+
+
+def parse_level(name):
+    """레벨 이름(debug, info, warning, off) 또는 숫자 → 레벨 값"""
+    if isinstance(name, int):
+        return name
+    try:
+        return LEVELS[str(name).strip().lower()]
+    except KeyError:
+        raise ValueError(f"알 수 없는 로그 레벨: {name!r} (가능: {', '.join(LEVELS)})") from None
+
+
+def _format(message, args):
+    """메시지 문자열 생성 (함수면 인자로 호출, 아니면 str.format)"""
+    if callable(message):
+        return message(*args)
+    return message.format(*args) if args else message
+
+
+class DecisionLog:
+    """레벨별 판단 기록 (콘솔, 링 버퍼, JSON lines)"""
+
+    def __init__(self, level=OFF, console=False, ring_size=DEFAULT_RING, path=None):
+        """
+        Args:
+            level (int | str): 링 버퍼 / 감사 기록 레벨
+            console (bool): 모든 이벤트를 표준 출력으로 출력 (verbose)
+            ring_size (int): 최근 이벤트 보관 개수 (0 이면 보관하지 않음)
+            path (str): JSON lines 감사 기록 경로 (None 이면 기록하지 않음)
+        """
+        self.level = level
+        self.console = console
+        self.ring = deque(maxlen=ring_size) if ring_size else None
+        self.path = path
+        self.stream = None
+
+    @property
+    def level(self):
+        return self._level
+
+    @level.setter
+    def level(self, value):
+        self._level = parse_level(value)
+
+    def enabled(self, level):
+        """이 레벨의 이벤트를 어디에든 남기는지"""
+        return self.console or level >= self.level
+
+    def log(self, level, event, message, *args, **fields):
+        """
+        이벤트 기록
+
+        Args:
+            level (int): 이벤트 레벨
+            event (str): 이벤트 종류 (예: 'bar', 'buy', 'sell', 'exit')
+            message (str | callable): 형식 문자열 또는 args 로 문자열을 만드는 함수
+            *args: 메시지 인자 (출력하거나 조회할 때만 사용)
+            **fields: JSON lines 에 남길 값
+        """
+        if self.console:
+            print(_format(message, args))
+        if level < self.level:
+            return
+        if self.ring is not None:
+            self.ring.append((level, event, message, args, fields))
+        if self.path:
+            self._write(level, event, fields)
+
+    def debug(self, event, message, *args, **fields):
+        self.log(DEBUG, event, message, *args, **fields)
+
+    def info(self, event, message, *args, **fields):
+        self.log(INFO, event, message, *args, **fields)
+
+    def warning(self, event, message, *args, **fields):
+        self.log(WARNING, event, message, *args, **fields)
+
+    def _write(self, level, event, fields):
+        if self.stream is None:
+            # 줄 단위 버퍼: 여러 프로세스가 같은 파일에 덧붙여도 줄이 섞이지 않는다
+            self.stream = open(self.path, 'a', encoding='utf-8', buffering=1)
+        record = {'level': LEVEL_NAMES.get(level, level), 'event': event,
+                  'ts': round(time.time(), 6), 'pid': os.getpid()}
+        record.update(fields)
+        self.stream.write(json.dumps(record, ensure_ascii=False, default=str) + '\n')
+
+    def recent(self, n=None, level=DEBUG):
+        """
+        링 버퍼의 최근 이벤트
+
+        Args:
+            n (int): 최근 n 개 (None 이면 전부)
+            level (int | str): 이 레벨 이상만
+
+        Returns:
+            list[dict]: level, event, message 와 이벤트 값
+        """
+        if self.ring is None:
+            return []
+        level = parse_level(level)
+        records = [r for r in self.ring if r[0] >= level]
+        if n is not None:
+            records = records[-n:] if n > 0 else []
+        return [dict(fields, level=LEVEL_NAMES.get(lv, lv), event=event, message=_format(message, args))
+                for lv, event, message, args, fields in records]
+
+    def close(self):
+        """감사 기록 파일 닫기 (다음 이벤트에서 다시 연다)"""
+        if self.stream is not None:
+            self.stream.close()
+            self.stream = None
+
+
+def from_env(console=False):
+    """환경 변수(SOXL_LOG_*)로 판단 기록 생성 (감사 기록 경로만 주면 INFO 레벨)"""
+    path = os.environ.get(ENV_JSONL) or None
+    level = os.environ.get(ENV_LEVEL) or ('info' if path else 'off')
+    return DecisionLog(level=level, console=console,
+                       ring_size=int(os.environ.get(ENV_RING, DEFAULT_RING)), path=path)
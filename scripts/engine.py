@@ -0,0 +1,874 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+통합 전략 엔진
+가격 데이터 로드, 지표 캐시, 계좌 장부, 거래 기록, 성과 지표를 한 곳에서 제공하고
+매매 규칙은 전략 플러그인(strategies.py)으로 붙인다.
+
+    SignalEngine: 봉별 매수/매도 신호를 따르는 단일 포지션 전략 (MA 돌파, MA20/MA60 추세 확인)
+    LadderEngine: 계좌를 나눠 등차수열로 매수하는 분할 전략 (기본 20분할, position_size 로 분할 수 지정)
+
+기존 시뮬레이터 클래스 4종은 이 엔진 위의 얇은 호환 래퍼이므로,
+엔진 쪽 최적화는 모든 전략에 한 번에 적용된다.
+"""
+
+import importlib
+from collections.abc import Mapping, MutableMapping
+
+import numpy as np
+import pandas as pd
+
+import decision_log
+from dataset import COMPACT_SIGNAL, TradingCalendar, float_dtype, is_compact
+from decision_log import DEBUG, INFO, WARNING
+from exit_engine import EXIT_REASONS, ExitBook
+from instrument import count, timed
+
+# investing.com 내려받기 CSV 컬럼
+PRICE_COLUMNS = ['date', 'close', 'open', 'high', 'low', 'volume', 'change_pct']
+
+# 전략 이름 → (모듈, 클래스)
+STRATEGIES = {
+    'ma_cross': ('strategies', 'MACrossStrategy'),
+    'trend_filter': ('strategies', 'TrendFilterStrategy'),
+    'ladder': ('strategies', 'LadderStrategy'),
+    'rules': ('strategies', 'RuleStrategy'),
+}
+
+# 체결가 대비 목표가/손절가 배수와 계좌 기록에 남기는 비율
+TARGET_MULTIPLIER = 1.05
+STOP_MULTIPLIER = 0.97
+TARGET_PROFIT_RATE = 0.05
+STOP_LOSS_RATE = 0.03
+
+# 계좌 기록 필드 (기존 accounts dict 와 같은 순서)
+ACCOUNT_FIELDS = ('cash', 'shares', 'avg_price', 'status', 'buy_price', 'target_profit_rate',
+                  'stop_loss_rate', 'target_price', 'stop_loss_price')
+_NUMERIC_FIELDS = tuple(f for f in ACCOUNT_FIELDS if f != 'status')
+
+# 차트에 그리는 이동평균선 (창 → 이름, 색, 굵기)
+MA_STYLES = {60: ('60일 이동평균', 'red', 2), 20: ('20일 이동평균', 'orange', 1)}
+
+
+def get_strategy_class(name):
+    """전략 이름으로 클래스 반환"""
+    try:
+        module_name, class_name = STRATEGIES[name]
+    except KeyError:
+        raise ValueError(f"알 수 없는 전략: {name!r} (가능: {', '.join(STRATEGIES)})")
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def create_engine(strategy, **kwargs):
+    """
+    전략에 맞는 엔진 생성
+
+    Args:
+        strategy (str | Strategy): 전략 이름 또는 전략 객체
+        **kwargs: 엔진 생성 인자 (initial_capital, position_size, exit_order)
+    """
+    if isinstance(strategy, str):
+        strategy = get_strategy_class(strategy)()
+    engine_class = LadderEngine if strategy.kind == 'ladder' else SignalEngine
+    return engine_class(strategy, **kwargs)
+
+
+# ---------------------------------------------------------------------------
+# 데이터 / 지표
+# ---------------------------------------------------------------------------
+
+def read_price_csv(file_path):
+    """investing.com 형식 CSV 로드 (숫자 컬럼 정리, 날짜 오름차순)"""
+    df = pd.read_csv(file_path, encoding='utf-8')
+    df.columns = PRICE_COLUMNS
+    df['date'] = pd.to_datetime(df['date'])
+
+    # 숫자 컬럼 정리
+    for col in ['close', 'open', 'high', 'low', 'change_pct']:
+        df[col] = pd.to_numeric(df[col].astype(str).str.replace(',', '').str.replace('%', ''), errors='coerce')
+    df['volume'] = df['volume'].astype(str).str.replace('M', '').astype(float) * 1000000
+
+    # 이동평균은 날짜순 정렬 후 계산해야 미래 가격이 섞이지 않는다
+    return df.sort_values('date').reset_index(drop=True)
+
+
+class IndicatorCache:
+    """가격 데이터의 컬럼 배열과 이동평균 캐시 (같은 창은 한 번만 계산)"""
+
+    def __init__(self, df):
+        self.df = df
+        self._arrays = {}
+
+    def column(self, name):
+        """컬럼을 실수 배열로 (한 번만 변환, 압축 모드 float32 는 그대로)"""
+        if name not in self._arrays:
+            values = self.df[name]
+            self._arrays[name] = values.to_numpy(dtype=float_dtype(values))
+        return self._arrays[name]
+
+    def sma(self, window):
+        """window 봉 단순 이동평균 (데이터에 MA 컬럼이 있으면 그대로 사용)"""
+        name = f'MA{window}'
+        if name not in self._arrays:
+            if name in self.df.columns:
+                self._arrays[name] = self.column(name)
+            else:
+                close = self.df['close']
+                self._arrays[name] = close.rolling(window=window).mean().to_numpy(dtype=float_dtype(close))
+        return self._arrays[name]
+
+    def attach(self, windows):
+        """이동평균 컬럼(MA20, MA60 ...)을 데이터에 추가"""
+        for window in windows:
+            self.df[f'MA{window}'] = self.sma(window)
+        return self.df
+
+
+# ---------------------------------------------------------------------------
+# 계좌 장부 / 거래 기록
+# ---------------------------------------------------------------------------
+
+class AccountBook:
+    """계좌 장부 (계좌 번호 순서의 컬럼 배열 + 목표가/손절가 청산 장부)"""
+
+    def __init__(self, n_accounts, cash_per_account, exit_order='olhc'):
+        self.filled = np.zeros(n_accounts, dtype=bool)
+        self.columns = {name: np.zeros(n_accounts, dtype=np.float64) for name in _NUMERIC_FIELDS}
+        self.columns['cash'][:] = cash_per_account
+        self.columns['target_profit_rate'][:] = TARGET_PROFIT_RATE
+        self.columns['stop_loss_rate'][:] = STOP_LOSS_RATE
+        self.exit_book = ExitBook(n_accounts, exit_order)
+
+    def __len__(self):
+        return len(self.filled)
+
+    def empty_indices(self):
+        return np.flatnonzero(~self.filled)
+
+    def filled_indices(self):
+        return np.flatnonzero(self.filled)
+
+    def buy(self, indices, prices, bar_index):
+        """
+        계좌 매수 (계좌 현금 전액, 여러 계좌 한 번에)
+
+        Returns:
+            (np.ndarray, np.ndarray): 계좌별 매수 수량, 매수 금액
+        """
+        columns = self.columns
+        amounts = columns['cash'][indices]
+        shares = amounts / prices
+        columns['shares'][indices] = shares
+        columns['avg_price'][indices] = prices
+        columns['buy_price'][indices] = prices
+        columns['target_price'][indices] = prices * TARGET_MULTIPLIER
+        columns['stop_loss_price'][indices] = prices * STOP_MULTIPLIER
+        self.filled[indices] = True
+        self.exit_book.arm(indices, columns['target_price'][indices],
+                           columns['stop_loss_price'][indices], bar_index)
+        return shares, amounts
+
+    def sell(self, indices, prices):
+        """
+        계좌 전량 매도
+
+        Returns:
+            (np.ndarray, np.ndarray): 계좌별 매도 수량, 매도 금액
+        """
+        columns = self.columns
+        shares = columns['shares'][indices]
+        amounts = shares * prices
+        columns['cash'][indices] = amounts
+        columns['shares'][indices] = 0
+        columns['avg_price'][indices] = 0
+        self.filled[indices] = False
+        self.exit_book.disarm(indices)
+        return shares, amounts
+
+    def total_value(self, close_price):
+        """계좌 번호 순서로 더한 총 평가액 (순차 누적이라 계좌별 dict 를 더하던 결과와 같다)"""
+        values = np.where(self.filled, self.columns['shares'] * close_price, self.columns['cash'])
+        return float(np.add.accumulate(values)[-1]) if len(values) else 0
+
+    def records(self):
+        """계좌 번호 → dict 호환 계좌 기록 보기"""
+        return AccountRecords(self)
+
+    def load(self, records):
+        """계좌 번호 → 기록 dict 로 장부 교체 (계좌 수가 다르면 청산 장부도 새로 만든다)"""
+        numbers = sorted(records)
+        if len(numbers) != len(self):
+            self.__init__(len(numbers), 0.0, self.exit_book.order)
+        for index, number in enumerate(numbers):
+            record = records[number]
+            self.filled[index] = record.get('status', 'empty') == 'filled'
+            for name in _NUMERIC_FIELDS:
+                if name in record:
+                    self.columns[name][index] = record[name]
+
+
+class AccountRecord(MutableMapping):
+    """계좌 하나의 dict 호환 보기 (값은 장부 배열에 바로 읽고 쓴다)"""
+
+    __slots__ = ('book', 'index')
+
+    def __init__(self, book, index):
+        self.book = book
+        self.index = index
+
+    def __getitem__(self, key):
+        if key == 'status':
+            return 'filled' if self.book.filled[self.index] else 'empty'
+        return self.book.columns[key][self.index].item()
+
+    def __setitem__(self, key, value):
+        if key == 'status':
+            self.book.filled[self.index] = value == 'filled'
+        elif key in self.book.columns:
+            self.book.columns[key][self.index] = value
+        else:
+            raise KeyError(key)
+
+    def __delitem__(self, key):
+        raise TypeError("계좌 기록의 필드는 삭제할 수 없습니다.")
+
+    def __iter__(self):
+        return iter(ACCOUNT_FIELDS)
+
+    def __len__(self):
+        return len(ACCOUNT_FIELDS)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+class AccountRecords(Mapping):
+    """계좌 번호(1부터) → AccountRecord"""
+
+    def __init__(self, book):
+        self.book = book
+
+    def __getitem__(self, number):
+        if not 1 <= number <= len(self.book):
+            raise KeyError(number)
+        return AccountRecord(self.book, number - 1)
+
+    def __iter__(self):
+        return iter(range(1, len(self.book) + 1))
+
+    def __len__(self):
+        return len(self.book)
+
+
+class Journal:
+    """거래 기록, 봉별 자산 기록(신호 전략), 일별 결과(계좌 전략)"""
+
+    def __init__(self):
+        self.trades = []
+        self.dates = []
+        self.values = []
+        self.daily_results = []
+
+    def frames(self):
+        """저장용 DataFrame (trades, daily_results)"""
+        if self.daily_results or not self.values:
+            daily = pd.DataFrame(self.daily_results)
+        else:
+            daily = pd.DataFrame({'date': self.dates, 'portfolio_value': self.values})
+        return {'trades': pd.DataFrame(self.trades), 'daily_results': daily}
+
+
+def performance(initial_capital, values, trades, cash, shares):
+    """
+    자산 곡선과 거래 기록의 성과 지표
+
+    Returns:
+        dict: 최종 가치, 총 수익률, 최대 낙폭, 거래 통계
+    """
+    if not len(values):
+        return {}
+    curve = np.concatenate(([initial_capital], np.asarray(values, dtype=np.float64)))
+    peak = np.fmax.accumulate(curve)
+    with np.errstate(invalid='ignore'):
+        max_drawdown = max(float(np.nanmax((peak - curve) / peak * 100)), 0)
+    final_value = values[-1]
+    buy_trades = sum(1 for t in trades if t['action'] == 'BUY')
+
+    return {
+        'initial_capital': initial_capital,
+        'final_value': final_value,
+        'total_return_pct': (final_value - initial_capital) / initial_capital * 100,
+        'max_drawdown_pct': max_drawdown,
+        'total_trades': len(trades),
+        'buy_trades': buy_trades,
+        'sell_trades': len(trades) - buy_trades,
+        'final_cash': cash,
+        'final_shares': shares
+    }
+
+
+# ---------------------------------------------------------------------------
+# 엔진
+# ---------------------------------------------------------------------------
+
+class Engine:
+    # 결과에 영향을 주는 모듈 (range_runner.simulator_identity 가 소스 해시에 포함)
+    source_modules = ('engine', 'strategies', 'rules', 'exit_engine', 'dataset', 'decision_log')
+
+    def __init__(self, strategy, initial_capital, position_size):
+        """
+        통합 엔진 공통 부분
+
+        Args:
+            strategy (Strategy): 전략 플러그인
+            initial_capital (int): 초기 자본
+            position_size (int): 분할 수 (1회 매수 금액 = 초기 자본 / 분할 수)
+        """
+        self.strategy = strategy
+        self.initial_capital = initial_capital
+        self.position_size = position_size
+        self.cash_per_trade = initial_capital / position_size
+        self.journal = Journal()
+
+    @property
+    def trades(self):
+        return self.journal.trades
+
+    @trades.setter
+    def trades(self, value):
+        self.journal.trades = value
+
+    def read_data(self, file_path):
+        """가격 데이터 로드 후 전략에 필요한 이동평균 추가"""
+        df = IndicatorCache(read_price_csv(file_path)).attach(self.strategy.indicators)
+        count('rows_parsed', len(df))
+        return df
+
+
+def execute_signals(dates, close, signal, cash, total_shares, cash_per_trade):
+    """
+    신호 매매 실행 (신호가 있는 봉만 순회하고 자산 곡선은 체결 사이 구간을 한 번에 채운다)
+
+    Args:
+        cash, total_shares: 시작 시점 현금/보유 수량
+
+    Returns:
+        (list, np.ndarray, float, float, float): 거래 기록, 봉별 포트폴리오 가치,
+        종료 시점 현금, 보유 수량, 마지막 매수 수량(없으면 None)
+    """
+    n = len(close)
+    cash_at = np.empty(n, dtype=np.float64)
+    shares_at = np.empty(n, dtype=np.float64)
+    trades = []
+    last_buy = None
+    last = 0
+    for i in np.flatnonzero(signal).tolist():
+        # 체결 전 상태가 이 봉까지의 평가 기준
+        cash_at[last:i + 1] = cash
+        shares_at[last:i + 1] = total_shares
+        last = i + 1
+
+        price = close[i].item()
+        if signal[i] == 1 and cash >= cash_per_trade:
+            shares_to_buy = cash_per_trade / price
+            last_buy = shares_to_buy
+            total_shares += shares_to_buy
+            cash -= cash_per_trade
+            trades.append({
+                'date': pd.Timestamp(dates[i]),
+                'action': 'BUY',
+                'price': price,
+                'shares': shares_to_buy,
+                'amount': cash_per_trade,
+                'cash_remaining': cash,
+                'total_shares': total_shares
+            })
+        elif signal[i] == -1 and total_shares > 0:
+            sell_amount = total_shares * price
+            cash += sell_amount
+            trades.append({
+                'date': pd.Timestamp(dates[i]),
+                'action': 'SELL',
+                'price': price,
+                'shares': total_shares,
+                'amount': sell_amount,
+                'cash_remaining': cash,
+                'total_shares': 0
+            })
+            total_shares = 0
+    cash_at[last:] = cash
+    shares_at[last:] = total_shares
+    return trades, cash_at + shares_at * close, cash, total_shares, last_buy
+
+
+class SignalEngine(Engine):
+    """봉별 매수/매도 신호를 따르는 단일 포지션 엔진"""
+
+    # 출력 문구 (호환 래퍼에서 재정의)
+    title = 'SOXL 트레이딩 시뮬레이션 결과'
+    chart_title = 'SOXL 가격 및 매매 신호'
+    start_message = '트레이딩 시뮬레이션 시작...'
+    result_marks = ('💰 ', '💸 ')  # 수익/손실 줄 머리표
+
+    def __init__(self, strategy, initial_capital=20000, position_size=20):
+        super().__init__(strategy, initial_capital, position_size)
+        self.cash = initial_capital
+        self.shares = 0
+        self.total_shares = 0
+        self.position = 0  # 현재 포지션 상태 (0: 없음, 1: 보유)
+
+    @property
+    def portfolio_value(self):
+        return self.journal.values
+
+    @portfolio_value.setter
+    def portfolio_value(self, value):
+        self.journal.values = value
+
+    @property
+    def dates(self):
+        return self.journal.dates
+
+    @dates.setter
+    def dates(self, value):
+        self.journal.dates = value
+
+    @timed('load_data')
+    def load_data(self, file_path):
+        """데이터 로드 및 전처리"""
+        print("데이터 로딩 중...")
+        df = self.read_data(file_path)
+        print(f"데이터 로딩 완료: {len(df)}개 행")
+        print(f"기간: {df['date'].min().strftime('%Y-%m-%d')} ~ {df['date'].max().strftime('%Y-%m-%d')}")
+        return df
+
+    @timed('calculate_signals')
+    def calculate_signals(self, df, start=60, prev_signal=0, prev_position=0):
+        """
+        매수/매도 신호 계산
+
+        Args:
+            df (DataFrame): 이동평균선이 계산된 데이터
+            start (int): 신호 계산 시작 위치 (기본: 60일 이평선 계산 후부터)
+            prev_signal, prev_position: 이어서 계산할 때 start 직전 봉의 신호/포지션
+        """
+        signal, position = self.strategy.signals(IndicatorCache(df), start, prev_signal, prev_position)
+        if is_compact(df):
+            signal, position = signal.astype(COMPACT_SIGNAL), position.astype(COMPACT_SIGNAL)
+        df['signal'] = signal  # 0: 보유, 1: 매수, -1: 매도
+        df['position'] = position  # 현재 포지션 크기
+        count('signal_bars', max(len(df) - start, 0))
+        return df
+
+    @timed('execute_trading')
+    def execute_trading(self, df):
+        """트레이딩 실행"""
+        print(self.start_message)
+        trades, values, self.cash, self.total_shares, last_buy = execute_signals(
+            df['date'].to_numpy(), df['close'].to_numpy(dtype=np.float64), df['signal'].to_numpy(),
+            self.cash, self.total_shares, self.cash_per_trade)
+        if last_buy is not None:
+            self.shares = last_buy
+
+        self.trades.extend(trades)
+        self.portfolio_value.extend(values.tolist())
+        self.dates.extend(df['date'].tolist())
+        count('bars', len(df))
+        count('fills', len(trades))
+
+        print(f"트레이딩 완료: {len(self.trades)}회 거래")
+        return self.trades
+
+    @timed('calculate_performance')
+    def calculate_performance(self):
+        """성과 계산"""
+        return performance(self.initial_capital, self.portfolio_value, self.trades,
+                           self.cash, self.total_shares)
+
+    def print_results(self):
+        """결과 출력"""
+        performance = self.calculate_performance()
+
+        print("\n" + "="*60)
+        print(self.title)
+        print("="*60)
+        print(f"초기 자본: ${performance['initial_capital']:,.2f}")
+        print(f"최종 가치: ${performance['final_value']:,.2f}")
+        print(f"총 수익률: {performance['total_return_pct']:.2f}%")
+        print(f"최대 낙폭: {performance['max_drawdown_pct']:.2f}%")
+        print(f"총 거래 횟수: {performance['total_trades']}회")
+        print(f"매수 거래: {performance['buy_trades']}회")
+        print(f"매도 거래: {performance['sell_trades']}회")
+        print(f"현금 잔고: ${performance['final_cash']:,.2f}")
+        print(f"보유 주식: {performance['final_shares']:.2f}주")
+
+        # 수익/손실
+        if performance['total_return_pct'] > 0:
+            print(f"{self.result_marks[0]}수익: ${performance['final_value'] - performance['initial_capital']:,.2f}")
+        else:
+            print(f"{self.result_marks[1]}손실: ${performance['initial_capital'] - performance['final_value']:,.2f}")
+
+    @timed('plot_results')
+    def plot_results(self, df):
+        """결과 시각화"""
+        import plotly.graph_objects as go
+        from plotly.subplots import make_subplots
+
+        fig = make_subplots(
+            rows=2, cols=1,
+            subplot_titles=(self.chart_title, '포트폴리오 가치'),
+            vertical_spacing=0.1,
+            row_heights=[0.6, 0.4]
+        )
+
+        # 가격 차트와 이동평균선
+        fig.add_trace(go.Scatter(x=df['date'], y=df['close'], mode='lines', name='SOXL 종가',
+                                 line=dict(color='blue', width=2)), row=1, col=1)
+        for window in self.strategy.indicators:
+            label, color, width = MA_STYLES.get(window, (f'{window}일 이동평균', 'gray', 1))
+            fig.add_trace(go.Scatter(x=df['date'], y=df[f'MA{window}'], mode='lines', name=label,
+                                     line=dict(color=color, width=width)), row=1, col=1)
+
+        # 매수/매도 신호
+        for value, label, color, symbol in ((1, '매수 신호', 'green', 'triangle-up'),
+                                            (-1, '매도 신호', 'red', 'triangle-down')):
+            signals = df[df['signal'] == value]
+            if not signals.empty:
+                fig.add_trace(go.Scatter(x=signals['date'], y=signals['close'], mode='markers', name=label,
+                                         marker=dict(color=color, size=10, symbol=symbol)), row=1, col=1)
+
+        # 포트폴리오 가치와 초기 자본선
+        fig.add_trace(go.Scatter(x=self.dates, y=self.portfolio_value, mode='lines', name='포트폴리오 가치',
+                                 line=dict(color='purple', width=2)), row=2, col=1)
+        fig.add_hline(y=self.initial_capital, line_dash="dash", line_color="gray",
+                      annotation_text="초기 자본", row=2, col=1)
+
+        fig.update_layout(title=self.title, height=800, showlegend=True)
+        fig.update_xaxes(title_text="날짜", row=1, col=1)
+        fig.update_xaxes(title_text="날짜", row=2, col=1)
+        fig.update_yaxes(title_text="가격 ($)", row=1, col=1)
+        fig.update_yaxes(title_text="포트폴리오 가치 ($)", row=2, col=1)
+
+        fig.show()
+
+
+def _trace_text(strategy, bars, plan, i):
+    """봉 i 의 판단 과정 (판단 기록 메시지, 출력하거나 조회할 때만 만든다)"""
+    return '\n'.join(strategy.trace(bars, plan, i))
+
+
+class LadderEngine(Engine):
+    """계좌를 나눠 등차수열로 매수하는 분할 엔진"""
+
+    # save_results 파일 이름 접미어 (호환 래퍼에서 재정의)
+    output_suffix = ''
+    # 봉별 판단 과정 콘솔 출력 (판단 기록의 console)
+    verbose = False
+
+    def __init__(self, strategy, initial_capital=10000, position_size=20, exit_order='olhc'):
+        super().__init__(strategy, initial_capital, position_size)
+        # 계좌 장부: 분할 수만큼의 계좌 (exit_order: 'ohlc' 또는 비관적 'olhc')
+        self.book = AccountBook(position_size, self.cash_per_trade, exit_order)
+        self.bar_index = -1
+        # 판단 기록 (SOXL_LOG_* 환경 변수로 링 버퍼 / 감사 기록 레벨 설정)
+        self.log = decision_log.from_env()
+
+    @property
+    def accounts(self):
+        """계좌 번호 → dict 호환 계좌 기록"""
+        return self.book.records()
+
+    @accounts.setter
+    def accounts(self, records):
+        self.book.load(records)
+
+    @property
+    def exit_book(self):
+        return self.book.exit_book
+
+    @exit_book.setter
+    def exit_book(self, value):
+        self.book.exit_book = value
+
+    @property
+    def daily_results(self):
+        return self.journal.daily_results
+
+    @daily_results.setter
+    def daily_results(self, value):
+        self.journal.daily_results = value
+
+    @timed('load_data')
+    def load_data(self, file_path):
+        """데이터 로드"""
+        return self.read_data(file_path)
+
+    def calculate_step(self, prev_close):
+        """등차 계산"""
+        return self.strategy.step(prev_close)
+
+    def get_empty_accounts(self):
+        """빈 계좌 번호 목록"""
+        count('accounts_scanned', len(self.book))
+        return (self.book.empty_indices() + 1).tolist()
+
+    def get_filled_accounts(self):
+        """매수된 계좌 번호 목록"""
+        count('accounts_scanned', len(self.book))
+        return (self.book.filled_indices() + 1).tolist()
+
+    def buy_account(self, account_num, price, date):
+        """계좌 매수"""
+        count('orders')
+        if self.book.filled[account_num - 1]:
+            return False
+        self._record_buys(np.array([account_num - 1]), np.array([price], dtype=np.float64), date)
+        return True
+
+    def sell_account(self, account_num, price, date):
+        """계좌 매도"""
+        count('orders')
+        if not self.book.filled[account_num - 1]:
+            return False
+        self._record_sells(np.array([account_num - 1]), np.array([price], dtype=np.float64), date)
+        return True
+
+    def _record_buys(self, indices, prices, date):
+        shares, amounts = self.book.buy(indices, prices, self.bar_index)
+        self.trades.extend({'date': date, 'account': index + 1, 'action': 'BUY',
+                            'price': price, 'shares': share, 'amount': amount}
+                           for index, price, share, amount
+                           in zip(indices.tolist(), prices.tolist(), shares.tolist(), amounts.tolist()))
+        count('fills', len(indices))
+
+    def _record_sells(self, indices, prices, date, reasons=None):
+        shares, amounts = self.book.sell(indices, prices)
+        records = [{'date': date, 'account': index + 1, 'action': 'SELL',
+                    'price': price, 'shares': share, 'amount': amount}
+                   for index, price, share, amount
+                   in zip(indices.tolist(), prices.tolist(), shares.tolist(), amounts.tolist())]
+        if reasons is not None:
+            for record, reason in zip(records, reasons.tolist()):
+                record['reason'] = EXIT_REASONS[reason]
+        self.trades.extend(records)
+        count('fills', len(indices))
+        return records
+
+    @timed('execute_trading')
+    def execute_trading(self, df, start_date='2024-01-01', end_date='2024-01-31'):
+        """
+        트레이딩 실행
+
+        체결된 계좌가 없고 봉별 판단도 기록하지 않으면 다음 매수 봉까지 평가액이
+        현금 합계로 고정되므로, 그 사이 봉은 한 번에 기록하고 건너뛴다.
+
+        Args:
+            df (DataFrame): 시작일 이전 구간(이평선 워밍업)을 포함한 전체 데이터
+            start_date, end_date: 시뮬레이션 기간 (양 끝 포함)
+        """
+        start_date = pd.to_datetime(start_date)
+        end_date = pd.to_datetime(end_date)
+        print(f"{start_date.strftime('%Y-%m-%d')} ~ {end_date.strftime('%Y-%m-%d')} 트레이딩 시뮬레이션 시작...")
+
+        bars = self.window_bars(df, start_date, end_date)
+        plan = self.strategy.plan(bars)
+        valid, buy, step = plan['valid'], plan['buy'], plan['step']
+        buy_bars = np.flatnonzero(buy)
+        log = self.log
+        log.console = self.verbose
+        tracing = log.enabled(INFO)
+
+        i = 0
+        n = len(bars['date'])
+        while i < n:
+            if not tracing and not self.book.filled.any():
+                next_buy = buy_bars[np.searchsorted(buy_bars, i):]
+                stop = int(next_buy[0]) if len(next_buy) else n
+                self._record_idle(bars, np.flatnonzero(valid[i:stop]) + i)
+                self.bar_index += stop - i
+                i = stop
+                if i >= n:
+                    break
+
+            self.bar_index += 1
+            if valid[i]:
+                date = pd.Timestamp(bars['date'][i])
+                open_price = bars['open'][i].item()
+                if tracing:
+                    log.info('bar', _trace_text, self.strategy, bars, plan, i,
+                             date=date, regime=int(plan['regime'][i]) if 'regime' in plan else None,
+                             buy=bool(buy[i]), open=open_price)
+                if buy[i]:
+                    self.execute_buy_sequence(open_price, step[i], date)
+                self.execute_sell_rule(open_price, date,
+                                       lambda accounts: self.strategy.sell_mask(bars, plan, i, accounts),
+                                       lambda C: self.strategy.describe_sell(bars, plan, i, C))
+
+                # 장중 목표가/손절가 청산
+                self.execute_exit_orders(open_price, bars['high'][i].item(), bars['low'][i].item(), date)
+                self.record_daily_result(date, bars['close'][i].item())
+            i += 1
+
+        count('bars', n)
+        log.close()
+        if self.verbose:
+            print()
+        print(f"시뮬레이션 완료: {len(self.trades)}회 거래")
+        return self.trades, self.daily_results
+
+    def window_bars(self, df, start_date, end_date):
+        """
+        기간 봉 배열 (전날 종가는 기간 직전 봉에서 가져온다)
+
+        Returns:
+            dict: date, open, high, low, close, prev_close 와 전략의 이동평균(MA<창>) 배열
+                  (prev_close 외에는 전체 배열의 복사 없는 슬라이스)
+        """
+        calendar = TradingCalendar.of(df)
+        first, last = calendar.locate(start_date, end_date)
+        window = slice(first, last)
+        cache = IndicatorCache(df)
+        closes = cache.column('close')
+        prev_close = closes[max(first - 1, 0):max(last - 1, 0)]
+        if first == 0 and last > 0:
+            # 데이터 첫 봉은 전날 종가가 없다
+            prev_close = np.concatenate((np.full(1, np.nan, dtype=closes.dtype), prev_close))
+        bars = {
+            'date': calendar.dates[window],
+            'open': cache.column('open')[window],
+            'high': cache.column('high')[window],
+            'low': cache.column('low')[window],
+            'close': closes[window],
+            'prev_close': prev_close,
+        }
+        for window_size in self.strategy.indicators:
+            bars[f'MA{window_size}'] = cache.sma(window_size)[window]
+        return bars
+
+    def _record_idle(self, bars, indices):
+        """체결된 계좌가 없는 봉들의 일별 결과를 한 번에 기록"""
+        if len(indices) == 0:
+            return
+        total_value = self.book.total_value(0.0)
+        total_return = (total_value - self.initial_capital) / self.initial_capital * 100
+        n_accounts = len(self.book)
+        self.daily_results.extend({
+            'date': pd.Timestamp(date),
+            'close_price': close,
+            'total_value': total_value,
+            'filled_accounts': 0,
+            'empty_accounts': n_accounts,
+            'total_return_pct': total_return
+        } for date, close in zip(bars['date'][indices], bars['close'][indices].tolist()))
+        count('accounts_scanned', n_accounts * len(indices))
+
+    def execute_buy_sequence(self, open_price, step, date):
+        """등차수열 매수 실행 (빈 계좌를 번호 순서로, 기준가에서 등차만큼 낮춰 가며)"""
+        empty = self.book.empty_indices()
+        count('accounts_scanned', len(self.book))
+        if len(empty) == 0:
+            if self.log.enabled(WARNING):
+                self.log.warning('buy_skipped', "    빈 계좌 없음", date=date)
+            return
+
+        base_price = open_price * self.strategy.buy_base_rate
+        if self.log.enabled(INFO):
+            self.log.info('buy_ladder', "    등차수열 매수: 기준가 ${:.2f}, 등차 ${:.1f}", base_price, step,
+                          date=date, base_price=base_price, step=float(step))
+
+        prices = base_price - (step * np.arange(len(empty)))
+        positive = prices > 0  # 가격이 양수일 때만 매수
+        count('orders', len(empty))
+        self._record_buys(empty[positive], prices[positive], date)
+        if self.log.enabled(DEBUG):
+            for index, price in zip(empty[positive].tolist(), prices[positive].tolist()):
+                self.log.debug('buy', "      {}번 계좌 매수: ${:.2f}", index + 1, price,
+                               date=date, account=index + 1, price=price)
+
+    def execute_sell_condition(self, open_price, threshold_rate, date):
+        """매도 조건 실행 (평균가가 시가보다 threshold_rate 이상 높은 계좌)"""
+        limit = open_price * (1 + threshold_rate)
+        self.execute_sell_rule(open_price, date, lambda accounts: accounts['avg_price'] > limit,
+                               lambda C: f"C={C:.2f} > D*{1+threshold_rate:.2f}={limit:.2f}")
+
+    def execute_sell_rule(self, open_price, date, rule, describe):
+        """
+        조건부 매도 실행 (조건이 성립하는 매수된 계좌를 시가 x 매도 비율에 매도)
+
+        Args:
+            rule: 계좌 컬럼 배열 dict → 계좌별 매도 여부 배열
+            describe: 계좌 평균가 → 출력용 조건 설명
+        """
+        count('accounts_scanned', len(self.book))
+        if not self.book.filled.any():
+            return
+
+        sell_price = open_price * self.strategy.sell_price_rate
+        if self.log.enabled(INFO):
+            self.log.info('sell_check', "    매도 조건 확인: 시가 ${:.2f}, 매도가 ${:.2f}", open_price, sell_price,
+                          date=date, open=open_price, sell_price=sell_price)
+
+        targets = np.flatnonzero(self.book.filled & rule(self.book.columns))
+        if len(targets) == 0:
+            return
+        count('orders', len(targets))
+        if self.log.enabled(DEBUG):
+            for index, C in zip(targets.tolist(), self.book.columns['avg_price'][targets].tolist()):
+                self.log.debug('sell', "      {}번 계좌 매도: {}", index + 1, describe(C),
+                               date=date, account=index + 1, avg_price=C, price=sell_price)
+        self._record_sells(targets, np.full(len(targets), sell_price), date)
+
+    def execute_exit_orders(self, open_price, high_price, low_price, date):
+        """목표가/손절가 도달 계좌 일괄 청산"""
+        indices, reasons, prices = self.exit_book.check(self.bar_index, open_price,
+                                                         high_price, low_price)
+        if len(indices) == 0:
+            return
+        count('orders', len(indices))
+        records = self._record_sells(indices, prices, date, reasons)
+        if self.log.enabled(DEBUG):
+            for trade in records:
+                self.log.debug('exit', "      {}번 계좌 {} 청산: ${:.2f}",
+                               trade['account'], trade['reason'], trade['price'],
+                               date=date, account=trade['account'], reason=trade['reason'],
+                               price=trade['price'])
+
+    def record_daily_result(self, date, close_price):
+        """일일 결과 기록"""
+        count('accounts_scanned', len(self.book))
+        total_value = self.book.total_value(close_price)
+        filled_count = int(self.book.filled.sum())
+        self.daily_results.append({
+            'date': date,
+            'close_price': close_price,
+            'total_value': total_value,
+            'filled_accounts': filled_count,
+            'empty_accounts': len(self.book) - filled_count,
+            'total_return_pct': (total_value - self.initial_capital) / self.initial_capital * 100
+        })
+
+    @timed('save_results')
+    def save_results(self):
+        """결과를 CSV 파일로 저장 (거래 기록, 일일 결과, 계좌별 최종 상태)"""
+        suffix = self.output_suffix
+        frames = self.journal.frames()
+        frames['trades'].to_csv(f'january_trades{suffix}.csv', index=False, encoding='utf-8-sig')
+        daily_df = frames['daily_results']
+        daily_df.to_csv(f'january_daily_results{suffix}.csv', index=False, encoding='utf-8-sig')
+
+        last_close = daily_df.iloc[-1]['close_price'] if len(daily_df) > 0 else 0
+        columns = self.book.columns
+        account_df = pd.DataFrame({
+            'account_number': np.arange(1, len(self.book) + 1),
+            'status': np.where(self.book.filled, 'filled', 'empty'),
+            'cash': columns['cash'],
+            'shares': columns['shares'],
+            'avg_price': columns['avg_price'],
+            'current_value': columns['cash'] + columns['shares'] * last_close,
+        })
+        account_df.to_csv(f'january_account_status{suffix}.csv', index=False, encoding='utf-8-sig')
+
+        print("결과 파일 저장 완료:")
+        print(f"- january_trades{suffix}.csv: 거래 기록")
+        print(f"- january_daily_results{suffix}.csv: 일일 결과")
+        print(f"- january_account_status{suffix}.csv: 계좌별 최종 상태")
@@ -0,0 +1,444 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+기준 엔진과 통합 엔진의 결과 동등성 검사
+같은 입력(무작위 생성 데이터와 실제 데이터 구간)으로 기준 루프(reference_engine.py)와
+통합 엔진 위의 시뮬레이터 클래스를 실행해
+신호, 거래 기록, 자산 곡선, 요약 지표를 허용 오차 안에서 비교하고 속도 향상을 함께 보고한다.
+
+생성 입력은 seed 로 재현되는 속성 기반 테스트 방식이다. 불일치가 나오면 종료일을 당겨 가며
+불일치가 처음 나타나는 가장 짧은 구간으로 줄여서 보고한다.
+
+compact 엔진은 같은 시뮬레이터를 압축 모드 데이터(dataset.compact_frame)로 실행하므로
+float32 정밀도에서 결과가 float64 경로와 얼마나 달라지는지 확인하는 데 쓴다.
+
+사용법:
+    python equivalence.py --cases 50 --data SOXL_2y.csv
+    python equivalence.py --engine compact --data SOXL_2y.csv
+"""
+
+import argparse
+import contextlib
+import importlib
+import io
+import time
+
+import numpy as np
+import pandas as pd
+
+from dataset import compact_frame
+from market_generator import REGIMES, MarketGenerator
+from range_runner import equity_curve, get_simulator_class, slice_with_warmup, summarize, warmup_bars
+from reference_engine import SIMULATORS
+
+# 엔진 이름 → (모듈, 함수). 함수는 (시뮬레이터 이름, df, 시작일, 종료일, 생성 인자)를 받아
+# signals, trades, dates, equity, metrics 를 담은 dict 를 반환한다
+ENGINES = {
+    'reference': ('reference_engine', 'run'),
+    'engine': ('equivalence', 'run_engine'),
+    'compact': ('equivalence', 'run_compact'),
+}
+
+REFERENCE_ENGINE = 'reference'
+# --engine 를 지정하지 않을 때 비교할 엔진 (compact 는 --engine compact 로 따로 실행)
+DEFAULT_ENGINES = ('engine',)
+
+# 기본 허용 오차 (상대, 절대)
+RTOL = 1e-9
+ATOL = 1e-9
+
+# 엔진별 기본 허용 오차 (--rtol/--atol 을 지정하지 않을 때)
+# compact 는 float32 가격으로 체결가와 자산 곡선이 유효 숫자 7자리 안에서 달라진다
+ENGINE_TOLERANCES = {
+    'compact': (1e-5, 1e-3),
+}
+
+
+def engine_tolerance(name, rtol=None, atol=None):
+    """엔진의 허용 오차 (지정한 값이 없으면 엔진별 기본값, 그 다음 RTOL/ATOL)"""
+    default_rtol, default_atol = ENGINE_TOLERANCES.get(name, (RTOL, ATOL))
+    return (default_rtol if rtol is None else rtol), (default_atol if atol is None else atol)
+
+
+def get_engine(name):
+    """엔진 이름으로 실행 함수 반환"""
+    try:
+        module_name, func_name = ENGINES[name]
+    except KeyError:
+        raise ValueError(f"알 수 없는 엔진: {name!r} (가능: {', '.join(ENGINES)})")
+    return getattr(importlib.import_module(module_name), func_name)
+
+
+def run_engine(simulator_name, df, start_date, end_date, sim_kwargs=None):
+    """통합 엔진 시뮬레이터 실행 (range_runner.run_range 와 같은 기간 처리, 신호 포함)"""
+    simulator = get_simulator_class(simulator_name)(**(sim_kwargs or {}))
+    data, offset = slice_with_warmup(df, start_date, end_date, warmup_bars(simulator.strategy))
+
+    signals = None
+    with contextlib.redirect_stdout(io.StringIO()):
+        if hasattr(simulator, 'accounts'):
+            simulator.execute_trading(data, start_date, end_date)
+        else:
+            data = simulator.calculate_signals(data)
+            period = data.iloc[offset:].reset_index(drop=True)
+            simulator.execute_trading(period)
+            signals = period[['signal', 'position']]
+
+    dates, values = equity_curve(simulator)
+    return {
+        'signals': signals,
+        'trades': pd.DataFrame(simulator.trades),
+        'dates': np.asarray(dates, dtype='datetime64[ns]'),
+        'equity': np.asarray(values, dtype=np.float64),
+        'metrics': summarize(simulator, start_date, end_date),
+    }
+
+
+def run_compact(simulator_name, df, start_date, end_date, sim_kwargs=None):
+    """압축 모드 데이터로 통합 엔진 시뮬레이터 실행"""
+    return run_engine(simulator_name, compact_frame(df), start_date, end_date, sim_kwargs)
+
+
+# ---------------------------------------------------------------------------
+# 입력 생성
+# ---------------------------------------------------------------------------
+
+def _prepare(df):
+    """가격을 CSV 와 같이 소수 둘째 자리로 맞추고 load_data 와 같은 방식으로 이평선 계산"""
+    df = df.copy()
+    for column in ('close', 'open', 'high', 'low'):
+        df[column] = df[column].round(2)
+    df['high'] = df[['high', 'open', 'close']].max(axis=1)
+    df['low'] = df[['low', 'open', 'close']].min(axis=1)
+    df['MA60'] = df['close'].rolling(window=60).mean()
+    df['MA20'] = df['close'].rolling(window=20).mean()
+    return df
+
+
+def generate_case(seed):
+    """
+    seed 하나로 재현되는 무작위 입력
+
+    국면 변동성, 레버리지, 가격 수준, 봉 수, 기간, 생성 인자를 무작위로 고르고
+    일부 입력에는 시가 갭과 가격이 변하지 않는 구간을 넣어 경계 조건을 자주 만든다.
+
+    Returns:
+        dict: label, df, start_date, end_date, kwargs_seed(시뮬레이터별 생성 인자를 고르는 seed)
+    """
+    rng = np.random.default_rng([seed, 0x45515549])
+    scale = rng.uniform(0.3, 3.0)
+    regimes = {name: dict(regime, volatility=regime['volatility'] * scale) for name, regime in REGIMES.items()}
+    n_bars = int(rng.integers(80, 400))
+    generator = MarketGenerator(n_bars, seed=seed, leverage=float(rng.choice([1.0, 2.0, 3.0])),
+                                initial_price=float(rng.uniform(2.0, 200.0)), regimes=regimes,
+                                moving_averages=())
+    df = generator.frame()
+
+    if rng.random() < 0.6:
+        # 시가 갭 (갭 조건으로 매매하는 규칙이 실제로 매매하도록 절반 이상의 입력에 넣는다)
+        gaps = rng.random(n_bars) < 0.2
+        df.loc[gaps, 'open'] *= rng.uniform(0.85, 1.15, gaps.sum())
+    if rng.random() < 0.3:
+        # 가격이 변하지 않는 구간 (이평선과 같은 값이 되는 경계 조건)
+        first = int(rng.integers(0, n_bars - 10))
+        last = min(n_bars, first + int(rng.integers(10, 80)))
+        for column in ('close', 'open', 'high', 'low'):
+            df.loc[first:last - 1, column] = df.loc[first, 'close']
+    df = _prepare(df)
+
+    start = int(rng.integers(0, n_bars - 5))
+    end = int(rng.integers(start, n_bars))
+    return {
+        'label': f'seed={seed}',
+        'df': df,
+        'start_date': df['date'].iloc[start],
+        'end_date': df['date'].iloc[end],
+        'kwargs_seed': seed,
+    }
+
+
+def random_kwargs(simulator_name, seed):
+    """시뮬레이터 생성 인자 무작위 선택"""
+    rng = np.random.default_rng([seed, sorted(SIMULATORS).index(simulator_name)])
+    kwargs = {'initial_capital': int(rng.choice([1000, 10000, 20000])),
+              'position_size': int(rng.choice([1, 5, 10, 20, 40]))}
+    if simulator_name.startswith('january') or simulator_name == 'rules':
+        kwargs['exit_order'] = str(rng.choice(['ohlc', 'olhc']))
+    if simulator_name == 'rules':
+        # 규칙 DSL 은 매매가 실제로 일어나는 outline 위주로, 갭 기준을 낮춰 매수/매도 봉을 늘린다
+        kwargs['rules'] = str(rng.choice(['outline', 'outline', 'january_v2']))
+        if kwargs['rules'] == 'outline':
+            kwargs['up_buy'] = float(rng.choice([0.01, 0.02, 0.05]))
+            kwargs['down_buy'] = float(rng.choice([0.01, 0.03, 0.07]))
+            kwargs['up_sell'] = float(rng.choice([0.01, 0.03, 0.09]))
+            kwargs['down_sell'] = float(rng.choice([0.01, 0.03, 0.06]))
+    return kwargs
+
+
+def historical_cases(path, windows=5, seed=0):
+    """
+    실제 데이터 입력: 워밍업 이후 전체 기간과 무작위 구간
+
+    Returns:
+        list[dict]: generate_case 와 같은 형태 (기본 생성 인자 사용)
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        df = get_simulator_class('improved')().load_data(path)
+    dates = df['date']
+    cases = [{'label': f'{path} 전체', 'df': df, 'start_date': dates.iloc[min(60, len(df) - 1)],
+              'end_date': dates.iloc[-1], 'kwargs_seed': None}]
+    rng = np.random.default_rng(seed)
+    for _ in range(windows):
+        start = int(rng.integers(0, len(df)))
+        end = int(rng.integers(start, len(df)))
+        cases.append({'label': f'{path} {dates.iloc[start]:%Y-%m-%d}~{dates.iloc[end]:%Y-%m-%d}',
+                      'df': df, 'start_date': dates.iloc[start], 'end_date': dates.iloc[end],
+                      'kwargs_seed': None})
+    return cases
+
+
+# ---------------------------------------------------------------------------
+# 비교
+# ---------------------------------------------------------------------------
+
+def _close(a, b, rtol, atol):
+    """수치 배열 비교 (NaN 끼리는 같다고 본다)"""
+    return np.isclose(np.asarray(a, dtype=np.float64), np.asarray(b, dtype=np.float64),
+                      rtol=rtol, atol=atol, equal_nan=True)
+
+
+def _first_bad(mask, labels):
+    index = int(np.flatnonzero(~mask)[0])
+    label = labels[index] if labels is not None else index
+    return f"{int((~mask).sum())}개 불일치, 첫 위치 {label}"
+
+
+def compare_frames(name, expected, actual, rtol, atol, labels=None):
+    """같은 컬럼 구성의 표 비교 (수치 컬럼은 허용 오차, 나머지는 정확히 일치)"""
+    if len(expected) != len(actual):
+        return [f"{name}: 행 수 {len(expected)} != {len(actual)}"]
+    if expected.empty:
+        return []
+    if set(expected.columns) != set(actual.columns):
+        return [f"{name}: 컬럼 {sorted(expected.columns)} != {sorted(actual.columns)}"]
+
+    problems = []
+    for column in expected.columns:
+        a = expected[column].reset_index(drop=True)
+        b = actual[column].reset_index(drop=True)
+        if pd.api.types.is_numeric_dtype(a) and pd.api.types.is_numeric_dtype(b):
+            same = _close(a, b, rtol, atol)
+        else:
+            same = ((a == b) | (a.isna() & b.isna())).to_numpy()
+        if not same.all():
+            problems.append(f"{name}.{column}: {_first_bad(same, labels)}")
+    return problems
+
+
+def compare_results(expected, actual, rtol=RTOL, atol=ATOL):
+    """
+    두 엔진 결과 비교
+
+    Returns:
+        list[str]: 불일치 설명 (같으면 빈 목록)
+    """
+    problems = []
+    dates = [str(pd.Timestamp(d).date()) for d in expected['dates']]
+
+    if expected['signals'] is not None:
+        if actual['signals'] is None:
+            problems.append("signals: 비교 엔진 결과 없음")
+        else:
+            problems += compare_frames('signals', expected['signals'], actual['signals'], 0, 0, dates)
+
+    problems += compare_frames('trades', expected['trades'], actual['trades'], rtol, atol)
+
+    if len(expected['dates']) != len(actual['dates']):
+        problems.append(f"equity: 봉 수 {len(expected['dates'])} != {len(actual['dates'])}")
+    else:
+        same_dates = (np.asarray(expected['dates'], dtype='datetime64[ns]')
+                      == np.asarray(actual['dates'], dtype='datetime64[ns]'))
+        if not same_dates.all():
+            problems.append(f"equity.date: {_first_bad(same_dates, dates)}")
+        same_values = _close(expected['equity'], actual['equity'], rtol, atol)
+        if not same_values.all():
+            diff = np.abs(np.asarray(expected['equity']) - np.asarray(actual['equity']))
+            problems.append(f"equity.value: {_first_bad(same_values, dates)}, 최대 차이 {np.nanmax(diff):.6g}")
+
+    for key, value in expected['metrics'].items():
+        other = actual['metrics'].get(key)
+        if isinstance(value, (int, float, np.number)) and not isinstance(value, bool):
+            same = other is not None and bool(_close(value, other, rtol, atol))
+        else:
+            same = value == other
+        if not same:
+            problems.append(f"metrics.{key}: {value} != {other}")
+    return problems
+
+
+# ---------------------------------------------------------------------------
+# 실행
+# ---------------------------------------------------------------------------
+
+def timed_run(func, args, repeat=1):
+    """
+    함수 실행 시간 측정
+
+    Returns:
+        (결과, float): 마지막 실행 결과, 가장 빠른 실행 시간(초)
+    """
+    best = float('inf')
+    result = None
+    for _ in range(max(repeat, 1)):
+        started = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - started)
+    return result, best
+
+
+def shrink_window(simulator_name, engine, case, sim_kwargs, rtol, atol):
+    """
+    불일치가 남는 가장 이른 종료일 찾기 (이진 탐색)
+
+    한 번 어긋난 상태는 이후 봉에도 남으므로 종료일에 대해 단조라고 가정한다.
+
+    Returns:
+        (Timestamp, list): 줄인 종료일과 그 구간의 불일치 설명
+    """
+    reference = get_engine(REFERENCE_ENGINE)
+    df = case['df']
+    dates = df['date']
+    low = int(dates.searchsorted(case['start_date']))
+    high = int(dates.searchsorted(case['end_date']))
+    problems = None
+    while low < high:
+        middle = (low + high) // 2
+        args = (simulator_name, df, case['start_date'], dates.iloc[middle], sim_kwargs)
+        found = compare_results(reference(*args), engine(*args), rtol, atol)
+        if found:
+            high, problems = middle, found
+        else:
+            low = middle + 1
+    if problems is None:
+        args = (simulator_name, df, case['start_date'], dates.iloc[high], sim_kwargs)
+        problems = compare_results(reference(*args), engine(*args), rtol, atol)
+    return dates.iloc[high], problems
+
+
+def check_case(simulator_name, case, engines, repeat=1, rtol=None, atol=None, shrink=True):
+    """
+    입력 하나에 대해 기준 엔진과 각 엔진 비교
+
+    Args:
+        rtol, atol: 허용 오차 (None 이면 engine_tolerance 의 엔진별 기본값)
+
+    Returns:
+        list[dict]: 엔진별 결과 행
+    """
+    sim_kwargs = (random_kwargs(simulator_name, case['kwargs_seed'])
+                  if case['kwargs_seed'] is not None else {})
+    args = (simulator_name, case['df'], case['start_date'], case['end_date'], sim_kwargs)
+    expected, reference_seconds = timed_run(get_engine(REFERENCE_ENGINE), args, repeat)
+
+    rows = []
+    for engine_name in engines:
+        engine = get_engine(engine_name)
+        actual, seconds = timed_run(engine, args, repeat)
+        engine_rtol, engine_atol = engine_tolerance(engine_name, rtol, atol)
+        problems = compare_results(expected, actual, engine_rtol, engine_atol)
+        shrunk_end = None
+        if problems and shrink:
+            shrunk_end, problems = shrink_window(simulator_name, engine, case, sim_kwargs,
+                                                 engine_rtol, engine_atol)
+        rows.append({
+            'simulator': simulator_name,
+            'engine': engine_name,
+            'case': case['label'],
+            'start_date': pd.Timestamp(case['start_date']),
+            'end_date': pd.Timestamp(shrunk_end if shrunk_end is not None else case['end_date']),
+            'sim_kwargs': sim_kwargs,
+            'bars': len(expected['dates']),
+            'trades': len(expected['trades']),
+            'ok': not problems,
+            'problems': problems,
+            'reference_seconds': reference_seconds,
+            'seconds': seconds,
+            'speedup': reference_seconds / seconds if seconds > 0 else float('inf'),
+        })
+    return rows
+
+
+def run_harness(simulators, engines, cases, repeat=1, rtol=None, atol=None, shrink=True):
+    """
+    모든 시뮬레이터 × 입력 × 엔진 비교
+
+    Returns:
+        DataFrame: 결과 행
+    """
+    rows = []
+    for case in cases:
+        for simulator_name in simulators:
+            rows += check_case(simulator_name, case, engines, repeat, rtol, atol, shrink)
+    return pd.DataFrame(rows)
+
+
+def report(results):
+    """시뮬레이터/엔진별 통과 수와 속도 향상 요약"""
+    lines = ["", "=== 동등성 검사 요약 ===",
+             f"{'시뮬레이터':<12} {'엔진':<10} {'입력':>6} {'실패':>6} {'무거래':>6} "
+             f"{'기준(초)':>10} {'엔진(초)':>10} {'속도 향상':>10}"]
+    for (simulator_name, engine_name), group in results.groupby(['simulator', 'engine'], sort=True):
+        reference_seconds = group['reference_seconds'].sum()
+        seconds = group['seconds'].sum()
+        speedup = reference_seconds / seconds if seconds > 0 else float('inf')
+        lines.append(f"{simulator_name:<12} {engine_name:<10} {len(group):>6} {(~group['ok']).sum():>6} "
+                     f"{(group['trades'] == 0).sum():>6} {reference_seconds:>10.3f} {seconds:>10.4f} {speedup:>9.1f}x")
+
+    idle = results.groupby(['simulator', 'engine'])['trades'].max()
+    for (simulator_name, engine_name) in idle[idle == 0].index:
+        lines.append(f"경고: [{simulator_name} / {engine_name}] 모든 입력에서 거래가 없어 비교가 무의미합니다")
+
+    failures = results[~results['ok']]
+    if not failures.empty:
+        lines.append("\n불일치 (가장 짧은 재현 구간)")
+        for _, row in failures.iterrows():
+            lines.append(f"  [{row['simulator']} / {row['engine']}] {row['case']} "
+                         f"{row['start_date']:%Y-%m-%d}~{row['end_date']:%Y-%m-%d} {row['sim_kwargs']}")
+            for problem in row['problems']:
+                lines.append(f"      {problem}")
+    return '\n'.join(lines)
+
+
+def main():
+    """메인 실행 함수"""
+    parser = argparse.ArgumentParser(description='기준 엔진과 통합 엔진의 결과 동등성 검사')
+    parser.add_argument('--sim', action='append', choices=sorted(SIMULATORS),
+                        help='대상 시뮬레이터 (여러 번 지정 가능, 기본: 전체)')
+    parser.add_argument('--engine', action='append', choices=sorted(set(ENGINES) - {REFERENCE_ENGINE}),
+                        help=f"비교할 엔진 (여러 번 지정 가능, 기본: {', '.join(DEFAULT_ENGINES)})")
+    parser.add_argument('--cases', type=int, default=25, help='무작위 생성 입력 수')
+    parser.add_argument('--seed', type=int, default=0, help='첫 입력 seed (입력 i 는 seed+i)')
+    parser.add_argument('--data', action='append', default=[], help='실제 데이터 CSV (여러 번 지정 가능)')
+    parser.add_argument('--windows', type=int, default=5, help='실제 데이터당 무작위 구간 수')
+    parser.add_argument('--repeat', type=int, default=1, help='시간 측정 반복 횟수 (가장 빠른 값 사용)')
+    parser.add_argument('--rtol', type=float, help=f'상대 허용 오차 (기본: {RTOL:g}, compact {ENGINE_TOLERANCES["compact"][0]:g})')
+    parser.add_argument('--atol', type=float, help=f'절대 허용 오차 (기본: {ATOL:g}, compact {ENGINE_TOLERANCES["compact"][1]:g})')
+    parser.add_argument('--no-shrink', action='store_true', help='불일치 구간 줄이기 생략')
+    parser.add_argument('--out', help='결과 행 CSV 저장 경로')
+    args = parser.parse_args()
+
+    cases = [generate_case(args.seed + i) for i in range(args.cases)]
+    for path in args.data:
+        cases += historical_cases(path, args.windows, args.seed)
+
+    engines = args.engine or list(DEFAULT_ENGINES)
+    results = run_harness(args.sim or sorted(SIMULATORS), engines, cases, args.repeat,
+                          args.rtol, args.atol, shrink=not args.no_shrink)
+    if args.out:
+        results.to_csv(args.out, index=False, encoding='utf-8-sig')
+    print(report(results))
+    raise SystemExit(0 if results['ok'].all() else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+계좌별 목표가/손절가 청산 엔진
+체결된 모든 계좌의 목표가와 손절가를 봉의 고가/저가와 한 번에(벡터화) 비교한다.
+"""
+
+import numpy as np
+
+# 봉 내부 가격 경로 가정
+#   'ohlc': 시가 → 고가 → 저가 → 종가 (같은 봉에서 둘 다 닿으면 목표가 먼저)
+#   'olhc': 시가 → 저가 → 고가 → 종가 (비관적 가정, 손절가 먼저)
+INTRABAR_ORDERS = {
+    'ohlc': 'ohlc',
+    'olhc': 'olhc',
+    'optimistic': 'ohlc',
+    'pessimistic': 'olhc',
+}
+
+# 청산 사유 코드
+EXIT_NONE = 0
+EXIT_TARGET = 1
+EXIT_STOP = 2
+
+EXIT_REASONS = {EXIT_TARGET: 'target', EXIT_STOP: 'stop'}
+
+
+def resolve_order(order):
+    """봉 내부 순서 이름을 'ohlc' 또는 'olhc'로 정규화"""
+    try:
+        return INTRABAR_ORDERS[order]
+    except KeyError:
+        raise ValueError(f"지원하지 않는 봉 내부 순서: {order!r} "
+                         f"(가능: {', '.join(INTRABAR_ORDERS)})")
+
+
+def evaluate_exits(active, target, stop, bar_open, bar_high, bar_low, order='olhc'):
+    """
+    한 봉에 대해 모든 계좌의 청산 여부를 한 번에 계산
+
+    Args:
+        active (np.ndarray): 평가 대상 계좌 마스크 (bool)
+        target (np.ndarray): 계좌별 목표가
+        stop (np.ndarray): 계좌별 손절가
+        bar_open, bar_high, bar_low (float): 봉의 시가/고가/저가
+        order (str): 봉 내부 가격 경로 가정
+
+    Returns:
+        (reason, price): 계좌별 청산 사유 코드(int8)와 청산 가격
+    """
+    order = resolve_order(order)
+
+    # 시가 갭: 시가가 이미 목표가/손절가를 넘어서면 시가에 체결
+    gap_target = active & (bar_open >= target)
+    gap_stop = active & (bar_open <= stop)
+    intrabar = active & ~(gap_target | gap_stop)
+
+    hit_target = intrabar & (bar_high >= target)
+    hit_stop = intrabar & (bar_low <= stop)
+    both = hit_target & hit_stop
+    if order == 'ohlc':
+        hit_stop &= ~both
+    else:
+        hit_target &= ~both
+
+    reason = np.zeros(len(active), dtype=np.int8)
+    reason[gap_target | hit_target] = EXIT_TARGET
+    reason[gap_stop | hit_stop] = EXIT_STOP
+
+    price = np.where(gap_target | gap_stop, bar_open,
+                     np.where(hit_target, target, stop))
+    return reason, price
+
+
+class ExitBook:
+    """계좌별 목표가/손절가를 배열로 보관하는 청산 장부"""
+
+    def __init__(self, n_accounts, order='olhc'):
+        self.order = resolve_order(order)
+        self.active = np.zeros(n_accounts, dtype=bool)
+        self.target = np.zeros(n_accounts, dtype=np.float64)
+        self.stop = np.zeros(n_accounts, dtype=np.float64)
+        self.entry_bar = np.full(n_accounts, -1, dtype=np.int64)
+
+    def arm(self, index, target_price, stop_loss_price, bar_index):
+        """매수된 계좌의 목표가/손절가 등록"""
+        self.active[index] = True
+        self.target[index] = target_price
+        self.stop[index] = stop_loss_price
+        self.entry_bar[index] = bar_index
+
+    def disarm(self, index):
+        """매도된 계좌 해제"""
+        self.active[index] = False
+
+    def check(self, bar_index, bar_open, bar_high, bar_low):
+        """
+        현재 봉에서 청산되는 계좌 계산
+
+        같은 봉에 체결된 계좌는 체결 시점 이후의 봉 내부 경로를 알 수 없으므로
+        다음 봉부터 평가한다.
+
+        Returns:
+            (indices, reasons, prices): 청산 계좌 인덱스, 사유 코드, 청산 가격
+        """
+        candidates = self.active & (self.entry_bar < bar_index)
+        if not candidates.any():
+            empty = np.empty(0, dtype=np.int64)
+            return empty, np.empty(0, dtype=np.int8), np.empty(0)
+
+        reason, price = evaluate_exits(candidates, self.target, self.stop,
+                                       bar_open, bar_high, bar_low, self.order)
+        indices = np.flatnonzero(reason)
+        self.active[indices] = False
+        return indices, reason[indices], price[indices]
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+새 봉 추가 시 증분 재시뮬레이션
+실행 종료 상태를 스냅샷으로 저장해 두고, 데이터가 늘어나면 새 봉만 이어서 시뮬레이션한 뒤
+기존 거래 기록 CSV 뒤에 덧붙인다. 체크포인트 이전 데이터가 바뀐 경우(내용 해시 불일치)에만
+전체를 다시 실행한다.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+
+import pandas as pd
+
+from dataset import content_hash
+from range_runner import SIMULATORS, get_simulator_class, run_range
+from snapshot import restore_snapshot, resume, simulator_frame, take_snapshot
+
+STATE_VERSION = 1
+
+
+def journal_frames(simulator):
+    """시뮬레이터의 거래 기록을 저장용 DataFrame 으로 변환"""
+    frames = {'trades': pd.DataFrame(simulator.trades)}
+    if hasattr(simulator, 'accounts'):
+        frames['daily_results'] = pd.DataFrame(simulator.daily_results)
+    else:
+        frames['daily_results'] = pd.DataFrame({'date': simulator.dates,
+                                                'portfolio_value': simulator.portfolio_value})
+    return frames
+
+
+def append_csv(path, frame):
+    """
+    CSV 뒤에 기록 추가
+
+    새 기록에 기존 파일에 없는 컬럼이 있으면 파일 전체를 다시 쓴다.
+    """
+    if frame.empty:
+        return
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        frame.to_csv(path, index=False, encoding='utf-8-sig')
+        return
+
+    columns = list(pd.read_csv(path, nrows=0, encoding='utf-8-sig').columns)
+    if set(frame.columns) <= set(columns):
+        frame.reindex(columns=columns).to_csv(path, mode='a', header=False, index=False, encoding='utf-8-sig')
+    else:
+        existing = pd.read_csv(path, encoding='utf-8-sig')
+        pd.concat([existing, frame], ignore_index=True).to_csv(path, index=False, encoding='utf-8-sig')
+
+
+class IncrementalRunner:
+    def __init__(self, simulator_name, state_dir='state', start_date='2024-01-02', sim_kwargs=None):
+        """
+        증분 재시뮬레이션 실행기
+
+        Args:
+            simulator_name (str): range_runner.SIMULATORS 키
+            state_dir (str): 스냅샷/메타/거래 기록 저장 디렉터리
+            start_date: 시뮬레이션 시작일
+            sim_kwargs (dict): 시뮬레이터 생성 인자
+        """
+        self.simulator_name = simulator_name
+        self.start_date = pd.to_datetime(start_date)
+        self.sim_kwargs = sim_kwargs or {}
+        self.directory = os.path.join(state_dir, simulator_name)
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def load_meta(self):
+        """체크포인트 메타 정보 로드 (없으면 None)"""
+        try:
+            with open(self._path('meta.json'), encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def is_valid_checkpoint(self, meta, df):
+        """체크포인트 이전 데이터가 그대로인지 확인"""
+        if (meta is None or meta.get('version') != STATE_VERSION
+                or meta['simulator'] != self.simulator_name
+                or meta['start_date'] != self.start_date.strftime('%Y-%m-%d')
+                or meta['sim_kwargs'] != self.sim_kwargs):
+            return False
+        rows = meta['checkpoint_rows']
+        if len(df) < rows or rows == 0:
+            return False
+        if df['date'].iloc[rows - 1].strftime('%Y-%m-%d') != meta['checkpoint_date']:
+            return False
+        return content_hash(df, rows) == meta['history_hash']
+
+    def run(self, df):
+        """
+        데이터에 맞춰 상태 갱신
+
+        Returns:
+            dict: 실행 방식('full', 'incremental', 'up-to-date')과 새 봉 수
+        """
+        meta = self.load_meta()
+        if self.is_valid_checkpoint(meta, df):
+            new_bars = len(df) - meta['checkpoint_rows']
+            if new_bars == 0:
+                return {'mode': 'up-to-date', 'new_bars': 0}
+            self._run_incremental(df, meta)
+            return {'mode': 'incremental', 'new_bars': new_bars}
+
+        self._run_full(df)
+        return {'mode': 'full', 'new_bars': len(df)}
+
+    def _run_full(self, df):
+        """전체 재실행 후 거래 기록을 새로 작성"""
+        end_date = df['date'].iloc[-1]
+        simulator, _ = run_range(self.simulator_name, df, self.start_date, end_date,
+                                 self.sim_kwargs, quiet=True)
+        frame = simulator_frame(simulator, df, self.start_date, end_date)
+
+        journal_bytes = {}
+        for name, journal in journal_frames(simulator).items():
+            path = self._path(f'{name}.csv')
+            journal.to_csv(path, index=False, encoding='utf-8-sig')
+            journal_bytes[name] = os.path.getsize(path)
+
+        self._checkpoint(simulator, frame, df, journal_bytes)
+
+    def _run_incremental(self, df, meta):
+        """체크포인트 이후 새 봉만 실행하고 거래 기록 뒤에 덧붙임"""
+        with open(self._path('state.snap'), 'rb') as f:
+            simulator, header = restore_snapshot(f.read(), **self.sim_kwargs)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            frame = resume(simulator, header, df)
+
+        journal_bytes = {}
+        for name, journal in journal_frames(simulator).items():
+            path = self._path(f'{name}.csv')
+            # 이전 실행이 메타 기록 전에 중단됐다면 덧붙인 부분을 잘라낸다
+            if os.path.exists(path) and os.path.getsize(path) > meta['journal_bytes'][name]:
+                os.truncate(path, meta['journal_bytes'][name])
+            append_csv(path, journal)
+            journal_bytes[name] = os.path.getsize(path)
+
+        self._checkpoint(simulator, frame, df, journal_bytes)
+
+    def _checkpoint(self, simulator, frame, df, journal_bytes):
+        """종료 상태 스냅샷과 메타 정보 저장 (메타는 마지막에 원자적으로 교체)"""
+        cursor = df['date'].iloc[-1]
+        blob = take_snapshot(simulator, frame, include_journals=False, cursor_date=cursor)
+        with open(self._path('state.snap.tmp'), 'wb') as f:
+            f.write(blob)
+        os.replace(self._path('state.snap.tmp'), self._path('state.snap'))
+
+        meta = {
+            'version': STATE_VERSION,
+            'simulator': self.simulator_name,
+            'start_date': self.start_date.strftime('%Y-%m-%d'),
+            'sim_kwargs': self.sim_kwargs,
+            'checkpoint_date': cursor.strftime('%Y-%m-%d'),
+            'checkpoint_rows': len(df),
+            'history_hash': content_hash(df),
+            'journal_bytes': journal_bytes,
+        }
+        with open(self._path('meta.json.tmp'), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+        os.replace(self._path('meta.json.tmp'), self._path('meta.json'))
+
+
+def main():
+    """메인 실행 함수"""
+    parser = argparse.ArgumentParser(description='새 봉 추가 시 증분 재시뮬레이션')
+    parser.add_argument('--data', default='SOXL_2y.csv', help='가격 데이터 CSV')
+    parser.add_argument('--sim', action='append', choices=sorted(SIMULATORS),
+                        help='대상 시뮬레이터 (여러 번 지정 가능, 기본: 전체)')
+    parser.add_argument('--state-dir', default='state')
+    parser.add_argument('--start', default='2024-01-02', help='시뮬레이션 시작일')
+    args = parser.parse_args()
+
+    for name in args.sim or sorted(SIMULATORS):
+        with contextlib.redirect_stdout(io.StringIO()):
+            df = get_simulator_class(name)().load_data(args.data)
+        result = IncrementalRunner(name, args.state_dir, args.start).run(df)
+        print(f"{name}: {result['mode']} (새 봉 {result['new_bars']}개)")
+
+
+if __name__ == "__main__":
+    main()
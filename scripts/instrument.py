@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+단계별 시간 측정 / 카운터 계측
+중첩 단계 타이머, 카운터(처리 봉 수, 주문, 체결, 계좌 탐색 수), 처리량 게이지를
+JSON lines 로 기록하고 실행 종료 시 요약 표를 출력한다.
+
+비활성 상태에서는 모든 호출이 전역 변수 하나만 확인하고 돌아가므로 항상 켜 둘 수 있다.
+환경 변수로 켠다:
+    SOXL_INSTRUMENT=run.jsonl       JSON lines 기록 경로 ('-' 면 표준 오류)
+    SOXL_INSTRUMENT_SUMMARY=1       종료 시 요약 표 출력
+"""
+
+import atexit
+import functools
+import json
+import os
+import sys
+import time
+
+ENV_PATH = 'SOXL_INSTRUMENT'
+ENV_SUMMARY = 'SOXL_INSTRUMENT_SUMMARY'
+
+# 활성 기록기 (None 이면 비활성)
+_recorder = None
+
+
+class _NullStage:
+    """비활성 상태의 단계 (아무것도 하지 않음)"""
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    def __init__(self, recorder, name):
+        self.recorder = recorder
+        self.name = name
+
+    def __enter__(self):
+        recorder = self.recorder
+        recorder.stack.append(self.name)
+        for listener in recorder.listeners:
+            listener.enter_stage(recorder.stack)
+        self.counters = dict(recorder.counters)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        self.recorder.finish_stage(elapsed, self.counters)
+        return False
+
+
+class Recorder:
+    def __init__(self, path=None, summary=False):
+        """
+        계측 기록기
+
+        Args:
+            path (str): JSON lines 기록 경로 ('-' 면 표준 오류, None 이면 기록하지 않음)
+            summary (bool): close() 에서 요약 표 출력
+        """
+        self.summary = summary
+        self.counters = {}
+        self.gauges = {}
+        self.stages = {}  # 단계 경로 → [호출 수, 누적 초, {카운터: 누적 증가량}]
+        self.stack = []
+        self.listeners = []  # 단계 시작/종료 시 추가 측정 (예: memory_profile.MemoryProfiler)
+        self.started = time.perf_counter()
+        if path == '-':
+            self.stream, self.owns_stream = sys.stderr, False
+        elif path:
+            self.stream, self.owns_stream = open(path, 'a', encoding='utf-8'), True
+        else:
+            self.stream, self.owns_stream = None, False
+
+    def emit(self, event, **fields):
+        if self.stream is None:
+            return
+        record = {'event': event, 'ts': round(time.time(), 6), 'pid': os.getpid()}
+        record.update(fields)
+        self.stream.write(json.dumps(record, ensure_ascii=False, default=str) + '\n')
+        # 단계 종료 때만 기록하므로 매번 비워도 비용이 작고, fork 된 작업 프로세스와 버퍼가 섞이지 않는다
+        self.stream.flush()
+
+    def finish_stage(self, elapsed, before):
+        """단계 종료: 경로별 누적, 단계 중 증가한 카운터로 처리량 계산"""
+        path = '/'.join(self.stack)
+        extra = {}
+        for listener in self.listeners:
+            extra.update(listener.exit_stage(self.stack, path) or {})
+        self.stack.pop()
+
+        deltas = {name: value - before.get(name, 0) for name, value in self.counters.items()
+                  if value != before.get(name, 0)}
+        entry = self.stages.setdefault(path, [0, 0.0, {}])
+        entry[0] += 1
+        entry[1] += elapsed
+        for name, delta in deltas.items():
+            entry[2][name] = entry[2].get(name, 0) + delta
+
+        rates = {f'{name}_per_sec': delta / elapsed for name, delta in deltas.items() if elapsed > 0}
+        self.emit('stage', name=path, depth=len(self.stack), seconds=elapsed,
+                  counters=deltas, rates=rates, **extra)
+
+    def close(self):
+        """카운터/게이지 합계 기록, 요약 출력"""
+        self.emit('summary', seconds=time.perf_counter() - self.started, counters=self.counters,
+                  gauges=self.gauges,
+                  stages={path: {'calls': calls, 'seconds': seconds, 'counters': counters}
+                          for path, (calls, seconds, counters) in self.stages.items()})
+        if self.stream is not None:
+            self.stream.flush()
+            if self.owns_stream:
+                self.stream.close()
+            self.stream = None
+        if self.summary:
+            print(summary_table(self))
+
+
+def enable(path=None, summary=False):
+    """
+    계측 시작 (이미 켜져 있으면 기존 기록기를 닫고 새로 시작)
+
+    Returns:
+        Recorder: 활성 기록기
+    """
+    global _recorder
+    if _recorder is not None:
+        disable()
+    _recorder = Recorder(path, summary)
+    return _recorder
+
+
+def disable():
+    """계측 종료 (요약 기록 후 비활성화)"""
+    global _recorder
+    recorder, _recorder = _recorder, None
+    if recorder is not None:
+        recorder.close()
+    return recorder
+
+
+def enabled():
+    return _recorder is not None
+
+
+def active_recorder():
+    """활성 기록기 (비활성이면 None)"""
+    return _recorder
+
+
+def stage(name):
+    """
+    중첩 단계 타이머
+
+    사용법:
+        with stage('execute_trading'):
+            ...
+    """
+    if _recorder is None:
+        return _NULL_STAGE
+    return _Stage(_recorder, name)
+
+
+def timed(name):
+    """함수/메서드 전체를 하나의 단계로 측정하는 데코레이터"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _recorder is None:
+                return func(*args, **kwargs)
+            with _Stage(_recorder, name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def count(name, value=1):
+    """카운터 증가 (봉 단위 반복 안에서는 반복이 끝난 뒤 한 번에 더하는 편이 싸다)"""
+    if _recorder is None:
+        return
+    counters = _recorder.counters
+    counters[name] = counters.get(name, 0) + value
+
+
+def gauge(name, value):
+    """게이지 기록 (마지막 값 유지)"""
+    if _recorder is None:
+        return
+    _recorder.gauges[name] = value
+
+
+def summary_table(recorder):
+    """단계별 호출 수, 누적/평균 시간, 비중, 처리량 요약 표"""
+    total = time.perf_counter() - recorder.started
+    lines = ["", "=== 단계별 계측 요약 ===",
+             f"{'단계':<48} {'호출':>6} {'누적(초)':>10} {'평균(초)':>10} {'비중':>7}  처리량"]
+    for path, (calls, seconds, counters) in sorted(recorder.stages.items()):
+        depth = path.count('/')
+        label = '  ' * depth + path.rsplit('/', 1)[-1]
+        rates = ', '.join(f'{name} {delta / seconds:,.0f}/s' for name, delta in counters.items() if seconds > 0)
+        share = seconds / total * 100 if total > 0 else 0.0
+        lines.append(f"{label:<48} {calls:>6} {seconds:>10.4f} {seconds / calls:>10.6f} {share:>6.1f}%  {rates}")
+    if recorder.counters:
+        lines.append("카운터: " + ', '.join(f'{k}={v:,}' for k, v in sorted(recorder.counters.items())))
+    if recorder.gauges:
+        lines.append("게이지: " + ', '.join(f'{k}={v:,.2f}' for k, v in sorted(recorder.gauges.items())))
+    return '\n'.join(lines)
+
+
+def _enable_from_env():
+    path = os.environ.get(ENV_PATH)
+    summary = os.environ.get(ENV_SUMMARY, '') not in ('', '0')
+    if path or summary:
+        enable(path, summary)
+        atexit.register(disable)
+
+
+_enable_from_env()
@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+분봉 / 틱 데이터 스트리밍 재생
+january 규칙은 시가에 판단한다 (시가 x 1.02 부터 등차 매수, 시가 x 0.99 매도). 일봉만으로는
+매수 뒤 장중 가격 경로를 알 수 없어 목표가/손절가 청산을 봉 내부 순서 가정으로 처리하는데,
+분봉/틱 파일을 재생하면 실제 경로로 처리한다.
+
+파일은 고정 크기 구간(chunk_rows 행)으로 읽어 제너레이터 단계로 흘려보낸다.
+
+    read_chunks   CSV(분봉 OHLCV 또는 틱 price/size) / 바이너리 데이터셋을 구간 단위로 읽기
+    sessions      구간을 날짜(세션) 단위로 나누기 (구간 경계에 걸친 세션은 이어 붙인다)
+    SessionFeatures  끝난 세션으로 규칙이 쓰는 일봉 값(전날 종가, 이동평균)을 바로 갱신
+
+메모리는 구간 하나 + 세션 하나 + 가장 긴 이동평균 창만큼만 쓰므로 파일 크기와 관계없다.
+
+세션마다:
+    1. 첫 봉의 시가와 끝난 세션들의 일봉 값으로 규칙 판단 (등차 매수, 조건부 매도)
+       - 이동평균은 전날까지의 종가로 계산한다 (시가에는 그날 종가를 알 수 없다)
+       - 규칙이 그날 고가/저가/종가를 참조하면 시가에는 판단할 수 없으므로 판단하지 않는다
+    2. 목표가/손절가 청산은 세션의 분봉(틱) 경로를 따라 처음 닿는 봉에서 체결
+       (그 세션 시가에 매수한 계좌는 첫 봉 다음부터 평가)
+    3. 세션 종가로 평가
+
+파일 형식:
+    CSV  오름차순, 머리글 이름으로 컬럼을 찾는다 (대소문자 무시)
+         시각: date / datetime / time / timestamp
+         분봉: open, high, low, close[, volume]    틱: price[, size 또는 volume]
+    바이너리 데이터셋: market_generator.py --freq min 으로 만든 디렉터리 (메모리 맵)
+
+사용법:
+    python market_generator.py --bars 2000000 --freq min --out data/minute
+    python intraday.py --data data/minute/SYN00 --start 2000-03-01 --rules outline
+    python intraday.py --data SOXL_1min.csv --chunk-rows 200000 --profile-memory
+"""
+
+import argparse
+import io
+import sys
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from dataset import is_frame_dir, load_frame
+from decision_log import INFO
+from engine import LadderEngine
+from exit_engine import evaluate_exits
+from instrument import count, timed
+from memory_profile import command_line, footprint_simulator
+from rules import RULE_SETS
+from strategies import RuleStrategy
+
+# 한 번에 읽는 행 수
+CHUNK_ROWS = 100_000
+
+# 세션 배열
+BAR_FIELDS = ('time', 'open', 'high', 'low', 'close', 'volume')
+
+# CSV 시각 컬럼 이름
+TIME_COLUMNS = ('date', 'datetime', 'time', 'timestamp')
+
+
+def _csv_columns(header):
+    """CSV 머리글 → (시각 컬럼, 봉 필드 → 컬럼 이름) (틱은 price 를 시가/고가/저가/종가로)"""
+    names = {str(c).strip().lower(): c for c in header}
+    time_column = next((names[n] for n in TIME_COLUMNS if n in names), None)
+    if time_column is None:
+        raise ValueError(f"시각 컬럼이 없습니다 (가능: {', '.join(TIME_COLUMNS)})")
+    volume = names.get('volume', names.get('size'))
+    if all(n in names for n in ('open', 'high', 'low', 'close')):
+        fields = {n: names[n] for n in ('open', 'high', 'low', 'close')}
+    elif 'price' in names:
+        fields = {n: names['price'] for n in ('open', 'high', 'low', 'close')}
+    else:
+        raise ValueError("가격 컬럼이 없습니다 (분봉: open/high/low/close, 틱: price)")
+    fields['volume'] = volume
+    return time_column, fields
+
+
+def read_chunks(source, chunk_rows=CHUNK_ROWS):
+    """
+    분봉 / 틱 파일을 구간 단위로 읽기
+
+    Args:
+        source (str): CSV 파일 또는 바이너리 데이터셋 디렉터리
+        chunk_rows (int): 구간 행 수
+
+    Yields:
+        dict: time(datetime64[ns]), open, high, low, close, volume 배열
+    """
+    if is_frame_dir(source):
+        # 메모리 맵이라 구간을 변환할 때만 그 부분을 읽는다
+        df = load_frame(source)
+        for offset in range(0, len(df), chunk_rows):
+            part = df.iloc[offset:offset + chunk_rows]
+            chunk = {'time': part['date'].to_numpy(dtype='datetime64[ns]')}
+            for name in BAR_FIELDS[1:]:
+                chunk[name] = part[name].to_numpy(dtype=np.float64)
+            count('rows_parsed', len(part))
+            yield chunk
+        return
+
+    with pd.read_csv(source, chunksize=chunk_rows) as reader:
+        columns = None
+        for part in reader:
+            if columns is None:
+                columns = _csv_columns(part.columns)
+            time_column, fields = columns
+            chunk = {'time': pd.to_datetime(part[time_column]).to_numpy(dtype='datetime64[ns]')}
+            for name, column in fields.items():
+                chunk[name] = (part[column].to_numpy(dtype=np.float64) if column is not None
+                               else np.zeros(len(part)))
+            count('rows_parsed', len(part))
+            yield chunk
+
+
+def sessions(chunks):
+    """
+    구간을 날짜(세션) 단위로 나누기 (구간 경계에 걸친 세션은 이어 붙인다)
+
+    Yields:
+        dict: date(세션 날짜 datetime64[D]) 와 세션의 BAR_FIELDS 배열
+    """
+    pending = []
+    last_time = None
+    for chunk in chunks:
+        times = chunk['time']
+        if len(times) == 0:
+            continue
+        if (last_time is not None and times[0] < last_time) or (times[1:] < times[:-1]).any():
+            raise ValueError("분봉/틱 파일이 시각 오름차순이 아닙니다")
+        last_time = times[-1]
+
+        days = times.astype('datetime64[D]')
+        bounds = np.flatnonzero(days[1:] != days[:-1]) + 1
+        for start, stop in zip(np.concatenate(([0], bounds)), np.concatenate((bounds, [len(days)]))):
+            piece = {name: values[start:stop] for name, values in chunk.items()}
+            if pending and pending[0]['time'][0].astype('datetime64[D]') != days[start]:
+                yield _join(pending)
+                pending = []
+            pending.append(piece)
+    if pending:
+        yield _join(pending)
+
+
+def _join(pieces):
+    """세션 조각 이어 붙이기"""
+    session = {name: (pieces[0][name] if len(pieces) == 1
+                      else np.concatenate([p[name] for p in pieces])) for name in BAR_FIELDS}
+    session['date'] = session['time'][0].astype('datetime64[D]')
+    return session
+
+
+def session_bar(session):
+    """세션 → 일봉 (date, open, high, low, close, volume)"""
+    return {
+        'date': pd.Timestamp(session['date']),
+        'open': session['open'][0].item(),
+        'high': session['high'].max().item(),
+        'low': session['low'].min().item(),
+        'close': session['close'][-1].item(),
+        'volume': session['volume'].sum().item(),
+    }
+
+
+def daily_bars(source, chunk_rows=CHUNK_ROWS):
+    """분봉 / 틱 파일을 스트리밍으로 일봉 DataFrame 으로 (일봉 수만큼만 메모리 사용)"""
+    return pd.DataFrame([session_bar(s) for s in sessions(read_chunks(source, chunk_rows))])
+
+
+class SessionFeatures:
+    """끝난 세션으로 갱신하는 일봉 값 (전날 종가, 이동평균), 메모리는 가장 긴 창 크기"""
+
+    def __init__(self, windows=(60,)):
+        self.windows = tuple(windows)
+        self.closes = deque(maxlen=max(self.windows, default=1))
+        self.prev_close = np.nan
+
+    def bars(self, session):
+        """
+        세션 시가 판단용 봉 배열 (원소 1개, LadderEngine.window_bars 형식)
+
+        그날 고가/저가/종가는 시가에 알 수 없으므로 NaN 이다.
+        """
+        bars = {
+            'date': np.array([session['date']], dtype='datetime64[ns]'),
+            'open': session['open'][:1],
+            'high': np.full(1, np.nan),
+            'low': np.full(1, np.nan),
+            'close': np.full(1, np.nan),
+            'prev_close': np.full(1, self.prev_close),
+        }
+        closes = np.fromiter(self.closes, dtype=np.float64, count=len(self.closes))
+        for window in self.windows:
+            value = closes[-window:].mean() if len(closes) >= window else np.nan
+            bars[f'MA{window}'] = np.full(1, value)
+        return bars
+
+    def update(self, session):
+        """세션이 끝난 뒤 종가 반영"""
+        self.prev_close = session['close'][-1].item()
+        self.closes.append(self.prev_close)
+
+
+class IntradayEngine(LadderEngine):
+    """분봉 / 틱 세션을 재생하는 분할 엔진 (판단은 시가, 청산은 장중 경로)"""
+
+    def __init__(self, strategy=None, initial_capital=10000, position_size=20, exit_order='olhc'):
+        """
+        Args:
+            strategy (RuleStrategy | str): 분할 매매 전략 또는 규칙 이름 (기본: january_v2)
+            exit_order (str): 분봉 하나 안에서 목표가와 손절가가 모두 닿을 때의 순서 가정
+        """
+        if strategy is None or isinstance(strategy, str):
+            strategy = RuleStrategy(strategy or 'january_v2')
+        super().__init__(strategy, initial_capital, position_size, exit_order)
+
+    @timed('replay')
+    def replay(self, source, start_date=None, end_date=None, chunk_rows=CHUNK_ROWS):
+        """
+        분봉 / 틱 파일 재생
+
+        시작일 이전 세션은 일봉 값(이동평균 워밍업)만 갱신하고 거래하지 않는다.
+
+        Args:
+            source (str): CSV 파일 또는 바이너리 데이터셋 디렉터리
+            start_date, end_date: 거래 기간 (양 끝 포함, None 이면 파일 처음/끝)
+            chunk_rows (int): 한 번에 읽는 행 수
+
+        Returns:
+            (list, list): 거래 기록, 일별 결과
+        """
+        start = np.datetime64(pd.to_datetime(start_date), 'D') if start_date is not None else None
+        end = np.datetime64(pd.to_datetime(end_date), 'D') if end_date is not None else None
+        print(f"{source} 재생 시작...")
+        features = SessionFeatures(self.strategy.indicators)
+        self.log.console = self.verbose
+
+        n_sessions = 0
+        for session in sessions(read_chunks(source, chunk_rows)):
+            if end is not None and session['date'] > end:
+                break
+            if start is None or session['date'] >= start:
+                self.trade_session(session, features)
+                n_sessions += 1
+            features.update(session)
+
+        count('sessions', n_sessions)
+        self.log.close()
+        if self.verbose:
+            print()
+        print(f"재생 완료: {n_sessions}세션, {len(self.trades)}회 거래")
+        return self.trades, self.daily_results
+
+    def trade_session(self, session, features):
+        """세션 하나 거래 (시가 판단 → 장중 청산 → 종가 평가)"""
+        bars = features.bars(session)
+        plan = self.strategy.plan(bars)
+        self.bar_index += 1
+        count('bars', len(session['time']))
+        if not plan['valid'][0]:
+            return
+
+        date = pd.Timestamp(session['date'])
+        open_price = bars['open'][0].item()
+        if self.log.enabled(INFO):
+            self.log.info('bar', lambda: '\n'.join(self.strategy.trace(bars, plan, 0)),
+                          date=date, regime=int(plan['regime'][0]), buy=bool(plan['buy'][0]), open=open_price)
+        if plan['buy'][0]:
+            self.execute_buy_sequence(open_price, plan['step'][0], date)
+        self.execute_sell_rule(open_price, date,
+                               lambda accounts: self.strategy.sell_mask(bars, plan, 0, accounts),
+                               lambda C: self.strategy.describe_sell(bars, plan, 0, C))
+        self.execute_session_exits(session)
+        self.record_daily_result(date, session['close'][-1].item())
+
+    def execute_session_exits(self, session):
+        """
+        세션 경로를 따라 목표가/손절가 청산 (계좌마다 처음 닿는 봉에서)
+
+        세션 안에서는 새 매수가 없어 목표가/손절가가 바뀌지 않으므로, (봉 x 계좌) 배열로
+        세션 전체를 한 번에 계산한다. 이번 세션 시가에 매수한 계좌는 첫 봉 다음부터 평가한다.
+        """
+        book = self.exit_book
+        if not book.active.any():
+            return
+        n_bars, n_accounts = len(session['time']), len(book.active)
+        active = np.broadcast_to(book.active, (n_bars, n_accounts)).copy()
+        active[0] &= book.entry_bar < self.bar_index
+        reason, price = evaluate_exits(active.ravel(), np.tile(book.target, n_bars), np.tile(book.stop, n_bars),
+                                       np.repeat(session['open'], n_accounts),
+                                       np.repeat(session['high'], n_accounts),
+                                       np.repeat(session['low'], n_accounts), book.order)
+        hit = reason.reshape(n_bars, n_accounts) != 0
+        accounts = np.flatnonzero(hit.any(axis=0))
+        if len(accounts) == 0:
+            return
+
+        # 체결 시각 순서로 (같은 봉은 계좌 번호 순서)
+        bars = hit[:, accounts].argmax(axis=0)
+        order = np.lexsort((accounts, bars))
+        accounts, bars = accounts[order], bars[order]
+        flat = bars * n_accounts + accounts
+        book.active[accounts] = False
+        count('orders', len(accounts))
+        for row in np.unique(bars).tolist():
+            same = bars == row
+            self._record_sells(accounts[same], price[flat[same]], pd.Timestamp(session['time'][row]),
+                               reason[flat[same]])
+
+
+@timed('main')
+def main():
+    """메인 실행 함수"""
+    parser = argparse.ArgumentParser(description='분봉 / 틱 데이터 스트리밍 분할 매매 재생')
+    parser.add_argument('--data', required=True, help='분봉/틱 CSV 또는 바이너리 데이터셋 디렉터리')
+    parser.add_argument('--rules', default='january_v2', help=f"규칙 이름({', '.join(RULE_SETS)}) 또는 JSON 파일")
+    parser.add_argument('--start', help='시작일 (YYYY-MM-DD)')
+    parser.add_argument('--end', help='종료일 (YYYY-MM-DD)')
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS, help='한 번에 읽는 행 수')
+    parser.add_argument('--exit-order', default='olhc', help="분봉 내부 순서 ('ohlc', 'olhc')")
+    parser.add_argument('--verbose', action='store_true', help='세션별 판단 과정 출력')
+    args, _ = parser.parse_known_args()
+
+    simulator = IntradayEngine(args.rules, exit_order=args.exit_order)
+    simulator.verbose = args.verbose
+    trades, daily_results = simulator.replay(args.data, args.start, args.end, args.chunk_rows)
+    footprint_simulator(simulator)
+    if daily_results:
+        final_value = daily_results[-1]['total_value']
+        print(f"\n=== 재생 결과 요약 ===")
+        print(f"기간: {daily_results[0]['date']:%Y-%m-%d} ~ {daily_results[-1]['date']:%Y-%m-%d}")
+        print(f"초기 자본: ${simulator.initial_capital:,}")
+        print(f"최종 가치: ${final_value:,.2f}")
+        print(f"총 수익률: {(final_value - simulator.initial_capital) / simulator.initial_capital * 100:.2f}%")
+        print(f"총 거래 횟수: {len(trades)}회 "
+              f"(목표가/손절가 청산 {sum(1 for t in trades if 'reason' in t)}회)")
+
+
+if __name__ == "__main__":
+    # 한글 인코딩 설정 (다른 모듈에서 import 할 때는 stdout 을 건드리지 않는다)
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+    # --profile-memory: 단계별 메모리 보고
+    with command_line():
+        main()
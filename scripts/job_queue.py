@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+공유 디렉터리 기반 분산 작업 실행기
+작업 명세(시뮬레이터, 파라미터, 기간, 데이터 버전)를 샤드 파일로 공유 디렉터리에 써 두면,
+여러 노드의 작업자가 샤드를 원자적으로 가져가 실행하고 결과를 기록한다.
+별도 브로커 없이 파일 시스템의 rename/link 원자성만 사용한다.
+
+디렉터리 구조:
+    pending/<shard>.json   대기 중인 샤드
+    running/<shard>.json   실행 중인 샤드 (수정 시각 = 작업자 하트비트)
+    results/<shard>.json   결과 (먼저 기록한 작업자 하나만 성공, exactly-once)
+"""
+
+import argparse
+import contextlib
+import itertools
+import json
+import os
+import socket
+import threading
+import time
+import traceback
+import uuid
+
+import pandas as pd
+
+from dataset import content_hash
+from range_runner import FREQUENCIES, SIMULATORS, _parse_grid, make_windows, run_range
+from shared_data import load_price_data
+
+QUEUE_DIRS = ('pending', 'running', 'results')
+DEFAULT_LEASE_SECONDS = 120
+
+
+def _write_json_atomic(path, payload):
+    """임시 파일에 쓰고 rename 으로 교체"""
+    temp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, ensure_ascii=False, default=str)
+    os.replace(temp_path, path)
+
+
+class JobQueue:
+    def __init__(self, root):
+        """
+        공유 디렉터리 작업 큐
+
+        Args:
+            root (str): 모든 노드가 접근하는 공유 디렉터리
+        """
+        self.root = root
+        for name in QUEUE_DIRS:
+            os.makedirs(os.path.join(root, name), exist_ok=True)
+
+    def _path(self, state, shard_id):
+        return os.path.join(self.root, state, f'{shard_id}.json')
+
+    def _list(self, state):
+        return sorted(name[:-5] for name in os.listdir(os.path.join(self.root, state))
+                      if name.endswith('.json'))
+
+    def submit(self, jobs, shard_size=20):
+        """
+        작업 명세를 샤드로 나누어 대기열에 추가
+
+        Args:
+            jobs (list[dict]): 작업 명세 (simulator, params, start_date, end_date, data_path, dataset_hash)
+            shard_size (int): 샤드당 작업 수
+
+        Returns:
+            list[str]: 샤드 ID 목록
+        """
+        batch = uuid.uuid4().hex[:8]
+        shard_ids = []
+        for number, first in enumerate(range(0, len(jobs), shard_size)):
+            shard_id = f'{batch}-{number:05d}'
+            _write_json_atomic(self._path('pending', shard_id),
+                               {'shard_id': shard_id, 'jobs': jobs[first:first + shard_size]})
+            shard_ids.append(shard_id)
+        return shard_ids
+
+    def claim(self):
+        """
+        대기 중인 샤드 하나를 원자적으로 가져감 (rename 에 성공한 작업자 하나만 가져간다)
+
+        Returns:
+            (str, dict): 샤드 ID와 내용 / 대기 샤드가 없으면 (None, None)
+        """
+        for shard_id in self._list('pending'):
+            pending_path = self._path('pending', shard_id)
+            running_path = self._path('running', shard_id)
+            try:
+                # rename 은 수정 시각을 유지하므로 옮기기 전에 임대를 새로 시작한다
+                # (오래 대기한 샤드가 running/ 에 들어가자마자 만료로 회수되지 않도록)
+                os.utime(pending_path)
+                os.rename(pending_path, running_path)
+            except FileNotFoundError:
+                continue  # 다른 작업자가 먼저 가져감
+
+            try:
+                # 만료 후 재배치된 샤드가 이미 완료된 경우
+                if os.path.exists(self._path('results', shard_id)):
+                    with contextlib.suppress(FileNotFoundError):
+                        os.remove(running_path)
+                    continue
+
+                with open(running_path, encoding='utf-8') as f:
+                    return shard_id, json.load(f)
+            except FileNotFoundError:
+                continue  # 다른 작업자가 만료로 회수함
+        return None, None
+
+    def heartbeat(self, shard_id):
+        """임대 갱신 (샤드가 만료로 회수됐으면 False)"""
+        try:
+            os.utime(self._path('running', shard_id))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def reap_expired(self, lease_seconds=DEFAULT_LEASE_SECONDS):
+        """하트비트가 끊긴(작업자 중단) 샤드를 대기열로 되돌림"""
+        now = time.time()
+        reaped = []
+        for shard_id in self._list('running'):
+            running_path = self._path('running', shard_id)
+            try:
+                expired = now - os.path.getmtime(running_path) > lease_seconds
+                if expired:
+                    os.rename(running_path, self._path('pending', shard_id))
+                    reaped.append(shard_id)
+            except FileNotFoundError:
+                continue
+        return reaped
+
+    def commit(self, shard_id, results):
+        """
+        샤드 결과 기록 (exactly-once)
+
+        임시 파일을 결과 경로에 hard link 하므로 같은 샤드를 두 작업자가 실행해도
+        먼저 기록한 쪽만 성공한다.
+
+        Returns:
+            bool: 이 호출이 결과를 기록했는지 여부
+        """
+        final_path = self._path('results', shard_id)
+        temp_path = f'{final_path}.{uuid.uuid4().hex}.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'shard_id': shard_id, 'worker': worker_id(), 'results': results},
+                      f, ensure_ascii=False, default=str)
+            f.flush()
+            os.fsync(f.fileno())
+        try:
+            os.link(temp_path, final_path)
+            committed = True
+        except FileExistsError:
+            committed = False
+        finally:
+            os.remove(temp_path)
+
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(self._path('running', shard_id))
+        return committed
+
+    def status(self):
+        """상태별 샤드 수"""
+        return {state: len(self._list(state)) for state in QUEUE_DIRS}
+
+    def collect(self):
+        """완료된 모든 작업 결과를 DataFrame 으로 수집"""
+        rows = []
+        for shard_id in self._list('results'):
+            with open(self._path('results', shard_id), encoding='utf-8') as f:
+                rows.extend(json.load(f)['results'])
+        return pd.DataFrame(rows)
+
+
+def worker_id():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def run_job(job, data_cache):
+    """작업 명세 하나 실행"""
+    path = job['data_path']
+    if path not in data_cache:
+        df = load_price_data(path)
+        data_cache[path] = (df, content_hash(df))
+    df, dataset_hash = data_cache[path]
+
+    result = {'job_id': job['job_id'], 'simulator': job['simulator']}
+    result.update({f'param.{key}': value for key, value in (job.get('params') or {}).items()})
+    if job.get('dataset_hash') and job['dataset_hash'] != dataset_hash:
+        result.update(status='error', error=f"데이터 버전 불일치: {path}")
+        return result
+
+    try:
+        _, summary = run_range(job['simulator'], df, job['start_date'], job['end_date'],
+                               job.get('params'), quiet=True)
+        result.update(summary, status='ok')
+    except Exception:
+        result.update(status='error', error=traceback.format_exc())
+    return result
+
+
+def run_worker(root, lease_seconds=DEFAULT_LEASE_SECONDS, wait=False, poll_seconds=2.0):
+    """
+    작업자 루프: 만료 샤드 회수 → 샤드 가져오기 → 실행 → 결과 기록
+
+    Args:
+        wait (bool): 대기 샤드가 없어도 종료하지 않고 계속 기다림
+
+    Returns:
+        int: 이 작업자가 결과를 기록한 샤드 수
+    """
+    queue = JobQueue(root)
+    data_cache = {}
+    committed = 0
+
+    while True:
+        queue.reap_expired(lease_seconds)
+        shard_id, shard = queue.claim()
+        if shard_id is None:
+            if wait or queue.status()['running']:
+                time.sleep(poll_seconds)
+                continue
+            return committed
+
+        # 실행 중 하트비트로 임대 유지
+        stop = threading.Event()
+
+        def beat():
+            while not stop.wait(lease_seconds / 3):
+                if not queue.heartbeat(shard_id):
+                    return
+
+        thread = threading.Thread(target=beat, daemon=True)
+        thread.start()
+        try:
+            results = [run_job(job, data_cache) for job in shard['jobs']]
+        finally:
+            stop.set()
+            thread.join()
+
+        if queue.commit(shard_id, results):
+            committed += 1
+
+
+def build_jobs(simulator_name, data_path, freq=None, grid=None, start_date=None, end_date=None):
+    """구간(freq) 또는 파라미터 격자(grid)로 작업 명세 목록 생성"""
+    df = load_price_data(data_path)
+    dataset_hash = content_hash(df)
+    start_date = start_date or df['date'].iloc[0]
+    end_date = end_date or df['date'].iloc[-1]
+
+    windows = make_windows(df, freq) if freq else [(start_date, end_date)]
+    combos = [{}]
+    if grid:
+        names = list(grid)
+        combos = [dict(zip(names, values)) for values in itertools.product(*(grid[n] for n in names))]
+
+    jobs = []
+    for window_start, window_end in windows:
+        for params in combos:
+            jobs.append({
+                'job_id': uuid.uuid4().hex,
+                'simulator': simulator_name,
+                'params': params,
+                'start_date': pd.to_datetime(window_start).strftime('%Y-%m-%d'),
+                'end_date': pd.to_datetime(window_end).strftime('%Y-%m-%d'),
+                'data_path': os.path.abspath(data_path),
+                'dataset_hash': dataset_hash,
+            })
+    return jobs
+
+
+def main():
+    """메인 실행 함수"""
+    parser = argparse.ArgumentParser(description='공유 디렉터리 기반 분산 작업 실행기')
+    parser.add_argument('--queue', default='queue', help='공유 큐 디렉터리')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    submit = sub.add_parser('submit', help='작업 샤드 추가')
+    submit.add_argument('--data', default='SOXL_2y.csv')
+    submit.add_argument('--sim', default='january_v2', choices=sorted(SIMULATORS))
+    submit.add_argument('--freq', choices=sorted(FREQUENCIES))
+    submit.add_argument('--param', action='append', default=[])
+    submit.add_argument('--start')
+    submit.add_argument('--end')
+    submit.add_argument('--shard-size', type=int, default=20)
+
+    worker = sub.add_parser('worker', help='작업자 실행')
+    worker.add_argument('--lease', type=float, default=DEFAULT_LEASE_SECONDS, help='임대 만료(초)')
+    worker.add_argument('--wait', action='store_true', help='대기 샤드가 없어도 계속 대기')
+
+    sub.add_parser('status', help='상태별 샤드 수')
+    collect = sub.add_parser('collect', help='결과 수집')
+    collect.add_argument('--out', help='결과 CSV 경로')
+    args = parser.parse_args()
+
+    queue = JobQueue(args.queue)
+    if args.command == 'submit':
+        jobs = build_jobs(args.sim, args.data, args.freq, _parse_grid(args.param) if args.param else None,
+                          args.start, args.end)
+        shard_ids = queue.submit(jobs, args.shard_size)
+        print(f"작업 {len(jobs)}개를 샤드 {len(shard_ids)}개로 추가")
+    elif args.command == 'worker':
+        committed = run_worker(args.queue, args.lease, args.wait)
+        print(f"{worker_id()}: 샤드 {committed}개 완료")
+    elif args.command == 'status':
+        for state, count in queue.status().items():
+            print(f"{state}: {count}")
+    else:
+        results = queue.collect()
+        if args.out:
+            results.to_csv(args.out, index=False, encoding='utf-8-sig')
+        print(results.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,402 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+합성 시장 데이터 생성기
+국면 전환(상승/하락/위기) 기초지수 GBM 에 레버리지를 적용한 가격을 만들어
+load_data 결과와 같은 형식(date, close, open, high, low, volume, change_pct, MA..)으로 내보낸다.
+고정 크기 구간 단위로 벡터화해 생성하므로 같은 seed 면 길이와 저장 방식에 관계없이 같은 데이터가 나오고,
+바이너리 데이터셋(dataset.FrameWriter)으로 바로 써서 1억 봉도 메모리 한도 안에서 만들 수 있다.
+
+분봉 같은 장중 주기는 기본으로 평일 정규장(09:30 부터 6.5시간) 세션에만 봉을 두고,
+sessions=False 면 시작 시각부터 쉬지 않고 이어지는 고정 간격 시각을 쓴다
+(세션 구조는 없지만 같은 봉 수로 훨씬 긴 기간을 만들 수 있다: 분봉 1억 개는 세션 기준 약 1000년).
+"""
+
+import argparse
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from dataset import (COMPACT_FLOAT, COMPACT_VOLUME, FrameWriter, compact_frame, is_frame_dir,
+                     load_frame)
+
+# 기초지수 국면: 연율 기대수익률, 연율 변동성, 평균 지속 기간(거래일), 출현 비중
+REGIMES = {
+    'bull': {'drift': 0.20, 'volatility': 0.18, 'duration': 250, 'weight': 0.6},
+    'bear': {'drift': -0.25, 'volatility': 0.32, 'duration': 120, 'weight': 0.3},
+    'crisis': {'drift': -0.60, 'volatility': 0.65, 'duration': 30, 'weight': 0.1},
+}
+
+TRADING_DAYS = 252
+SESSION_SECONDS = 6.5 * 3600
+SESSION_OPEN = pd.Timedelta(hours=9, minutes=30)
+
+# 생성 구간 크기 (seed 와 함께 난수열을 결정하므로 바꾸면 데이터가 달라진다)
+CHUNK_BARS = 1 << 20
+
+DEFAULT_CACHE_DIR = os.path.join('.cache', 'market')
+
+PRICE_COLUMNS = ('close', 'open', 'high', 'low', 'volume', 'change_pct')
+
+
+def _is_daily(offset):
+    return isinstance(offset, (pd.offsets.Day, pd.offsets.BusinessDay))
+
+
+def session_bars(freq):
+    """장중 주기의 세션당 봉 수 (6.5시간 장에 들어가는 봉 수, 최소 1)"""
+    offset = pd.tseries.frequencies.to_offset(freq)
+    try:
+        seconds = pd.Timedelta(offset).total_seconds()
+    except ValueError:
+        raise ValueError(f"지원하지 않는 봉 주기: {freq!r} (일봉 'B'/'D' 또는 고정 간격 'h', '5min' 등)")
+    return max(int(SESSION_SECONDS // seconds), 1)
+
+
+def bars_per_year(freq):
+    """봉 주기 → 연간 봉 수 (일봉 252개, 장중 주기는 세션당 봉 수 기준)"""
+    offset = pd.tseries.frequencies.to_offset(freq)
+    if _is_daily(offset):
+        return TRADING_DAYS / offset.n
+    return TRADING_DAYS * session_bars(freq)
+
+
+class MarketGenerator:
+    def __init__(self, n_bars, tickers=1, freq='B', seed=0, start='2000-01-03', leverage=3.0,
+                 correlation=0.6, initial_price=30.0, expense_ratio=0.0095, regimes=None,
+                 price_range=(0.5, 5000.0), moving_averages=(20, 60), base_volume=50_000_000,
+                 sessions=True):
+        """
+        합성 시장 데이터 생성기
+
+        Args:
+            n_bars (int): 봉 수
+            tickers (int | list[str]): 종목 수 또는 종목 이름 목록
+            freq (str): 봉 주기 ('B' 일봉, 'h', '5min', 'min' 등 고정 간격)
+            seed (int): 난수 seed
+            leverage (float | list[float]): 종목별 레버리지 배수 (SOXL 은 3배)
+            correlation (float): 종목 간 수익률 상관 (공통 시장 충격 비중)
+            expense_ratio (float): 연간 운용 보수
+            regimes (dict): 국면 정의 (기본: REGIMES)
+            price_range (tuple): 가격 하한/상한 (로그 가격을 경계에서 반사해 긴 구간에서도 발산하지 않게 함)
+            moving_averages (tuple): 함께 계산할 이동평균 창 (MA20, MA60 ...)
+            base_volume (float): 하루 평균 거래량
+            sessions (bool): 장중 주기를 평일 정규장 세션에만 둘지 (False 면 쉬지 않는 고정 간격)
+        """
+        self.n_bars = int(n_bars)
+        if self.n_bars < 1:
+            raise ValueError(f"봉 수는 1 이상이어야 합니다: {n_bars}")
+        self.tickers = ([f'SYN{i:02d}' for i in range(tickers)] if isinstance(tickers, int)
+                        else list(tickers))
+        self.freq = freq
+        self.seed = seed
+        self.start = pd.Timestamp(start)
+        self.leverage = np.broadcast_to(np.asarray(leverage, dtype=np.float64), (len(self.tickers),)).copy()
+        self.correlation = correlation
+        self.initial_price = initial_price
+        self.expense_ratio = expense_ratio
+        self.regimes = regimes or REGIMES
+        self.price_range = price_range
+        self.moving_averages = tuple(moving_averages)
+        self.base_volume = base_volume
+        self.sessions = sessions
+        self.step = pd.tseries.frequencies.to_offset(freq)
+
+        self.bars_per_year = bars_per_year(freq)
+        self.dt = 1.0 / self.bars_per_year
+        bars_per_day = self.bars_per_year / TRADING_DAYS
+
+        names = list(self.regimes)
+        self.drift = np.array([self.regimes[n]['drift'] for n in names])
+        self.volatility = np.array([self.regimes[n]['volatility'] for n in names])
+        self.duration = np.array([self.regimes[n]['duration'] for n in names]) * bars_per_day
+        weights = np.array([self.regimes[n]['weight'] for n in names], dtype=np.float64)
+        self.weights = weights / weights.sum()
+
+        # 마지막 봉 날짜를 미리 계산해 표현 범위를 넘는 봉 수는 생성 전에 거부
+        self.dates(self.n_bars - 1, 1)
+
+    @property
+    def columns(self):
+        """load_data 결과와 같은 컬럼 순서"""
+        return ['date'] + list(PRICE_COLUMNS) + [f'MA{w}' for w in self.moving_averages]
+
+    def params(self):
+        """캐시 키에 쓰는 생성 인자"""
+        return {
+            'n_bars': self.n_bars, 'tickers': self.tickers, 'freq': self.freq, 'seed': self.seed,
+            'start': str(self.start), 'leverage': self.leverage.tolist(), 'correlation': self.correlation,
+            'initial_price': self.initial_price, 'expense_ratio': self.expense_ratio,
+            'regimes': self.regimes, 'price_range': list(self.price_range),
+            'moving_averages': list(self.moving_averages), 'base_volume': self.base_volume,
+            'chunk_bars': CHUNK_BARS, 'sessions': self.sessions,
+        }
+
+    def dates(self, offset, count):
+        """
+        offset 번째 봉부터 count 개의 날짜 (앞 봉을 만들지 않고 위치로 바로 계산)
+
+        일봉은 시작일부터 (영업)일 수, 세션 장중 봉은 영업일 수와 세션 안 순번,
+        그 밖의 장중 봉은 시작 시각부터 간격 배수로 계산한다.
+        """
+        positions = np.arange(offset, offset + count, dtype=np.int64)
+        if _is_daily(self.step):
+            days, time_of_day = positions * self.step.n, (self.start - self.start.normalize()).value
+            business = isinstance(self.step, pd.offsets.BusinessDay)
+        elif self.sessions:
+            days, slots = np.divmod(positions, session_bars(self.freq))
+            time_of_day = SESSION_OPEN.value + slots * pd.Timedelta(self.step).value
+            business = True
+        else:
+            nanos = pd.Timedelta(self.step).value
+            if self.start.value + (offset + count - 1) * nanos > pd.Timestamp.max.value:
+                raise ValueError(f"날짜 범위 초과: {self.freq} 주기로 {offset + count:,}봉은 표현할 수 없습니다")
+            return (self.start.value + positions * nanos).view('datetime64[ns]')
+
+        first_day = np.datetime64(self.start.date(), 'D')
+        day = np.busday_offset(first_day, days, roll='forward') if business else first_day + days
+        if day[-1] > np.datetime64(pd.Timestamp.max.date(), 'D') - 1:
+            raise ValueError(f"날짜 범위 초과: {self.freq} 주기로 {offset + count:,}봉은 표현할 수 없습니다")
+        return (day.astype('datetime64[ns]').view(np.int64) + time_of_day).view('datetime64[ns]')
+
+    def _regime_path(self, rng, count, state):
+        """
+        국면 경로 생성 (구간 사이 국면과 남은 지속 기간을 state 로 이어 간다)
+
+        다음 국면은 출현 비중으로, 지속 기간은 국면별 평균의 기하분포로 뽑는다.
+        """
+        regime, remaining = state
+        take = min(remaining, count)
+        parts = [np.full(take, regime, dtype=np.int8)]
+        filled, remaining = take, remaining - take
+
+        while filled < count:
+            batch = max(16, int((count - filled) / self.duration.min()) + 1)
+            regimes = rng.choice(len(self.weights), size=batch, p=self.weights).astype(np.int8)
+            durations = rng.geometric(1.0 / np.maximum(self.duration[regimes], 1.0))
+            ends = np.cumsum(durations)
+            take = min(int(ends[-1]), count - filled)
+            parts.append(np.repeat(regimes, durations)[:take])
+            filled += take
+
+            # 마지막으로 쓴 봉이 속한 국면과 그 국면의 남은 기간은 다음 구간으로 넘긴다
+            last = int(np.searchsorted(ends, take))
+            regime, remaining = int(regimes[last]), int(ends[last] - take)
+
+        state[:] = [regime, remaining]
+        return np.concatenate(parts)
+
+    def chunks(self):
+        """
+        구간 단위 생성
+
+        Yields:
+            (int, dict): 시작 행, 컬럼 → 배열 ((봉 수,) 또는 종목이 여럿이면 (봉 수, 종목 수))
+        """
+        n_tickers = len(self.tickers)
+        log_low, log_high = np.log(self.price_range[0]), np.log(self.price_range[1])
+        sqrt_dt = np.sqrt(self.dt)
+        bars_per_day = self.bars_per_year / TRADING_DAYS
+
+        log_level = np.full(n_tickers, np.log(self.initial_price))  # 반사 전 누적 로그 가격
+        prev_close = np.full(n_tickers, self.initial_price)
+        state = [int(np.argmax(self.weights)), 0]
+        max_window = max(self.moving_averages, default=1)
+        tail = np.empty((0, n_tickers))
+
+        for chunk_index, offset in enumerate(range(0, self.n_bars, CHUNK_BARS)):
+            count = min(CHUNK_BARS, self.n_bars - offset)
+            rng = np.random.default_rng([self.seed, chunk_index])
+
+            regime = self._regime_path(rng, count, state)
+            mu = self.drift[regime][:, None]
+            sigma = self.volatility[regime][:, None]
+
+            # 공통 시장 충격 + 종목 고유 충격
+            market = rng.standard_normal((count, 1))
+            shocks = (np.sqrt(self.correlation) * market
+                      + np.sqrt(1 - self.correlation) * rng.standard_normal((count, n_tickers)))
+            underlying = (mu - 0.5 * sigma ** 2) * self.dt + sigma * sqrt_dt * shocks
+
+            # 레버리지는 봉 단위 단순 수익률에 적용 (일일 재조정 레버리지 ETF)
+            levered = self.leverage * np.expm1(underlying) - self.expense_ratio * self.dt
+            log_returns = np.log1p(np.maximum(levered, -0.95))
+
+            cumulative = log_level + np.cumsum(log_returns, axis=0)
+            log_level = cumulative[-1]
+            width = log_high - log_low
+            folded = np.mod(cumulative - log_low, 2 * width)
+            close = np.exp(log_low + width - np.abs(folded - width))
+
+            previous = np.vstack([prev_close, close[:-1]])
+            prev_close = close[-1]
+
+            # 시가 갭, 장중 고가/저가 확장은 봉 변동성에 비례
+            bar_sigma = self.leverage * sigma * sqrt_dt
+            open_ = previous * np.exp(0.3 * bar_sigma * rng.standard_normal((count, n_tickers)))
+            high = np.maximum(open_, close) * np.exp(0.5 * bar_sigma * rng.exponential(size=(count, n_tickers)))
+            low = np.minimum(open_, close) * np.exp(-0.5 * bar_sigma * rng.exponential(size=(count, n_tickers)))
+
+            # 거래량은 변동이 큰 봉에서 늘어난다
+            volume = (self.base_volume / bars_per_day
+                      * np.exp(0.35 * rng.standard_normal((count, n_tickers))) * (1 + np.abs(shocks)))
+
+            data = {
+                'close': close, 'open': open_, 'high': high, 'low': low, 'volume': volume,
+                'change_pct': (close / previous - 1) * 100,
+            }
+
+            # 이동평균 (이전 구간 끝부분을 이어 붙여 구간 경계에서도 연속)
+            extended = np.vstack([tail, close])
+            sums = np.vstack([np.zeros((1, n_tickers)), np.cumsum(extended, axis=0)])
+            for window in self.moving_averages:
+                ends = np.arange(len(tail) + 1, len(extended) + 1)
+                starts = ends - window
+                average = np.full((count, n_tickers), np.nan)
+                valid = (starts >= 0) & (offset + ends - len(tail) >= window)
+                average[valid] = (sums[ends[valid]] - sums[starts[valid]]) / window
+                data[f'MA{window}'] = average
+            tail = extended[-(max_window - 1):] if max_window > 1 else tail
+
+            if n_tickers == 1:
+                data = {name: values[:, 0] for name, values in data.items()}
+            yield offset, data
+
+    def column_dtypes(self, compact=False):
+        """저장 컬럼 형식 (compact: 가격/이동평균/등락률 float32, 거래량 int64)"""
+        if not compact:
+            return {'date': 'datetime64[ns]', **{name: np.float64 for name in self.columns[1:]}}
+        return {'date': 'datetime64[ns]',
+                **{name: COMPACT_VOLUME if name == 'volume' else COMPACT_FLOAT for name in self.columns[1:]}}
+
+    def frames(self, compact=False):
+        """
+        전체 데이터를 메모리에 생성
+
+        Args:
+            compact (bool): 압축 모드 형식으로 반환 (dataset.compact_frame)
+
+        Returns:
+            dict: 종목 이름 → DataFrame (load_data 결과 형식)
+        """
+        columns = {name: np.empty((self.n_bars, len(self.tickers))) for name in self.columns[1:]}
+        for offset, data in self.chunks():
+            for name, values in data.items():
+                columns[name][offset:offset + len(values)] = values.reshape(len(values), -1)
+
+        dates = self.dates(0, self.n_bars)
+        frames = {ticker: pd.DataFrame({'date': dates, **{name: values[:, i] for name, values in columns.items()}})
+                  for i, ticker in enumerate(self.tickers)}
+        if compact:
+            frames = {ticker: compact_frame(df) for ticker, df in frames.items()}
+        return frames
+
+    def frame(self):
+        """단일 종목 데이터 (load_data 결과 형식)"""
+        if len(self.tickers) != 1:
+            raise ValueError(f"종목이 {len(self.tickers)}개입니다. frames() 를 사용하세요")
+        return self.frames()[self.tickers[0]]
+
+    def write(self, directory, compact=False):
+        """
+        종목별 바이너리 데이터셋으로 직접 기록 (구간 단위, 메모리는 구간 크기만 사용)
+
+        Args:
+            compact (bool): 압축 모드 형식으로 저장 (봉당 바이트 수가 약 절반)
+
+        Returns:
+            dict: 종목 이름 → 데이터셋 디렉터리
+        """
+        dtypes = self.column_dtypes(compact)
+        paths = {ticker: os.path.join(directory, ticker) for ticker in self.tickers}
+        writers = {ticker: FrameWriter(path, self.n_bars, dtypes) for ticker, path in paths.items()}
+
+        for offset, data in self.chunks():
+            count = len(data['close'])
+            dates = self.dates(offset, count)
+            for i, ticker in enumerate(self.tickers):
+                columns = {name: (values if values.ndim == 1 else values[:, i]) for name, values in data.items()}
+                writers[ticker].write(offset, {'date': dates, **columns})
+
+        for ticker, writer in writers.items():
+            writer.close(ticker=ticker, generator=self.params())
+        return paths
+
+    def cache_key(self):
+        payload = json.dumps(self.params(), sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def load_or_generate(cache_dir=DEFAULT_CACHE_DIR, compact=False, **params):
+    """
+    생성 인자별로 캐시된 바이너리 데이터셋을 로드 (없으면 생성해 저장)
+
+    Args:
+        compact (bool): 압축 모드 형식 (float32 가격, int64 거래량)
+
+    Returns:
+        dict: 종목 이름 → DataFrame (메모리 맵, 읽기 전용)
+    """
+    generator = MarketGenerator(**params)
+    directory = os.path.join(cache_dir, generator.cache_key() + ('-compact' if compact else ''))
+    paths = {ticker: os.path.join(directory, ticker) for ticker in generator.tickers}
+    if not all(is_frame_dir(path) for path in paths.values()):
+        paths = generator.write(directory, compact)
+    return {ticker: load_frame(path) for ticker, path in paths.items()}
+
+
+def write_investing_csv(df, path):
+    """investing.com 내려받기 형식(최신 날짜가 위, 'M' 거래량, '%' 등락률)으로 저장"""
+    dates = df['date'].to_numpy(dtype='datetime64[ns]')
+    intraday = bool((dates.astype('datetime64[D]') != dates).any())
+    frame = pd.DataFrame({
+        'Date': (np.datetime_as_string(dates.astype('datetime64[m]'), unit='m') if intraday
+                 else pd.DatetimeIndex(dates).strftime('%m/%d/%Y')),
+        'Price': df['close'].round(2),
+        'Open': df['open'].round(2),
+        'High': df['high'].round(2),
+        'Low': df['low'].round(2),
+        'Vol.': (df['volume'] / 1_000_000).round(2).astype(str) + 'M',
+        'Change %': df['change_pct'].round(2).astype(str) + '%',
+    })
+    temp_path = f'{path}.{os.getpid()}.tmp'
+    frame.iloc[::-1].to_csv(temp_path, index=False)
+    os.replace(temp_path, path)
+
+
+def main():
+    """메인 실행 함수"""
+    parser = argparse.ArgumentParser(description='국면 전환 레버리지 GBM 합성 시장 데이터 생성')
+    parser.add_argument('--bars', type=int, default=100_000)
+    parser.add_argument('--tickers', type=int, default=1)
+    parser.add_argument('--freq', default='B', help="봉 주기 ('B', 'h', '5min', 'min' ...)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--start', default='2000-01-03')
+    parser.add_argument('--leverage', type=float, default=3.0)
+    parser.add_argument('--out', default=os.path.join('data', 'synthetic'), help='바이너리 데이터셋 디렉터리')
+    parser.add_argument('--csv', help='investing.com 형식 CSV 로도 저장 (단일 종목)')
+    parser.add_argument('--compact', action='store_true', help='압축 모드 형식 (float32 가격, int64 거래량)')
+    parser.add_argument('--continuous', action='store_true',
+                        help='장중 주기를 세션 없이 쉬지 않는 고정 간격으로 (긴 기간의 분봉)')
+    args = parser.parse_args()
+
+    try:
+        generator = MarketGenerator(args.bars, args.tickers, args.freq, args.seed, args.start, args.leverage,
+                                    sessions=not args.continuous)
+    except ValueError as e:
+        parser.error(str(e))
+    paths = generator.write(args.out, args.compact)
+    for ticker, path in paths.items():
+        df = load_frame(path)
+        print(f"{ticker}: {len(df):,}봉 {df['date'].iloc[0]} ~ {df['date'].iloc[-1]}, "
+              f"종가 {df['close'].min():.2f} ~ {df['close'].max():.2f} → {path}")
+        if args.csv and len(paths) == 1:
+            write_investing_csv(df, args.csv)
+            print(f"CSV 저장: {args.csv}")
+
+
+if __name__ == "__main__":
+    main()
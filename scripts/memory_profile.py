@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+메모리 프로파일링 / 할당 보고
+instrument 의 단계 타이머에 붙어 단계별 최대 RSS, tracemalloc 최대 사용량,
+상위 할당 위치, 거래 기록/계좌 장부의 봉당·계좌당 바이트를 보고한다.
+봉당 메모리 한도를 넘으면 실행을 실패로 끝낸다.
+
+차트 단계(plot_*, render)는 그리기 라이브러리가 처음 그릴 때 모듈과 스키마를 읽어 들여
+수십 MB 를 할당하므로 추적을 멈추고 실행한다 (RSS 만 보고, 봉당 한도에서 제외).
+
+진입점에서 사용:
+    python january_simulation_v2.py --profile-memory --memory-budget 20000
+"""
+
+import argparse
+import contextlib
+import os
+import sys
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+import instrument
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# 활성 프로파일러 (None 이면 비활성)
+_profiler = None
+
+# tracemalloc 추적을 멈추고 실행하는 단계 이름 접두어 (차트 출력)
+UNTRACED_PREFIXES = ('plot', 'render')
+
+
+def current_rss():
+    """현재 RSS(바이트), 측정할 수 없으면 None"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        pass
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    return None
+
+
+def peak_rss():
+    """프로세스 최대 RSS(바이트), 측정할 수 없으면 None"""
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux 는 KB, macOS 는 바이트 단위
+        return peak if sys.platform == 'darwin' else peak * 1024
+    if psutil is not None:
+        info = psutil.Process().memory_info()
+        return getattr(info, 'peak_wset', info.rss)
+    return None
+
+
+def deep_sizeof(obj):
+    """
+    객체가 참조하는 전체 메모리(바이트) 추정
+
+    list/dict/tuple/set 은 원소까지 따라가고, numpy 배열은 데이터 크기,
+    DataFrame 은 memory_usage(deep=True) 를 사용한다. 같은 객체는 한 번만 센다.
+    """
+    seen = set()
+    total = 0
+    stack = [obj]
+    while stack:
+        item = stack.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        if isinstance(item, pd.DataFrame):
+            total += int(item.memory_usage(deep=True).sum())
+        elif isinstance(item, np.ndarray):
+            total += sys.getsizeof(item) + (item.nbytes if item.base is not None else 0)
+        else:
+            total += sys.getsizeof(item)
+            if isinstance(item, dict):
+                stack.extend(item.keys())
+                stack.extend(item.values())
+            elif isinstance(item, (list, tuple, set, frozenset)):
+                stack.extend(item)
+    return total
+
+
+class MemoryProfiler:
+    def __init__(self, top=10, budget_per_bar=None, frames=1):
+        """
+        단계별 메모리 측정기 (instrument 기록기의 listener)
+
+        Args:
+            top (int): 보고할 상위 할당 위치 수
+            budget_per_bar (float): 봉당 최대 메모리 한도(바이트), None 이면 검사하지 않음
+            frames (int): 할당 위치마다 저장할 호출 스택 깊이 (추적을 다시 시작할 때 사용)
+        """
+        self.top = top
+        self.budget_per_bar = budget_per_bar
+        self.trace_frames = frames
+        self.paused_at = None  # 추적을 멈춘 단계의 깊이 (None 이면 추적 중)
+        self.frames = []  # 진행 중인 단계별 {'peak': 하위 단계 최대, 'max_rss': 시작 시 최대 RSS}
+        self.stages = {}  # 단계 경로 → {'calls', 'traced_peak', 'max_rss', 'rss_growth'}
+        self.overall_peak = 0
+        self.snapshot = None
+        self.snapshot_stage = None
+        self.snapshot_bytes = -1
+        self.footprints = []  # (이름, 바이트, 단위 수, 단위)
+        self.owns_recorder = False
+        self.bar_count = None  # 종료 시점에 고정한 봉 수 (기록기를 닫은 뒤에도 한도 검사에 사용)
+
+    def enter_stage(self, stack):
+        current, peak = tracemalloc.get_traced_memory()
+        if self.frames:
+            self.frames[-1]['peak'] = max(self.frames[-1]['peak'], peak)
+        self.overall_peak = max(self.overall_peak, peak)
+        tracemalloc.reset_peak()
+        self.frames.append({'peak': 0, 'max_rss': peak_rss()})
+        if self.paused_at is None and stack[-1].startswith(UNTRACED_PREFIXES):
+            # 이 단계에서 할당한 메모리는 추적을 다시 시작해도 잡히지 않는다
+            tracemalloc.stop()
+            self.paused_at = len(stack)
+
+    def exit_stage(self, stack, path):
+        """단계 종료: 하위 단계를 포함한 최대 사용량 기록, 가장 많이 남은 시점의 할당 위치 저장"""
+        current, peak = tracemalloc.get_traced_memory()
+        frame = self.frames.pop()
+        stage_peak = max(frame['peak'], peak)
+        if self.frames:
+            self.frames[-1]['peak'] = max(self.frames[-1]['peak'], stage_peak)
+        self.overall_peak = max(self.overall_peak, stage_peak)
+        tracemalloc.reset_peak()
+
+        max_rss = peak_rss()
+        growth = max_rss - frame['max_rss'] if max_rss is not None else None
+        entry = self.stages.setdefault(path, {'calls': 0, 'traced_peak': 0, 'max_rss': None, 'rss_growth': 0})
+        entry['calls'] += 1
+        entry['untraced'] = self.paused_at is not None
+        if self.paused_at == len(stack):
+            tracemalloc.start(self.trace_frames)
+            self.paused_at = None
+        entry['traced_peak'] = max(entry['traced_peak'], stage_peak)
+        entry['max_rss'] = max_rss
+        entry['rss_growth'] = max(entry['rss_growth'], growth or 0)
+
+        # 최상위 단계 바로 아래 단계가 끝난 시점에 남아 있는 메모리가 다음 단계로 넘어가는 데이터
+        if len(stack) <= 2 and current > self.snapshot_bytes and tracemalloc.is_tracing():
+            self.snapshot = tracemalloc.take_snapshot()
+            self.snapshot_stage = path
+            self.snapshot_bytes = current
+
+        return {'traced_peak': stage_peak, 'traced_current': current,
+                'rss': current_rss(), 'max_rss': max_rss, 'max_rss_growth': growth}
+
+    def add_footprint(self, name, size, units, unit):
+        self.footprints.append((name, size, units, unit))
+
+    def bars(self):
+        """봉당 메모리 계산에 쓰는 봉 수 (읽은 행 수와 시뮬레이션한 봉 수 중 큰 값)"""
+        if self.bar_count is not None:
+            return self.bar_count
+        recorder = instrument.active_recorder()
+        counters = recorder.counters if recorder is not None else {}
+        return max(counters.get('rows_parsed', 0), counters.get('bars', 0))
+
+    def bytes_per_bar(self):
+        bars = self.bars()
+        return self.overall_peak / bars if bars else None
+
+    def over_budget(self):
+        per_bar = self.bytes_per_bar()
+        return self.budget_per_bar is not None and per_bar is not None and per_bar > self.budget_per_bar
+
+    def report(self):
+        """메모리 보고서 문자열"""
+        lines = ["", "=== 메모리 프로파일 ===",
+                 f"{'단계':<40} {'호출':>5} {'tracemalloc 최대':>16} {'최대 RSS':>12} {'RSS 증가':>12}"]
+        for path, entry in sorted(self.stages.items()):
+            label = '  ' * path.count('/') + path.rsplit('/', 1)[-1]
+            traced = '제외' if entry.get('untraced') else format_bytes(entry['traced_peak'])
+            lines.append(f"{label:<40} {entry['calls']:>5} {traced:>16} "
+                         f"{format_bytes(entry['max_rss']):>12} {format_bytes(entry['rss_growth']):>12}")
+
+        if self.snapshot is not None:
+            lines.append(f"\n상위 할당 위치 ('{self.snapshot_stage}' 종료 시점, "
+                         f"추적 메모리 {format_bytes(self.snapshot_bytes)})")
+            for stat in self.snapshot.statistics('lineno')[:self.top]:
+                frame = stat.traceback[0]
+                lines.append(f"  {format_bytes(stat.size):>10} {stat.count:>9,}개  "
+                             f"{_short_path(frame.filename)}:{frame.lineno}")
+
+        if self.footprints:
+            lines.append("\n기록/장부 크기")
+            for name, size, units, unit in self.footprints:
+                per_unit = f"{size / units:,.1f} 바이트/{unit}" if units else '-'
+                lines.append(f"  {name:<24} {format_bytes(size):>10}  {units:>10,} {unit}  {per_unit}")
+
+        bars = self.bars()
+        per_bar = self.bytes_per_bar()
+        lines.append(f"\n최대 추적 메모리: {format_bytes(self.overall_peak)} "
+                     f"(봉 {bars:,}개, {per_bar:,.1f} 바이트/봉)" if per_bar is not None
+                     else f"\n최대 추적 메모리: {format_bytes(self.overall_peak)}")
+        if self.budget_per_bar is not None and per_bar is not None:
+            status = '초과' if self.over_budget() else '통과'
+            lines.append(f"메모리 한도: {self.budget_per_bar:,.0f} 바이트/봉 → {status}")
+        return '\n'.join(lines)
+
+
+def format_bytes(value):
+    if value is None:
+        return '-'
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if abs(value) < 1024 or unit == 'GB':
+            return f'{value:,.1f}{unit}'
+        value /= 1024
+
+
+def _short_path(filename):
+    parts = filename.replace('\\', '/').split('/')
+    return '/'.join(parts[-2:])
+
+
+def start(top=10, budget_per_bar=None, frames=1):
+    """
+    메모리 프로파일링 시작 (instrument 가 꺼져 있으면 기록 없이 켠다)
+
+    Args:
+        frames (int): 할당 위치마다 저장할 호출 스택 깊이
+    """
+    global _profiler
+    if _profiler is not None:
+        stop()
+    _profiler = MemoryProfiler(top, budget_per_bar, frames)
+    _profiler.owns_recorder = instrument.active_recorder() is None
+    recorder = instrument.active_recorder() or instrument.enable(None)
+    recorder.listeners.append(_profiler)
+    tracemalloc.start(frames)
+    return _profiler
+
+
+def stop(print_report=True):
+    """
+    메모리 프로파일링 종료
+
+    Returns:
+        MemoryProfiler: 측정 결과 (시작하지 않았으면 None)
+    """
+    global _profiler
+    profiler, _profiler = _profiler, None
+    if profiler is None:
+        return None
+    if tracemalloc.is_tracing():
+        profiler.overall_peak = max(profiler.overall_peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    profiler.bar_count = profiler.bars()
+    if print_report:
+        print(profiler.report())
+
+    recorder = instrument.active_recorder()
+    if recorder is not None and profiler in recorder.listeners:
+        recorder.listeners.remove(profiler)
+        if profiler.owns_recorder:
+            instrument.disable()
+    return profiler
+
+
+def footprint_simulator(simulator):
+    """시뮬레이터의 거래 기록(봉당)과 계좌 장부(계좌당) 크기 기록 (프로파일링 중일 때만)"""
+    if _profiler is None:
+        return
+    journals = {name: getattr(simulator, name) for name in ('trades', 'daily_results', 'portfolio_value', 'dates')
+                if hasattr(simulator, name)}
+    bars = len(journals.get('daily_results') or journals.get('portfolio_value') or [])
+    for name, journal in journals.items():
+        _profiler.add_footprint(f'journal.{name}', deep_sizeof(journal), bars, '봉')
+
+    if hasattr(simulator, 'accounts'):
+        # 통합 엔진은 계좌 장부를 컬럼 배열로 들고 있다
+        engine_book = getattr(simulator, 'book', None)
+        book = [engine_book.columns, engine_book.filled] if engine_book is not None else [simulator.accounts]
+        if hasattr(simulator, 'exit_book'):
+            book.append(vars(simulator.exit_book))
+        _profiler.add_footprint('account_book', deep_sizeof(book), len(simulator.accounts), '계좌')
+
+
+def footprint_frame(df, name='price_frame'):
+    """가격 데이터 크기 기록 (행당, 프로파일링 중일 때만)"""
+    if _profiler is None:
+        return
+    _profiler.add_footprint(name, int(df.memory_usage(deep=True).sum()), len(df), '봉')
+
+
+@contextlib.contextmanager
+def command_line(argv=None):
+    """
+    진입점 공용 --profile-memory 옵션 처리
+
+    --profile-memory        단계별 메모리 보고
+    --memory-budget N       봉당 최대 메모리(바이트), 넘으면 종료 코드 1
+    --memory-top N          상위 할당 위치 수
+    """
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument('--profile-memory', action='store_true')
+    parser.add_argument('--memory-budget', type=float)
+    parser.add_argument('--memory-top', type=int, default=10)
+    args, _ = parser.parse_known_args(argv)
+    if not args.profile_memory:
+        yield None
+        return
+
+    profiler = start(args.memory_top, args.memory_budget)
+    try:
+        yield profiler
+    finally:
+        stop()
+    if profiler.over_budget():
+        print(f"메모리 한도 초과: {profiler.bytes_per_bar():,.1f} 바이트/봉 > {args.memory_budget:,.0f} 바이트/봉")
+        sys.exit(1)
@@ -0,0 +1,429 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+적응형 인자 탐색 (진화 전략) + 조기 중단
+격자 전체를 돌리지 않고, 시뮬레이터를 블랙박스 목적 함수로 감싸 좋은 후보 주변만 탐색한다.
+
+    - 세대마다 후보 묶음을 프로세스 풀에서 병렬 평가
+    - 후보 하나는 기간을 몇 단계로 나눠 실행하고, 단계 끝마다 최대 낙폭이 한도를 넘으면
+      나머지 기간을 실행하지 않고 중단(pruned)한다 (다음 단계는 snapshot.resume 으로 이어서 실행)
+    - 평가한 후보는 시행 기록 파일(JSONL)에 바로 남겨, 같은 파일로 다시 실행하면 이어서 탐색하고
+      이미 평가한 인자 조합은 다시 실행하지 않는다
+
+사용법:
+    python optimizer.py --sim rules --param up_buy=0.95:1.05:0.01 --param down_buy=0.95:1.05:0.01 \\
+        --param up_sell=0.02:0.14:0.01 --param down_sell=0.02:0.10:0.01 --max-drawdown 30
+    python optimizer.py --sim trading --param position_size=5,10,20,40 --generations 3
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from instrument import count, timed
+from memory_profile import command_line
+from range_runner import (SIMULATORS, get_simulator_class, run_range, simulator_warmup, slice_with_warmup,
+                          summarize)
+from snapshot import read_snapshot, resume, simulator_frame, take_snapshot
+
+# 목적 함수로 쓸 수 있는 지표 (클수록 좋다)
+OBJECTIVES = ('total_return_pct', 'return_over_drawdown')
+
+# 시행 기록 기본 저장 위치
+DEFAULT_STUDY_DIR = os.path.join('results', 'optimizer')
+
+
+def parse_dimension(spec):
+    """
+    탐색 범위 해석
+
+        '시작:끝'       연속 구간
+        '시작:끝:간격'  간격만큼 떨어진 값 목록
+        '값1,값2,...'  값 목록 (숫자가 아니면 문자열)
+
+    Returns:
+        dict: low/high (연속) 또는 levels (값 목록)
+    """
+    if ':' in spec:
+        parts = [float(value) for value in spec.split(':')]
+        if len(parts) == 2:
+            return {'low': min(parts), 'high': max(parts)}
+        start, stop, step = parts
+        levels = np.round(np.arange(start, stop + step / 2, step), 10).tolist()
+        if all(float(value).is_integer() for value in (start, stop, step)):
+            levels = [int(value) for value in levels]
+        return {'levels': levels}
+    levels = []
+    for value in spec.split(','):
+        try:
+            levels.append(json.loads(value))
+        except json.JSONDecodeError:
+            levels.append(value)
+    return {'levels': levels}
+
+
+class SearchSpace:
+    """인자별 탐색 범위와 후보 생성/변이"""
+
+    def __init__(self, dimensions):
+        """
+        Args:
+            dimensions (dict): 인자 이름 → parse_dimension 결과
+        """
+        self.dimensions = dict(dimensions)
+
+    def grid_size(self):
+        """같은 범위를 격자로 돌릴 때의 조합 수 (연속 구간이 있으면 None)"""
+        if any('levels' not in dim for dim in self.dimensions.values()):
+            return None
+        return math.prod(len(dim['levels']) for dim in self.dimensions.values())
+
+    def sample(self, rng):
+        """범위 안의 무작위 후보"""
+        params = {}
+        for name, dim in self.dimensions.items():
+            if 'levels' in dim:
+                params[name] = dim['levels'][rng.integers(len(dim['levels']))]
+            else:
+                params[name] = round(float(rng.uniform(dim['low'], dim['high'])), 6)
+        return params
+
+    def crossover(self, first, second, rng):
+        """인자마다 두 부모 중 하나의 값을 고른다"""
+        return {name: (first if rng.random() < 0.5 else second)[name] for name in self.dimensions}
+
+    def mutate(self, params, scale, rng):
+        """
+        정규 분포 변이
+
+        Args:
+            scale (float): 범위 폭 대비 표준편차 (세대가 지날수록 줄인다)
+        """
+        mutated = dict(params)
+        for name, dim in self.dimensions.items():
+            if 'levels' in dim:
+                levels = dim['levels']
+                index = levels.index(params[name]) if params[name] in levels else rng.integers(len(levels))
+                shift = int(round(rng.normal(0, scale * len(levels))))
+                mutated[name] = levels[int(np.clip(index + shift, 0, len(levels) - 1))]
+            else:
+                value = params[name] + rng.normal(0, scale * (dim['high'] - dim['low']))
+                mutated[name] = round(float(np.clip(value, dim['low'], dim['high'])), 6)
+        return mutated
+
+
+def stage_ends(data, start_date, end_date, stages):
+    """기간을 거래일 수로 stages 등분한 단계별 종료일"""
+    dates = data['date']
+    window = dates[(dates >= pd.to_datetime(start_date)) & (dates <= pd.to_datetime(end_date))].reset_index(drop=True)
+    if window.empty:
+        return [pd.to_datetime(end_date)]
+    positions = sorted({max(int(round(len(window) * k / stages)) - 1, 0) for k in range(1, stages + 1)})
+    return [window.iloc[p] for p in positions]
+
+
+def score(summary, objective):
+    """요약의 목적 함수 값"""
+    if objective == 'return_over_drawdown':
+        return summary['total_return_pct'] / max(summary['max_drawdown_pct'], 1.0)
+    return summary[objective]
+
+
+def evaluate(simulator_name, data, start_date, end_date, params, stages=4, max_drawdown=None,
+             objective='total_return_pct'):
+    """
+    후보 하나를 단계별로 실행
+
+    첫 단계는 run_range 와 같고, 이후 단계는 같은 시뮬레이터를 스냅샷 커서에서 이어서 실행하므로
+    끝까지 실행한 결과는 전체 기간 run_range 결과와 같다.
+
+    Args:
+        data (DataFrame): 기간과 워밍업 구간만 자른 데이터
+        params (dict): 시뮬레이터 생성 인자
+        stages (int): 낙폭을 확인할 단계 수
+        max_drawdown (float): 최대 낙폭 한도 (%), 넘으면 그 단계에서 중단
+
+    Returns:
+        dict: 시행 결과 (status: complete/pruned, stage, score, 구간 요약)
+    """
+    ends = stage_ends(data, start_date, end_date, stages)
+    simulator, summary = run_range(simulator_name, data, start_date, ends[0], params, quiet=True)
+    frame = simulator_frame(simulator, data, start_date, ends[0])
+    stage = 1
+    while True:
+        if max_drawdown is not None and summary['max_drawdown_pct'] > max_drawdown:
+            status = 'pruned'
+            count('trials_pruned')
+            break
+        if stage == len(ends):
+            status = 'complete'
+            break
+        header, _ = read_snapshot(take_snapshot(simulator, frame, include_journals=False))
+        with contextlib.redirect_stdout(io.StringIO()):
+            frame = resume(simulator, header, data, ends[stage])
+        stage += 1
+        summary = summarize(simulator, start_date, ends[stage - 1])
+    count('stages_run', stage)
+
+    result = {
+        'params': params,
+        'status': status,
+        'stage': stage,
+        'stages': len(ends),
+        'score': score(summary, objective) if status == 'complete' else None,
+    }
+    result.update({key: (value.strftime('%Y-%m-%d') if isinstance(value, pd.Timestamp) else value)
+                   for key, value in summary.items()})
+    return result
+
+
+# 작업 프로세스별 평가 상태 (데이터는 프로세스마다 한 번만 전달)
+_OBJECTIVE = None
+
+
+def _init_worker(objective):
+    global _OBJECTIVE
+    _OBJECTIVE = objective
+
+
+def _evaluate(params):
+    """프로세스 풀 작업 함수"""
+    return _OBJECTIVE(params)
+
+
+class Objective:
+    """시뮬레이터를 감싼 블랙박스 목적 함수 (생성 인자 dict → 시행 결과)"""
+
+    def __init__(self, simulator_name, data, start_date, end_date, fixed=None, stages=4,
+                 max_drawdown=None, objective='total_return_pct'):
+        """
+        Args:
+            simulator_name (str): range_runner.SIMULATORS 키
+            data (DataFrame): 기간과 워밍업 구간만 자른 데이터 (slice_with_warmup)
+            fixed (dict): 탐색하지 않는 생성 인자
+        """
+        self.simulator_name = simulator_name
+        self.data = data
+        self.start_date = start_date
+        self.end_date = end_date
+        self.fixed = dict(fixed or {})
+        self.stages = stages
+        self.max_drawdown = max_drawdown
+        self.objective = objective
+
+    def __call__(self, params):
+        result = evaluate(self.simulator_name, self.data, self.start_date, self.end_date,
+                          dict(self.fixed, **params), self.stages, self.max_drawdown, self.objective)
+        result['params'] = params
+        return result
+
+    @timed('evaluate_batch')
+    def evaluate_batch(self, candidates, max_workers=None):
+        """후보 묶음을 병렬 평가 (후보 순서대로의 시행 결과)"""
+        max_workers = max_workers or os.cpu_count()
+        if max_workers == 1 or len(candidates) <= 1:
+            return [self(params) for params in candidates]
+        with ProcessPoolExecutor(max_workers, initializer=_init_worker, initargs=(self,)) as executor:
+            return list(executor.map(_evaluate, candidates))
+
+
+def _trial_key(params):
+    return json.dumps(params, sort_keys=True, default=str)
+
+
+class EvolutionarySearch:
+    """
+    (mu + lambda) 진화 전략
+
+    세대마다 상위 후보(elite)를 남기고, 토너먼트로 고른 부모를 교차/변이해 새 후보를 만든다.
+    변이 폭은 세대마다 decay 배로 줄어 점점 좋은 영역 주변만 찾는다.
+    """
+
+    def __init__(self, space, objective, population=16, elite=4, scale=0.25, decay=0.7, seed=0,
+                 study_path=None):
+        """
+        Args:
+            space (SearchSpace): 탐색 범위
+            objective (Objective): 목적 함수
+            population (int): 세대별 후보 수
+            elite (int): 다음 세대 부모로 남길 상위 후보 수
+            scale (float): 첫 세대 변이 폭 (범위 대비)
+            study_path (str): 시행 기록 파일 (JSONL, 있으면 이어서 탐색)
+        """
+        self.space = space
+        self.objective = objective
+        self.population = population
+        self.elite = elite
+        self.scale = scale
+        self.decay = decay
+        self.seed = seed
+        self.study_path = study_path
+        self.trials = []
+        self.seen = {}
+        if study_path and os.path.exists(study_path):
+            self.load(study_path)
+
+    def load(self, path):
+        """시행 기록 불러오기 (같은 목적/기간으로 만든 기록인지 확인)"""
+        with open(path, encoding='utf-8') as f:
+            lines = [json.loads(line) for line in f if line.strip()]
+        if not lines:
+            return
+        header, trials = lines[0], lines[1:]
+        if header.get('study') != self.describe():
+            raise ValueError(f"시행 기록의 탐색 설정이 다릅니다: {path}")
+        for trial in trials:
+            self.trials.append(trial)
+            self.seen[_trial_key(trial['params'])] = trial
+        print(f"시행 기록 {len(trials)}개 불러옴: {path}")
+
+    def describe(self):
+        """시행 기록 파일 머리에 남기는 탐색 설정"""
+        objective = self.objective
+        return {
+            'simulator': objective.simulator_name,
+            'start': pd.to_datetime(objective.start_date).strftime('%Y-%m-%d'),
+            'end': pd.to_datetime(objective.end_date).strftime('%Y-%m-%d'),
+            'fixed': objective.fixed,
+            'stages': objective.stages,
+            'max_drawdown': objective.max_drawdown,
+            'objective': objective.objective,
+            'space': self.space.dimensions,
+        }
+
+    def _append(self, trials):
+        if not self.study_path:
+            return
+        os.makedirs(os.path.dirname(self.study_path) or '.', exist_ok=True)
+        new_file = not os.path.exists(self.study_path) or os.path.getsize(self.study_path) == 0
+        with open(self.study_path, 'a', encoding='utf-8') as f:
+            if new_file:
+                f.write(json.dumps({'study': self.describe()}, ensure_ascii=False, default=str) + '\n')
+            for trial in trials:
+                f.write(json.dumps(trial, ensure_ascii=False, default=str) + '\n')
+
+    def ranked(self):
+        """끝까지 실행한 시행을 점수 순으로"""
+        return sorted((t for t in self.trials if t['status'] == 'complete'), key=lambda t: -t['score'])
+
+    @property
+    def generation(self):
+        return max((t['generation'] for t in self.trials), default=-1) + 1
+
+    def propose(self, rng, generation):
+        """
+        새 세대 후보 (이미 평가한 조합과 세대 안의 중복은 빼고 만든다)
+
+        변이 폭이 줄어 부모 주변에 새 조합이 남지 않으면 나머지는 무작위 후보로 채운다.
+        """
+        parents = self.ranked()[:self.elite]
+        scale = self.scale * self.decay ** generation
+        candidates = {}
+        for attempt in range(self.population * 40):
+            if len(candidates) >= self.population:
+                break
+            if len(parents) < 2 or attempt >= self.population * 20:
+                params = self.space.sample(rng)
+            else:
+                # 토너먼트 선택: 상위 후보 중 둘을 뽑아 나은 쪽
+                first, second = (parents[min(rng.choice(len(parents), 2))] for _ in range(2))
+                params = self.space.mutate(self.space.crossover(first['params'], second['params'], rng),
+                                           scale, rng)
+            key = _trial_key(params)
+            if key not in self.seen and key not in candidates:
+                candidates[key] = params
+        return list(candidates.values())
+
+    def run(self, generations=8, max_workers=None):
+        """
+        탐색 실행
+
+        Returns:
+            list[dict]: 끝까지 실행한 시행 (점수 순)
+        """
+        first = self.generation
+        for generation in range(first, first + generations):
+            rng = np.random.default_rng([self.seed, generation])
+            candidates = self.propose(rng, generation)
+            if not candidates:
+                print(f"세대 {generation}: 새 후보 없음 (탐색 범위를 모두 평가)")
+                break
+            results = self.objective.evaluate_batch(candidates, max_workers)
+            for trial_number, result in enumerate(results, len(self.trials)):
+                result.update(trial=trial_number, generation=generation)
+            self.trials.extend(results)
+            self.seen.update((_trial_key(r['params']), r) for r in results)
+            self._append(results)
+            count('trials', len(results))
+
+            best = self.ranked()[:1]
+            pruned = sum(r['status'] == 'pruned' for r in results)
+            best_text = (f"최고 {best[0]['score']:.2f} @ {best[0]['params']}" if best
+                         else "끝까지 실행한 후보 없음")
+            print(f"세대 {generation}: {len(results)}개 평가 (중단 {pruned}개), {best_text}")
+        return self.ranked()
+
+
+@timed('main')
+def main():
+    """메인 실행 함수"""
+    parser = argparse.ArgumentParser(description='적응형 인자 탐색 (진화 전략, 낙폭 조기 중단)')
+    parser.add_argument('--data', default='SOXL_2y.csv', help='가격 데이터 CSV')
+    parser.add_argument('--sim', default='rules', choices=sorted(SIMULATORS))
+    parser.add_argument('--start', default='2024-01-02', help='시작일 (YYYY-MM-DD)')
+    parser.add_argument('--end', default='2024-12-27', help='종료일 (YYYY-MM-DD)')
+    parser.add_argument('--param', action='append', default=[],
+                        help="탐색 범위 (예: up_sell=0.02:0.14, up_sell=0.02:0.14:0.01, position_size=10,20,40)")
+    parser.add_argument('--set', action='append', default=[], help='고정할 생성 인자 (예: rules="outline")')
+    parser.add_argument('--objective', default='total_return_pct', choices=OBJECTIVES, help='최대화할 지표')
+    parser.add_argument('--max-drawdown', type=float, default=None, help='최대 낙폭 한도 (%%), 넘으면 조기 중단')
+    parser.add_argument('--stages', type=int, default=4, help='낙폭을 확인할 단계 수')
+    parser.add_argument('--population', type=int, default=16, help='세대별 후보 수')
+    parser.add_argument('--elite', type=int, default=4, help='부모로 남길 상위 후보 수')
+    parser.add_argument('--generations', type=int, default=8, help='이번 실행의 세대 수')
+    parser.add_argument('--seed', type=int, default=0, help='난수 시드')
+    parser.add_argument('--workers', type=int, default=None, help='프로세스 수')
+    parser.add_argument('--study', default=None,
+                        help=f'시행 기록 파일 (기본: {DEFAULT_STUDY_DIR}/<시뮬레이터>.jsonl, 있으면 이어서 탐색)')
+    args, _ = parser.parse_known_args()
+
+    if not args.param:
+        parser.error('--param 을 하나 이상 지정하세요')
+    space = SearchSpace({name: parse_dimension(spec) for name, spec in (item.split('=', 1) for item in args.param)})
+    fixed = {name: json.loads(value) for name, value in (item.split('=', 1) for item in args.set)}
+
+    df = get_simulator_class(args.sim)().load_data(args.data)
+    data, _ = slice_with_warmup(df, args.start, args.end, simulator_warmup(args.sim, fixed))
+    objective = Objective(args.sim, data, args.start, args.end, fixed, args.stages, args.max_drawdown,
+                          args.objective)
+    study = args.study or os.path.join(DEFAULT_STUDY_DIR, f'{args.sim}.jsonl')
+    search = EvolutionarySearch(space, objective, args.population, args.elite, seed=args.seed, study_path=study)
+    ranked = search.run(args.generations, args.workers)
+
+    print("\n=== 상위 후보 ===")
+    for trial in ranked[:5]:
+        print(f"{trial['score']:10.2f}  수익률 {trial['total_return_pct']:8.2f}%  "
+              f"낙폭 {trial['max_drawdown_pct']:6.2f}%  거래 {trial['total_trades']:4d}  {trial['params']}")
+    grid = space.grid_size()
+    evaluated = len(search.trials)
+    stages_run = sum(t['stage'] for t in search.trials)
+    full = sum(t['stages'] for t in search.trials)
+    print(f"\n평가 {evaluated}개" + (f" (격자 {grid:,}개의 {evaluated / grid * 100:.2f}%)" if grid else "")
+          + f", 실행 단계 {stages_run}/{full} (조기 중단으로 {100 - stages_run / max(full, 1) * 100:.0f}% 절약)")
+    print(f"시행 기록: {study}")
+
+
+if __name__ == "__main__":
+    # 한글 인코딩 설정 (다른 모듈에서 import 할 때는 stdout 을 건드리지 않는다)
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+    # --profile-memory: 단계별 메모리 보고
+    with command_line():
+        main()
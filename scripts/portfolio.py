@@ -0,0 +1,381 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+여러 종목 분할 매매 포트폴리오
+SOXL 과 인버스(SOXS), 다른 레버리지 ETF 를 자본 하나로 함께 운용한다.
+
+종목들을 공통 거래일 달력에 맞춘 (봉 x 종목) 배열로 만들고, 규칙 DSL 의 봉 조건은
+전체 배열에서 한 번에, 매도 조건과 목표가/손절가 청산은 봉마다 (종목 x 계좌) 배열에서
+한 번에 계산한다. 봉당 비용은 종목 수만큼의 파이썬 반복이 아니라 배열 폭에 비례한다.
+
+    - 종목마다 분할 수(position_size)만큼 계좌를 두고, 매수 금액은 초기 자본 / 분할 수
+    - 현금은 모든 종목이 함께 쓰며 현금이 모자라면 남은 매수는 건너뛴다
+      (같은 봉에서는 각 종목의 첫 분할부터 차례로 매수해 한 종목이 현금을 독차지하지 않는다)
+    - 거래가 없는 날(휴장, 상장 전)의 봉은 판단하지 않고, 평가액은 마지막 종가로 계산
+
+사용법:
+    python portfolio.py --data SOXL_2y.csv SOXS_2y.csv --start 2024-01-02 --end 2024-12-27
+    python portfolio.py --generate 50 --bars 5000 --rules outline --capital 100000 --splits 100
+"""
+
+import argparse
+import io
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from dataset import TradingCalendar, is_frame_dir, load_frame
+from engine import AccountBook, IndicatorCache, Journal, performance, read_price_csv
+from exit_engine import EXIT_REASONS
+from instrument import count, timed
+from market_generator import MarketGenerator
+from memory_profile import command_line
+from rules import RULE_SETS
+from strategies import RuleStrategy
+
+# 봉 배열 가격 컬럼
+PANEL_COLUMNS = ('open', 'high', 'low', 'close')
+
+
+class PricePanel:
+    """여러 종목을 공통 거래일 달력에 맞춘 (봉 x 종목) 가격 배열"""
+
+    def __init__(self, frames, indicators=(60,)):
+        """
+        Args:
+            frames (dict): 종목 이름 → load_data 결과 (날짜 오름차순)
+            indicators (tuple): 함께 계산할 이동평균 창 (종목별 자기 봉으로 계산한 뒤 맞춘다)
+        """
+        self.tickers = list(frames)
+        dates = {ticker: df['date'].to_numpy(dtype='datetime64[ns]') for ticker, df in frames.items()}
+        self.calendar = TradingCalendar(np.unique(np.concatenate(list(dates.values()))), check=False)
+
+        shape = (len(self.calendar), len(self.tickers))
+        names = list(PANEL_COLUMNS) + ['prev_close'] + [f'MA{w}' for w in indicators]
+        self.columns = {name: np.full(shape, np.nan) for name in names}
+        self.present = np.zeros(shape, dtype=bool)
+        for k, (ticker, df) in enumerate(frames.items()):
+            rows = np.searchsorted(self.calendar.dates, dates[ticker])
+            cache = IndicatorCache(df)
+            for name in PANEL_COLUMNS:
+                self.columns[name][rows, k] = cache.column(name)
+            # 전날 종가는 그 종목의 직전 거래 봉 (다른 종목만 거래한 날은 건너뛴다)
+            self.columns['prev_close'][rows[1:], k] = cache.column('close')[:-1]
+            for window in indicators:
+                self.columns[f'MA{window}'][rows, k] = cache.sma(window)
+            self.present[rows, k] = True
+
+    def __len__(self):
+        return len(self.calendar)
+
+    def window_bars(self, start_date=None, end_date=None):
+        """
+        기간 봉 배열
+
+        Returns:
+            dict: date (봉,) 와 가격/이동평균 (봉 x 종목) 배열 (복사 없는 슬라이스),
+                  mark (봉 x 종목, 거래가 없는 봉은 직전 종가) 평가 가격
+        """
+        first, last = self.calendar.locate(start_date, end_date)
+        bars = {'date': self.calendar.dates[first:last]}
+        bars.update((name, values[first:last]) for name, values in self.columns.items())
+
+        # 평가 가격: 종목별 마지막 종가를 앞으로 채운다 (상장 전은 0)
+        close = self.columns['close'][:last]
+        seen = np.where(self.present[:last], np.arange(last)[:, None], -1)
+        latest = np.maximum.accumulate(seen, axis=0)[first:]
+        mark = np.take_along_axis(close, np.maximum(latest, 0), axis=0)
+        bars['mark'] = np.where(latest >= 0, mark, 0.0)
+        return bars
+
+
+class PortfolioEngine:
+    """자본 하나를 여러 종목의 분할 계좌가 함께 쓰는 포트폴리오 엔진"""
+
+    def __init__(self, strategy=None, initial_capital=10000, position_size=20, exit_order='olhc'):
+        """
+        Args:
+            strategy (RuleStrategy | str): 분할 매매 전략 또는 규칙 이름 (기본: january_v2)
+            initial_capital (int): 모든 종목이 함께 쓰는 초기 자본
+            position_size (int): 분할 수 (1회 매수 금액 = 초기 자본 / 분할 수)
+            exit_order (str): 봉 내부 가격 경로 가정 ('ohlc' 또는 비관적 'olhc')
+        """
+        if strategy is None or isinstance(strategy, str):
+            strategy = RuleStrategy(strategy or 'january_v2')
+        self.strategy = strategy
+        self.initial_capital = initial_capital
+        self.position_size = position_size
+        self.cash_per_trade = initial_capital / position_size
+        self.exit_order = exit_order
+        self.journal = Journal()
+        self.tickers = []
+        self.book = None
+        self.cash = initial_capital
+
+    @property
+    def trades(self):
+        return self.journal.trades
+
+    @property
+    def daily_results(self):
+        return self.journal.daily_results
+
+    @timed('load_panel')
+    def load_panel(self, paths):
+        """
+        종목별 가격 데이터(CSV 또는 바이너리 데이터셋)를 읽어 공통 달력 배열로
+
+        Args:
+            paths (dict): 종목 이름 → 경로
+        """
+        frames = {ticker: load_frame(path) if is_frame_dir(path) else read_price_csv(path)
+                  for ticker, path in paths.items()}
+        count('rows_parsed', sum(len(df) for df in frames.values()))
+        return PricePanel(frames, self.strategy.indicators)
+
+    @timed('execute_trading')
+    def execute_trading(self, panel, start_date=None, end_date=None):
+        """
+        포트폴리오 트레이딩 실행
+
+        봉마다 (매수 → 조건부 매도 → 목표가/손절가 청산 → 평가) 순서는 분할 엔진과 같고,
+        각 단계는 모든 종목의 계좌를 한 번에 처리한다.
+
+        Args:
+            panel (PricePanel): 시작일 이전 구간(이평선 워밍업)을 포함한 종목별 가격 배열
+            start_date, end_date: 시뮬레이션 기간 (양 끝 포함, None 이면 데이터 처음/끝)
+
+        Returns:
+            (list, list): 거래 기록, 일별 결과
+        """
+        bars = panel.window_bars(start_date, end_date)
+        n, n_tickers = bars['close'].shape
+        n_accounts = self.position_size
+        self.tickers = panel.tickers
+        if n == 0:
+            return self.trades, self.daily_results
+        print(f"{pd.Timestamp(bars['date'][0]).strftime('%Y-%m-%d')} ~ "
+              f"{pd.Timestamp(bars['date'][-1]).strftime('%Y-%m-%d')} "
+              f"{n_tickers}종목 포트폴리오 시뮬레이션 시작...")
+
+        # 봉 조건은 (봉 x 종목) 배열을 펼쳐 기간 전체를 한 번에 계산
+        flat = {name: values.ravel() for name, values in bars.items() if name not in ('date', 'mark')}
+        plan = self.strategy.plan(flat)
+        buy = plan['buy'].reshape(n, n_tickers)
+        step = plan['step'].reshape(n, n_tickers)
+        buy_bars = np.flatnonzero(buy.any(axis=1))
+
+        # 계좌는 종목 순서로 n_accounts 개씩 (계좌 현금은 매수할 때 공동 현금에서 받는다)
+        self.book = book = AccountBook(n_tickers * n_accounts, 0.0, self.exit_order)
+        accounts = {name: values.reshape(n_tickers, n_accounts) for name, values in book.columns.items()}
+        owner = np.repeat(np.arange(n_tickers), n_accounts)
+        columns = np.arange(n_tickers)
+        values = np.empty(n)
+        cash = np.empty(n)
+        filled = np.zeros(n, dtype=np.int64)
+
+        i = 0
+        while i < n:
+            if not book.filled.any():
+                # 체결된 계좌가 없으면 다음 매수 봉까지 평가액은 현금 그대로
+                next_buy = buy_bars[np.searchsorted(buy_bars, i):]
+                stop = int(next_buy[0]) if len(next_buy) else n
+                values[i:stop] = cash[i:stop] = self.cash
+                i = stop
+                if i >= n:
+                    break
+
+            date = pd.Timestamp(bars['date'][i])
+            open_row = bars['open'][i]
+            if buy[i].any():
+                self._buy(date, open_row, buy[i], step[i], n_accounts, i)
+            if book.filled.any():
+                sell_price = open_row * self.strategy.sell_price_rate
+                rows = i * n_tickers + columns
+                mask = book.filled & self.strategy.sell_masks(bars, plan, rows, accounts).ravel()
+                targets = np.flatnonzero(mask)
+                if len(targets):
+                    self._sell(date, targets, sell_price[owner[targets]])
+
+            # 장중 목표가/손절가 청산 (거래가 없는 종목은 NaN 이라 청산되지 않는다)
+            indices, reasons, prices = book.exit_book.check(i, open_row[owner], bars['high'][i][owner],
+                                                            bars['low'][i][owner])
+            if len(indices):
+                self._sell(date, indices, prices, reasons)
+
+            held = accounts['shares'].sum(axis=1)
+            values[i] = self.cash + float(held @ bars['mark'][i])
+            cash[i] = self.cash
+            filled[i] = int(book.filled.sum())
+            i += 1
+
+        self.journal.daily_results = [{
+            'date': pd.Timestamp(date),
+            'cash': c,
+            'total_value': value,
+            'filled_accounts': f,
+            'total_return_pct': (value - self.initial_capital) / self.initial_capital * 100,
+        } for date, c, value, f in zip(bars['date'], cash.tolist(), values.tolist(), filled.tolist())]
+        self.last_mark = bars['mark'][-1]
+        count('bars', n)
+        count('ticker_bars', n * n_tickers)
+        print(f"시뮬레이션 완료: {len(self.trades)}회 거래")
+        return self.trades, self.daily_results
+
+    def _buy(self, date, open_row, buy_row, step_row, n_accounts, bar_index):
+        """
+        매수 봉인 종목들의 등차수열 매수 (공동 현금 안에서)
+
+        종목마다 빈 계좌를 번호 순서로 기준가에서 등차만큼 낮춰 가며 매수하고,
+        현금이 모자라면 분할 순서(각 종목의 첫 분할 → 두 번째 분할 ...)로 살 수 있는 만큼만 산다.
+        """
+        book = self.book
+        n_tickers = len(open_row)
+        empty = ~book.filled.reshape(n_tickers, n_accounts)
+        rank = np.cumsum(empty, axis=1) - 1
+        base_price = open_row * self.strategy.buy_base_rate
+        with np.errstate(invalid='ignore'):
+            prices = base_price[:, None] - step_row[:, None] * rank
+            candidates = buy_row[:, None] & empty & (prices > 0)  # 가격이 양수일 때만 매수
+        count('accounts_scanned', empty.size)
+
+        # (분할, 종목) 순서로 펼쳐 공동 현금으로 살 수 있는 만큼
+        order = np.flatnonzero(candidates.T)
+        affordable = int(self.cash / self.cash_per_trade + 1e-9)
+        if affordable < len(order):
+            count('orders_skipped', len(order) - affordable)
+            order = order[:affordable]
+        if len(order) == 0:
+            return
+        split, ticker = np.divmod(order, n_tickers)
+        indices = ticker * n_accounts + split
+        count('orders', len(indices))
+
+        book.columns['cash'][indices] = self.cash_per_trade
+        shares, amounts = book.buy(indices, prices[ticker, split], bar_index)
+        self.cash -= float(amounts.sum())
+        self._record(date, 'BUY', indices, prices[ticker, split], shares, amounts, n_accounts)
+
+    def _sell(self, date, indices, prices, reasons=None):
+        """계좌 전량 매도 후 매도 금액을 공동 현금으로"""
+        count('orders', len(indices))
+        shares, amounts = self.book.sell(indices, prices)
+        self.book.columns['cash'][indices] = 0
+        self.cash += float(amounts.sum())
+        self._record(date, 'SELL', indices, prices, shares, amounts, self.position_size, reasons)
+
+    def _record(self, date, action, indices, prices, shares, amounts, n_accounts, reasons=None):
+        ticker, account = np.divmod(indices, n_accounts)
+        records = [{'date': date, 'ticker': self.tickers[t], 'account': a + 1, 'action': action,
+                    'price': price, 'shares': share, 'amount': amount}
+                   for t, a, price, share, amount
+                   in zip(ticker.tolist(), account.tolist(), prices.tolist(), shares.tolist(), amounts.tolist())]
+        if reasons is not None:
+            for record, reason in zip(records, reasons.tolist()):
+                record['reason'] = EXIT_REASONS[reason]
+        self.trades.extend(records)
+        count('fills', len(indices))
+
+    def calculate_performance(self):
+        """포트폴리오 성과 지표 (종목별 보유 수량 포함)"""
+        values = [r['total_value'] for r in self.daily_results]
+        return performance(self.initial_capital, values, self.trades, self.cash, self.holdings())
+
+    def holdings(self):
+        """종목 이름 → 보유 수량"""
+        if self.book is None:
+            return {}
+        shares = self.book.columns['shares'].reshape(len(self.tickers), -1).sum(axis=1)
+        return dict(zip(self.tickers, shares.tolist()))
+
+    def ticker_summary(self):
+        """
+        종목별 요약
+
+        Returns:
+            DataFrame: 종목별 매수/매도 횟수, 매수/매도 금액, 보유 계좌 수, 보유 평가액
+        """
+        trades = pd.DataFrame(self.trades, columns=['ticker', 'action', 'amount'])
+        grouped = trades.pivot_table(index='ticker', columns='action', values='amount',
+                                     aggfunc=['count', 'sum'], fill_value=0)
+        filled = self.book.filled.reshape(len(self.tickers), -1).sum(axis=1)
+        shares = np.array(list(self.holdings().values()))
+        summary = pd.DataFrame({
+            'ticker': self.tickers,
+            'buys': [grouped.get(('count', 'BUY'), {}).get(t, 0) for t in self.tickers],
+            'sells': [grouped.get(('count', 'SELL'), {}).get(t, 0) for t in self.tickers],
+            'bought': [grouped.get(('sum', 'BUY'), {}).get(t, 0.0) for t in self.tickers],
+            'sold': [grouped.get(('sum', 'SELL'), {}).get(t, 0.0) for t in self.tickers],
+            'filled_accounts': filled,
+            'market_value': shares * self.last_mark,
+        })
+        summary['pnl'] = summary['sold'] + summary['market_value'] - summary['bought']
+        return summary
+
+
+def synthetic_paths(n_tickers, n_bars, cache_dir, seed=0):
+    """합성 종목 데이터셋 (짝수 번째는 3배, 홀수 번째는 인버스 -3배 레버리지)"""
+    generator = MarketGenerator(n_bars, n_tickers, seed=seed, start='2015-01-02',
+                                leverage=[3.0 if k % 2 == 0 else -3.0 for k in range(n_tickers)])
+    directory = os.path.join(cache_dir, generator.cache_key())
+    paths = {ticker: os.path.join(directory, ticker) for ticker in generator.tickers}
+    if not all(is_frame_dir(path) for path in paths.values()):
+        paths = generator.write(directory)
+    return paths
+
+
+def _ticker_name(path):
+    """파일 이름의 첫 '_' 앞부분 (SOXL_2y.csv → SOXL)"""
+    return os.path.splitext(os.path.basename(os.path.normpath(path)))[0].split('_')[0]
+
+
+@timed('main')
+def main():
+    """메인 실행 함수"""
+    parser = argparse.ArgumentParser(description='여러 종목 분할 매매 포트폴리오 시뮬레이션')
+    parser.add_argument('--data', nargs='+', help='종목별 가격 데이터 (CSV 또는 바이너리 데이터셋)')
+    parser.add_argument('--generate', type=int, default=0, help='합성 종목 수 (--data 대신)')
+    parser.add_argument('--bars', type=int, default=2000, help='합성 종목 봉 수')
+    parser.add_argument('--cache-dir', default=os.path.join('.cache', 'market'), help='합성 데이터 캐시')
+    parser.add_argument('--rules', default='january_v2', help=f"규칙 이름({', '.join(RULE_SETS)}) 또는 JSON 파일")
+    parser.add_argument('--start', help='시작일 (YYYY-MM-DD)')
+    parser.add_argument('--end', help='종료일 (YYYY-MM-DD)')
+    parser.add_argument('--capital', type=float, default=10000, help='공동 초기 자본')
+    parser.add_argument('--splits', type=int, default=20, help='분할 수 (1회 매수 금액 = 자본 / 분할 수)')
+    parser.add_argument('--exit-order', default='olhc', help="봉 내부 순서 ('ohlc', 'olhc')")
+    args, _ = parser.parse_known_args()
+
+    if args.generate:
+        paths = synthetic_paths(args.generate, args.bars, args.cache_dir)
+    elif args.data:
+        paths = {_ticker_name(path): path for path in args.data}
+    else:
+        parser.error('--data 또는 --generate 가 필요합니다')
+
+    engine = PortfolioEngine(args.rules, args.capital, args.splits, args.exit_order)
+    panel = engine.load_panel(paths)
+    engine.execute_trading(panel, args.start, args.end)
+    if not engine.daily_results:
+        print("기간 안에 봉이 없습니다.")
+        return
+
+    result = engine.calculate_performance()
+    print(f"\n=== 포트폴리오 결과 ({len(engine.tickers)}종목) ===")
+    print(f"초기 자본: ${engine.initial_capital:,.0f}")
+    print(f"최종 가치: ${result['final_value']:,.2f}")
+    print(f"총 수익률: {result['total_return_pct']:.2f}%")
+    print(f"최대 낙폭: {result['max_drawdown_pct']:.2f}%")
+    print(f"남은 현금: ${result['final_cash']:,.2f}")
+    print(f"총 거래 횟수: {result['total_trades']}회 (매수 {result['buy_trades']}, 매도 {result['sell_trades']})")
+    print("\n=== 종목별 요약 ===")
+    print(engine.ticker_summary().to_string(index=False, float_format=lambda v: f'{v:,.2f}'))
+
+
+if __name__ == "__main__":
+    # 한글 인코딩 설정 (다른 모듈에서 import 할 때는 stdout 을 건드리지 않는다)
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+    # --profile-memory: 단계별 메모리 보고
+    with command_line():
+        main()
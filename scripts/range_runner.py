@@ -0,0 +1,415 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+임의 기간 시뮬레이션 실행기
+시작일 이전 데이터로 이평선 워밍업을 자동 계산하고,
+월/주/분기 단위 구간을 프로세스 풀에서 독립적으로 실행해 결과를 집계한다.
+"""
+
+import argparse
+import contextlib
+import hashlib
+import importlib
+import io
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from dataset import TradingCalendar, compact_frame, content_hash
+from result_cache import ResultCache, make_key
+from results_db import ResultsStore, make_run
+
+# 시뮬레이터 이름 → (모듈, 클래스)
+SIMULATORS = {
+    'trading': ('trading_simulator', 'SOXLTradingSimulator'),
+    'improved': ('improved_trading_simulator', 'ImprovedSOXLTradingSimulator'),
+    'january': ('january_simulation', 'SOXLTradingSimulator'),
+    'january_v2': ('january_simulation_v2', 'SOXLTradingSimulator'),
+    'rules': ('rule_simulation', 'RuleSimulator'),
+}
+
+# 구간 단위 (pandas 기간 코드: 주/월/분기)
+FREQUENCIES = ('W', 'M', 'Q')
+
+
+def get_simulator_class(name):
+    """시뮬레이터 이름으로 클래스 반환"""
+    try:
+        module_name, class_name = SIMULATORS[name]
+    except KeyError:
+        raise ValueError(f"알 수 없는 시뮬레이터: {name!r} (가능: {', '.join(SIMULATORS)})")
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def simulator_identity(name):
+    """
+    시뮬레이터 식별자: 클래스 이름 + 소스 해시 (코드가 바뀌면 캐시가 무효화된다)
+
+    래퍼 모듈과 함께 클래스의 source_modules(통합 엔진, 전략 등) 소스도 해시에 포함한다.
+    """
+    cls = get_simulator_class(name)
+    modules = [cls.__module__] + [m for m in getattr(cls, 'source_modules', ()) if m != cls.__module__]
+    digest = hashlib.sha256()
+    for module_name in modules:
+        with open(importlib.import_module(module_name).__file__, 'rb') as f:
+            digest.update(f.read())
+    return f'{cls.__module__}:{cls.__name__}:{digest.hexdigest()[:16]}'
+
+
+def warmup_bars(strategy):
+    """전략이 쓰는 가장 긴 지표 창 + 전날 종가 1봉"""
+    return max(strategy.indicators, default=0) + 1
+
+
+def simulator_warmup(simulator_name, sim_kwargs=None):
+    """시뮬레이터(생성 인자에 따라 규칙이 달라질 수 있음)의 워밍업 봉 수"""
+    return warmup_bars(get_simulator_class(simulator_name)(**(sim_kwargs or {})).strategy)
+
+
+def slice_with_warmup(df, start_date, end_date, warmup):
+    """
+    기간 데이터와 그 이전 워밍업 구간을 잘라 반환
+
+    Args:
+        warmup (int): 기간 앞에 붙일 봉 수 (warmup_bars / simulator_warmup)
+
+    Returns:
+        (DataFrame, int): 잘라낸 데이터, 기간 시작 위치(워밍업 봉 수)
+    """
+    return TradingCalendar.of(df).view(df, start_date, end_date, warmup)
+
+
+def make_windows(df, freq='M'):
+    """데이터에 존재하는 날짜로 월/주/분기 구간 목록 생성"""
+    if freq not in FREQUENCIES:
+        raise ValueError(f"지원하지 않는 구간 단위: {freq!r} (가능: {', '.join(FREQUENCIES)})")
+    periods = df['date'].dt.to_period(freq)
+    grouped = df['date'].groupby(periods)
+    return [(group.min(), group.max()) for _, group in grouped]
+
+
+def equity_curve(simulator):
+    """시뮬레이터의 일별 자산 곡선 (날짜 목록, 가치 목록)"""
+    if hasattr(simulator, 'accounts'):
+        return ([r['date'] for r in simulator.daily_results],
+                [r['total_value'] for r in simulator.daily_results])
+    return list(simulator.dates), list(simulator.portfolio_value)
+
+
+def summarize(simulator, start_date, end_date):
+    """시뮬레이터 종료 상태를 구간 요약으로 변환"""
+    _, values = equity_curve(simulator)
+    return summarize_curve(simulator.initial_capital, values, len(simulator.trades), start_date, end_date)
+
+
+def summarize_curve(initial, values, total_trades, start_date, end_date):
+    """
+    자산 곡선을 구간 요약으로 변환
+
+    Args:
+        initial (float): 초기 자본
+        values (list | np.ndarray): 일별 자산 가치
+        total_trades (int): 거래 횟수
+    """
+    final = values[-1] if len(values) else initial
+    curve = np.concatenate(([initial], np.asarray(values, dtype=np.float64)))
+    peak = np.maximum.accumulate(curve)
+    max_drawdown = float(((peak - curve) / peak).max() * 100)
+
+    return {
+        'start_date': pd.to_datetime(start_date),
+        'end_date': pd.to_datetime(end_date),
+        'bars': len(values),
+        'initial_capital': initial,
+        'final_value': final,
+        'total_return_pct': (final - initial) / initial * 100,
+        'max_drawdown_pct': max_drawdown,
+        'total_trades': total_trades,
+    }
+
+
+def run_range(simulator_name, df, start_date, end_date, sim_kwargs=None, quiet=False):
+    """
+    임의 기간 시뮬레이션 실행
+
+    Args:
+        simulator_name (str): SIMULATORS 키
+        df (DataFrame): load_data 결과 (지표 포함, 날짜 오름차순)
+        start_date, end_date: 시뮬레이션 기간 (양 끝 포함)
+        sim_kwargs (dict): 시뮬레이터 생성 인자
+        quiet (bool): 시뮬레이터 출력 숨김
+
+    Returns:
+        (simulator, dict): 실행이 끝난 시뮬레이터와 구간 요약
+    """
+    simulator = get_simulator_class(simulator_name)(**(sim_kwargs or {}))
+    if quiet and hasattr(simulator, 'log'):
+        # 출력을 버리는 실행은 봉별 판단 문자열도 만들지 않는다 (판단 기록 레벨은 그대로)
+        simulator.verbose = False
+    data, offset = slice_with_warmup(df, start_date, end_date, warmup_bars(simulator.strategy))
+
+    output = io.StringIO() if quiet else None
+    with contextlib.redirect_stdout(output) if quiet else contextlib.nullcontext():
+        if hasattr(simulator, 'accounts'):
+            simulator.execute_trading(data, start_date, end_date)
+        else:
+            # 신호는 워밍업 구간부터 계산하고 매매는 기간 안에서만 실행
+            data = simulator.calculate_signals(data)
+            simulator.execute_trading(data.iloc[offset:].reset_index(drop=True))
+
+    return simulator, summarize(simulator, start_date, end_date)
+
+
+# 작업 프로세스별 캐시 / 결과 저장소 연결
+_WORKER_CACHES = {}
+_WORKER_STORES = {}
+
+# 결과 저장소에 한 트랜잭션으로 넣는 작업 수
+DB_BATCH = 32
+
+
+def _worker_cache(cache_dir):
+    if cache_dir not in _WORKER_CACHES:
+        _WORKER_CACHES[cache_dir] = ResultCache(cache_dir)
+    return _WORKER_CACHES[cache_dir]
+
+
+def _worker_store(db_dir):
+    if db_dir not in _WORKER_STORES:
+        _WORKER_STORES[db_dir] = ResultsStore(db_dir)
+    return _WORKER_STORES[db_dir]
+
+
+def _from_cache(metrics):
+    """캐시에 JSON 으로 저장된 요약을 실행 결과와 같은 형태로 변환"""
+    metrics = dict(metrics)
+    for key in ('start_date', 'end_date'):
+        metrics[key] = pd.to_datetime(metrics[key])
+    return metrics
+
+
+def _run_cached(args):
+    """작업 하나 실행 (캐시를 쓰면 결과 저장), 실행이 끝난 시뮬레이터와 구간 요약"""
+    (simulator_name, data, start_date, end_date, sim_kwargs), key, cache_dir = args
+    simulator, summary = run_range(simulator_name, data, start_date, end_date, sim_kwargs, quiet=True)
+    if cache_dir:
+        dates, values = equity_curve(simulator)
+        _worker_cache(cache_dir).put(key, summary, dates, values, simulator.trades)
+    return simulator, summary
+
+
+def _run_window(args):
+    """프로세스 풀 작업 함수"""
+    return _run_cached(args)[1]
+
+
+def _run_batch(args):
+    """
+    프로세스 풀 작업 함수 (작업 묶음)
+
+    결과 저장소를 쓰면 묶음의 실행 기록을 한 트랜잭션으로 넣는다.
+    """
+    items, db_dir, dataset = args
+    summaries, runs, hashes = [], [], {}
+    for item in items:
+        simulator, summary = _run_cached(item)
+        summaries.append(summary)
+        if db_dir:
+            simulator_name, data, _, _, sim_kwargs = item[0]
+            if dataset is None and id(data) not in hashes:
+                hashes[id(data)] = content_hash(data, indicators=False)
+            runs.append(make_run(simulator_name, simulator, summary, sim_kwargs,
+                                 dataset or hashes[id(data)]))
+    if runs:
+        _worker_store(db_dir).add_runs(runs)
+    return summaries
+
+
+def lookup_cache(tasks, cache_dir):
+    """
+    작업 목록의 캐시 키 계산과 일괄 조회
+
+    Returns:
+        (list, list): 작업별 캐시 키(캐시 미사용 시 None), 캐시된 요약(없으면 None)
+    """
+    keys = [None] * len(tasks)
+    results = [None] * len(tasks)
+    if not cache_dir:
+        return keys, results
+
+    identities = {}
+    data_hashes = {}
+    for i, (simulator_name, data, start_date, end_date, sim_kwargs) in enumerate(tasks):
+        if simulator_name not in identities:
+            identities[simulator_name] = simulator_identity(simulator_name)
+        if id(data) not in data_hashes:
+            data_hashes[id(data)] = content_hash(data)
+        keys[i] = make_key(data_hashes[id(data)], identities[simulator_name],
+                           sim_kwargs, start_date, end_date)
+    cache = ResultCache(cache_dir)
+    hits = cache.get_many(keys)
+    cache.close()
+    for i, key in enumerate(keys):
+        if key in hits:
+            results[i] = _from_cache(hits[key])
+    return keys, results
+
+
+def run_tasks(tasks, cache_dir=None, max_workers=None, db_dir=None, dataset=None):
+    """
+    (시뮬레이터, 데이터, 시작일, 종료일, 생성 인자) 작업 목록 실행
+
+    cache_dir 를 지정하면 캐시를 먼저 한 번에 조회하고, 없는 작업만 프로세스 풀에서 실행한다.
+    db_dir 를 지정하면 실행한 작업(캐시에서 가져온 작업 제외)을 결과 저장소에 남긴다.
+
+    Args:
+        dataset (str): 저장소에 남길 데이터셋 해시 (자르기 전 전체 데이터의
+            content_hash(df, indicators=False), 생략하면 작업 데이터마다 계산)
+
+    Returns:
+        list[dict]: 작업 순서대로의 구간 요약
+    """
+    keys, results = lookup_cache(tasks, cache_dir)
+
+    pending = [i for i, result in enumerate(results) if result is None]
+    payload = [(tasks[i], keys[i], cache_dir) for i in pending]
+    max_workers = max_workers or os.cpu_count()
+    if max_workers == 1 or len(payload) <= 1:
+        computed = _run_batch((payload, db_dir, dataset))
+    else:
+        # 작업 묶음 크기: 저장소를 쓰면 트랜잭션 단위, 아니면 작업 하나씩
+        size = min(DB_BATCH, max(1, len(payload) // max_workers)) if db_dir else 1
+        batches = [(payload[i:i + size], db_dir, dataset) for i in range(0, len(payload), size)]
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            computed = [summary for batch in executor.map(_run_batch, batches) for summary in batch]
+
+    for i, summary in zip(pending, computed):
+        results[i] = summary
+    return results
+
+
+def run_windows(simulator_name, df, freq='M', sim_kwargs=None, max_workers=None, cache_dir=None, db_dir=None):
+    """
+    전체 기간을 구간별로 나누어 병렬 실행하고 결과를 집계
+
+    각 작업에는 해당 구간과 워밍업 구간만 전달하므로 작업 하나의 비용은
+    기존 1개월 실행과 같고, 전체 실행 시간은 코어 수에 따라 줄어든다.
+
+    Returns:
+        DataFrame: 구간별 요약
+    """
+    warmup = simulator_warmup(simulator_name, sim_kwargs)
+    tasks = []
+    for start_date, end_date in make_windows(df, freq):
+        data, _ = slice_with_warmup(df, start_date, end_date, warmup)
+        tasks.append((simulator_name, data, start_date, end_date, sim_kwargs))
+    dataset = content_hash(df, indicators=False) if db_dir else None
+    return pd.DataFrame(run_tasks(tasks, cache_dir, max_workers, db_dir, dataset))
+
+
+def run_sweep(simulator_name, df, grid, start_date, end_date, max_workers=None, cache_dir=None, db_dir=None):
+    """
+    생성 인자 격자 전체를 같은 기간에 대해 실행
+
+    Args:
+        grid (dict): 인자 이름 → 후보 값 목록
+
+    Returns:
+        DataFrame: 조합별 요약 (param.<이름> 컬럼 포함)
+    """
+    names = list(grid)
+    combos = [dict(zip(names, values)) for values in itertools.product(*(grid[n] for n in names))]
+    # 조합마다 규칙(지표 창)이 다를 수 있으므로 가장 긴 워밍업으로 한 번만 자른다
+    data, _ = slice_with_warmup(df, start_date, end_date,
+                                max(simulator_warmup(simulator_name, combo) for combo in combos))
+    tasks = [(simulator_name, data, start_date, end_date, combo) for combo in combos]
+    dataset = content_hash(df, indicators=False) if db_dir else None
+
+    rows = []
+    for combo, summary in zip(combos, run_tasks(tasks, cache_dir, max_workers, db_dir, dataset)):
+        row = {f'param.{name}': value for name, value in combo.items()}
+        row.update(summary)
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def _parse_grid(items):
+    """'이름=값1,값2' 목록을 인자 격자로 변환"""
+    grid = {}
+    for item in items:
+        name, values = item.split('=', 1)
+        parsed = []
+        for value in values.split(','):
+            try:
+                parsed.append(json.loads(value))
+            except json.JSONDecodeError:
+                parsed.append(value)
+        grid[name] = parsed
+    return grid
+
+
+def aggregate(results):
+    """구간별 요약의 전체 통계"""
+    if results.empty:
+        return {}
+    returns = results['total_return_pct']
+    return {
+        'windows': len(results),
+        'mean_return_pct': returns.mean(),
+        'median_return_pct': returns.median(),
+        'win_rate_pct': (returns > 0).mean() * 100,
+        'worst_return_pct': returns.min(),
+        'best_return_pct': returns.max(),
+        'max_drawdown_pct': results['max_drawdown_pct'].max(),
+        'total_trades': int(results['total_trades'].sum()),
+    }
+
+
+def main():
+    """메인 실행 함수"""
+    parser = argparse.ArgumentParser(description='임의 기간 / 구간별 병렬 시뮬레이션')
+    parser.add_argument('--data', default='SOXL_2y.csv', help='가격 데이터 CSV')
+    parser.add_argument('--sim', default='january_v2', choices=sorted(SIMULATORS))
+    parser.add_argument('--start', help='시작일 (YYYY-MM-DD)')
+    parser.add_argument('--end', help='종료일 (YYYY-MM-DD)')
+    parser.add_argument('--freq', choices=sorted(FREQUENCIES), help='구간 단위 (지정 시 전체 구간 병렬 실행)')
+    parser.add_argument('--param', action='append', default=[],
+                        help="생성 인자 격자 (예: position_size=10,20,40), 지정 시 --start~--end 스윕 실행")
+    parser.add_argument('--workers', type=int, default=None, help='프로세스 수')
+    parser.add_argument('--cache-dir', default=None, help='결과 캐시 디렉터리 (지정 시 캐시 먼저 조회)')
+    parser.add_argument('--db', default=None, help='결과 저장소 디렉터리 (지정 시 실행마다 기록)')
+    parser.add_argument('--compact', action='store_true', help='압축 모드 데이터 (float32 가격, int64 거래량)')
+    args = parser.parse_args()
+
+    df = get_simulator_class(args.sim)().load_data(args.data)
+    if args.compact:
+        df = compact_frame(df)
+
+    if args.param:
+        start_date = args.start or df['date'].iloc[0]
+        end_date = args.end or df['date'].iloc[-1]
+        results = run_sweep(args.sim, df, _parse_grid(args.param), start_date, end_date,
+                            max_workers=args.workers, cache_dir=args.cache_dir, db_dir=args.db)
+        print(results.to_string(index=False))
+    elif args.freq:
+        results = run_windows(args.sim, df, args.freq, max_workers=args.workers, cache_dir=args.cache_dir,
+                              db_dir=args.db)
+        print(results.to_string(index=False))
+        print("\n=== 구간 집계 ===")
+        for key, value in aggregate(results).items():
+            print(f"{key}: {value:,.2f}" if isinstance(value, float) else f"{key}: {value}")
+    else:
+        start_date = args.start or df['date'].iloc[0]
+        end_date = args.end or df['date'].iloc[-1]
+        _, summary = run_range(args.sim, df, start_date, end_date)
+        print("\n=== 구간 요약 ===")
+        for key, value in summary.items():
+            print(f"{key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
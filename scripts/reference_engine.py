@@ -0,0 +1,970 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+기준(레거시) 엔진
+통합 엔진(engine.py)으로 옮기기 전 시뮬레이터 4종의 클래스를 시뮬레이션 메서드만 그대로 보존한다
+(데이터 로드, 저장, 출력, 차트 메서드와 main 은 제외, 메서드 본문은 출력과 계측까지 원본 그대로).
+equivalence.py 가 새 엔진의 결과를 이 루프와 비교한다. 보존 클래스는 고치지 말 것.
+
+통합 이후 바뀐 실행 조건(분할 수만큼의 계좌 등)은 아래 어댑터 계층에서만 맞춘다.
+"""
+
+import contextlib
+import io
+
+import numpy as np
+import pandas as pd
+
+from exit_engine import ExitBook, EXIT_REASONS
+from instrument import count, timed
+from range_runner import simulator_warmup, slice_with_warmup, summarize_curve
+
+
+# ---------------------------------------------------------------------------
+# 보존 클래스 (통합 직전 trading_simulator / improved_trading_simulator /
+# january_simulation / january_simulation_v2 그대로)
+# ---------------------------------------------------------------------------
+
+class TradingSimulator:
+    def __init__(self, initial_capital=20000, position_size=20):
+        """
+        SOXL 트레이딩 시뮬레이터 초기화
+        
+        Args:
+            initial_capital (int): 초기 자본 ($20,000)
+            position_size (int): 분할 매수 횟수 (20회)
+        """
+        self.initial_capital = initial_capital
+        self.position_size = position_size
+        self.cash_per_trade = initial_capital / position_size  # $1,000 per trade
+        
+        # 트레이딩 기록
+        self.trades = []
+        self.portfolio_value = []
+        self.dates = []
+        self.cash = initial_capital
+        self.shares = 0
+        self.total_shares = 0
+        
+    @timed('calculate_signals')
+    def calculate_signals(self, df, start=60, prev_signal=0, prev_position=0):
+        """
+        매수/매도 신호 계산
+        
+        Args:
+            df (DataFrame): 이동평균선이 계산된 데이터
+            start (int): 신호 계산 시작 위치 (기본: 60일 이평선 계산 후부터)
+            prev_signal, prev_position: 이어서 계산할 때 start 직전 봉의 신호/포지션
+        """
+        df['signal'] = 0  # 0: 보유, 1: 매수, -1: 매도
+        df['position'] = 0  # 현재 포지션 크기
+        
+        # 스냅샷에서 이어서 계산하는 경우 직전 봉 상태 복원
+        if 0 < start <= len(df):
+            df.iloc[start - 1, df.columns.get_loc('signal')] = prev_signal
+            df.iloc[start - 1, df.columns.get_loc('position')] = prev_position
+        
+        for i in range(start, len(df)):  # 60일 이평선 계산 후부터
+            current_price = df.iloc[i]['close']
+            ma60 = df.iloc[i]['MA60']
+            
+            if pd.isna(ma60):
+                continue
+                
+            # 이평선 대비 비율 계산
+            price_ratio = (current_price - ma60) / ma60 * 100
+            
+            # 매수 신호: 이평선 돌파 (+1% 이상)
+            if price_ratio >= 1.0 and df.iloc[i-1]['signal'] != 1:
+                df.iloc[i, df.columns.get_loc('signal')] = 1
+                
+            # 매도 신호: 이평선 이탈 (-2% 이하)
+            elif price_ratio <= -2.0 and df.iloc[i-1]['signal'] != -1:
+                df.iloc[i, df.columns.get_loc('signal')] = -1
+        
+        count('signal_bars', max(len(df) - start, 0))
+        return df
+    
+    @timed('execute_trading')
+    def execute_trading(self, df):
+        """트레이딩 실행"""
+        print("트레이딩 시뮬레이션 시작...")
+        trades_before = len(self.trades)
+        
+        for i in range(len(df)):
+            current_date = df.iloc[i]['date']
+            current_price = df.iloc[i]['close']
+            signal = df.iloc[i]['signal']
+            
+            # 포트폴리오 가치 계산
+            portfolio_value = self.cash + (self.total_shares * current_price)
+            self.portfolio_value.append(portfolio_value)
+            self.dates.append(current_date)
+            
+            # 매수 신호
+            if signal == 1 and self.cash >= self.cash_per_trade:
+                shares_to_buy = self.cash_per_trade / current_price
+                self.shares = shares_to_buy
+                self.total_shares += shares_to_buy
+                self.cash -= self.cash_per_trade
+                
+                trade_record = {
+                    'date': current_date,
+                    'action': 'BUY',
+                    'price': current_price,
+                    'shares': shares_to_buy,
+                    'amount': self.cash_per_trade,
+                    'cash_remaining': self.cash,
+                    'total_shares': self.total_shares
+                }
+                self.trades.append(trade_record)
+                
+            # 매도 신호
+            elif signal == -1 and self.total_shares > 0:
+                sell_amount = self.total_shares * current_price
+                self.cash += sell_amount
+                
+                trade_record = {
+                    'date': current_date,
+                    'action': 'SELL',
+                    'price': current_price,
+                    'shares': self.total_shares,
+                    'amount': sell_amount,
+                    'cash_remaining': self.cash,
+                    'total_shares': 0
+                }
+                self.trades.append(trade_record)
+                self.total_shares = 0
+        
+        count('bars', len(df))
+        count('fills', len(self.trades) - trades_before)
+        
+        print(f"트레이딩 완료: {len(self.trades)}회 거래")
+        return self.trades
+
+
+class ImprovedTradingSimulator:
+    def __init__(self, initial_capital=20000, position_size=20):
+        self.initial_capital = initial_capital
+        self.position_size = position_size
+        self.cash_per_trade = initial_capital / position_size
+        
+        # 트레이딩 기록
+        self.trades = []
+        self.portfolio_value = []
+        self.dates = []
+        self.cash = initial_capital
+        self.shares = 0
+        self.total_shares = 0
+        self.position = 0  # 현재 포지션 상태 (0: 없음, 1: 보유)
+        
+    @timed('calculate_signals')
+    def calculate_signals(self, df, start=60, prev_signal=0, prev_position=0):
+        """
+        개선된 매수/매도 신호 계산
+        
+        Args:
+            df (DataFrame): 이동평균선이 계산된 데이터
+            start (int): 신호 계산 시작 위치 (기본: 60일 이평선 계산 후부터)
+            prev_signal, prev_position: 이어서 계산할 때 start 직전 봉의 신호/포지션
+        """
+        df['signal'] = 0  # 0: 보유, 1: 매수, -1: 매도
+        df['position'] = 0  # 현재 포지션 크기
+        
+        # 스냅샷에서 이어서 계산하는 경우 직전 봉 상태 복원
+        if 0 < start <= len(df):
+            df.iloc[start - 1, df.columns.get_loc('signal')] = prev_signal
+            df.iloc[start - 1, df.columns.get_loc('position')] = prev_position
+        
+        for i in range(start, len(df)):  # 60일 이평선 계산 후부터
+            current_price = df.iloc[i]['close']
+            ma60 = df.iloc[i]['MA60']
+            ma20 = df.iloc[i]['MA20']
+            
+            if pd.isna(ma60) or pd.isna(ma20):
+                continue
+                
+            # 이평선 대비 비율 계산
+            price_ratio_60 = (current_price - ma60) / ma60 * 100
+            price_ratio_20 = (current_price - ma20) / ma20 * 100
+            
+            # 현재 포지션 상태 확인
+            current_position = df.iloc[i-1]['position'] if i > 0 else 0
+            
+            # 매수 신호: 이평선 돌파 + 상승 추세 확인
+            if (current_position == 0 and 
+                price_ratio_60 >= 2.0 and  # 60일 이평선 2% 이상 돌파
+                price_ratio_20 >= 1.0 and  # 20일 이평선 1% 이상 돌파
+                ma20 > ma60):  # 단기 이평선이 장기 이평선 위에 있음
+                df.iloc[i, df.columns.get_loc('signal')] = 1
+                df.iloc[i, df.columns.get_loc('position')] = 1
+                
+            # 매도 신호: 이평선 이탈 또는 하락 추세
+            elif (current_position == 1 and 
+                  (price_ratio_60 <= -1.0 or  # 60일 이평선 1% 이하 이탈
+                   price_ratio_20 <= -2.0 or  # 20일 이평선 2% 이하 이탈
+                   ma20 < ma60)):  # 단기 이평선이 장기 이평선 아래로
+                df.iloc[i, df.columns.get_loc('signal')] = -1
+                df.iloc[i, df.columns.get_loc('position')] = 0
+            else:
+                # 포지션 유지
+                df.iloc[i, df.columns.get_loc('position')] = current_position
+        
+        count('signal_bars', max(len(df) - start, 0))
+        return df
+    
+    @timed('execute_trading')
+    def execute_trading(self, df):
+        """트레이딩 실행"""
+        print("개선된 트레이딩 시뮬레이션 시작...")
+        trades_before = len(self.trades)
+        
+        for i in range(len(df)):
+            current_date = df.iloc[i]['date']
+            current_price = df.iloc[i]['close']
+            signal = df.iloc[i]['signal']
+            
+            # 포트폴리오 가치 계산
+            portfolio_value = self.cash + (self.total_shares * current_price)
+            self.portfolio_value.append(portfolio_value)
+            self.dates.append(current_date)
+            
+            # 매수 신호
+            if signal == 1 and self.cash >= self.cash_per_trade:
+                shares_to_buy = self.cash_per_trade / current_price
+                self.shares = shares_to_buy
+                self.total_shares += shares_to_buy
+                self.cash -= self.cash_per_trade
+                
+                trade_record = {
+                    'date': current_date,
+                    'action': 'BUY',
+                    'price': current_price,
+                    'shares': shares_to_buy,
+                    'amount': self.cash_per_trade,
+                    'cash_remaining': self.cash,
+                    'total_shares': self.total_shares
+                }
+                self.trades.append(trade_record)
+                
+            # 매도 신호
+            elif signal == -1 and self.total_shares > 0:
+                sell_amount = self.total_shares * current_price
+                self.cash += sell_amount
+                
+                trade_record = {
+                    'date': current_date,
+                    'action': 'SELL',
+                    'price': current_price,
+                    'shares': self.total_shares,
+                    'amount': sell_amount,
+                    'cash_remaining': self.cash,
+                    'total_shares': 0
+                }
+                self.trades.append(trade_record)
+                self.total_shares = 0
+        
+        count('bars', len(df))
+        count('fills', len(self.trades) - trades_before)
+        
+        print(f"트레이딩 완료: {len(self.trades)}회 거래")
+        return self.trades
+
+
+class JanuarySimulator:
+    def __init__(self, initial_capital=10000, position_size=20, exit_order='olhc'):
+        self.initial_capital = initial_capital
+        self.position_size = position_size
+        self.cash_per_trade = initial_capital / position_size  # $500 per trade
+        
+        # 계좌 관리
+        self.accounts = {}
+        for i in range(1, 21):
+            self.accounts[i] = {
+                'cash': self.cash_per_trade,
+                'shares': 0,
+                'avg_price': 0,
+                'status': 'empty',  # empty, filled
+                'buy_price': 0,
+                'target_profit_rate': 0.05,  # 5%
+                'stop_loss_rate': 0.03,      # 3%
+                'target_price': 0,
+                'stop_loss_price': 0
+            }
+        
+        # 목표가/손절가 청산 장부 (exit_order: 'ohlc' 또는 비관적 'olhc')
+        self.exit_book = ExitBook(len(self.accounts), exit_order)
+        self.bar_index = -1
+        
+        # 거래 기록
+        self.trades = []
+        self.daily_results = []
+        
+    def calculate_step(self, prev_close):
+        """등차 계산"""
+        return round(prev_close * 0.01, 1)
+    
+    def get_empty_accounts(self):
+        """빈 계좌 목록 반환"""
+        count('accounts_scanned', 20)
+        return [i for i in range(1, 21) if self.accounts[i]['status'] == 'empty']
+    
+    def get_filled_accounts(self):
+        """매수된 계좌 목록 반환"""
+        count('accounts_scanned', 20)
+        return [i for i in range(1, 21) if self.accounts[i]['status'] == 'filled']
+    
+    def buy_account(self, account_num, price, date):
+        """계좌 매수"""
+        count('orders')
+        if self.accounts[account_num]['status'] != 'empty':
+            return False
+            
+        shares = self.accounts[account_num]['cash'] / price
+        self.accounts[account_num]['shares'] = shares
+        self.accounts[account_num]['avg_price'] = price
+        self.accounts[account_num]['buy_price'] = price
+        self.accounts[account_num]['status'] = 'filled'
+        
+        # 목표가/손절가 설정
+        self.accounts[account_num]['target_price'] = price * 1.05
+        self.accounts[account_num]['stop_loss_price'] = price * 0.97
+        self.exit_book.arm(account_num - 1,
+                           self.accounts[account_num]['target_price'],
+                           self.accounts[account_num]['stop_loss_price'],
+                           self.bar_index)
+        
+        # 거래 기록
+        self.trades.append({
+            'date': date,
+            'account': account_num,
+            'action': 'BUY',
+            'price': price,
+            'shares': shares,
+            'amount': self.accounts[account_num]['cash']
+        })
+        count('fills')
+        
+        return True
+    
+    def sell_account(self, account_num, price, date):
+        """계좌 매도"""
+        count('orders')
+        if self.accounts[account_num]['status'] != 'filled':
+            return False
+            
+        shares = self.accounts[account_num]['shares']
+        amount = shares * price
+        
+        self.accounts[account_num]['cash'] = amount
+        self.accounts[account_num]['shares'] = 0
+        self.accounts[account_num]['avg_price'] = 0
+        self.accounts[account_num]['status'] = 'empty'
+        self.exit_book.disarm(account_num - 1)
+        
+        # 거래 기록
+        self.trades.append({
+            'date': date,
+            'account': account_num,
+            'action': 'SELL',
+            'price': price,
+            'shares': shares,
+            'amount': amount
+        })
+        count('fills')
+        
+        return True
+    
+    @timed('execute_trading')
+    def execute_trading(self, df, start_date='2024-01-01', end_date='2024-01-31'):
+        """
+        트레이딩 실행
+        
+        Args:
+            df (DataFrame): 시작일 이전 구간(이평선 워밍업)을 포함한 전체 데이터
+            start_date, end_date: 시뮬레이션 기간 (양 끝 포함)
+        """
+        start_date = pd.to_datetime(start_date)
+        end_date = pd.to_datetime(end_date)
+        print(f"{start_date.strftime('%Y-%m-%d')} ~ {end_date.strftime('%Y-%m-%d')} 트레이딩 시뮬레이션 시작...")
+        
+        # 기간 데이터 필터링 (전날 종가는 기간 직전 봉에서 가져온다)
+        in_window = (df['date'] >= start_date) & (df['date'] <= end_date)
+        positions = np.flatnonzero(in_window.to_numpy())
+        window = df.iloc[positions]
+        closes = df['close'].to_numpy()
+        prev_closes = np.where(positions > 0, closes[np.maximum(positions - 1, 0)], np.nan)
+        
+        for i in range(len(window)):
+            self.bar_index += 1
+            current_date = window.iloc[i]['date']
+            current_open = window.iloc[i]['open']
+            current_close = window.iloc[i]['close']
+            current_ma60 = window.iloc[i]['MA60']
+            
+            # 전날 종가
+            prev_close = prev_closes[i]
+            
+            if pd.isna(current_ma60) or pd.isna(prev_close):
+                continue
+            
+            # 등차 계산
+            step = self.calculate_step(prev_close)
+            
+            # A: 60일 이평선, B: 전날 종가, C: 계좌 평균가, D: 시가
+            A = current_ma60
+            B = prev_close
+            D = current_open
+            
+            # 매매 로직 실행
+            if A > B:  # 이평선이 전날 종가보다 위
+                # B가 A보다 5% 위면 매수
+                if B > A * 1.05:
+                    self.execute_buy_sequence(current_open, step, current_date)
+                
+                # 매수된 계좌들 중 C가 D보다 9% 위면 매도
+                self.execute_sell_condition(current_open, 0.09, current_date)
+                
+            else:  # 이평선이 전날 종가보다 아래
+                # B가 A보다 5% 아래면 매수
+                if B < A * 0.95:
+                    self.execute_buy_sequence(current_open, step, current_date)
+                
+                # 매수된 계좌들 중 C가 D보다 6% 아래면 매도
+                self.execute_sell_condition(current_open, 0.06, current_date)
+            
+            # 장중 목표가/손절가 청산
+            self.execute_exit_orders(current_open, window.iloc[i]['high'],
+                                     window.iloc[i]['low'], current_date)
+            
+            # 일일 결과 기록
+            self.record_daily_result(current_date, current_close)
+        
+        count('bars', len(window))
+        print(f"시뮬레이션 완료: {len(self.trades)}회 거래")
+        return self.trades, self.daily_results
+    
+    def execute_buy_sequence(self, open_price, step, date):
+        """등차수열 매수 실행"""
+        empty_accounts = self.get_empty_accounts()
+        if not empty_accounts:
+            return
+            
+        # 기준가 설정 (시가의 102%)
+        base_price = open_price * 1.02
+        
+        # 등차수열로 매수
+        for i, account_num in enumerate(empty_accounts):
+            buy_price = base_price - (step * i)
+            if buy_price > 0:  # 가격이 양수일 때만 매수
+                self.buy_account(account_num, buy_price, date)
+    
+    def execute_sell_condition(self, open_price, threshold_rate, date):
+        """매도 조건 실행"""
+        filled_accounts = self.get_filled_accounts()
+        sell_price = open_price * 0.99  # 시가의 99%
+        
+        for account_num in filled_accounts:
+            account = self.accounts[account_num]
+            C = account['avg_price']  # 계좌 평균가
+            D = open_price  # 시가
+            
+            # 조건 확인
+            if C > D * (1 + threshold_rate):
+                self.sell_account(account_num, sell_price, date)
+    
+    def execute_exit_orders(self, open_price, high_price, low_price, date):
+        """목표가/손절가 도달 계좌 일괄 청산"""
+        indices, reasons, prices = self.exit_book.check(self.bar_index, open_price,
+                                                         high_price, low_price)
+        if len(indices) == 0:
+            return
+        count('orders', len(indices))
+        count('fills', len(indices))
+        
+        exit_trades = []
+        for index, reason, price in zip(indices.tolist(), reasons.tolist(), prices.tolist()):
+            account_num = index + 1
+            account = self.accounts[account_num]
+            shares = account['shares']
+            amount = shares * price
+            
+            account['cash'] = amount
+            account['shares'] = 0
+            account['avg_price'] = 0
+            account['status'] = 'empty'
+            
+            exit_trades.append({
+                'date': date,
+                'account': account_num,
+                'action': 'SELL',
+                'price': price,
+                'shares': shares,
+                'amount': amount,
+                'reason': EXIT_REASONS[reason]
+            })
+        
+        # 거래 기록 일괄 추가
+        self.trades.extend(exit_trades)
+    
+    def record_daily_result(self, date, close_price):
+        """일일 결과 기록"""
+        count('accounts_scanned', len(self.accounts))
+        total_value = 0
+        filled_count = 0
+        
+        for account in self.accounts.values():
+            if account['status'] == 'filled':
+                total_value += account['shares'] * close_price
+                filled_count += 1
+            else:
+                total_value += account['cash']
+        
+        self.daily_results.append({
+            'date': date,
+            'close_price': close_price,
+            'total_value': total_value,
+            'filled_accounts': filled_count,
+            'empty_accounts': 20 - filled_count,
+            'total_return_pct': (total_value - self.initial_capital) / self.initial_capital * 100
+        })
+
+
+class JanuaryV2Simulator:
+    def __init__(self, initial_capital=10000, position_size=20, exit_order='olhc'):
+        self.initial_capital = initial_capital
+        self.position_size = position_size
+        self.cash_per_trade = initial_capital / position_size  # $500 per trade
+        
+        # 계좌 관리
+        self.accounts = {}
+        for i in range(1, 21):
+            self.accounts[i] = {
+                'cash': self.cash_per_trade,
+                'shares': 0,
+                'avg_price': 0,
+                'status': 'empty',  # empty, filled
+                'buy_price': 0,
+                'target_profit_rate': 0.05,  # 5%
+                'stop_loss_rate': 0.03,      # 3%
+                'target_price': 0,
+                'stop_loss_price': 0
+            }
+        
+        # 목표가/손절가 청산 장부 (exit_order: 'ohlc' 또는 비관적 'olhc')
+        self.exit_book = ExitBook(len(self.accounts), exit_order)
+        self.bar_index = -1
+        
+        # 거래 기록
+        self.trades = []
+        self.daily_results = []
+        
+    def calculate_step(self, prev_close):
+        """등차 계산"""
+        return round(prev_close * 0.01, 1)
+    
+    def get_empty_accounts(self):
+        """빈 계좌 목록 반환"""
+        count('accounts_scanned', 20)
+        return [i for i in range(1, 21) if self.accounts[i]['status'] == 'empty']
+    
+    def get_filled_accounts(self):
+        """매수된 계좌 목록 반환"""
+        count('accounts_scanned', 20)
+        return [i for i in range(1, 21) if self.accounts[i]['status'] == 'filled']
+    
+    def buy_account(self, account_num, price, date):
+        """계좌 매수"""
+        count('orders')
+        if self.accounts[account_num]['status'] != 'empty':
+            return False
+            
+        shares = self.accounts[account_num]['cash'] / price
+        self.accounts[account_num]['shares'] = shares
+        self.accounts[account_num]['avg_price'] = price
+        self.accounts[account_num]['buy_price'] = price
+        self.accounts[account_num]['status'] = 'filled'
+        
+        # 목표가/손절가 설정
+        self.accounts[account_num]['target_price'] = price * 1.05
+        self.accounts[account_num]['stop_loss_price'] = price * 0.97
+        self.exit_book.arm(account_num - 1,
+                           self.accounts[account_num]['target_price'],
+                           self.accounts[account_num]['stop_loss_price'],
+                           self.bar_index)
+        
+        # 거래 기록
+        self.trades.append({
+            'date': date,
+            'account': account_num,
+            'action': 'BUY',
+            'price': price,
+            'shares': shares,
+            'amount': self.accounts[account_num]['cash']
+        })
+        count('fills')
+        
+        return True
+    
+    def sell_account(self, account_num, price, date):
+        """계좌 매도"""
+        count('orders')
+        if self.accounts[account_num]['status'] != 'filled':
+            return False
+            
+        shares = self.accounts[account_num]['shares']
+        amount = shares * price
+        
+        self.accounts[account_num]['cash'] = amount
+        self.accounts[account_num]['shares'] = 0
+        self.accounts[account_num]['avg_price'] = 0
+        self.accounts[account_num]['status'] = 'empty'
+        self.exit_book.disarm(account_num - 1)
+        
+        # 거래 기록
+        self.trades.append({
+            'date': date,
+            'account': account_num,
+            'action': 'SELL',
+            'price': price,
+            'shares': shares,
+            'amount': amount
+        })
+        count('fills')
+        
+        return True
+    
+    @timed('execute_trading')
+    def execute_trading(self, df, start_date='2024-01-01', end_date='2024-01-31'):
+        """
+        트레이딩 실행
+        
+        Args:
+            df (DataFrame): 시작일 이전 구간(이평선 워밍업)을 포함한 전체 데이터
+            start_date, end_date: 시뮬레이션 기간 (양 끝 포함)
+        """
+        start_date = pd.to_datetime(start_date)
+        end_date = pd.to_datetime(end_date)
+        print(f"{start_date.strftime('%Y-%m-%d')} ~ {end_date.strftime('%Y-%m-%d')} 트레이딩 시뮬레이션 시작...")
+        
+        # 기간 데이터 필터링 (전날 종가는 기간 직전 봉에서 가져온다)
+        in_window = (df['date'] >= start_date) & (df['date'] <= end_date)
+        positions = np.flatnonzero(in_window.to_numpy())
+        window = df.iloc[positions]
+        closes = df['close'].to_numpy()
+        prev_closes = np.where(positions > 0, closes[np.maximum(positions - 1, 0)], np.nan)
+        
+        for i in range(len(window)):
+            self.bar_index += 1
+            current_date = window.iloc[i]['date']
+            current_open = window.iloc[i]['open']
+            current_close = window.iloc[i]['close']
+            current_ma60 = window.iloc[i]['MA60']
+            
+            # 전날 종가
+            prev_close = prev_closes[i]
+            
+            if pd.isna(current_ma60) or pd.isna(prev_close):
+                continue
+            
+            # 등차 계산
+            step = self.calculate_step(prev_close)
+            
+            # A: 60일 이평선, B: 전날 종가, C: 계좌 평균가, D: 시가
+            A = current_ma60
+            B = prev_close
+            D = current_open
+            
+            print(f"\n{current_date.strftime('%Y-%m-%d')}: A={A:.2f}, B={B:.2f}, D={D:.2f}, step={step}")
+            
+            # 매매 로직 실행
+            if A > B:  # 이평선이 전날 종가보다 위
+                print(f"  조건: A > B ({A:.2f} > {B:.2f})")
+                # B가 A보다 5% 위면 매수
+                if B > A * 1.05:
+                    print(f"  매수 조건: B > A*1.05 ({B:.2f} > {A*1.05:.2f}) - 매수 실행")
+                    self.execute_buy_sequence(current_open, step, current_date)
+                else:
+                    print(f"  매수 조건 미충족: B <= A*1.05 ({B:.2f} <= {A*1.05:.2f})")
+                
+                # 매수된 계좌들 중 C가 D보다 9% 위면 매도
+                self.execute_sell_condition(current_open, 0.09, current_date)
+                
+            else:  # 이평선이 전날 종가보다 아래
+                print(f"  조건: A < B ({A:.2f} < {B:.2f})")
+                # B가 A보다 5% 아래면 매수
+                if B < A * 0.95:
+                    print(f"  매수 조건: B < A*0.95 ({B:.2f} < {A*0.95:.2f}) - 매수 실행")
+                    self.execute_buy_sequence(current_open, step, current_date)
+                else:
+                    print(f"  매수 조건 미충족: B >= A*0.95 ({B:.2f} >= {A*0.95:.2f})")
+                
+                # 매수된 계좌들 중 C가 D보다 6% 아래면 매도
+                self.execute_sell_condition(current_open, 0.06, current_date)
+            
+            # 장중 목표가/손절가 청산
+            self.execute_exit_orders(current_open, window.iloc[i]['high'],
+                                     window.iloc[i]['low'], current_date)
+            
+            # 일일 결과 기록
+            self.record_daily_result(current_date, current_close)
+        
+        count('bars', len(window))
+        print(f"\n시뮬레이션 완료: {len(self.trades)}회 거래")
+        return self.trades, self.daily_results
+    
+    def execute_buy_sequence(self, open_price, step, date):
+        """등차수열 매수 실행"""
+        empty_accounts = self.get_empty_accounts()
+        if not empty_accounts:
+            print(f"    빈 계좌 없음")
+            return
+            
+        # 기준가 설정 (시가의 102%)
+        base_price = open_price * 1.02
+        
+        print(f"    등차수열 매수: 기준가 ${base_price:.2f}, 등차 ${step:.1f}")
+        
+        # 등차수열로 매수
+        for i, account_num in enumerate(empty_accounts):
+            buy_price = base_price - (step * i)
+            if buy_price > 0:  # 가격이 양수일 때만 매수
+                if self.buy_account(account_num, buy_price, date):
+                    print(f"      {account_num}번 계좌 매수: ${buy_price:.2f}")
+    
+    def execute_sell_condition(self, open_price, threshold_rate, date):
+        """매도 조건 실행"""
+        filled_accounts = self.get_filled_accounts()
+        if not filled_accounts:
+            return
+            
+        sell_price = open_price * 0.99  # 시가의 99%
+        
+        print(f"    매도 조건 확인: 시가 ${open_price:.2f}, 매도가 ${sell_price:.2f}")
+        
+        for account_num in filled_accounts:
+            account = self.accounts[account_num]
+            C = account['avg_price']  # 계좌 평균가
+            D = open_price  # 시가
+            
+            # 조건 확인
+            if C > D * (1 + threshold_rate):
+                if self.sell_account(account_num, sell_price, date):
+                    print(f"      {account_num}번 계좌 매도: C={C:.2f} > D*{1+threshold_rate:.2f}={D*(1+threshold_rate):.2f}")
+    
+    def execute_exit_orders(self, open_price, high_price, low_price, date):
+        """목표가/손절가 도달 계좌 일괄 청산"""
+        indices, reasons, prices = self.exit_book.check(self.bar_index, open_price,
+                                                         high_price, low_price)
+        if len(indices) == 0:
+            return
+        count('orders', len(indices))
+        count('fills', len(indices))
+        
+        exit_trades = []
+        for index, reason, price in zip(indices.tolist(), reasons.tolist(), prices.tolist()):
+            account_num = index + 1
+            account = self.accounts[account_num]
+            shares = account['shares']
+            amount = shares * price
+            
+            account['cash'] = amount
+            account['shares'] = 0
+            account['avg_price'] = 0
+            account['status'] = 'empty'
+            
+            exit_trades.append({
+                'date': date,
+                'account': account_num,
+                'action': 'SELL',
+                'price': price,
+                'shares': shares,
+                'amount': amount,
+                'reason': EXIT_REASONS[reason]
+            })
+        
+        # 거래 기록 일괄 추가
+        self.trades.extend(exit_trades)
+        for trade in exit_trades:
+            print(f"      {trade['account']}번 계좌 {trade['reason']} 청산: ${trade['price']:.2f}")
+    
+    def record_daily_result(self, date, close_price):
+        """일일 결과 기록"""
+        count('accounts_scanned', len(self.accounts))
+        total_value = 0
+        filled_count = 0
+        
+        for account in self.accounts.values():
+            if account['status'] == 'filled':
+                total_value += account['shares'] * close_price
+                filled_count += 1
+            else:
+                total_value += account['cash']
+        
+        self.daily_results.append({
+            'date': date,
+            'close_price': close_price,
+            'total_value': total_value,
+            'filled_accounts': filled_count,
+            'empty_accounts': 20 - filled_count,
+            'total_return_pct': (total_value - self.initial_capital) / self.initial_capital * 100
+        })
+
+
+# ---------------------------------------------------------------------------
+# 어댑터 계층
+# ---------------------------------------------------------------------------
+
+def split_accounts(base):
+    """
+    분할 수(position_size)만큼 계좌를 두는 분할 계좌 기준 클래스
+
+    보존 클래스는 계좌 20개 고정이다. 통합 엔진은 분할 수만큼 계좌를 두므로
+    계좌 번호 범위를 쓰는 메서드만 분할 수로 바꾸고 매매 루프는 그대로 쓴다.
+    """
+    class SplitAccounts(base):
+        def __init__(self, initial_capital=10000, position_size=20, exit_order='olhc'):
+            super().__init__(initial_capital, position_size, exit_order)
+            template = self.accounts[1]
+            self.accounts = {i: dict(template) for i in range(1, position_size + 1)}
+            self.exit_book = ExitBook(position_size, exit_order)
+
+        def get_empty_accounts(self):
+            return [i for i in self.accounts if self.accounts[i]['status'] == 'empty']
+
+        def get_filled_accounts(self):
+            return [i for i in self.accounts if self.accounts[i]['status'] == 'filled']
+
+        def record_daily_result(self, date, close_price):
+            super().record_daily_result(date, close_price)
+            result = self.daily_results[-1]
+            result['empty_accounts'] = self.position_size - result['filled_accounts']
+
+    SplitAccounts.__name__ = SplitAccounts.__qualname__ = base.__name__
+    return SplitAccounts
+
+
+JanuaryLadder = split_accounts(JanuarySimulator)
+JanuaryV2Ladder = split_accounts(JanuaryV2Simulator)
+
+
+class OutlineLadder(JanuaryV2Ladder):
+    """
+    docs/OUTLINE.md 시나리오 기준 루프 (규칙 DSL 'outline' 비교용)
+
+    january_simulation_v2 의 봉 루프 구조와 매수/매도/청산 메서드를 그대로 쓰고
+    국면과 매수/매도 조건만 시나리오대로 바꾼다 (A: 60일 이평선, B: 시가, C: 계좌 평균가, D: 전날 종가).
+    """
+
+    def __init__(self, initial_capital=10000, position_size=20, exit_order='olhc',
+                 up_buy=0.05, up_sell=0.09, down_buy=0.07, down_sell=0.06):
+        super().__init__(initial_capital, position_size, exit_order)
+        self.up_buy = up_buy
+        self.up_sell = up_sell
+        self.down_buy = down_buy
+        self.down_sell = down_sell
+
+    def execute_trading(self, df, start_date, end_date):
+        start_date = pd.to_datetime(start_date)
+        end_date = pd.to_datetime(end_date)
+
+        in_window = (df['date'] >= start_date) & (df['date'] <= end_date)
+        positions = np.flatnonzero(in_window.to_numpy())
+        window = df.iloc[positions]
+        closes = df['close'].to_numpy()
+        prev_closes = np.where(positions > 0, closes[np.maximum(positions - 1, 0)], np.nan)
+
+        for i in range(len(window)):
+            self.bar_index += 1
+            current_date = window.iloc[i]['date']
+            current_open = window.iloc[i]['open']
+            current_close = window.iloc[i]['close']
+            current_ma60 = window.iloc[i]['MA60']
+            prev_close = prev_closes[i]
+
+            if pd.isna(current_ma60) or pd.isna(prev_close):
+                continue
+
+            A = current_ma60
+            B = current_open
+            D = prev_close
+            gap = abs(B / D - 1)
+            if A < B:  # 상승추세
+                buy_rate, sell_rate = self.up_buy, self.up_sell
+            else:  # 하락추세
+                buy_rate, sell_rate = self.down_buy, self.down_sell
+
+            if gap >= buy_rate:
+                self.execute_buy_sequence(current_open, self.calculate_step(prev_close), current_date)
+
+            # 갭이 매도 기준 이상이면 매도가(B*99%)가 평균가보다 높은 계좌 매도
+            if gap >= sell_rate:
+                sell_price = B * 0.99
+                for account_num in self.get_filled_accounts():
+                    if self.accounts[account_num]['avg_price'] < sell_price:
+                        self.sell_account(account_num, sell_price, current_date)
+
+            self.execute_exit_orders(current_open, window.iloc[i]['high'],
+                                     window.iloc[i]['low'], current_date)
+            self.record_daily_result(current_date, current_close)
+
+        return self.trades, self.daily_results
+
+
+# 규칙 이름 → 기준 클래스 (rule_simulation.RuleSimulator 비교용)
+RULE_SIMULATORS = {
+    'january_v2': JanuaryV2Ladder,
+    'outline': OutlineLadder,
+}
+
+
+def rule_simulator(rules='january_v2', **kwargs):
+    """규칙 이름에 맞는 기준 클래스 생성 (규칙 인자는 기준 클래스가 받는 것만)"""
+    try:
+        cls = RULE_SIMULATORS[rules]
+    except (KeyError, TypeError):
+        raise ValueError(f"기준 루프가 없는 규칙: {rules!r} (가능: {', '.join(RULE_SIMULATORS)})")
+    return cls(**kwargs)
+
+
+# 시뮬레이터 이름 → 기준 클래스 (또는 생성 함수)
+SIMULATORS = {
+    'trading': TradingSimulator,
+    'improved': ImprovedTradingSimulator,
+    'january': JanuaryLadder,
+    'january_v2': JanuaryV2Ladder,
+    'rules': rule_simulator,
+}
+
+
+def run(simulator_name, df, start_date, end_date, sim_kwargs=None):
+    """
+    range_runner.run_range 와 같은 기간 처리로 기준 루프 실행 (신호 포함, 출력은 버림)
+
+    Returns:
+        dict: signals(DataFrame 또는 None), trades(DataFrame), dates, equity, metrics
+    """
+    simulator = SIMULATORS[simulator_name](**(sim_kwargs or {}))
+    data, offset = slice_with_warmup(df, start_date, end_date, simulator_warmup(simulator_name, sim_kwargs))
+
+    signals = None
+    with contextlib.redirect_stdout(io.StringIO()):
+        if hasattr(simulator, 'accounts'):
+            simulator.execute_trading(data, start_date, end_date)
+            dates = [r['date'] for r in simulator.daily_results]
+            values = [r['total_value'] for r in simulator.daily_results]
+        else:
+            data = simulator.calculate_signals(data)
+            period = data.iloc[offset:].reset_index(drop=True)
+            simulator.execute_trading(period)
+            signals = period[['signal', 'position']]
+            dates, values = simulator.dates, simulator.portfolio_value
+
+    return {
+        'signals': signals,
+        'trades': pd.DataFrame(simulator.trades),
+        'dates': np.asarray(dates, dtype='datetime64[ns]'),
+        'equity': np.asarray(values, dtype=np.float64),
+        'metrics': summarize_curve(simulator.initial_capital, values, len(simulator.trades),
+                                   start_date, end_date),
+    }
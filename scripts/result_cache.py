@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+백테스트 결과 캐시 (내용 주소 기반 메모이제이션)
+데이터 버전 + 시뮬레이터 식별자 + 파라미터 + 엔진 버전의 해시를 키로
+성과 지표, 자산 곡선, 거래 기록을 로컬 디스크에 저장한다.
+용량을 넘으면 가장 오래 사용하지 않은 항목부터 지운다(LRU).
+
+캐시는 range_runner 의 작업 실행(구간 배치, 스윕)과 이를 쓰는 도구(sensitivity, optimizer 등)에만
+적용된다. 시뮬레이터 단독 실행(각 시뮬레이터의 main)은 거래 내역 출력과 차트를 위해 항상 다시 계산한다.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+import pandas as pd
+
+from series_codec import pack_series, unpack_series
+
+# 시뮬레이션 결과에 영향을 주는데 시뮬레이터 소스 해시(Engine.source_modules)에 들어가지 않는
+# 코드(range_runner 의 기간 처리와 요약 등)가 바뀌면 올린다
+# 2: 통합 엔진, 달력 기간 처리, 압축 데이터 모드, 분할 수 실행 차원 이후
+ENGINE_VERSION = 2
+
+DEFAULT_CACHE_DIR = os.path.join('.cache', 'results')
+DEFAULT_MAX_BYTES = 1 << 30  # 1GB
+# 압축 형식(series_codec) 이전의 자산 곡선/거래 기록 파일
+LEGACY_SUFFIX = '.npz'
+
+
+def make_key(dataset_hash, simulator_identity, params, start_date, end_date):
+    """
+    캐시 키 계산
+
+    Args:
+        dataset_hash (str): dataset.content_hash 결과
+        simulator_identity (str): 시뮬레이터 클래스와 소스 해시
+        params (dict): 시뮬레이터 생성 인자
+        start_date, end_date: 시뮬레이션 기간
+    """
+    payload = json.dumps({
+        'engine': ENGINE_VERSION,
+        'dataset': dataset_hash,
+        'simulator': simulator_identity,
+        'params': params or {},
+        'start': pd.to_datetime(start_date).strftime('%Y-%m-%d'),
+        'end': pd.to_datetime(end_date).strftime('%Y-%m-%d'),
+    }, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ResultCache:
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        """
+        결과 캐시 초기화
+
+        Args:
+            directory (str): 캐시 디렉터리
+            max_bytes (int): 자산 곡선/거래 기록 파일 총 용량 한도
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.join(directory, 'objects'), exist_ok=True)
+
+        # 여러 프로세스가 동시에 쓰므로 WAL 모드와 대기 시간 설정
+        self.db = sqlite3.connect(os.path.join(directory, 'index.db'), timeout=60)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('''
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                metrics TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL
+            )''')
+        self.db.execute('CREATE INDEX IF NOT EXISTS entries_last_access ON entries(last_access)')
+        self.db.commit()
+
+    def close(self):
+        self.db.close()
+
+    def _object_path(self, key, suffix='.sxc'):
+        return os.path.join(self.directory, 'objects', key[:2], f'{key}{suffix}')
+
+    def get(self, key):
+        """성과 지표 조회 (없으면 None)"""
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys):
+        """
+        여러 키의 성과 지표를 한 번에 조회하고 사용 시각 갱신
+
+        Returns:
+            dict: 키 → 성과 지표 (캐시에 있는 것만)
+        """
+        found = {}
+        keys = list(keys)
+        for i in range(0, len(keys), 500):
+            chunk = keys[i:i + 500]
+            placeholders = ','.join('?' * len(chunk))
+            rows = self.db.execute(
+                f'SELECT key, metrics FROM entries WHERE key IN ({placeholders})', chunk).fetchall()
+            found.update((key, json.loads(metrics)) for key, metrics in rows)
+        if found:
+            now = time.time()
+            with self.db:
+                self.db.executemany('UPDATE entries SET last_access = ? WHERE key = ?',
+                                    [(now, key) for key in found])
+        return found
+
+    def load_series(self, key):
+        """
+        저장된 자산 곡선과 거래 기록 로드
+
+        Returns:
+            (DataFrame, DataFrame): 자산 곡선(date, value), 거래 기록 / 없으면 None
+        """
+        # 압축 형식 이전에 저장한 항목은 npz 파일로 남아 있다
+        for suffix in ('.sxc', LEGACY_SUFFIX):
+            try:
+                with open(self._object_path(key, suffix), 'rb') as f:
+                    return unpack_series(f.read())
+            except FileNotFoundError:
+                pass
+        return None
+
+    def put(self, key, metrics, equity_dates, equity_values, trades):
+        """
+        결과 저장
+
+        Args:
+            key (str): make_key 결과
+            metrics (dict): 성과 지표 (JSON 변환 가능)
+            equity_dates, equity_values: 자산 곡선
+            trades (list[dict]): 거래 기록
+        """
+        path = self._object_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f'{path}.{os.getpid()}.tmp'
+        with open(temp_path, 'wb') as f:
+            f.write(pack_series(equity_dates, equity_values, trades))
+        os.replace(temp_path, path)
+
+        with self.db:
+            self.db.execute('INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)',
+                            (key, json.dumps(metrics, default=str), os.path.getsize(path), time.time()))
+        self.evict()
+
+    def total_bytes(self):
+        return self.db.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+
+    def evict(self):
+        """용량 한도를 넘으면 오래 사용하지 않은 항목부터 한도의 90%까지 삭제"""
+        total = self.total_bytes()
+        if total <= self.max_bytes:
+            return 0
+
+        target = self.max_bytes * 0.9
+        removed = []
+        for key, size in self.db.execute('SELECT key, size FROM entries ORDER BY last_access'):
+            if total <= target:
+                break
+            removed.append(key)
+            total -= size
+
+        with self.db:
+            self.db.executemany('DELETE FROM entries WHERE key = ?', [(key,) for key in removed])
+        for key in removed:
+            for suffix in ('.sxc', LEGACY_SUFFIX):
+                try:
+                    os.remove(self._object_path(key, suffix))
+                except FileNotFoundError:
+                    pass
+        return len(removed)
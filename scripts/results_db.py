@@ -0,0 +1,414 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+실행 결과 저장소 (SQLite 색인 + 실행별 자산 곡선/거래 기록 묶음)
+실행마다 인자, 데이터 내용 해시, 성과 지표, 자산 곡선, 거래 기록을 남기고
+전략/인자/지표 색인으로 여러 실행을 조회한다. 작업 파일(january_trades*.csv 등)은 실행마다
+덮어쓰이지만 저장소에는 실행이 계속 쌓인다.
+
+    runs        실행별 한 행 (시뮬레이터, 전략, 인자 JSON, 데이터 해시, 기간, 지표)
+    run_params  실행별 인자 값 (지표 색인 순서로 실행을 훑으며 실행 번호로 인자 조건 확인)
+    series      실행별 자산 곡선과 거래 기록 (series_codec 압축 형식, 조회 색인과 분리)
+
+여러 프로세스가 동시에 쓰므로 WAL 모드로 열고, 실행 묶음은 한 트랜잭션으로 넣는다.
+환경 변수 SOXL_RESULTS_DB=<디렉터리> 를 주면 january/rule 시뮬레이션 실행도 저장소에 남는다.
+
+사용법:
+    python range_runner.py --sim rules --param up_buy=0.97,0.99,1.01 --db results/db
+    python results_db.py --db results/db top --order calmar --where "max_drawdown_pct<30" --limit 20
+    python results_db.py --db results/db top --strategy january_v2 --where "up_buy>=0.99"
+    python results_db.py --db results/db show 42
+    python results_db.py --db results/db curves --limit 500 --start 2024-06-01 --end 2024-06-30
+"""
+
+import argparse
+import io
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from dataset import content_hash
+from memory_profile import command_line
+from series_codec import pack_series, read_curve, unpack_series
+
+ENV_DB = 'SOXL_RESULTS_DB'
+DEFAULT_DB_DIR = os.path.join('results', 'db')
+
+# 연율화에 쓰는 1년 거래일 수
+TRADING_DAYS = 252
+
+# 조회 조건과 정렬에 쓸 수 있는 지표 컬럼
+METRIC_COLUMNS = ('bars', 'initial_capital', 'final_value', 'total_return_pct', 'cagr_pct',
+                  'max_drawdown_pct', 'calmar', 'total_trades')
+# 정렬용 색인을 만드는 지표 (낙폭을 함께 넣어 낙폭 조건이 색인 안에서 걸러진다)
+RANKED_METRICS = ('calmar', 'total_return_pct', 'cagr_pct')
+
+_CONDITION = re.compile(r'^\s*(\w+)\s*(<=|>=|!=|<|>|=)\s*(.+?)\s*$')
+
+SCHEMA = [
+    '''CREATE TABLE IF NOT EXISTS runs (
+        id INTEGER PRIMARY KEY,
+        created REAL NOT NULL,
+        simulator TEXT NOT NULL,
+        strategy TEXT NOT NULL,
+        params TEXT NOT NULL,
+        dataset TEXT NOT NULL,
+        start_date TEXT NOT NULL,
+        end_date TEXT NOT NULL,
+        bars INTEGER,
+        initial_capital REAL,
+        final_value REAL,
+        total_return_pct REAL,
+        cagr_pct REAL,
+        max_drawdown_pct REAL,
+        calmar REAL,
+        total_trades INTEGER
+    )''',
+    '''CREATE TABLE IF NOT EXISTS run_params (
+        run_id INTEGER NOT NULL,
+        name TEXT NOT NULL,
+        value,
+        PRIMARY KEY (run_id, name)
+    ) WITHOUT ROWID''',
+    '''CREATE TABLE IF NOT EXISTS series (
+        run_id INTEGER PRIMARY KEY,
+        data BLOB NOT NULL
+    )''',
+    'CREATE INDEX IF NOT EXISTS runs_strategy_params ON runs(strategy, params)',
+    'CREATE INDEX IF NOT EXISTS runs_dataset ON runs(dataset)',
+] + [f'CREATE INDEX IF NOT EXISTS runs_{metric} ON runs({metric}, max_drawdown_pct)' for metric in RANKED_METRICS] \
+  + [f'CREATE INDEX IF NOT EXISTS runs_strategy_{metric} ON runs(strategy, {metric})' for metric in RANKED_METRICS]
+
+
+def calmar_metrics(summary):
+    """
+    구간 요약의 연율화 수익률과 칼마 비율
+
+    Returns:
+        (float, float): 연 수익률(%), 칼마 비율 (낙폭이 0 이면 None)
+    """
+    bars = summary.get('bars') or 0
+    growth = summary['final_value'] / summary['initial_capital'] if summary['initial_capital'] else 0
+    if bars <= 0 or growth <= 0:
+        cagr = -100.0 if growth <= 0 and bars > 0 else 0.0
+    else:
+        cagr = (growth ** (TRADING_DAYS / bars) - 1) * 100
+    drawdown = summary['max_drawdown_pct']
+    return cagr, (cagr / drawdown if drawdown else None)
+
+
+def strategy_name(simulator, simulator_name):
+    """전략 이름 (규칙 전략은 규칙 이름, 아니면 전략 플러그인 이름, 없으면 시뮬레이터 이름)"""
+    strategy = getattr(simulator, 'strategy', None)
+    rules = getattr(strategy, 'rules', None)
+    return getattr(rules, 'name', None) or getattr(strategy, 'name', None) or simulator_name
+
+
+def make_run(simulator_name, simulator, summary, params, dataset, strategy=None):
+    """
+    실행이 끝난 시뮬레이터를 저장소 기록으로
+
+    Args:
+        summary (dict): range_runner.summarize 결과
+        params (dict): 시뮬레이터 생성 인자
+        dataset (str): 전체 원본 데이터(날짜, OHLC)의 내용 해시 (dataset.content_hash(df, indicators=False))
+    """
+    # range_runner 가 이 모듈을 가져오므로 함수 안에서 가져온다
+    from range_runner import equity_curve
+
+    dates, values = equity_curve(simulator)
+    return {
+        'simulator': simulator_name,
+        'strategy': strategy or strategy_name(simulator, simulator_name),
+        'params': params or {},
+        'dataset': dataset,
+        'summary': summary,
+        'equity_dates': dates,
+        'equity_values': values,
+        'trades': simulator.trades,
+    }
+
+
+def _param_value(value):
+    """인자 값을 색인 값으로 (숫자는 숫자, 나머지는 JSON 문자열)"""
+    if isinstance(value, bool) or not isinstance(value, (int, float, np.integer, np.floating)):
+        return value if isinstance(value, str) else json.dumps(value, sort_keys=True, default=str)
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def _condition_value(text):
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        return text
+
+
+class ResultsStore:
+    def __init__(self, directory=DEFAULT_DB_DIR):
+        """
+        결과 저장소 열기 (없으면 만든다)
+
+        Args:
+            directory (str): 저장소 디렉터리 (runs.db)
+        """
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        # 여러 프로세스가 동시에 쓰므로 WAL 모드와 대기 시간 설정
+        self.db = sqlite3.connect(os.path.join(directory, 'runs.db'), timeout=60)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA synchronous=NORMAL')
+        self.db.execute('PRAGMA cache_size=-65536')
+        with self.db:
+            for statement in SCHEMA:
+                self.db.execute(statement)
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.db.execute('SELECT COUNT(*) FROM runs').fetchone()[0]
+
+    def add_runs(self, runs):
+        """
+        실행 묶음을 한 트랜잭션으로 저장
+
+        Args:
+            runs (list[dict]): make_run 결과 (equity_dates/equity_values/trades 가 없으면 지표만 저장)
+
+        Returns:
+            list[int]: 실행 번호
+        """
+        now = time.time()
+        rows, blobs = [], []
+        for run in runs:
+            summary = run['summary']
+            cagr, calmar = calmar_metrics(summary)
+            rows.append((
+                now, run['simulator'], run['strategy'],
+                json.dumps(run['params'], sort_keys=True, default=str), run['dataset'],
+                pd.to_datetime(summary['start_date']).strftime('%Y-%m-%d'),
+                pd.to_datetime(summary['end_date']).strftime('%Y-%m-%d'),
+                summary['bars'], summary['initial_capital'], summary['final_value'],
+                summary['total_return_pct'], cagr, summary['max_drawdown_pct'], calmar, summary['total_trades'],
+            ))
+            blobs.append(pack_series(run['equity_dates'], run['equity_values'], run.get('trades', ()))
+                         if 'equity_values' in run else None)
+
+        if not rows:
+            return []
+        insert = ('INSERT INTO runs (created, simulator, strategy, params, dataset, start_date, end_date, bars, '
+                  'initial_capital, final_value, total_return_pct, cagr_pct, max_drawdown_pct, calmar, '
+                  'total_trades) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)')
+        with self.db:
+            # 첫 행으로 쓰기 잠금을 잡은 뒤에는 다른 프로세스가 끼어들 수 없으므로 실행 번호가 연속이다
+            first = self.db.execute(insert, rows[0]).lastrowid
+            self.db.executemany(insert, rows[1:])
+            ids = list(range(first, first + len(rows)))
+            self.db.executemany('INSERT INTO run_params VALUES (?, ?, ?)',
+                                [(run_id, name, _param_value(value))
+                                 for run_id, run in zip(ids, runs) for name, value in run['params'].items()])
+            self.db.executemany('INSERT INTO series VALUES (?, ?)',
+                                [(run_id, blob) for run_id, blob in zip(ids, blobs) if blob is not None])
+        return ids
+
+    def _where(self, strategy, conditions):
+        """조회 조건을 SQL 조건과 인자로 (지표 이름이 아니면 인자 이름으로 본다)"""
+        clauses, args = [], []
+        if strategy:
+            clauses.append('strategy = ?')
+            args.append(strategy)
+        for condition in conditions or ():
+            match = _CONDITION.match(condition)
+            if not match:
+                raise ValueError(f"조회 조건 형식 오류: {condition!r} (예: max_drawdown_pct<30, up_buy>=0.99)")
+            name, operator, value = match.groups()
+            value = _condition_value(value)
+            if name in METRIC_COLUMNS:
+                clauses.append(f'{name} {operator} ?')
+                args.append(value)
+            else:
+                # 지표 순서로 훑는 중에 실행마다 확인하므로 상위 몇 개만 찾으면 바로 끝난다
+                clauses.append('EXISTS (SELECT 1 FROM run_params WHERE run_id = runs.id AND name = ? '
+                               f'AND value {operator} ?)')
+                args.extend([name, _param_value(value)])
+        return (' WHERE ' + ' AND '.join(clauses)) if clauses else '', args
+
+    def top(self, order='calmar', limit=20, strategy=None, where=None, ascending=False):
+        """
+        지표 순 상위 실행
+
+        Args:
+            order (str): 정렬 지표 (METRIC_COLUMNS)
+            strategy (str): 전략 이름 조건
+            where (list[str]): '이름 연산자 값' 조건 (지표 또는 인자, 예: 'max_drawdown_pct<30')
+
+        Returns:
+            DataFrame: 실행 번호, 전략, 인자, 기간, 지표
+        """
+        if order not in METRIC_COLUMNS:
+            raise ValueError(f"정렬할 수 없는 지표: {order!r} (가능: {', '.join(METRIC_COLUMNS)})")
+        clause, args = self._where(strategy, where)
+        # 값이 없는 지표(낙폭 0 의 칼마)는 정렬 대상에서 뺀다
+        clause += (' AND ' if clause else ' WHERE ') + f'{order} IS NOT NULL'
+        direction = 'ASC' if ascending else 'DESC'
+        cursor = self.db.execute(
+            'SELECT id, simulator, strategy, params, dataset, start_date, end_date, '
+            f'{", ".join(METRIC_COLUMNS)} FROM runs{clause} ORDER BY {order} {direction} LIMIT ?',
+            args + [int(limit)])
+        columns = [column[0] for column in cursor.description]
+        frame = pd.DataFrame(cursor.fetchall(), columns=columns)
+        frame['params'] = frame['params'].map(json.loads)
+        return frame
+
+    def count(self, strategy=None, where=None):
+        clause, args = self._where(strategy, where)
+        return self.db.execute(f'SELECT COUNT(*) FROM runs{clause}', args).fetchone()[0]
+
+    def get(self, run_id):
+        """실행 한 개의 기록 (없으면 None)"""
+        cursor = self.db.execute('SELECT * FROM runs WHERE id = ?', (run_id,))
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        record = dict(zip((column[0] for column in cursor.description), row))
+        record['params'] = json.loads(record['params'])
+        return record
+
+    def load_series(self, run_id):
+        """
+        실행의 자산 곡선과 거래 기록
+
+        Returns:
+            (DataFrame, DataFrame): 자산 곡선, 거래 기록 / 저장하지 않았으면 None
+        """
+        row = self.db.execute('SELECT data FROM series WHERE run_id = ?', (run_id,)).fetchone()
+        return unpack_series(row[0]) if row else None
+
+    def load_curves(self, run_ids, start=None, end=None):
+        """
+        여러 실행의 자산 곡선 기간 조각 (기간과 겹치는 압축 조각만 읽는다)
+
+        Args:
+            run_ids (list[int]): 실행 번호
+            start, end: 기간 (양 끝 포함, 없으면 처음/끝까지)
+
+        Returns:
+            DataFrame: 날짜 x 실행 번호 평가액 (자산 곡선을 저장하지 않은 실행은 빠진다)
+        """
+        curves = {}
+        for run_id in run_ids:
+            try:
+                blob = self.db.blobopen('series', 'data', int(run_id), readonly=True)
+            except sqlite3.OperationalError:
+                continue
+            with blob:
+                dates, values = read_curve(blob, start, end)
+            curves[int(run_id)] = pd.Series(values, index=dates)
+        frame = pd.DataFrame(curves)
+        frame.index.name = 'date'
+        return frame
+
+
+def record_from_env(simulator_name, simulator, df, params=None):
+    """
+    SOXL_RESULTS_DB 가 있으면 실행이 끝난 시뮬레이터를 저장소에 기록
+
+    Args:
+        df (DataFrame): 실행에 넘긴 전체 데이터 (워밍업으로 자르기 전)
+        params (dict): 생성 인자 (기본: 초기 자본, 분할 수, 규칙 인자)
+
+    Returns:
+        int: 실행 번호 (환경 변수가 없거나 기록할 결과가 없으면 None)
+    """
+    directory = os.environ.get(ENV_DB)
+    if not directory:
+        return None
+    from range_runner import equity_curve, summarize
+
+    dates, _ = equity_curve(simulator)
+    if not len(dates):
+        return None
+    if params is None:
+        params = {'initial_capital': simulator.initial_capital, 'position_size': simulator.position_size}
+        rules = getattr(simulator.strategy, 'rules', None)
+        if rules is not None:
+            params.update(rules.params)
+    summary = summarize(simulator, dates[0], dates[-1])
+    with ResultsStore(directory) as store:
+        run_id, = store.add_runs([make_run(simulator_name, simulator, summary, params,
+                                                content_hash(df, indicators=False))])
+    print(f"결과 저장소에 기록: {directory} #{run_id}")
+    return run_id
+
+
+def main():
+    """메인 실행 함수"""
+    parser = argparse.ArgumentParser(description='실행 결과 저장소 조회')
+    parser.add_argument('--db', default=DEFAULT_DB_DIR, help='저장소 디렉터리')
+    commands = parser.add_subparsers(dest='command', required=True)
+    top = commands.add_parser('top', help='지표 순 상위 실행')
+    top.add_argument('--order', default='calmar', choices=METRIC_COLUMNS, help='정렬 지표')
+    top.add_argument('--ascending', action='store_true', help='작은 값부터')
+    top.add_argument('--limit', type=int, default=20)
+    top.add_argument('--strategy', default=None, help='전략 이름 (예: january_v2, outline, ma_cross)')
+    top.add_argument('--where', action='append', default=[],
+                     help="지표/인자 조건 (예: max_drawdown_pct<30, up_buy>=0.99)")
+    show = commands.add_parser('show', help='실행 한 개의 지표와 자산 곡선')
+    show.add_argument('run_id', type=int)
+    curves = commands.add_parser('curves', help='상위 실행들의 자산 곡선 기간 조각을 CSV 로')
+    curves.add_argument('--order', default='calmar', choices=METRIC_COLUMNS, help='정렬 지표')
+    curves.add_argument('--limit', type=int, default=100)
+    curves.add_argument('--strategy', default=None, help='전략 이름')
+    curves.add_argument('--where', action='append', default=[], help="지표/인자 조건")
+    curves.add_argument('--start', default=None, help='시작일 (YYYY-MM-DD)')
+    curves.add_argument('--end', default=None, help='종료일 (YYYY-MM-DD)')
+    curves.add_argument('--out', default=os.path.join('results', 'curves.csv'), help='저장할 CSV')
+    args, _ = parser.parse_known_args()
+
+    with ResultsStore(args.db) as store:
+        if args.command == 'top':
+            start = time.perf_counter()
+            frame = store.top(args.order, args.limit, args.strategy, args.where, args.ascending)
+            elapsed = (time.perf_counter() - start) * 1000
+            print(frame.to_string(index=False) if len(frame) else "조건에 맞는 실행 없음")
+            print(f"\n전체 {len(store):,}개 실행 중 상위 {len(frame)}개 ({elapsed:.1f}ms)")
+        elif args.command == 'curves':
+            ids = store.top(args.order, args.limit, args.strategy, args.where)['id'].tolist()
+            start = time.perf_counter()
+            frame = store.load_curves(ids, args.start, args.end)
+            elapsed = (time.perf_counter() - start) * 1000
+            os.makedirs(os.path.dirname(args.out) or '.', exist_ok=True)
+            frame.to_csv(args.out, encoding='utf-8-sig')
+            print(f"실행 {frame.shape[1]}개 x {frame.shape[0]}봉 저장: {args.out} ({elapsed:.1f}ms)")
+        else:
+            record = store.get(args.run_id)
+            if record is None:
+                print(f"실행 없음: #{args.run_id}")
+                sys.exit(1)
+            for key, value in record.items():
+                print(f"{key}: {value}")
+            series = store.load_series(args.run_id)
+            if series is not None:
+                equity, trades = series
+                print(f"\n자산 곡선 {len(equity)}봉, 거래 {len(trades)}회")
+                print(equity.tail().to_string(index=False))
+
+
+if __name__ == "__main__":
+    # 한글 인코딩 설정 (다른 모듈에서 import 할 때는 stdout 을 건드리지 않는다)
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+    # --profile-memory: 단계별 메모리 보고
+    with command_line():
+        main()
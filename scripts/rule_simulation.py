@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+규칙 DSL 분할 매매 시뮬레이션
+rules.py 의 규칙(이름 또는 JSON 파일)을 검사하고 통합 엔진으로 실행한다.
+인자 스윕은 range_runner.py --sim rules --param <인자>=값1,값2 로 실행한다.
+
+사용법:
+    python rule_simulation.py --rules outline --start 2024-01-02 --end 2024-12-27
+    python rule_simulation.py --rules my_rules.json --param up_buy=0.04 --check
+"""
+
+import argparse
+import io
+import json
+import sys
+
+from engine import LadderEngine
+from instrument import timed
+from memory_profile import command_line, footprint_simulator
+from results_db import record_from_env
+from rules import RULE_SETS
+from strategies import RuleStrategy
+
+
+class RuleSimulator(LadderEngine):
+    """규칙 DSL 분할 매매 전략 (range_runner 등록용)"""
+
+    def __init__(self, initial_capital=10000, position_size=20, exit_order='olhc',
+                 rules='january_v2', **params):
+        """
+        Args:
+            rules (str | dict): 규칙 이름, JSON 파일 경로 또는 규칙 정의
+            **params: 덮어쓸 규칙 인자
+        """
+        super().__init__(RuleStrategy(rules, **params), initial_capital, position_size, exit_order)
+
+
+def _parse_params(items):
+    """'이름=값' 목록을 규칙 인자 dict 로"""
+    params = {}
+    for item in items:
+        name, value = item.split('=', 1)
+        params[name] = json.loads(value)
+    return params
+
+
+@timed('main')
+def main():
+    """메인 실행 함수"""
+    parser = argparse.ArgumentParser(description='규칙 DSL 분할 매매 시뮬레이션')
+    parser.add_argument('--rules', default='outline', help=f"규칙 이름({', '.join(RULE_SETS)}) 또는 JSON 파일")
+    parser.add_argument('--data', default='SOXL_2y.csv', help='가격 데이터 CSV')
+    parser.add_argument('--start', default='2024-01-02', help='시작일 (YYYY-MM-DD)')
+    parser.add_argument('--end', default='2024-12-31', help='종료일 (YYYY-MM-DD)')
+    parser.add_argument('--param', action='append', default=[], help='규칙 인자 (예: up_buy=0.04)')
+    parser.add_argument('--splits', type=int, default=20, help='분할 수 (계좌 수, 1회 매수 금액 = 초기 자본 / 분할 수)')
+    parser.add_argument('--capital', type=int, default=10000, help='초기 자본')
+    parser.add_argument('--check', action='store_true', help='국면별 봉 수와 매수 봉 수만 출력')
+    parser.add_argument('--verbose', action='store_true', help='봉별 판단 과정 출력')
+    args, _ = parser.parse_known_args()
+
+    try:
+        simulator = RuleSimulator(args.capital, args.splits, rules=args.rules, **_parse_params(args.param))
+    except ValueError as e:
+        print(f"규칙 오류: {e}")
+        sys.exit(1)
+    simulator.verbose = args.verbose
+    rules = simulator.strategy.rules
+
+    print(f"규칙: {rules.name}")
+    print(f"문자: {', '.join(f'{k}={v}' for k, v in rules.letters.items())}"
+          f"{''.join(f', {k}={v}' for k, v in rules.account_letters.items())}")
+    print(f"인자: {', '.join(f'{k}={v}' for k, v in rules.params.items())}")
+
+    df = simulator.load_data(args.data)
+    if args.check:
+        bars = simulator.window_bars(df, args.start, args.end)
+        print(f"\n=== 규칙 검사 ({args.start} ~ {args.end}) ===")
+        for row in rules.check(bars):
+            print(f"{row['name']:<20} 봉 {row['bars']:>5}  매수 봉 {row['buy_bars']:>5}"
+                  + (f"  | 매수: {row['buy']}  매도: {row['sell']}" if row['buy'] else ''))
+        return
+
+    trades, daily_results = simulator.execute_trading(df, args.start, args.end)
+    footprint_simulator(simulator)
+    record_from_env('rules', simulator, df, dict(rules=args.rules, **_parse_params(args.param),
+                                                  initial_capital=args.capital, position_size=args.splits))
+    if daily_results:
+        final_value = daily_results[-1]['total_value']
+        print(f"\n=== 시뮬레이션 결과 요약 ===")
+        print(f"초기 자본: ${simulator.initial_capital:,}")
+        print(f"최종 가치: ${final_value:,.2f}")
+        print(f"총 수익률: {(final_value - simulator.initial_capital) / simulator.initial_capital * 100:.2f}%")
+        print(f"총 거래 횟수: {len(trades)}회")
+
+
+if __name__ == "__main__":
+    # 한글 인코딩 설정 (다른 모듈에서 import 할 때는 stdout 을 건드리지 않는다)
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+    # --profile-memory: 단계별 메모리 보고
+    with command_line():
+        main()
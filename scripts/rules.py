@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+매매 규칙 DSL
+분할 매매 전략의 국면 조건, 등차 매수 조건, 조건부 매도를 짧은 식으로 적고
+NumPy 배열 식으로 컴파일한다. 봉 조건은 기간 전체를 한 번에, 매도 조건은 봉마다
+전체 계좌 배열을 한 번에 계산하므로 엔진 루프를 고치지 않고 규칙만 바꿔 실험할 수 있다.
+
+식 문법 (파이썬 식의 부분집합):
+    비교   <  <=  >  >=  ==  !=   (연쇄 비교 가능: 0.9 < B / A < 1.1)
+    논리   and  or  not           (배열에서는 원소별 &, |, ~ 로 바뀐다)
+    산술   +  -  *  /  **
+    함수   abs(x)  min(x, y)  max(x, y)  round(x, n)  (원소별, round 는 NumPy 반올림)
+    이름   문자 별칭(letters), 봉 컬럼(open, high, low, close, prev_close, MA<n>),
+           매도 조건에서만 계좌 별칭(accounts)과 계좌 컬럼(avg_price, buy_price), 규칙 인자(params)
+
+규칙 정의 (dict, JSON 파일로도 읽는다):
+    letters   문자 → 봉 컬럼          예: {'A': 'MA60', 'B': 'prev_close', 'D': 'open'}
+    accounts  문자 → 계좌 컬럼        예: {'C': 'avg_price'}
+    params    인자 이름 → 기본값       (스윕 대상, 식에서 이름으로 참조)
+    regimes   국면 목록 (위에서부터 when 이 처음 성립하는 국면 적용)
+              name, when(봉 조건, 생략 시 True), buy(봉 조건), sell(계좌 조건)
+    step      등차 식 (봉 값)
+    params 의 buy_base_rate / sell_price_rate 는 엔진이 매수 기준가(시가 x 비율)와
+    매도가(시가 x 비율)로 사용한다.
+"""
+
+import ast
+import json
+import re
+
+import numpy as np
+
+# 봉 컬럼 (이동평균은 MA<창> 형식으로 참조)
+BAR_COLUMNS = ('open', 'high', 'low', 'close', 'prev_close')
+MA_PATTERN = re.compile(r'^MA(\d+)$')
+
+# 매도 조건에서 참조할 수 있는 계좌 컬럼
+ACCOUNT_COLUMNS = ('avg_price', 'buy_price')
+
+# 엔진이 직접 읽는 규칙 인자 (기본값)
+ENGINE_PARAMS = {'buy_base_rate': 1.02, 'sell_price_rate': 0.99}
+
+# 식에서 쓸 수 있는 함수 (원소별)
+FUNCTIONS = {
+    'abs': np.abs,
+    'min': np.minimum,
+    'max': np.maximum,
+    'round': np.round,
+}
+
+RULE_SETS = {
+    # january_simulation(_v2) 의 규칙 그대로 (A: 60일 이평선, B: 전날 종가, C: 계좌 평균가, D: 시가)
+    'january_v2': {
+        'letters': {'A': 'MA60', 'B': 'prev_close', 'D': 'open'},
+        'accounts': {'C': 'avg_price'},
+        'params': {'up_buy': 1.05, 'down_buy': 0.95, 'up_sell': 0.09, 'down_sell': 0.06,
+                   'step_rate': 0.01, 'buy_base_rate': 1.02, 'sell_price_rate': 0.99},
+        'regimes': [
+            {'name': 'A > B', 'when': 'A > B', 'buy': 'B > A * up_buy', 'sell': 'C > D * (1 + up_sell)'},
+            {'name': 'A <= B', 'buy': 'B < A * down_buy', 'sell': 'C > D * (1 + down_sell)'},
+        ],
+        'step': 'round(B * step_rate, 1)',
+    },
+    # docs/OUTLINE.md 20분할 시나리오 (A: 60일 이평선, B: 시가, C: 계좌 평균가, D: 전날 종가)
+    # 시가와 전날 종가의 차이(갭)가 상승추세 5% / 하락추세 7% 이상이면 매수,
+    # 9% / 6% 이상이면 매도가(B*99%)가 평균가보다 높은 계좌를 매도한다.
+    'outline': {
+        'letters': {'A': 'MA60', 'B': 'open', 'D': 'prev_close'},
+        'accounts': {'C': 'avg_price'},
+        'params': {'up_buy': 0.05, 'up_sell': 0.09, 'down_buy': 0.07, 'down_sell': 0.06,
+                   'step_rate': 0.01, 'buy_base_rate': 1.02, 'sell_price_rate': 0.99},
+        'regimes': [
+            {'name': '상승추세 (A < B)', 'when': 'A < B',
+             'buy': 'abs(B / D - 1) >= up_buy',
+             'sell': 'abs(B / D - 1) >= up_sell and C < B * sell_price_rate'},
+            {'name': '하락추세 (A >= B)',
+             'buy': 'abs(B / D - 1) >= down_buy',
+             'sell': 'abs(B / D - 1) >= down_sell and C < B * sell_price_rate'},
+        ],
+        'step': 'round(D * step_rate, 1)',
+    },
+}
+
+# 허용 구문
+_NODES = (ast.Expression, ast.BoolOp, ast.And, ast.Or, ast.UnaryOp, ast.Not, ast.USub, ast.UAdd,
+          ast.BinOp, ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Pow, ast.Compare, ast.Gt, ast.GtE,
+          ast.Lt, ast.LtE, ast.Eq, ast.NotEq, ast.Call, ast.Name, ast.Load, ast.Constant)
+
+# 배열로 바꾼 True/False 상수 이름
+_CONSTANTS = {'__true': np.True_, '__false': np.False_}
+
+
+class _Vectorize(ast.NodeTransformer):
+    """and/or/not, 연쇄 비교, bool 상수를 원소별 연산으로 바꾼다"""
+
+    def visit_BoolOp(self, node):
+        self.generic_visit(node)
+        op = ast.BitAnd() if isinstance(node.op, ast.And) else ast.BitOr()
+        result = node.values[0]
+        for value in node.values[1:]:
+            result = ast.BinOp(left=result, op=op, right=value)
+        return result
+
+    def visit_UnaryOp(self, node):
+        self.generic_visit(node)
+        if isinstance(node.op, ast.Not):
+            return ast.UnaryOp(op=ast.Invert(), operand=node.operand)
+        return node
+
+    def visit_Compare(self, node):
+        self.generic_visit(node)
+        operands = [node.left] + node.comparators
+        parts = [ast.Compare(left=left, ops=[op], comparators=[right])
+                 for left, op, right in zip(operands, node.ops, operands[1:])]
+        result = parts[0]
+        for part in parts[1:]:
+            result = ast.BinOp(left=result, op=ast.BitAnd(), right=part)
+        return result
+
+    def visit_Constant(self, node):
+        if isinstance(node.value, bool):
+            return ast.Name(id='__true' if node.value else '__false', ctx=ast.Load())
+        return node
+
+
+def _is_condition(node):
+    """식의 최상위가 참/거짓 값인지"""
+    if isinstance(node, (ast.Compare, ast.BoolOp)):
+        return True
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+        return True
+    return isinstance(node, ast.Constant) and isinstance(node.value, bool)
+
+
+class Expression:
+    """컴파일된 규칙 식"""
+
+    def __init__(self, text, allowed, condition):
+        """
+        Args:
+            text (str): 규칙 식
+            allowed (set): 참조할 수 있는 이름
+            condition (bool): 참/거짓 식이어야 하는지
+        """
+        self.text = text
+        try:
+            tree = ast.parse(text.strip(), mode='eval')
+        except SyntaxError as e:
+            raise ValueError(f"규칙 식 {text!r}: 문법 오류 ({e.msg})")
+
+        for node in ast.walk(tree):
+            if not isinstance(node, _NODES):
+                raise ValueError(f"규칙 식 {text!r}: 허용되지 않는 구문 {type(node).__name__}")
+            if isinstance(node, ast.Constant) and not isinstance(node.value, (int, float)):
+                raise ValueError(f"규칙 식 {text!r}: 숫자와 True/False 만 쓸 수 있습니다")
+            if isinstance(node, ast.Call):
+                if not isinstance(node.func, ast.Name) or node.func.id not in FUNCTIONS or node.keywords:
+                    raise ValueError(f"규칙 식 {text!r}: 지원하지 않는 함수 호출 "
+                                     f"(가능: {', '.join(FUNCTIONS)})")
+        calls = {node.func.id for node in ast.walk(tree) if isinstance(node, ast.Call)}
+        self.names = {node.id for node in ast.walk(tree) if isinstance(node, ast.Name)} - calls
+        unknown = self.names - set(allowed)
+        if unknown:
+            raise ValueError(f"규칙 식 {text!r}: 알 수 없는 이름 {', '.join(sorted(unknown))}")
+        if condition != _is_condition(tree.body):
+            kind = '조건(비교/논리)' if condition else '값'
+            raise ValueError(f"규칙 식 {text!r}: {kind} 식이어야 합니다")
+
+        tree = ast.fix_missing_locations(_Vectorize().visit(tree))
+        self.code = compile(tree, f'<규칙 {text}>', 'eval')
+
+    def evaluate(self, namespace):
+        """이름 → 값(배열 또는 스칼라) 으로 계산"""
+        with np.errstate(all='ignore'):
+            return eval(self.code, {'__builtins__': {}}, namespace)
+
+    def __repr__(self):
+        return f'Expression({self.text!r})'
+
+
+def load_rules(rules):
+    """규칙 이름(RULE_SETS), JSON 파일 경로, dict 중 하나를 규칙 정의 dict 로"""
+    if isinstance(rules, dict):
+        return rules
+    if rules in RULE_SETS:
+        return RULE_SETS[rules]
+    if str(rules).endswith('.json'):
+        with open(rules, encoding='utf-8') as f:
+            return json.load(f)
+    raise ValueError(f"알 수 없는 규칙: {rules!r} (가능: {', '.join(RULE_SETS)} 또는 JSON 파일)")
+
+
+class RuleSet:
+    """규칙 정의를 검사하고 컴파일한 결과"""
+
+    def __init__(self, rules, params=None):
+        """
+        Args:
+            rules (str | dict): 규칙 이름, JSON 파일 경로 또는 규칙 정의
+            params (dict): 기본값을 덮어쓸 규칙 인자
+        """
+        spec = load_rules(rules)
+        self.name = spec.get('name') or (rules if isinstance(rules, str) else 'custom')
+        # 규칙 정의 원본 (스냅샷 등에 저장해 같은 규칙을 다시 만들 수 있도록 이름 포함)
+        self.spec = dict(spec, name=self.name)
+        self.letters = dict(spec.get('letters', {}))
+        self.account_letters = dict(spec.get('accounts', {}))
+        self.params = dict(ENGINE_PARAMS, **spec.get('params', {}))
+        unknown = set(params or {}) - set(self.params)
+        if unknown:
+            raise ValueError(f"알 수 없는 규칙 인자: {', '.join(sorted(unknown))} "
+                             f"(가능: {', '.join(self.params)})")
+        self.params.update(params or {})
+
+        for letter, column in self.letters.items():
+            if column not in BAR_COLUMNS and not MA_PATTERN.match(column):
+                raise ValueError(f"문자 {letter}: 알 수 없는 봉 컬럼 {column!r}")
+        for letter, column in self.account_letters.items():
+            if column not in ACCOUNT_COLUMNS:
+                raise ValueError(f"문자 {letter}: 알 수 없는 계좌 컬럼 {column!r}")
+
+        bar_names = self._bar_names(spec)
+        account_names = bar_names | set(self.account_letters) | set(ACCOUNT_COLUMNS)
+        if not spec.get('regimes'):
+            raise ValueError("규칙에 국면(regimes)이 없습니다")
+        self.regimes = []
+        for index, regime in enumerate(spec['regimes']):
+            self.regimes.append({
+                'name': regime.get('name', f'국면 {index + 1}'),
+                'when': Expression(regime.get('when', 'True'), bar_names, True),
+                'buy': Expression(regime.get('buy', 'False'), bar_names, True),
+                'sell': Expression(regime.get('sell', 'False'), account_names, True),
+            })
+        self.step = Expression(spec.get('step', 'round(prev_close * 0.01, 1)'), bar_names, False)
+
+        # 봉 조건에 쓰인 컬럼 (값이 없는 봉은 판단하지 않는다)
+        used = set().union(*(r[key].names for r in self.regimes for key in ('when', 'buy')))
+        columns = {self.letters.get(name, name) for name in used}
+        self.columns = sorted(c for c in columns if c in BAR_COLUMNS or MA_PATTERN.match(c))
+
+        # 봉별 매매 계획(plan)에 영향을 주는 인자 (나머지 인자만 바뀌면 같은 계획을 다시 쓸 수 있다)
+        self.plan_params = tuple(sorted((used | self.step.names) & set(self.params)))
+
+        # 필요한 이동평균 창
+        expressions = [self.step] + [r[key] for r in self.regimes for key in ('when', 'buy', 'sell')]
+        names = set(self.letters.values()).union(*(e.names for e in expressions))
+        matches = [MA_PATTERN.match(name) for name in names]
+        self.indicators = tuple(sorted({int(m.group(1)) for m in matches if m}, reverse=True))
+
+    def _bar_columns(self, spec):
+        """규칙에서 참조하는 이동평균 컬럼"""
+        names = set(self.letters.values())
+        texts = [spec.get('step', '')]
+        for regime in spec['regimes']:
+            texts.extend(regime.get(key, '') for key in ('when', 'buy', 'sell'))
+        for text in texts:
+            names.update(re.findall(r'\bMA\d+\b', text))
+        return {name for name in names if MA_PATTERN.match(name)}
+
+    def _bar_names(self, spec):
+        return (set(self.letters) | set(BAR_COLUMNS) | self._bar_columns(spec)
+                | set(self.params) | set(_CONSTANTS))
+
+    def namespace(self, bars):
+        """봉 배열로 식 계산용 이름 공간 생성"""
+        namespace = dict(_CONSTANTS, **FUNCTIONS)
+        namespace.update(self.params)
+        for name, values in bars.items():
+            if name != 'date':
+                namespace[name] = values
+        for letter, column in self.letters.items():
+            namespace[letter] = bars[column]
+        return namespace
+
+    def plan(self, bars):
+        """
+        봉별 매매 계획
+
+        Returns:
+            dict: valid, regime(국면 번호, 판단하지 않는 봉은 -1), buy, step 배열과 이름 공간
+        """
+        n = len(bars['open'])
+        namespace = self.namespace(bars)
+        valid = np.ones(n, dtype=bool)
+        for column in self.columns:
+            valid &= ~np.isnan(bars[column])
+
+        whens = [np.broadcast_to(r['when'].evaluate(namespace), (n,)) for r in self.regimes]
+        regime = np.select(whens, np.arange(len(self.regimes)), default=-1)
+        regime[~valid] = -1
+        buy = np.zeros(n, dtype=bool)
+        for index, r in enumerate(self.regimes):
+            buy |= (regime == index) & np.broadcast_to(r['buy'].evaluate(namespace), (n,))
+
+        # 등차는 매수 봉에서만 계산
+        step = np.full(n, np.nan)
+        buy_bars = np.flatnonzero(buy)
+        if len(buy_bars):
+            subset = {name: value[buy_bars] if isinstance(value, np.ndarray) else value
+                      for name, value in namespace.items()}
+            step[buy_bars] = np.broadcast_to(self.step.evaluate(subset), (len(buy_bars),))
+        return {'valid': valid, 'regime': regime, 'buy': buy, 'step': step, 'namespace': namespace}
+
+    def sell_mask(self, plan, i, accounts):
+        """
+        봉 i 에서 매도 조건이 성립하는 계좌
+
+        Args:
+            accounts (dict): 계좌 컬럼 배열 (AccountBook.columns)
+        """
+        n_accounts = len(accounts['avg_price'])
+        regime = plan['regime'][i]
+        if regime < 0:
+            return np.zeros(n_accounts, dtype=bool)
+        expression = self.regimes[regime]['sell']
+        namespace = {name: value[i] if isinstance(value, np.ndarray) else value
+                     for name, value in plan['namespace'].items()}
+        for column in ACCOUNT_COLUMNS:
+            namespace[column] = accounts[column]
+        for letter, column in self.account_letters.items():
+            namespace[letter] = accounts[column]
+        return np.broadcast_to(expression.evaluate(namespace), (n_accounts,))
+
+    def sell_masks(self, plan, rows, accounts):
+        """
+        여러 봉에서 매도 조건이 성립하는 계좌 (포트폴리오 엔진: 종목별 봉 하나씩)
+
+        국면마다 식을 한 번만 계산하므로 비용은 종목 수가 아니라 국면 수에 비례한다.
+
+        Args:
+            rows (np.ndarray): 종목별 봉 위치 (plan 배열의 위치)
+            accounts (dict): 계좌 컬럼 배열 (종목 수 x 종목당 계좌 수)
+
+        Returns:
+            np.ndarray: (종목 수 x 종목당 계좌 수) 매도 여부
+        """
+        shape = accounts['avg_price'].shape
+        regime = plan['regime'][rows]
+        mask = np.zeros(shape, dtype=bool)
+        namespace = {name: value[rows][:, None] if isinstance(value, np.ndarray) else value
+                     for name, value in plan['namespace'].items()}
+        for column in ACCOUNT_COLUMNS:
+            namespace[column] = accounts[column]
+        for letter, column in self.account_letters.items():
+            namespace[letter] = accounts[column]
+        for index in np.unique(regime[regime >= 0]).tolist():
+            expression = self.regimes[index]['sell']
+            mask |= (regime == index)[:, None] & np.broadcast_to(expression.evaluate(namespace), shape)
+        return mask
+
+    def check(self, bars):
+        """
+        규칙이 기간 안에서 어떻게 작동하는지 집계 (국면별 봉 수, 매수 봉 수)
+
+        Returns:
+            list[dict]: 국면별 name, when, buy, sell, bars, buy_bars
+        """
+        plan = self.plan(bars)
+        rows = []
+        for index, r in enumerate(self.regimes):
+            in_regime = plan['regime'] == index
+            rows.append({
+                'name': r['name'], 'when': r['when'].text, 'buy': r['buy'].text, 'sell': r['sell'].text,
+                'bars': int(in_regime.sum()), 'buy_bars': int((plan['buy'] & in_regime).sum()),
+            })
+        rows.append({'name': '(판단 안 함)', 'when': '', 'buy': '', 'sell': '',
+                     'bars': int((plan['regime'] < 0).sum()), 'buy_bars': 0})
+        return rows
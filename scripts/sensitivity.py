@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+20분할 전략 인자 민감도 분석 (히트맵)
+january_simulation_v2 규칙(rules.RULE_SETS['january_v2'])의 인자를 두 개씩 바꿔 가며
+수익률과 최대 낙폭이 어떻게 변하는지 격자로 계산하고 히트맵으로 저장한다.
+
+    매수 조건   up_buy (1.05), down_buy (0.95)
+    매도 조건   up_sell (0.09), down_sell (0.06)
+    등차        step_rate (전날 종가의 1%)
+    기준가 배수  buy_base_rate (1.02), sell_price_rate (0.99)
+
+격자 셀끼리 중간 결과를 다시 쓴다.
+    - 기간 봉 배열과 이동평균은 작업 프로세스마다 한 번만 만든다
+    - 봉별 매수 계획(국면, 매수 봉, 등차)은 계획에 쓰이는 인자(RuleSet.plan_params)가 같은 셀끼리
+      공유한다 (매도 조건/기준가 배수만 다른 셀은 계획을 다시 계산하지 않는다)
+    - 셀 결과는 range_runner --sim rules 와 같은 키로 결과 캐시(--cache-dir)에 남는다
+
+세밀화(--refine)는 이웃 셀 사이 값 차이가 큰 칸에만 중간 값을 넣어 다시 계산하므로,
+성긴 격자 전체를 다시 돌리지 않고 관심 영역만 촘촘해진다.
+
+사용법:
+    python sensitivity.py --param up_buy=0.97:1.03:7 --param down_buy=0.97:1.03:7 --refine 2
+    python sensitivity.py --set up_buy=0.99 --set down_buy=1.01 \
+        --param up_sell=0.03:0.15:5 --param down_sell=0.02:0.10:5 --param step_rate=0.005,0.01,0.02
+"""
+
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from engine import LadderEngine
+from instrument import count, timed
+from memory_profile import command_line
+from range_runner import lookup_cache, slice_with_warmup, summarize, warmup_bars
+from result_cache import ResultCache
+from strategies import RuleStrategy
+
+# 히트맵으로 그리는 지표
+METRICS = ('total_return_pct', 'max_drawdown_pct')
+
+# 결과 캐시의 시뮬레이터 이름 (rule_simulation.RuleSimulator 와 같은 결과)
+SIMULATOR = 'rules'
+
+
+def parse_values(spec):
+    """
+    인자 값 목록 ('시작:끝:개수' 등간격 또는 '값1,값2,...')
+
+    Returns:
+        list[float]: 오름차순 값
+    """
+    if ':' in spec:
+        start, stop, num = spec.split(':')
+        values = np.linspace(float(start), float(stop), int(num))
+    else:
+        values = [float(value) for value in spec.split(',')]
+    return sorted({round(float(value), 10) for value in values})
+
+
+class CellContext:
+    """작업 프로세스 하나가 셀끼리 공유하는 기간 봉 배열과 매수 계획 캐시"""
+
+    def __init__(self, data, rules, start_date, end_date, cache_dir=None):
+        self.data = data
+        self.rules = rules
+        self.start_date = start_date
+        self.end_date = end_date
+        self.bars = LadderEngine(RuleStrategy(rules)).window_bars(data, start_date, end_date)
+        self.plans = {}
+        self.cache = ResultCache(cache_dir) if cache_dir else None
+
+    def plan(self, rule_set):
+        """계획 인자가 같은 셀의 매수 계획을 다시 쓴다 (이름 공간의 인자 값만 이 셀 값으로)"""
+        key = tuple(rule_set.params[name] for name in rule_set.plan_params)
+        if key not in self.plans:
+            self.plans[key] = rule_set.plan(self.bars)
+            count('plans_computed')
+        else:
+            count('plans_reused')
+        plan = self.plans[key]
+        return dict(plan, namespace=dict(plan['namespace'], **rule_set.params))
+
+    def run(self, params, key=None):
+        """
+        셀 하나 실행
+
+        Args:
+            params (dict): 기본값을 덮어쓸 규칙 인자
+            key (str): 결과 캐시 키 (있으면 결과를 캐시에 남긴다)
+
+        Returns:
+            dict: 구간 요약 (range_runner.summarize)
+        """
+        engine = CellEngine(self, CachedPlanStrategy(self, self.rules, **params))
+        with contextlib.redirect_stdout(io.StringIO()):
+            engine.execute_trading(self.data, self.start_date, self.end_date)
+        summary = summarize(engine, self.start_date, self.end_date)
+        if self.cache is not None and key is not None:
+            self.cache.put(key, summary, [r['date'] for r in engine.daily_results],
+                           [r['total_value'] for r in engine.daily_results], engine.trades)
+        count('cells')
+        return summary
+
+
+class CachedPlanStrategy(RuleStrategy):
+    """매수 계획을 CellContext 캐시에서 가져오는 규칙 전략"""
+
+    def __init__(self, context, rules, **params):
+        super().__init__(rules, **params)
+        self.context = context
+
+    def plan(self, bars):
+        return self.context.plan(self.rules)
+
+
+class CellEngine(LadderEngine):
+    """CellContext 의 기간 봉 배열을 쓰는 분할 엔진"""
+
+    def __init__(self, context, strategy):
+        super().__init__(strategy)
+        self.context = context
+
+    def window_bars(self, df, start_date, end_date):
+        return self.context.bars
+
+
+# 작업 프로세스별 셀 공유 상태
+_CONTEXT = None
+
+
+def _init_worker(data, rules, start_date, end_date, cache_dir):
+    global _CONTEXT
+    _CONTEXT = CellContext(data, rules, start_date, end_date, cache_dir)
+
+
+def _run_cell(args):
+    """프로세스 풀 작업 함수"""
+    params, key = args
+    return _CONTEXT.run(params, key)
+
+
+class SensitivityGrid:
+    """두 인자 격자의 셀 결과 (세밀화하면 새 셀만 계산해 더한다)"""
+
+    def __init__(self, data, x, y, x_values, y_values, rules='january_v2', fixed=None):
+        """
+        Args:
+            data (DataFrame): 기간과 워밍업 구간만 자른 데이터 (slice_with_warmup)
+            x, y (str): 바꿀 규칙 인자 이름
+            x_values, y_values (list): 인자별 값
+            fixed (dict): 나머지 인자 값 (생략한 인자는 규칙 기본값)
+        """
+        self.data = data
+        self.x, self.y = x, y
+        self.x_values = sorted(x_values)
+        self.y_values = sorted(y_values)
+        self.rules = rules
+        self.fixed = dict(fixed or {})
+        self.cells = {}
+
+    def params(self, x_value, y_value):
+        return dict(self.fixed, **{self.x: x_value, self.y: y_value})
+
+    @timed('sensitivity')
+    def compute(self, start_date, end_date, max_workers=None, cache_dir=None, cells=None):
+        """
+        아직 결과가 없는 셀 계산
+
+        계획 인자가 같은 셀이 같은 작업 묶음에 들어가도록 정렬해 프로세스에 나눈다.
+
+        Args:
+            cells (list): 계산할 (x 값, y 값) 목록 (None 이면 격자 전체)
+        """
+        if cells is None:
+            cells = list(itertools.product(self.x_values, self.y_values))
+        cells = [cell for cell in cells if cell not in self.cells]
+        if not cells:
+            return self
+
+        tasks = [(SIMULATOR, self.data, start_date, end_date, dict(rules=self.rules, **self.params(*cell)))
+                 for cell in cells]
+        keys, results = lookup_cache(tasks, cache_dir)
+        pending = [i for i, result in enumerate(results) if result is None]
+        count('cells_cached', len(cells) - len(pending))
+
+        plan_params = RuleStrategy(self.rules).rules.plan_params
+        pending.sort(key=lambda i: tuple(self.params(*cells[i]).get(name, 0) for name in plan_params))
+        payload = [(self.params(*cells[i]), keys[i]) for i in pending]
+        init_args = (self.data, self.rules, start_date, end_date, cache_dir)
+        max_workers = max_workers or os.cpu_count()
+        if max_workers == 1 or len(payload) <= 1:
+            context = CellContext(*init_args)
+            computed = [context.run(*item) for item in payload]
+        else:
+            chunksize = max(1, len(payload) // (max_workers * 4))
+            with ProcessPoolExecutor(max_workers, initializer=_init_worker, initargs=init_args) as executor:
+                computed = list(executor.map(_run_cell, payload, chunksize=chunksize))
+        for i, summary in zip(pending, computed):
+            results[i] = summary
+
+        for cell, summary in zip(cells, results):
+            self.cells[cell] = summary
+        return self
+
+    def refine(self, metric='total_return_pct', fraction=0.25):
+        """
+        값 차이가 큰 칸에 중간 값 추가
+
+        이웃한 네 셀(칸) 중 지표의 최대-최소 차이가 상위 fraction 인 칸마다 가운데와 변의
+        중간점 셀을 만든다. 격자 축에는 중간 값이 더해지지만 다른 칸의 셀은 계산하지 않는다.
+
+        Returns:
+            list: 새로 계산할 (x 값, y 값) 목록
+        """
+        table = self.table(metric, fill=False)
+        values = table.to_numpy()
+        spreads = []
+        for i, j in itertools.product(range(len(self.y_values) - 1), range(len(self.x_values) - 1)):
+            corners = values[i:i + 2, j:j + 2]
+            if not np.isnan(corners).any():
+                spreads.append((float(corners.max() - corners.min()), i, j))
+        if not spreads:
+            return []
+
+        spreads.sort(reverse=True)
+        cells = set()
+        for _, i, j in spreads[:max(1, int(np.ceil(len(spreads) * fraction)))]:
+            x0, x1 = self.x_values[j], self.x_values[j + 1]
+            y0, y1 = self.y_values[i], self.y_values[i + 1]
+            xm, ym = round((x0 + x1) / 2, 10), round((y0 + y1) / 2, 10)
+            cells.update([(xm, ym), (xm, y0), (xm, y1), (x0, ym), (x1, ym)])
+        self.x_values = sorted(set(self.x_values) | {x for x, _ in cells})
+        self.y_values = sorted(set(self.y_values) | {y for _, y in cells})
+        return sorted(cells - set(self.cells))
+
+    def frame(self):
+        """셀별 요약 DataFrame (param.<이름> 컬럼 포함)"""
+        rows = []
+        for (x_value, y_value), summary in sorted(self.cells.items()):
+            row = {f'param.{self.x}': x_value, f'param.{self.y}': y_value}
+            row.update(summary)
+            rows.append(row)
+        return pd.DataFrame(rows)
+
+    def table(self, metric, fill=True):
+        """
+        지표 격자 (행: y 값, 열: x 값)
+
+        Args:
+            fill (bool): 계산하지 않은 셀(세밀화하지 않은 칸)을 이웃 셀 값으로 채움
+        """
+        table = pd.DataFrame(np.nan, index=self.y_values, columns=self.x_values)
+        for (x_value, y_value), summary in self.cells.items():
+            table.loc[y_value, x_value] = summary[metric]
+        if fill:
+            table = table.ffill(axis=1).bfill(axis=1).ffill(axis=0).bfill(axis=0)
+        return table
+
+    @timed('render')
+    def render(self, path, metrics=METRICS):
+        """
+        지표별 히트맵을 PNG 로 저장 (화면 없이 그린다)
+
+        계산한 셀에는 값을 적고, 이웃 값으로 채운 셀은 값을 적지 않는다.
+        """
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+
+        fig, axes = plt.subplots(1, len(metrics), figsize=(6 * len(metrics), 5), squeeze=False)
+        measured = self.table(metrics[0], fill=False).notna().to_numpy()
+        for ax, metric in zip(axes[0], metrics):
+            table = self.table(metric)
+            cmap = 'RdYlGn' if metric == 'total_return_pct' else 'RdYlGn_r'
+            image = ax.imshow(table.to_numpy(), origin='lower', aspect='auto', cmap=cmap)
+            ax.set_xticks(range(len(self.x_values)), [f'{v:g}' for v in self.x_values], rotation=45)
+            ax.set_yticks(range(len(self.y_values)), [f'{v:g}' for v in self.y_values])
+            ax.set_xlabel(self.x)
+            ax.set_ylabel(self.y)
+            ax.set_title(metric)
+            if table.size <= 400:
+                for (i, j), value in np.ndenumerate(table.to_numpy()):
+                    if measured[i, j]:
+                        ax.text(j, i, f'{value:.1f}', ha='center', va='center', fontsize=7)
+            fig.colorbar(image, ax=ax)
+        fig.suptitle(f'{self.rules}: {self.x} x {self.y}')
+        fig.tight_layout()
+        fig.savefig(path, dpi=120)
+        plt.close(fig)
+        return path
+
+
+def run_pairs(data, axes, start_date, end_date, rules='january_v2', fixed=None, refine=0, fraction=0.25,
+              max_workers=None, cache_dir=None):
+    """
+    인자 두 개씩 모든 쌍의 격자 계산
+
+    Args:
+        axes (dict): 인자 이름 → 값 목록
+        fixed (dict): 격자에 넣지 않은 인자 값 (생략한 인자는 규칙 기본값)
+        refine (int): 세밀화 횟수
+
+    Returns:
+        list[SensitivityGrid]: 쌍별 격자
+    """
+    grids = []
+    for x, y in itertools.combinations(axes, 2):
+        grid = SensitivityGrid(data, x, y, axes[x], axes[y], rules, fixed)
+        grid.compute(start_date, end_date, max_workers, cache_dir)
+        for _ in range(refine):
+            cells = grid.refine(fraction=fraction)
+            if not cells:
+                break
+            print(f"{x} x {y}: 세밀화 {len(cells)}셀")
+            grid.compute(start_date, end_date, max_workers, cache_dir, cells)
+        grids.append(grid)
+    return grids
+
+
+@timed('main')
+def main():
+    """메인 실행 함수"""
+    parser = argparse.ArgumentParser(description='20분할 전략 인자 민감도 히트맵')
+    parser.add_argument('--data', default='SOXL_2y.csv', help='가격 데이터 CSV')
+    parser.add_argument('--rules', default='january_v2', help='규칙 이름 또는 JSON 파일')
+    parser.add_argument('--start', default='2024-01-02', help='시작일 (YYYY-MM-DD)')
+    parser.add_argument('--end', default='2024-12-27', help='종료일 (YYYY-MM-DD)')
+    parser.add_argument('--param', action='append', default=[],
+                        help="인자 값 (예: up_sell=0.03:0.15:5 또는 up_sell=0.06,0.09,0.12), 두 개 이상")
+    parser.add_argument('--set', action='append', default=[], help='고정할 규칙 인자 (예: up_buy=0.99)')
+    parser.add_argument('--refine', type=int, default=0, help='세밀화 횟수')
+    parser.add_argument('--fraction', type=float, default=0.25, help='세밀화할 칸 비율 (값 차이 상위)')
+    parser.add_argument('--workers', type=int, default=None, help='프로세스 수')
+    parser.add_argument('--cache-dir', default=None, help='결과 캐시 디렉터리')
+    parser.add_argument('--out', default=os.path.join('results', 'sensitivity'), help='히트맵 / CSV 저장 디렉터리')
+    args, _ = parser.parse_known_args()
+
+    axes = {}
+    for item in args.param:
+        name, spec = item.split('=', 1)
+        axes[name] = parse_values(spec)
+    if len(axes) < 2:
+        parser.error('--param 을 두 개 이상 지정하세요')
+    fixed = {name: json.loads(value) for name, value in (item.split('=', 1) for item in args.set)}
+    unknown = (set(axes) | set(fixed)) - set(RuleStrategy(args.rules).rules.params)
+    if unknown:
+        parser.error(f"알 수 없는 규칙 인자: {', '.join(sorted(unknown))}")
+
+    df = LadderEngine(RuleStrategy(args.rules)).load_data(args.data)
+    data, _ = slice_with_warmup(df, args.start, args.end, warmup_bars(RuleStrategy(args.rules)))
+    grids = run_pairs(data, axes, args.start, args.end, args.rules, fixed, args.refine, args.fraction,
+                      args.workers, args.cache_dir)
+
+    os.makedirs(args.out, exist_ok=True)
+    for grid in grids:
+        name = f'{grid.x}_{grid.y}'
+        grid.frame().to_csv(os.path.join(args.out, f'{name}.csv'), index=False, encoding='utf-8-sig')
+        path = grid.render(os.path.join(args.out, f'{name}.png'))
+        best = grid.frame().sort_values('total_return_pct', ascending=False).iloc[0]
+        print(f"{grid.x} x {grid.y}: {len(grid.cells)}셀 → {path} "
+              f"(최고 수익률 {best['total_return_pct']:.2f}% @ {grid.x}={best[f'param.{grid.x}']:g}, "
+              f"{grid.y}={best[f'param.{grid.y}']:g}, 낙폭 {best['max_drawdown_pct']:.2f}%)")
+    with open(os.path.join(args.out, 'axes.json'), 'w', encoding='utf-8') as f:
+        json.dump({'rules': args.rules, 'start': args.start, 'end': args.end, 'fixed': fixed, 'axes': axes},
+                  f, indent=2)
+
+
+if __name__ == "__main__":
+    # 한글 인코딩 설정 (다른 모듈에서 import 할 때는 stdout 을 건드리지 않는다)
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+    # --profile-memory: 단계별 메모리 보고
+    with command_line():
+        main()
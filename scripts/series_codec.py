@@ -0,0 +1,435 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+자산 곡선 / 거래 기록 압축 형식
+실행 결과 저장소(results_db)와 결과 캐시(result_cache)가 실행마다 남기는 자산 곡선과 거래 기록을
+컬럼별 차분/XOR 부호화 + 블록 압축으로 저장한다.
+
+    날짜, 정수     앞 값과의 차이 (거래일 간격이 거의 일정해 대부분 같은 값)
+    실수           앞 값과 비트 XOR (평가액이 그대로인 봉은 0) 또는 소수 자릿수 정수 + 잔여 비트,
+                   그대로 두기 중 가장 작게 압축되는 쪽 (같은 값이 다시 나오는 수량/금액 컬럼)
+    문자열         사전 번호
+
+    모든 컬럼은 바이트 자리별로 모은 뒤(상위 바이트가 대부분 0) 컬럼마다 deflate 로 압축한다.
+
+자산 곡선은 CHUNK_BARS 봉씩 따로 압축하고 머리에 조각별 (위치, 첫/끝 날짜) 표를 두므로,
+기간 일부만 읽을 때는 머리와 겹치는 조각만 읽어 푼다 (sqlite3 Blob 처럼 잘라 읽는 객체도 받는다).
+거래 기록은 자산 곡선 뒤에 한 블록으로 두어 곡선만 읽을 때는 건드리지 않는다.
+
+사용법 (저장소의 실행들을 CSV 와 비교):
+    python series_codec.py --db results/db
+"""
+
+import argparse
+import io
+import json
+import os
+import struct
+import sys
+import time
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from dataset import arrays_to_records, records_to_arrays
+from memory_profile import command_line
+
+MAGIC = b'SXC1'
+# 머리: 표식, 봉 수, 조각 수, 거래 기록 블록 길이
+HEADER = struct.Struct('<4sIII')
+# 조각 표: 데이터 영역 안의 위치/길이, 봉 수, 첫/끝 날짜 (ns)
+CHUNK = np.dtype([('offset', '<u4'), ('length', '<u4'), ('rows', '<u4'), ('first', '<i8'), ('last', '<i8')])
+# 조각 안 컬럼별 (부호화, 인자, 압축 길이)
+COLUMN = struct.Struct('<BbI')
+
+# 자산 곡선 조각 크기 (약 1년)
+CHUNK_BARS = 256
+
+# 컬럼 부호화 방식
+RAW, DELTA, XOR, DECIMAL, DICTIONARY = range(5)
+
+# 소수 자릿수 부호화에서 확인하는 최대 자릿수
+MAX_DECIMALS = 6
+
+
+def _deflate(data):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, -15)
+    return compressor.compress(data) + compressor.flush()
+
+
+def _inflate(data):
+    return zlib.decompress(data, -15)
+
+
+def _planes(values):
+    """값들을 바이트 자리별로 모으기 (자리 수 x 값 수)"""
+    values = np.ascontiguousarray(values)
+    return values.view(np.uint8).reshape(-1, values.dtype.itemsize).T.tobytes()
+
+
+def _unplanes(data, dtype, rows):
+    dtype = np.dtype(dtype)
+    planes = np.frombuffer(data, dtype=np.uint8).reshape(dtype.itemsize, rows)
+    return np.ascontiguousarray(planes.T).view(dtype).ravel()
+
+
+def _decimals(values):
+    """
+    값 대부분(90%)이 소수 자릿수 k 이내인 가장 작은 k (없으면 None)
+
+    부동소수 오차가 붙은 값(43.358000000000004)도 몇 ulp 안이면 맞는 것으로 본다.
+    """
+    finite = values[np.isfinite(values)]
+    if not len(finite):
+        return None
+    for k in range(MAX_DECIMALS + 1):
+        scaled = finite * 10.0 ** k
+        if np.abs(scaled).max() >= 2 ** 52:
+            return None
+        close = np.abs(np.round(scaled) / 10.0 ** k - finite) <= np.abs(finite) * 2 ** -50
+        if close.mean() >= 0.9:
+            return k
+    return None
+
+
+def _encode_decimal(bits, values, k):
+    """소수 k 자리 정수(차분)와 그 값으로 되돌린 실수와의 잔여 비트"""
+    digits = np.where(np.isfinite(values), np.round(values * 10.0 ** k), 0).astype(np.int64)
+    residual = bits ^ (digits.astype(np.float64) / 10.0 ** k).view(np.uint64)
+    return _planes(np.diff(digits, prepend=np.int64(0))) + _planes(residual)
+
+
+def encode_column(values):
+    """
+    컬럼 하나 부호화 + 압축
+
+    Returns:
+        (int, int, bytes, list): 부호화 방식, 인자, 압축 바이트, 사전 (문자열 컬럼만)
+    """
+    kind = values.dtype.kind
+    if kind in 'iuMm':
+        integers = values.view(np.int64) if kind in 'Mm' else values.astype(np.int64)
+        return DELTA, 0, _deflate(_planes(np.diff(integers, prepend=np.int64(0)))), None
+    if kind == 'f':
+        values = values.astype(np.float64)
+        bits = values.view(np.uint64)
+        xor = bits.copy()
+        xor[1:] ^= bits[:-1]
+        candidates = [(XOR, 0, _deflate(_planes(xor))), (RAW, 0, _deflate(bits.tobytes()))]
+        k = _decimals(values)
+        if k is not None:
+            candidates.append((DECIMAL, k, _deflate(_encode_decimal(bits, values, k))))
+        codec, param, data = min(candidates, key=lambda candidate: len(candidate[2]))
+        return codec, param, data, None
+    dictionary, codes = np.unique(values.astype(str), return_inverse=True)
+    width = np.uint8 if len(dictionary) <= 1 << 8 else np.uint16 if len(dictionary) <= 1 << 16 else np.uint32
+    return DICTIONARY, np.dtype(width).itemsize, _deflate(codes.astype(width).tobytes()), dictionary.tolist()
+
+
+def decode_column(codec, param, data, dtype, rows, dictionary=None):
+    """encode_column 결과 복원"""
+    dtype = np.dtype(dtype)
+    data = _inflate(data)
+    if codec == DICTIONARY:
+        codes = np.frombuffer(data, dtype=f'<u{param}')
+        return np.asarray(dictionary, dtype=str)[codes] if rows else np.array([], dtype=str)
+    if codec == DELTA:
+        integers = np.cumsum(_unplanes(data, np.int64, rows))
+        return integers.view(dtype) if dtype.kind in 'Mm' else integers.astype(dtype)
+    if codec == RAW:
+        bits = np.frombuffer(data, dtype=np.uint64).copy()
+    elif codec == XOR:
+        bits = np.bitwise_xor.accumulate(_unplanes(data, np.uint64, rows))
+    else:
+        digits = np.cumsum(_unplanes(data[:rows * 8], np.int64, rows))
+        bits = (digits.astype(np.float64) / 10.0 ** param).view(np.uint64) ^ _unplanes(data[rows * 8:], np.uint64, rows)
+    return bits.view(np.float64).astype(dtype)
+
+
+def _encode_chunk(dates, values):
+    """자산 곡선 조각 (날짜, 평가액 컬럼 고정)"""
+    parts = [encode_column(dates), encode_column(values)]
+    header = b''.join(COLUMN.pack(codec, param, len(data)) for codec, param, data, _ in parts)
+    return header + b''.join(data for _, _, data, _ in parts)
+
+
+def _decode_chunk(data, rows):
+    columns, offset = [], 2 * COLUMN.size
+    for index, dtype in enumerate(('datetime64[ns]', np.float64)):
+        codec, param, length = COLUMN.unpack_from(data, index * COLUMN.size)
+        columns.append(decode_column(codec, param, data[offset:offset + length], dtype, rows))
+        offset += length
+    return columns
+
+
+def _encode_trades(trades):
+    """거래 기록 블록 (컬럼 설명 JSON + 컬럼별 압축 바이트)"""
+    arrays = {}
+    columns = records_to_arrays('trades', list(trades), arrays)
+    if not columns:
+        return b''
+    described, payload = [], []
+    for column in columns:
+        values = arrays[f'trades/{column}']
+        codec, param, data, dictionary = encode_column(values)
+        described.append([column, values.dtype.str if values.dtype.kind != 'U' else '<U', codec, param,
+                          len(data), dictionary])
+        payload.append(data)
+    meta = _deflate(json.dumps({'rows': len(trades), 'columns': described}).encode('utf-8'))
+    return struct.pack('<I', len(meta)) + meta + b''.join(payload)
+
+
+def _decode_trades(data):
+    """거래 기록 블록을 (컬럼 이름 목록, 'trades/<컬럼>' 배열) 로"""
+    if not data:
+        return [], {}
+    length, = struct.unpack_from('<I', data)
+    meta = json.loads(_inflate(data[4:4 + length]))
+    arrays, columns, offset = {}, [], 4 + length
+    for column, dtype, codec, param, size, dictionary in meta['columns']:
+        arrays[f'trades/{column}'] = decode_column(codec, param, data[offset:offset + size],
+                                                   dtype, meta['rows'], dictionary)
+        columns.append(column)
+        offset += size
+    return columns, arrays
+
+
+def _trade_frame(columns, arrays):
+    """컬럼 배열을 바로 DataFrame 으로 (빈 문자열은 그 키가 없던 기록이므로 결측값)"""
+    data = {}
+    for column in columns:
+        values = arrays[f'trades/{column}']
+        data[column] = pd.Series(values).where(values != '') if values.dtype.kind == 'U' else values
+    return pd.DataFrame(data)
+
+
+def pack_series(dates, values, trades=(), chunk_bars=CHUNK_BARS):
+    """
+    자산 곡선과 거래 기록을 압축 형식 바이트로
+
+    Args:
+        dates, values: 자산 곡선 (날짜 목록, 평가액 목록)
+        trades (list[dict]): 거래 기록
+        chunk_bars (int): 따로 압축하는 자산 곡선 조각 크기
+
+    Returns:
+        bytes
+    """
+    dates = pd.to_datetime(pd.Series(list(dates), dtype='object')).to_numpy(dtype='datetime64[ns]')
+    values = np.asarray(values, dtype=np.float64)
+    table = np.zeros((len(dates) + chunk_bars - 1) // chunk_bars, dtype=CHUNK)
+    chunks, offset = [], 0
+    for index, start in enumerate(range(0, len(dates), chunk_bars)):
+        stop = min(start + chunk_bars, len(dates))
+        data = _encode_chunk(dates[start:stop], values[start:stop])
+        table[index] = (offset, len(data), stop - start, dates[start].view(np.int64), dates[stop - 1].view(np.int64))
+        chunks.append(data)
+        offset += len(data)
+    trade_block = _encode_trades(trades)
+    return b''.join([HEADER.pack(MAGIC, len(dates), len(table), len(trade_block)), table.tobytes()]
+                    + chunks + [trade_block])
+
+
+def _read_table(blob):
+    """머리와 조각 표 읽기 (bytes 또는 잘라 읽을 수 있는 Blob)"""
+    magic, bars, n_chunks, trade_length = HEADER.unpack(blob[:HEADER.size])
+    if magic != MAGIC:
+        raise ValueError(f"압축 형식이 아님: {magic!r}")
+    table_end = HEADER.size + n_chunks * CHUNK.itemsize
+    table = np.frombuffer(blob[HEADER.size:table_end], dtype=CHUNK)
+    return table, table_end, trade_length
+
+
+def _read_chunks(blob, start, end):
+    """기간과 겹치는 자산 곡선 조각만 읽어 풀기"""
+    table, data_start, _ = _read_table(blob)
+    first = np.searchsorted(table['last'], pd.Timestamp(start).value) if start is not None else 0
+    stop = np.searchsorted(table['first'], pd.Timestamp(end).value, side='right') if end is not None else len(table)
+    if first >= stop:
+        return []
+    # 겹치는 조각은 이어져 있으므로 한 번에 읽는다
+    base = data_start + int(table['offset'][first])
+    span = blob[base:data_start + int(table['offset'][stop - 1] + table['length'][stop - 1])]
+    parts = []
+    for chunk in table[first:stop]:
+        offset = data_start + int(chunk['offset']) - base
+        parts.append(_decode_chunk(span[offset:offset + int(chunk['length'])], int(chunk['rows'])))
+    return parts
+
+
+def read_curve(blob, start=None, end=None):
+    """
+    자산 곡선 (기간을 주면 겹치는 조각만 읽어 푼다)
+
+    Args:
+        blob: pack_series 결과 (bytes 또는 sqlite3 Blob, 이전 npz 형식은 전체를 읽는다)
+        start, end: 기간 (양 끝 포함, 없으면 처음/끝까지)
+
+    Returns:
+        (np.ndarray, np.ndarray): 날짜(datetime64[ns]), 평가액
+    """
+    if bytes(blob[:len(MAGIC)]) != MAGIC:
+        equity, _ = _unpack_npz(bytes(blob[:]))
+        parts = [(equity['date'].to_numpy(dtype='datetime64[ns]'), equity['value'].to_numpy())]
+    else:
+        parts = _read_chunks(blob, start, end)
+    if not parts:
+        return np.array([], dtype='datetime64[ns]'), np.array([], dtype=np.float64)
+    dates = np.concatenate([part[0] for part in parts])
+    values = np.concatenate([part[1] for part in parts])
+    if start is None and end is None:
+        return dates, values
+    mask = np.ones(len(dates), dtype=bool)
+    if start is not None:
+        mask &= dates >= np.datetime64(pd.Timestamp(start))
+    if end is not None:
+        mask &= dates <= np.datetime64(pd.Timestamp(end))
+    return dates[mask], values[mask]
+
+
+def _trade_block(blob):
+    table, data_start, trade_length = _read_table(blob)
+    offset = data_start + int((table['offset'][-1] + table['length'][-1]) if len(table) else 0)
+    return _decode_trades(blob[offset:offset + trade_length])
+
+
+def read_trades(blob):
+    """거래 기록 (dict 목록)"""
+    return arrays_to_records('trades', *_trade_block(blob))
+
+
+def _unpack_npz(blob):
+    """이전 형식 (압축 npz 컬럼 배열)"""
+    with np.load(io.BytesIO(blob), allow_pickle=False) as data:
+        arrays = {name: data[name] for name in data.files}
+    columns = [str(c) for c in arrays.pop('trade_columns').tolist()]
+    equity = pd.DataFrame({'date': arrays['equity/date'], 'value': arrays['equity/value']})
+    return equity, pd.DataFrame(arrays_to_records('trades', columns, arrays))
+
+
+def unpack_series(blob):
+    """
+    pack_series 결과 전체 복원 (이전 npz 형식도 읽는다)
+
+    Returns:
+        (DataFrame, DataFrame): 자산 곡선(date, value), 거래 기록
+    """
+    if bytes(blob[:len(MAGIC)]) != MAGIC:
+        return _unpack_npz(bytes(blob))
+    dates, values = read_curve(blob)
+    return pd.DataFrame({'date': dates, 'value': values}), _trade_frame(*_trade_block(blob))
+
+
+def _filler(values, rows):
+    """실행에 없는 거래 기록 컬럼 자리 (문자열은 빈 값, 나머지는 결측값)"""
+    if values.dtype.kind == 'U':
+        return np.full(rows, '')
+    if values.dtype.kind in 'Mm':
+        return np.full(rows, np.datetime64('NaT'), dtype=values.dtype)
+    return np.full(rows, np.nan)
+
+
+def unpack_many(blobs, run_ids=None):
+    """
+    여러 실행을 한 번에 복원 (컬럼별로 이어 붙여 DataFrame 은 두 개만 만든다)
+
+    Args:
+        blobs (list): pack_series 결과 목록
+        run_ids (list): 실행 번호 (기본: 0부터 순서대로)
+
+    Returns:
+        (DataFrame, DataFrame): run_id 컬럼을 붙인 자산 곡선, 거래 기록
+    """
+    run_ids = list(range(len(blobs)) if run_ids is None else run_ids)
+    curves, runs, columns = [], [], {}
+    for blob in blobs:
+        curves.append(read_curve(blob))
+        names, arrays = _trade_block(blob)
+        runs.append(({name: arrays[f'trades/{name}'] for name in names},
+                      len(arrays[f'trades/{names[0]}']) if names else 0))
+        for name in names:
+            columns.setdefault(name, arrays[f'trades/{name}'])
+
+    equity = pd.DataFrame({
+        'run_id': np.repeat(run_ids, [len(dates) for dates, _ in curves]),
+        'date': np.concatenate([dates for dates, _ in curves]) if curves else np.array([], dtype='datetime64[ns]'),
+        'value': np.concatenate([values for _, values in curves]) if curves else np.array([]),
+    })
+    arrays = {'trades/run_id': np.repeat(run_ids, [rows for _, rows in runs])}
+    for name, sample in columns.items():
+        arrays[f'trades/{name}'] = np.concatenate([found.get(name, _filler(sample, rows)) if rows else sample[:0]
+                                                   for found, rows in runs])
+    return equity, _trade_frame(['run_id'] + list(columns), arrays)
+
+
+def compare_csv(series):
+    """
+    (날짜, 평가액, 거래 기록) 목록을 압축 형식과 CSV 로 저장/복원해 크기와 시간 비교
+
+    CSV 는 실행 번호 컬럼을 붙인 자산 곡선 파일과 거래 기록 파일 두 개로 쓴다.
+    """
+    start = time.perf_counter()
+    blobs = [pack_series(dates, values, trades) for dates, values, trades in series]
+    pack_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    unpack_many(blobs)
+    unpack_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    curve_csv = pd.concat([pd.DataFrame({'run_id': run_id, 'date': dates, 'value': values})
+                           for run_id, (dates, values, _) in enumerate(series)]).to_csv(index=False)
+    trade_frames = [pd.DataFrame(trades).assign(run_id=run_id) for run_id, (_, _, trades) in enumerate(series) if trades]
+    trade_csv = pd.concat(trade_frames).to_csv(index=False) if trade_frames else ''
+    write_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    pd.read_csv(io.StringIO(curve_csv), parse_dates=['date'])
+    if trade_csv:
+        pd.read_csv(io.StringIO(trade_csv), parse_dates=['date'])
+    read_seconds = time.perf_counter() - start
+
+    return {
+        'runs': len(series),
+        'packed_bytes': sum(len(blob) for blob in blobs),
+        'csv_bytes': len(curve_csv.encode('utf-8')) + len(trade_csv.encode('utf-8')),
+        'pack_seconds': pack_seconds,
+        'unpack_seconds': unpack_seconds,
+        'csv_write_seconds': write_seconds,
+        'csv_read_seconds': read_seconds,
+    }
+
+
+def main():
+    """메인 실행 함수"""
+    parser = argparse.ArgumentParser(description='압축 형식과 CSV 크기/시간 비교')
+    parser.add_argument('--db', default=os.path.join('results', 'db'), help='결과 저장소 디렉터리')
+    parser.add_argument('--limit', type=int, default=1000, help='비교할 실행 수')
+    args, _ = parser.parse_known_args()
+
+    from results_db import ResultsStore
+
+    with ResultsStore(args.db) as store:
+        ids = [row[0] for row in store.db.execute('SELECT run_id FROM series ORDER BY run_id LIMIT ?', (args.limit,))]
+        series = []
+        for run_id in ids:
+            equity, trades = store.load_series(run_id)
+            series.append((equity['date'], equity['value'], trades.to_dict('records')))
+    if not series:
+        print(f"자산 곡선이 저장된 실행 없음: {args.db}")
+        return
+
+    stats = compare_csv(series)
+    bars = sum(len(dates) for dates, _, _ in series)
+    print(f"실행 {stats['runs']:,}개, {bars:,}봉")
+    print(f"크기: 압축 {stats['packed_bytes']:,}B / CSV {stats['csv_bytes']:,}B "
+          f"({stats['csv_bytes'] / stats['packed_bytes']:.1f}배)")
+    print(f"저장: 압축 {stats['pack_seconds']:.2f}초 / CSV {stats['csv_write_seconds']:.2f}초")
+    print(f"복원: 압축 {stats['unpack_seconds']:.2f}초 / CSV {stats['csv_read_seconds']:.2f}초")
+
+
+if __name__ == "__main__":
+    # 한글 인코딩 설정 (다른 모듈에서 import 할 때는 stdout 을 건드리지 않는다)
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+    # --profile-memory: 단계별 메모리 보고
+    with command_line():
+        main()
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+공유 메모리 가격 데이터와 다중 프로세스 실행 조정기
+데이터 로드와 이동평균 계산을 한 번만 하고 multiprocessing.shared_memory 블록에 올려 두면,
+작업 프로세스는 복사 없이 같은 메모리를 DataFrame 으로 본다.
+작업 프로세스의 메모리는 가격 이력이 아니라 계좌 상태 크기에 비례한다.
+"""
+
+import argparse
+import contextlib
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from dataset import compact_frame, is_frame_dir, load_frame
+from range_runner import (FREQUENCIES, SIMULATORS, _run_window, aggregate, get_simulator_class,
+                          lookup_cache, make_windows, simulator_warmup, slice_with_warmup)
+
+# 모든 시뮬레이터가 쓰는 컬럼을 포함하는 로더 (숫자 정리 + MA20/MA60)
+LOADER_SIMULATOR = 'improved'
+
+
+def load_price_data(file_path):
+    """
+    공유용 가격 데이터 로드 (숫자 컬럼 정리, 이동평균 포함)
+
+    바이너리 데이터셋 디렉터리(market_generator 출력 등)는 그대로 읽는다.
+    """
+    if is_frame_dir(file_path):
+        return load_frame(file_path)
+    with contextlib.redirect_stdout(io.StringIO()):
+        return get_simulator_class(LOADER_SIMULATOR)().load_data(file_path)
+
+
+def _attach_block(name):
+    """
+    기존 공유 메모리에 연결
+
+    Python 3.13 미만에는 track 인자가 없지만, 풀 작업 프로세스는 조정기의 resource tracker 를
+    공유하므로 다시 등록돼도 블록은 조정기가 unlink 할 때 한 번만 정리된다.
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+
+def _layout(rows, dtypes):
+    """컬럼별 시작 위치 (8바이트 정렬)와 전체 크기"""
+    offsets, size = [], rows * 8
+    for dtype in dtypes:
+        offsets.append(size)
+        size += -(-rows * np.dtype(dtype).itemsize // 8) * 8
+    return offsets, size
+
+
+class SharedPriceData:
+    def __init__(self, block, rows, columns, dtypes, owner):
+        """
+        공유 메모리 가격 데이터
+
+        메모리 배치: 날짜(int64, rows) 뒤에 숫자 컬럼이 컬럼별로 연속 저장된다.
+        컬럼 형식은 원본 그대로라 압축 모드(float32 가격) 데이터는 블록 크기도 줄어든다.
+        """
+        self.block = block
+        self.rows = rows
+        self.columns = list(columns)
+        self.dtypes = [np.dtype(dtype).str for dtype in dtypes]
+        self.owner = owner
+        self.dates = np.ndarray((rows,), dtype=np.int64, buffer=block.buf, offset=0)
+        offsets, _ = _layout(rows, self.dtypes)
+        self.values = [np.ndarray((rows,), dtype=dtype, buffer=block.buf, offset=offset)
+                       for dtype, offset in zip(self.dtypes, offsets)]
+
+    @classmethod
+    def create(cls, df):
+        """DataFrame 을 공유 메모리 블록으로 복사 (조정기 프로세스에서 한 번)"""
+        columns = [c for c in df.columns
+                   if c != 'date' and pd.api.types.is_numeric_dtype(df[c])]
+        dtypes = [df[c].to_numpy().dtype for c in columns]
+        rows = len(df)
+        _, size = _layout(rows, dtypes)
+        block = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        data = cls(block, rows, columns, dtypes, owner=True)
+        data.dates[:] = df['date'].to_numpy(dtype='datetime64[ns]').view(np.int64)
+        for values, column in zip(data.values, columns):
+            values[:] = df[column].to_numpy()
+        return data
+
+    @property
+    def spec(self):
+        """작업 프로세스에 넘기는 연결 정보 (이름과 모양만 전달된다)"""
+        return {'name': self.block.name, 'rows': self.rows, 'columns': self.columns, 'dtypes': self.dtypes}
+
+    @classmethod
+    def attach(cls, spec):
+        """작업 프로세스에서 공유 블록에 연결"""
+        return cls(_attach_block(spec['name']), spec['rows'], spec['columns'], spec['dtypes'], owner=False)
+
+    def frame(self):
+        """공유 메모리를 그대로 가리키는 DataFrame (복사 없음)"""
+        data = {'date': self.dates.view('datetime64[ns]')}
+        for values, column in zip(self.values, self.columns):
+            data[column] = values
+        return pd.DataFrame(data, copy=False)
+
+    def close(self):
+        # numpy 뷰가 남아 있으면 블록을 닫을 수 없으므로 먼저 해제
+        self.dates = self.values = None
+        self.block.close()
+        if self.owner:
+            self.block.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# 작업 프로세스가 연결한 공유 데이터
+_WORKER_DATA = {}
+
+
+def _init_worker(spec):
+    """작업 프로세스 초기화: 공유 블록 연결 (프로세스당 한 번)"""
+    data = SharedPriceData.attach(spec)
+    _WORKER_DATA['data'] = data
+    _WORKER_DATA['frame'] = data.frame()
+
+
+def _run_shared(args):
+    """공유 데이터로 구간 실행"""
+    (simulator_name, start_date, end_date, sim_kwargs), key, cache_dir = args
+    task = (simulator_name, _WORKER_DATA['frame'], start_date, end_date, sim_kwargs)
+    return _run_window((task, key, cache_dir))
+
+
+class SharedRunCoordinator:
+    def __init__(self, df):
+        """
+        다중 프로세스 실행 조정기
+
+        Args:
+            df (DataFrame): load_price_data 결과 (지표 포함)
+        """
+        self.data = SharedPriceData.create(df)
+        self.df = self.data.frame()
+
+    def run(self, tasks, max_workers=None, cache_dir=None):
+        """
+        (시뮬레이터, 시작일, 종료일, 생성 인자) 작업 목록을 공유 데이터로 병렬 실행
+
+        Returns:
+            list[dict]: 작업 순서대로의 구간 요약
+        """
+        keys, results = [None] * len(tasks), [None] * len(tasks)
+        if cache_dir:
+            sliced = [(name, slice_with_warmup(self.df, start, end, simulator_warmup(name, kwargs))[0],
+                       start, end, kwargs)
+                      for name, start, end, kwargs in tasks]
+            keys, results = lookup_cache(sliced, cache_dir)
+
+        pending = [i for i, result in enumerate(results) if result is None]
+        payload = [(tasks[i], keys[i], cache_dir) for i in pending]
+        with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count(),
+                                 initializer=_init_worker, initargs=(self.data.spec,)) as executor:
+            computed = list(executor.map(_run_shared, payload))
+
+        for i, summary in zip(pending, computed):
+            results[i] = summary
+        return results
+
+    def close(self):
+        self.df = None
+        self.data.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main():
+    """메인 실행 함수"""
+    parser = argparse.ArgumentParser(description='공유 메모리 데이터로 여러 시뮬레이터 구간 병렬 실행')
+    parser.add_argument('--data', default='SOXL_2y.csv', help='가격 데이터 CSV')
+    parser.add_argument('--sim', action='append', choices=sorted(SIMULATORS),
+                        help='대상 시뮬레이터 (여러 번 지정 가능, 기본: 전체)')
+    parser.add_argument('--freq', default='M', choices=sorted(FREQUENCIES))
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--cache-dir', default=None)
+    parser.add_argument('--compact', action='store_true', help='압축 모드 데이터 (float32 가격, int64 거래량)')
+    args = parser.parse_args()
+
+    df = load_price_data(args.data)
+    if args.compact:
+        df = compact_frame(df)
+    names = args.sim or sorted(SIMULATORS)
+    windows = make_windows(df, args.freq)
+    tasks = [(name, start, end, None) for name in names for start, end in windows]
+
+    with SharedRunCoordinator(df) as coordinator:
+        summaries = coordinator.run(tasks, args.workers, args.cache_dir)
+
+    results = pd.DataFrame(summaries)
+    results.insert(0, 'simulator', [task[0] for task in tasks])
+    for name, group in results.groupby('simulator'):
+        print(f"\n=== {name} ===")
+        for key, value in aggregate(group).items():
+            print(f"{key}: {value:,.2f}" if isinstance(value, float) else f"{key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,407 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+시뮬레이터 상태 스냅샷 / 재개 / 분기(fork)
+계좌 장부, 현금, 보유 주식, 거래 기록 커서, 지표/신호 상태를 버전이 붙은 바이너리로 저장하고,
+저장 시점부터 재개하거나 여러 변형 규칙으로 병렬 분기 실행한다.
+
+파일 구조: MAGIC(4) + 버전(uint16) + 헤더 길이(uint32) + JSON 헤더 + npz 배열
+"""
+
+import argparse
+import contextlib
+import importlib
+import io
+import json
+import multiprocessing
+import struct
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from dataset import TradingCalendar, arrays_to_records, records_to_arrays
+from engine import AccountBook
+from range_runner import (SIMULATORS, get_simulator_class, run_range, slice_with_warmup, summarize,
+                          warmup_bars)
+from strategies import SIGNAL_START
+
+MAGIC = b'FSNP'
+SNAPSHOT_VERSION = 1
+_PREFIX = struct.Struct('<4sHI')
+
+# 그대로 저장/복원하는 스칼라 상태
+SCALAR_FIELDS = ('initial_capital', 'position_size', 'cash_per_trade',
+                 'cash', 'shares', 'total_shares', 'position', 'bar_index')
+
+# 스냅샷에 포함되는 거래 기록
+JOURNAL_FIELDS = ('trades', 'daily_results')
+SERIES_FIELDS = ('portfolio_value', 'dates')
+
+
+def _to_python(value):
+    """numpy 스칼라를 JSON 저장 가능한 값으로 변환"""
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def _cursor_date(simulator):
+    """시뮬레이터가 마지막으로 처리한 날짜"""
+    if getattr(simulator, 'daily_results', None):
+        return pd.to_datetime(simulator.daily_results[-1]['date'])
+    if getattr(simulator, 'dates', None):
+        return pd.to_datetime(simulator.dates[-1])
+    return None
+
+
+def take_snapshot(simulator, df=None, include_journals=True, cursor_date=None):
+    """
+    시뮬레이터 상태를 바이너리 스냅샷으로 저장
+
+    Args:
+        simulator: 실행 중(또는 실행 후) 시뮬레이터
+        df (DataFrame): 실행에 사용한 데이터 (지표 시작 봉과 신호 상태 저장용)
+        include_journals (bool): False면 거래 기록은 커서(개수)만 저장
+        cursor_date: 마지막 처리 날짜 (기본: 거래 기록의 마지막 날짜)
+
+    Returns:
+        bytes: 스냅샷
+    """
+    cls = type(simulator)
+    cursor = pd.to_datetime(cursor_date) if cursor_date is not None else _cursor_date(simulator)
+    header = {
+        'version': SNAPSHOT_VERSION,
+        'simulator': f'{cls.__module__}:{cls.__name__}',
+        'cursor_date': cursor.strftime('%Y-%m-%d') if cursor is not None else None,
+        'scalars': {name: _to_python(getattr(simulator, name))
+                    for name in SCALAR_FIELDS if hasattr(simulator, name)},
+        'journal_cursors': {name: len(getattr(simulator, name))
+                            for name in JOURNAL_FIELDS + SERIES_FIELDS if hasattr(simulator, name)},
+        'journal_columns': {},
+        'include_journals': include_journals,
+        'account_columns': [],
+        'exit_order': None,
+        'rules': None,
+        'indicator_start': None,
+        'signal_state': None,
+    }
+    arrays = {}
+
+    # 계좌 장부 (계좌 번호 순 컬럼 배열)
+    if hasattr(simulator, 'accounts'):
+        numbers = sorted(simulator.accounts)
+        arrays['accounts/number'] = np.asarray(numbers, dtype=np.int64)
+        header['account_columns'] = records_to_arrays(
+            'accounts', [dict(simulator.accounts[n]) for n in numbers], arrays)
+
+    # 목표가/손절가 청산 장부
+    if hasattr(simulator, 'exit_book'):
+        book = simulator.exit_book
+        header['exit_order'] = book.order
+        arrays['exit_book/active'] = book.active
+        arrays['exit_book/target'] = book.target
+        arrays['exit_book/stop'] = book.stop
+        arrays['exit_book/entry_bar'] = book.entry_bar
+
+    # 규칙 전략: 규칙 정의와 인자 (복원 시 같은 규칙으로 생성)
+    rules = getattr(simulator.strategy, 'rules', None)
+    if rules is not None:
+        header['rules'] = {'definition': rules.spec, 'params': rules.params}
+
+    # 거래 기록
+    if include_journals:
+        for name in JOURNAL_FIELDS:
+            if hasattr(simulator, name):
+                header['journal_columns'][name] = records_to_arrays(
+                    name, getattr(simulator, name), arrays)
+        if hasattr(simulator, 'portfolio_value'):
+            arrays['portfolio_value'] = np.asarray(simulator.portfolio_value, dtype=np.float64)
+            arrays['dates'] = pd.to_datetime(pd.Series(simulator.dates, dtype='object')).to_numpy()
+
+    # 지표 상태: 실행 데이터의 시작 봉 (재개 시 같은 봉부터 이평선을 다시 계산) 과 신호 상태
+    if df is not None and len(df):
+        header['indicator_start'] = pd.to_datetime(df['date'].iloc[0]).strftime('%Y-%m-%d')
+    if df is not None and cursor is not None:
+        _, position = TradingCalendar.of(df).locate(end=cursor)
+        if 'signal' in df.columns and position > 0:
+            row = df.iloc[position - 1]
+            header['signal_state'] = {'signal': int(row['signal']), 'position': int(row['position'])}
+
+    buffer = io.BytesIO()
+    np.savez(buffer, **arrays)
+    header_bytes = json.dumps(header, ensure_ascii=False).encode('utf-8')
+    return _PREFIX.pack(MAGIC, SNAPSHOT_VERSION, len(header_bytes)) + header_bytes + buffer.getvalue()
+
+
+def read_snapshot(blob):
+    """
+    스냅샷 바이트를 (헤더, 배열) 로 해석
+
+    Raises:
+        ValueError: 스냅샷 형식이 아니거나 지원하지 않는 버전
+    """
+    if len(blob) < _PREFIX.size:
+        raise ValueError("스냅샷 데이터가 너무 짧습니다.")
+    magic, version, header_length = _PREFIX.unpack_from(blob)
+    if magic != MAGIC:
+        raise ValueError("스냅샷 형식이 아닙니다.")
+    if version > SNAPSHOT_VERSION:
+        raise ValueError(f"지원하지 않는 스냅샷 버전: {version} (지원: {SNAPSHOT_VERSION} 이하)")
+
+    start = _PREFIX.size
+    header = json.loads(blob[start:start + header_length].decode('utf-8'))
+    with np.load(io.BytesIO(blob[start + header_length:]), allow_pickle=False) as data:
+        arrays = {key: data[key] for key in data.files}
+    return header, arrays
+
+
+def restore_snapshot(blob, **overrides):
+    """
+    스냅샷에서 시뮬레이터 복원
+
+    규칙 전략은 저장된 규칙 정의와 인자로 생성한다.
+    생성 인자 재정의는 저장된 상태를 복원한 뒤에 적용한다. 청산 순서와 규칙 인자는 생성 인자로
+    그대로 반영되고, 분할 수는 1회 매수 금액을 다시 계산한다 (_resize).
+    실행이 진행된 스냅샷의 초기 자본은 바꿀 수 없다.
+
+    Args:
+        blob (bytes): take_snapshot 결과
+        **overrides: 시뮬레이터 생성 인자 재정의 (분기 시 규칙 변경)
+
+    Returns:
+        (simulator, header)
+
+    Raises:
+        ValueError: 상태와 맞지 않는 재정의 (진행 후 초기 자본, 보유 계좌가 있을 때 분할 수)
+    """
+    header, arrays = read_snapshot(blob)
+    module_name, class_name = header['simulator'].split(':')
+    cls = getattr(importlib.import_module(module_name), class_name)
+
+    scalars = header['scalars']
+    kwargs = {'initial_capital': scalars['initial_capital'], 'position_size': scalars['position_size']}
+    if header['exit_order'] is not None:
+        kwargs['exit_order'] = header['exit_order']
+    if header.get('rules') and 'rules' not in overrides:
+        # 규칙을 바꾸는 분기는 저장된 규칙 인자도 함께 버린다 (새 규칙의 기본값 사용)
+        kwargs['rules'] = header['rules']['definition']
+        kwargs.update(header['rules']['params'])
+    kwargs.update(overrides)
+    simulator = cls(**kwargs)
+    if header['cursor_date'] is None:
+        # 진행 전 스냅샷: 재정의를 반영한 새 시뮬레이터가 곧 복원 결과
+        return simulator, header
+    if kwargs['initial_capital'] != scalars['initial_capital']:
+        raise ValueError("실행이 진행된 스냅샷의 초기 자본은 바꿀 수 없습니다.")
+
+    for name, value in scalars.items():
+        setattr(simulator, name, value)
+
+    if header['account_columns']:
+        numbers = arrays['accounts/number'].tolist()
+        records = arrays_to_records('accounts', header['account_columns'], arrays)
+        simulator.accounts = dict(zip(numbers, records))
+
+    if header['exit_order'] is not None:
+        book = simulator.exit_book
+        book.active = arrays['exit_book/active'].copy()
+        book.target = arrays['exit_book/target'].copy()
+        book.stop = arrays['exit_book/stop'].copy()
+        book.entry_bar = arrays['exit_book/entry_bar'].copy()
+
+    if header['include_journals']:
+        for name, columns in header['journal_columns'].items():
+            setattr(simulator, name, arrays_to_records(name, columns, arrays))
+        if 'portfolio_value' in arrays:
+            simulator.portfolio_value = arrays['portfolio_value'].tolist()
+            simulator.dates = list(pd.to_datetime(arrays['dates']))
+
+    if kwargs['position_size'] != scalars['position_size']:
+        _resize(simulator, kwargs['position_size'])
+    return simulator, header
+
+
+def _resize(simulator, position_size):
+    """
+    복원한 시뮬레이터의 분할 수 변경
+
+    1회 매수 금액(초기 자본 / 분할 수)을 다시 계산한다. 계좌 전략은 보유 계좌가 없을 때만
+    계좌 현금 합계를 새 계좌 수로 균등 배분한 장부로 바꾼다.
+
+    Raises:
+        ValueError: 보유 중인 계좌가 있는 계좌 전략
+    """
+    if hasattr(simulator, 'accounts'):
+        book = simulator.book
+        if book.filled.any():
+            raise ValueError("보유 중인 계좌가 있는 스냅샷의 분할 수는 바꿀 수 없습니다.")
+        cash = float(book.columns['cash'].sum())
+        simulator.book = AccountBook(position_size, cash / position_size, book.exit_book.order)
+    simulator.position_size = position_size
+    simulator.cash_per_trade = simulator.initial_capital / position_size
+
+
+def resume(simulator, header, df, end_date=None):
+    """
+    스냅샷 커서 다음 봉부터 end_date 까지 실행 (커서 이후 구간만 비용이 든다)
+
+    지표는 원래 실행과 같은 시작 봉(헤더의 indicator_start)부터 다시 계산한다. rolling 평균은
+    시작 위치에 따라 마지막 자리가 달라지므로, 커서 직전부터만 자르면 이어서 실행한 결과가
+    한 번에 실행한 결과와 달라질 수 있다.
+
+    Args:
+        simulator, header: restore_snapshot 결과
+        df (DataFrame): load_data 결과 (커서 이전 구간 포함)
+        end_date: 종료일 (기본: 데이터 끝)
+
+    Returns:
+        DataFrame: 지표 시작 봉부터의 실행 데이터 (신호 기반 시뮬레이터는 신호 포함, 다음 스냅샷용)
+    """
+    calendar = TradingCalendar.of(df)
+    start = calendar.next(header['cursor_date']) if header['cursor_date'] else df['date'].iloc[0]
+    end_date = pd.to_datetime(end_date) if end_date is not None else df['date'].iloc[-1]
+    first, last = calendar.locate(start, end_date) if start is not None else (len(df), len(df))
+    if first >= last:
+        return df.iloc[:0]
+
+    # 지표 시작 봉이 데이터에 없으면(앞부분이 바뀐 데이터) 워밍업 봉 수만큼 앞에서 시작
+    begin = calendar.position(header['indicator_start']) if header.get('indicator_start') else None
+    if begin is None:
+        begin = first - warmup_bars(simulator.strategy)
+    begin = min(max(begin, 0), first)
+
+    if hasattr(simulator, 'accounts'):
+        frame = df.iloc[begin:]
+        simulator.execute_trading(frame, df['date'].iloc[first], end_date)
+        return frame
+
+    # 커서 봉의 신호/포지션을 이어받아 새 구간만 신호 계산
+    state = header['signal_state'] or {'signal': 0, 'position': 0}
+    frame = df.iloc[begin:last].reset_index(drop=True)
+    frame = simulator.calculate_signals(frame, start=max(first - begin, SIGNAL_START),
+                                        prev_signal=state['signal'], prev_position=state['position'])
+    simulator.execute_trading(frame.iloc[first - begin:].reset_index(drop=True))
+    return frame
+
+
+# fork 방식 프로세스 풀에서 자식 프로세스가 복사 없이(copy-on-write) 물려받는 상태
+_FORK_STATE = {}
+
+
+def _run_variant(index):
+    """분기 작업 함수"""
+    blob = _FORK_STATE['blob']
+    df = _FORK_STATE['df']
+    variant = _FORK_STATE['variants'][index]
+    end_date = _FORK_STATE['end_date']
+
+    simulator, header = restore_snapshot(blob, **variant)
+    with contextlib.redirect_stdout(io.StringIO()):
+        resume(simulator, header, df, end_date)
+    summary = summarize(simulator, header['cursor_date'] or df['date'].iloc[0], end_date or df['date'].iloc[-1])
+    summary.update({f'variant.{key}': value for key, value in variant.items()})
+    return summary
+
+
+def fork_variants(blob, df, variants, end_date=None, max_workers=None):
+    """
+    하나의 스냅샷에서 여러 변형을 병렬로 분기 실행
+
+    fork 를 지원하는 플랫폼에서는 스냅샷과 데이터가 자식 프로세스에 복사 없이 공유된다.
+
+    Args:
+        blob (bytes): 분기 시점 스냅샷
+        df (DataFrame): load_data 결과
+        variants (list[dict]): 변형별 시뮬레이터 생성 인자 재정의
+        end_date: 종료일 (기본: 데이터 끝)
+
+    Returns:
+        DataFrame: 변형별 요약 (분기 시점 이후 구간)
+    """
+    _FORK_STATE.update(blob=blob, df=df, variants=list(variants), end_date=end_date)
+    try:
+        if max_workers == 1 or 'fork' not in multiprocessing.get_all_start_methods():
+            results = [_run_variant(i) for i in range(len(variants))]
+        else:
+            context = multiprocessing.get_context('fork')
+            with ProcessPoolExecutor(max_workers=max_workers, mp_context=context) as executor:
+                results = list(executor.map(_run_variant, range(len(variants))))
+    finally:
+        _FORK_STATE.clear()
+    return pd.DataFrame(results)
+
+
+def simulator_frame(simulator, df, start_date, end_date):
+    """
+    run_range 가 실행한 데이터 (스냅샷의 지표 시작 봉, 신호 기반 시뮬레이터는 신호 포함)
+    """
+    data, _ = slice_with_warmup(df, start_date, end_date, warmup_bars(simulator.strategy))
+    if hasattr(simulator, 'accounts'):
+        return data
+    return simulator.calculate_signals(data)
+
+
+def _parse_variant(text):
+    """'key=value,key=value' 형식의 변형 인자 해석"""
+    variant = {}
+    for item in filter(None, text.split(',')):
+        key, value = item.split('=', 1)
+        try:
+            variant[key] = json.loads(value)
+        except json.JSONDecodeError:
+            variant[key] = value
+    return variant
+
+
+def main():
+    """메인 실행 함수"""
+    parser = argparse.ArgumentParser(description='시뮬레이터 스냅샷 / 재개 / 분기')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    take = sub.add_parser('take', help='지정일까지 실행 후 스냅샷 저장')
+    take.add_argument('--data', default='SOXL_2y.csv')
+    take.add_argument('--sim', default='january_v2', choices=sorted(SIMULATORS))
+    take.add_argument('--start', required=True)
+    take.add_argument('--until', required=True)
+    take.add_argument('--out', required=True)
+
+    res = sub.add_parser('resume', help='스냅샷에서 이어서 실행')
+    res.add_argument('snapshot')
+    res.add_argument('--data', default='SOXL_2y.csv')
+    res.add_argument('--end')
+    res.add_argument('--out', help='종료 상태 스냅샷 저장 경로')
+
+    fork = sub.add_parser('fork', help='스냅샷에서 여러 변형 병렬 실행')
+    fork.add_argument('snapshot')
+    fork.add_argument('--data', default='SOXL_2y.csv')
+    fork.add_argument('--end')
+    fork.add_argument('--variant', action='append', default=[], help="예: exit_order=ohlc")
+    fork.add_argument('--workers', type=int)
+    args = parser.parse_args()
+
+    if args.command == 'take':
+        df = get_simulator_class(args.sim)().load_data(args.data)
+        simulator, _ = run_range(args.sim, df, args.start, args.until)
+        with open(args.out, 'wb') as f:
+            f.write(take_snapshot(simulator, simulator_frame(simulator, df, args.start, args.until)))
+        print(f"스냅샷 저장 완료: {args.out}")
+        return
+
+    with open(args.snapshot, 'rb') as f:
+        blob = f.read()
+    simulator, header = restore_snapshot(blob)
+    df = simulator.load_data(args.data)
+
+    if args.command == 'resume':
+        frame = resume(simulator, header, df, args.end)
+        print(summarize(simulator, header['cursor_date'], args.end or df['date'].iloc[-1]))
+        if args.out:
+            with open(args.out, 'wb') as f:
+                f.write(take_snapshot(simulator, frame))
+    else:
+        variants = [_parse_variant(v) for v in args.variant] or [{}]
+        results = fork_variants(blob, df, variants, args.end, args.workers)
+        print(results.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
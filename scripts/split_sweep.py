@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+분할 수 / 초기 자본 what-if 일괄 실행
+(초기 자본, 분할 수) 조합 여러 개를 분할 엔진(LadderEngine)과 같은 규칙으로 한 번에 실행한다.
+
+조합마다 계좌 행 하나를 두고, 가장 큰 분할 수에 맞춰 채운 (조합 x 계좌) 배열 하나에서
+매수/조건부 매도/목표가·손절가 청산을 봉마다 한 번에 계산한다. 분할 수보다 뒤의 계좌는
+현금이 0 인 채로 매수 대상에서 빠지므로 평가액에 영향이 없다.
+
+    - 봉별 매수 계획(국면, 매수 봉, 등차)은 분할 수/자본과 관계없으므로 한 번만 계산
+    - 조합별 결과는 같은 인자의 LadderEngine(initial_capital, position_size) 실행 결과와 같다
+    - 매수 수량은 소수 단위이므로 수익률은 초기 자본과 관계없고, 분할 수에 따라서만 달라진다
+
+사용법:
+    python split_sweep.py --splits 5:200:5 --capital 10000,50000 --set up_buy=0.99 --set down_buy=1.01
+    python split_sweep.py --rules outline --splits 5,7,10,20,40
+"""
+
+import argparse
+import io
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from engine import AccountBook, LadderEngine
+from instrument import count, timed
+from memory_profile import command_line
+from range_runner import slice_with_warmup, summarize_curve, warmup_bars
+from strategies import RuleStrategy
+
+
+def parse_list(spec, cast=float):
+    """'시작:끝:간격' 또는 '값1,값2,...' 를 값 목록으로"""
+    if ':' in spec:
+        start, stop, step = (float(value) for value in spec.split(':'))
+        return [cast(value) for value in np.arange(start, stop + step / 2, step)]
+    return [cast(value) for value in spec.split(',')]
+
+
+class SplitSweep:
+    """(초기 자본, 분할 수) 조합을 채운 계좌 배열 하나로 함께 실행하는 분할 엔진"""
+
+    def __init__(self, configs, strategy=None, exit_order='olhc'):
+        """
+        Args:
+            configs (list): (초기 자본, 분할 수) 목록
+            strategy (RuleStrategy | str): 분할 매매 전략 또는 규칙 이름 (기본: january_v2)
+            exit_order (str): 봉 내부 가격 경로 가정 ('ohlc' 또는 비관적 'olhc')
+        """
+        if strategy is None or isinstance(strategy, str):
+            strategy = RuleStrategy(strategy or 'january_v2')
+        self.strategy = strategy
+        self.configs = [(capital, int(splits)) for capital, splits in configs]
+        self.capital = np.array([capital for capital, _ in self.configs], dtype=np.float64)
+        self.splits = np.array([splits for _, splits in self.configs], dtype=np.int64)
+        self.exit_order = exit_order
+        self.dates = None
+        self.values = None
+        self.trade_counts = np.zeros(len(self.configs), dtype=np.int64)
+
+    @timed('execute_trading')
+    def execute_trading(self, df, start_date, end_date):
+        """
+        조합 전체를 기간에 대해 실행
+
+        봉마다 (매수 → 조건부 매도 → 목표가/손절가 청산 → 평가) 순서는 분할 엔진과 같다.
+
+        Args:
+            df (DataFrame): 시작일 이전 구간(이평선 워밍업)을 포함한 데이터
+            start_date, end_date: 시뮬레이션 기간 (양 끝 포함)
+
+        Returns:
+            np.ndarray: 판단한 봉별 조합별 평가액 (봉 수 x 조합 수)
+        """
+        bars = LadderEngine(self.strategy).window_bars(df, start_date, end_date)
+        plan = self.strategy.plan(bars)
+        valid, buy, step = plan['valid'], plan['buy'], plan['step']
+        buy_bars = np.flatnonzero(buy)
+        n = len(bars['date'])
+        n_configs, width = len(self.configs), int(self.splits.max())
+
+        # 조합별 계좌 행: 분할 수까지만 현금(자본 / 분할 수)이 있고 나머지는 채움 계좌
+        usable = np.arange(width) < self.splits[:, None]
+        self.book = book = AccountBook(n_configs * width, 0.0, self.exit_order)
+        book.columns['cash'][:] = np.where(usable, (self.capital / self.splits)[:, None], 0.0).ravel()
+        usable = usable.ravel()
+        sell_rate = self.strategy.sell_price_rate
+        trade_counts = self.trade_counts
+        values = np.empty((n, n_configs))
+
+        def row_values(close_price):
+            # 계좌 번호 순서의 누적 합 (AccountBook.total_value 와 같은 더하기 순서)
+            held = np.where(book.filled, book.columns['shares'] * close_price, book.columns['cash'])
+            return np.add.accumulate(held.reshape(n_configs, width), axis=1)[:, -1]
+
+        i = 0
+        while i < n:
+            if not book.filled.any():
+                # 체결된 계좌가 없으면 다음 매수 봉까지 평가액은 현금 그대로
+                next_buy = buy_bars[np.searchsorted(buy_bars, i):]
+                stop = int(next_buy[0]) if len(next_buy) else n
+                values[i:stop] = row_values(0.0)
+                i = stop
+                if i >= n:
+                    break
+
+            if valid[i]:
+                open_price = bars['open'][i].item()
+                if buy[i]:
+                    # 조합마다 빈 계좌를 번호 순서로, 기준가에서 등차만큼 낮춰 가며
+                    empty = ~book.filled & usable
+                    rank = np.cumsum(empty.reshape(n_configs, width), axis=1).ravel() - 1
+                    prices = open_price * self.strategy.buy_base_rate - step[i] * rank
+                    indices = np.flatnonzero(empty & (prices > 0))
+                    book.buy(indices, prices[indices], i)
+                    trade_counts += np.bincount(indices // width, minlength=n_configs)
+                if book.filled.any():
+                    targets = np.flatnonzero(book.filled & self.strategy.sell_mask(bars, plan, i, book.columns))
+                    book.sell(targets, np.full(len(targets), open_price * sell_rate))
+                    trade_counts += np.bincount(targets // width, minlength=n_configs)
+
+                # 장중 목표가/손절가 청산
+                indices, _, prices = book.exit_book.check(i, open_price, bars['high'][i].item(),
+                                                          bars['low'][i].item())
+                book.sell(indices, prices)
+                trade_counts += np.bincount(indices // width, minlength=n_configs)
+            values[i] = row_values(bars['close'][i].item())
+            count('accounts_scanned', len(book))
+            i += 1
+
+        count('bars', n)
+        self.dates = bars['date'][valid]
+        self.values = values[valid]
+        return self.values
+
+    def results(self, start_date, end_date):
+        """
+        조합별 구간 요약
+
+        Returns:
+            DataFrame: initial_capital, splits 와 range_runner.summarize 지표
+        """
+        rows = []
+        for k, (capital, splits) in enumerate(self.configs):
+            row = summarize_curve(capital, self.values[:, k], int(self.trade_counts[k]), start_date, end_date)
+            row['splits'] = splits
+            rows.append(row)
+        columns = ['initial_capital', 'splits', 'final_value', 'total_return_pct', 'max_drawdown_pct', 'total_trades']
+        return pd.DataFrame(rows)[columns]
+
+
+def render(results, path, title):
+    """분할 수별 수익률 / 최대 낙폭 선 그래프 (초기 자본별 선)"""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    fig, axes = plt.subplots(1, 2, figsize=(12, 4.5))
+    for capital, group in results.groupby('initial_capital'):
+        group = group.sort_values('splits')
+        for ax, metric in zip(axes, ('total_return_pct', 'max_drawdown_pct')):
+            ax.plot(group['splits'], group[metric], marker='o', markersize=3, label=f'${capital:,.0f}')
+    for ax, metric in zip(axes, ('total_return_pct', 'max_drawdown_pct')):
+        ax.set_title(metric)
+        ax.set_xlabel('splits')
+        ax.grid(True, alpha=0.3)
+    # 분할 수에 따라 수익률이 몇 자릿수씩 달라지므로 대칭 로그 축
+    axes[0].set_yscale('symlog')
+    axes[0].legend(title='initial_capital')
+    fig.suptitle(title)
+    fig.tight_layout()
+    fig.savefig(path, dpi=120)
+    plt.close(fig)
+    return path
+
+
+@timed('main')
+def main():
+    """메인 실행 함수"""
+    parser = argparse.ArgumentParser(description='분할 수 / 초기 자본 what-if 일괄 실행')
+    parser.add_argument('--data', default='SOXL_2y.csv', help='가격 데이터 CSV')
+    parser.add_argument('--rules', default='january_v2', help='규칙 이름 또는 JSON 파일')
+    parser.add_argument('--start', default='2024-01-02', help='시작일 (YYYY-MM-DD)')
+    parser.add_argument('--end', default='2024-12-27', help='종료일 (YYYY-MM-DD)')
+    parser.add_argument('--splits', default='5:200:5', help='분할 수 (예: 5:200:5 또는 5,7,10,20)')
+    parser.add_argument('--capital', default='10000', help='초기 자본 (예: 10000,50000)')
+    parser.add_argument('--set', action='append', default=[], help='규칙 인자 (예: up_buy=0.99)')
+    parser.add_argument('--exit-order', default='olhc', choices=['olhc', 'ohlc'], help='봉 내부 가격 경로 가정')
+    parser.add_argument('--out', default=os.path.join('results', 'splits'), help='CSV / 그래프 저장 디렉터리')
+    args, _ = parser.parse_known_args()
+
+    params = {name: json.loads(value) for name, value in (item.split('=', 1) for item in args.set)}
+    strategy = RuleStrategy(args.rules, **params)
+    configs = [(capital, splits) for capital in parse_list(args.capital)
+               for splits in parse_list(args.splits, int)]
+
+    df = LadderEngine(strategy).load_data(args.data)
+    data, _ = slice_with_warmup(df, args.start, args.end, warmup_bars(strategy))
+    sweep = SplitSweep(configs, strategy, args.exit_order)
+    sweep.execute_trading(data, args.start, args.end)
+    results = sweep.results(args.start, args.end)
+    print(results.to_string(index=False))
+
+    os.makedirs(args.out, exist_ok=True)
+    csv_path = os.path.join(args.out, f'{strategy.rules.name}_splits.csv')
+    results.to_csv(csv_path, index=False, encoding='utf-8-sig')
+    png_path = render(results, os.path.join(args.out, f'{strategy.rules.name}_splits.png'),
+                      f'{strategy.rules.name}: {args.start} ~ {args.end}')
+    print(f"\n{len(configs)}개 조합 저장: {csv_path}, {png_path}")
+
+
+if __name__ == "__main__":
+    # 한글 인코딩 설정 (다른 모듈에서 import 할 때는 stdout 을 건드리지 않는다)
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+    # --profile-memory: 단계별 메모리 보고
+    with command_line():
+        main()
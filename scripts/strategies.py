@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+전략 플러그인
+매매 규칙만 담고 체결, 계좌 장부, 거래 기록은 통합 엔진(engine.py)이 맡는다.
+
+    신호 전략(kind='signal'): signals() 로 봉별 매수/매도 신호와 포지션 배열을 한 번에 계산
+    계좌 전략(kind='ladder'): plan() 으로 봉별 매수 여부와 매도 기준을 한 번에 계산
+"""
+
+import numpy as np
+import pandas as pd
+
+from rules import RuleSet
+
+# 신호 계산 시작 위치 (60일 이평선 계산 후부터)
+SIGNAL_START = 60
+
+
+class Strategy:
+    """전략 플러그인 기본 클래스"""
+
+    name = None
+    kind = 'signal'
+    # 필요한 이동평균 창 (엔진이 MA 컬럼으로 추가)
+    indicators = (60,)
+
+    def signals(self, cache, start=SIGNAL_START, prev_signal=0, prev_position=0):
+        """
+        봉별 신호 계산 (신호 전략)
+
+        Args:
+            cache (IndicatorCache): 가격/지표 배열
+            start (int): 신호 계산 시작 위치
+            prev_signal, prev_position: start 직전 봉의 신호/포지션
+
+        Returns:
+            (signal, position): 봉별 신호(1/-1/0)와 포지션 배열
+        """
+        raise NotImplementedError
+
+    def plan(self, bars):
+        """
+        봉별 매매 계획 (계좌 전략)
+
+        Args:
+            bars (dict): 기간 봉 배열 (date, open, high, low, close, prev_close, MA 창별 이동평균)
+
+        Returns:
+            dict: valid(판단 가능 봉), buy(매수 봉), step(매수 봉의 등차) 배열
+        """
+        raise NotImplementedError
+
+    def sell_mask(self, bars, plan, i, accounts):
+        """
+        봉 i 에서 조건부 매도할 계좌 (계좌 전략)
+
+        Args:
+            accounts (dict): 계좌 컬럼 배열 (AccountBook.columns)
+
+        Returns:
+            np.ndarray: 계좌별 매도 여부
+        """
+        raise NotImplementedError
+
+
+def _seed(n, start, prev_signal, prev_position):
+    """신호/포지션 배열을 만들고 start 직전 봉에 이전 상태를 기록"""
+    signal = np.zeros(n, dtype=np.int64)
+    position = np.zeros(n, dtype=np.int64)
+    if 0 < start <= n:
+        signal[start - 1] = prev_signal
+        position[start - 1] = prev_position
+    return signal, position
+
+
+def ma_cross_signals(close, ma60, start=SIGNAL_START, prev_signal=0, prev_position=0):
+    """
+    60일 이평선 돌파/이탈 신호
+
+    같은 방향 조건이 연속되면 직전 봉과 같은 신호를 내지 않으므로 신호가 한 봉씩
+    건너뛰며 나온다. 연속 구간 안의 위치가 짝수인 봉만 신호를 낸다.
+
+    Returns:
+        (signal, position): 봉별 신호(1/-1/0)와 포지션 배열
+    """
+    n = len(close)
+    signal, position = _seed(n, start, prev_signal, prev_position)
+    if start >= n:
+        return signal, position
+    start = max(start, 0)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        ratio = (close[start:] - ma60[start:]) / ma60[start:] * 100
+    raw = np.where(ratio >= 1.0, 1, np.where(ratio <= -2.0, -1, 0))
+
+    # 직전 봉 신호를 구간의 첫 원소로 두고 연속 구간 안의 위치 계산
+    seq = np.concatenate(([signal[start - 1] if start > 0 else 0], raw))
+    index = np.arange(len(seq))
+    new_run = np.ones(len(seq), dtype=bool)
+    new_run[1:] = seq[1:] != seq[:-1]
+    run_start = np.maximum.accumulate(np.where(new_run, index, 0))
+    emit = ((index - run_start) % 2 == 0) & (seq != 0)
+    signal[start:] = np.where(emit[1:], seq[1:], 0)
+    return signal, position
+
+
+def trend_filter_signals(close, ma20, ma60, start=SIGNAL_START, prev_signal=0, prev_position=0):
+    """
+    MA20/MA60 추세 확인 신호
+
+    매수 조건과 매도 조건은 동시에 성립하지 않으므로 포지션은 마지막으로 성립한 조건을 따른다.
+    지표가 없는 봉은 포지션을 기록하지 않아 0 으로 돌아간다.
+
+    Returns:
+        (signal, position): 봉별 신호(1/-1/0)와 포지션 배열
+    """
+    n = len(close)
+    signal, position = _seed(n, start, prev_signal, prev_position)
+    if start >= n:
+        return signal, position
+    start = max(start, 0)
+
+    c, m20, m60 = close[start:], ma20[start:], ma60[start:]
+    valid = ~(np.isnan(m60) | np.isnan(m20))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        ratio_60 = (c - m60) / m60 * 100
+        ratio_20 = (c - m20) / m20 * 100
+    buy = valid & (ratio_60 >= 2.0) & (ratio_20 >= 1.0) & (m20 > m60)
+    sell = valid & ((ratio_60 <= -1.0) | (ratio_20 <= -2.0) | (m20 < m60))
+
+    event = np.where(buy, 1.0, np.where(sell | ~valid, 0.0, np.nan))
+    initial = position[start - 1] if start > 0 else 0
+    state = pd.Series(np.concatenate(([initial], event))).ffill().to_numpy().astype(np.int64)
+    position[start:] = state[1:]
+    signal[start:] = np.where(valid, state[1:] - state[:-1], 0)
+    return signal, position
+
+
+class MACrossStrategy(Strategy):
+    """60일 이평선 돌파 매수 (+1%), 이탈 매도 (-2%)"""
+
+    name = 'ma_cross'
+    indicators = (60,)
+
+    def signals(self, cache, start=SIGNAL_START, prev_signal=0, prev_position=0):
+        return ma_cross_signals(cache.column('close'), cache.sma(60), start, prev_signal, prev_position)
+
+
+class TrendFilterStrategy(Strategy):
+    """MA20 > MA60 추세에서 두 이평선을 모두 돌파하면 매수, 하나라도 이탈하면 매도"""
+
+    name = 'trend_filter'
+    indicators = (60, 20)
+
+    def signals(self, cache, start=SIGNAL_START, prev_signal=0, prev_position=0):
+        return trend_filter_signals(cache.column('close'), cache.sma(20), cache.sma(60),
+                                    start, prev_signal, prev_position)
+
+
+class RuleStrategy(Strategy):
+    """규칙 DSL(rules.py)로 정의한 분할 매매 전략"""
+
+    name = 'rules'
+    kind = 'ladder'
+
+    def __init__(self, rules='january_v2', **params):
+        """
+        Args:
+            rules (str | dict): 규칙 이름(rules.RULE_SETS), JSON 파일 경로 또는 규칙 정의
+            **params: 덮어쓸 규칙 인자 (예: up_buy=1.04)
+        """
+        self.rules = RuleSet(rules, params)
+        self.indicators = self.rules.indicators
+        self.buy_base_rate = self.rules.params['buy_base_rate']
+        self.sell_price_rate = self.rules.params['sell_price_rate']
+
+    def step(self, prev_close):
+        """전날 종가 기준 등차 (calculate_step 호환, 규칙의 step_rate 사용)"""
+        return round(prev_close * self.rules.params.get('step_rate', 0.01), 1)
+
+    def plan(self, bars):
+        return self.rules.plan(bars)
+
+    def sell_mask(self, bars, plan, i, accounts):
+        return self.rules.sell_mask(plan, i, accounts)
+
+    def sell_masks(self, bars, plan, rows, accounts):
+        """종목별 봉 rows 에서 조건부 매도할 계좌 (포트폴리오 엔진, 종목 수 x 계좌 수)"""
+        return self.rules.sell_masks(plan, rows, accounts)
+
+    def describe_sell(self, bars, plan, i, C):
+        """매도 계좌 설명 (출력용)"""
+        return f"C={C:.2f}, {self.rules.regimes[plan['regime'][i]]['sell'].text}"
+
+    def trace(self, bars, plan, i):
+        """봉 i 의 판단 과정 (출력용 문자열 목록)"""
+        date = pd.Timestamp(bars['date'][i])
+        values = ', '.join(f"{letter}={bars[column][i]:.2f}" for letter, column in self.rules.letters.items())
+        if plan['buy'][i]:
+            values += f", step={plan['step'][i]}"
+        lines = [f"\n{date.strftime('%Y-%m-%d')}: {values}"]
+        if plan['regime'][i] < 0:
+            lines.append("  국면: 해당 없음")
+            return lines
+        regime = self.rules.regimes[plan['regime'][i]]
+        lines.append(f"  국면: {regime['name']}")
+        if plan['buy'][i]:
+            lines.append(f"  매수 조건: {regime['buy'].text} - 매수 실행")
+        else:
+            lines.append(f"  매수 조건 미충족: {regime['buy'].text}")
+        return lines
+
+
+class LadderStrategy(RuleStrategy):
+    """
+    20분할 등차수열 매수 전략 (january_simulation 규칙, rules.RULE_SETS['january_v2'])
+
+    A: 60일 이평선, B: 전날 종가, C: 계좌 평균가, D: 시가
+    A > B 이면 B > A*1.05 일 때 매수, C > D*1.09 인 계좌 매도
+    A <= B 이면 B < A*0.95 일 때 매수, C > D*1.06 인 계좌 매도
+    매수가는 시가의 102% 에서 전날 종가의 1%(등차)씩 낮춰 가고, 매도가는 시가의 99%.
+    """
+
+    name = 'ladder'
+
+    def __init__(self, **params):
+        super().__init__('january_v2', **params)
+
+    def describe_sell(self, bars, plan, i, C):
+        rate = self.rules.params['up_sell' if plan['regime'][i] == 0 else 'down_sell']
+        D = bars['open'][i]
+        return f"C={C:.2f} > D*{1+rate:.2f}={D*(1+rate):.2f}"
+
+    def trace(self, bars, plan, i):
+        """봉 i 의 판단 과정 (january_simulation_v2 출력 형식)"""
+        A, B, D = bars['MA60'][i], bars['prev_close'][i], bars['open'][i]
+        up_buy, down_buy = self.rules.params['up_buy'], self.rules.params['down_buy']
+        date = pd.Timestamp(bars['date'][i])
+        lines = [f"\n{date.strftime('%Y-%m-%d')}: A={A:.2f}, B={B:.2f}, D={D:.2f}, step={self.step(B)}"]
+        if plan['regime'][i] == 0:
+            lines.append(f"  조건: A > B ({A:.2f} > {B:.2f})")
+            if plan['buy'][i]:
+                lines.append(f"  매수 조건: B > A*{up_buy:.2f} ({B:.2f} > {A*up_buy:.2f}) - 매수 실행")
+            else:
+                lines.append(f"  매수 조건 미충족: B <= A*{up_buy:.2f} ({B:.2f} <= {A*up_buy:.2f})")
+        else:
+            lines.append(f"  조건: A < B ({A:.2f} < {B:.2f})")
+            if plan['buy'][i]:
+                lines.append(f"  매수 조건: B < A*{down_buy:.2f} ({B:.2f} < {A*down_buy:.2f}) - 매수 실행")
+            else:
+                lines.append(f"  매수 조건 미충족: B >= A*{down_buy:.2f} ({B:.2f} >= {A*down_buy:.2f})")
+        return lines
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+거래일 달력의 구간 위치와 슬라이스 경계 조건 (데이터 밖, 거래일이 아닌 날, 이력보다 긴 워밍업)
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+from dataset import TradingCalendar  # noqa: E402
+
+
+@pytest.fixture
+def df():
+    # 2024-01-01(월) 부터 평일 10일: 01-06, 01-07 은 주말
+    dates = pd.bdate_range('2024-01-01', periods=10)
+    return pd.DataFrame({'date': dates, 'close': np.arange(10, dtype=np.float64)})
+
+
+@pytest.fixture
+def calendar(df):
+    return TradingCalendar.of(df)
+
+
+def test_locate_full_and_partial(calendar):
+    assert calendar.locate() == (0, 10)
+    assert calendar.locate('2024-01-02', '2024-01-04') == (1, 4)
+    assert calendar.locate(start='2024-01-10') == (7, 10)
+    assert calendar.locate(end='2024-01-03') == (0, 3)
+
+
+@pytest.mark.parametrize('start, end', [
+    ('2023-12-01', '2023-12-29'),  # 데이터 이전
+    ('2024-02-01', '2024-02-29'),  # 데이터 이후
+    ('2024-01-06', '2024-01-07'),  # 주말만
+    ('2024-01-05', '2024-01-02'),  # 시작일이 종료일보다 뒤
+])
+def test_locate_empty_ranges(calendar, start, end):
+    first, last = calendar.locate(start, end)
+    assert first == last
+
+
+def test_locate_non_trading_days_snap_inward(calendar, df):
+    first, last = calendar.locate('2024-01-06', '2024-01-13')
+    assert df['date'].iloc[first] == pd.Timestamp('2024-01-08')
+    assert df['date'].iloc[last - 1] == pd.Timestamp('2024-01-12')
+
+
+def test_locate_range_covering_data(calendar):
+    assert calendar.locate('2023-01-01', '2025-01-01') == (0, 10)
+
+
+def test_view_warmup(calendar, df):
+    data, offset = calendar.view(df, '2024-01-08', '2024-01-10', warmup=2)
+    assert offset == 2
+    assert list(data['close']) == [3.0, 4.0, 5.0, 6.0, 7.0]
+    assert data.index[0] == 0
+
+
+def test_view_warmup_longer_than_history(calendar, df):
+    data, offset = calendar.view(df, '2024-01-03', '2024-01-04', warmup=60)
+    assert offset == 2
+    assert list(data['close']) == [0.0, 1.0, 2.0, 3.0]
+
+
+def test_view_outside_data_has_no_period_bars(calendar):
+    df = pd.DataFrame({'date': calendar.dates, 'close': np.arange(10, dtype=np.float64)})
+    # 데이터 이후 구간: 워밍업 봉만 남고 기간 봉은 없다
+    data, offset = calendar.view(df, '2024-03-01', '2024-03-29', warmup=5)
+    assert offset == 5
+    assert data.iloc[offset:].empty
+    assert list(data['close']) == [5.0, 6.0, 7.0, 8.0, 9.0]
+    # 데이터 이전 구간
+    data, offset = calendar.view(df, '2023-12-01', '2023-12-29', warmup=5)
+    assert data.empty and offset == 0
+
+
+def test_position_and_next(calendar):
+    assert calendar.position('2024-01-01') == 0
+    assert calendar.position('2024-01-12') == 9
+    assert calendar.position('2024-01-06') is None
+    assert calendar.position('2023-12-29') is None
+    assert calendar.next('2024-01-05') == pd.Timestamp('2024-01-08')
+    assert calendar.next('2024-01-06') == pd.Timestamp('2024-01-08')
+    assert calendar.next('2023-12-01') == pd.Timestamp('2024-01-01')
+    assert calendar.next('2024-01-12') is None
+
+
+def test_unsorted_dates_rejected():
+    with pytest.raises(ValueError):
+        TradingCalendar(pd.Series(pd.to_datetime(['2024-01-02', '2024-01-01'])))
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""
+JobQueue.claim 과 만료 회수(reap_expired)가 겹칠 때의 동작
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+from job_queue import JobQueue  # noqa: E402
+
+
+def _age(queue, shard_id, seconds):
+    """대기 샤드의 수정 시각을 과거로 (오래 대기한 샤드)"""
+    old = time.time() - seconds
+    os.utime(queue._path('pending', shard_id), (old, old))
+
+
+def _reap_after_rename(monkeypatch, queue, lease_seconds):
+    """claim 의 rename 직후, 읽기 전에 다른 작업자의 reap_expired 가 끼어들게 한다"""
+    rename = os.rename
+    reaped = []
+
+    def rename_then_reap(source, target):
+        rename(source, target)
+        if not reaped and os.path.dirname(target).endswith('running'):
+            reaped.append(queue.reap_expired(lease_seconds))
+
+    monkeypatch.setattr(os, 'rename', rename_then_reap)
+    return reaped
+
+
+def test_claim_starts_fresh_lease_for_old_shard(tmp_path, monkeypatch):
+    queue = JobQueue(str(tmp_path))
+    shard_id, = queue.submit([{'simulator': 'trading'}])
+    _age(queue, shard_id, 3600)
+    reaped = _reap_after_rename(monkeypatch, queue, lease_seconds=120)
+
+    claimed, shard = queue.claim()
+
+    # 옮기기 전에 임대를 새로 시작하므로 대기 시간만으로는 회수되지 않는다
+    assert reaped == [[]]
+    assert claimed == shard_id
+    assert shard['jobs'] == [{'simulator': 'trading'}]
+    assert queue.status()['running'] == 1
+
+
+def test_claim_skips_shard_reaped_before_read(tmp_path, monkeypatch):
+    queue = JobQueue(str(tmp_path))
+    first, second = queue.submit([{'simulator': 'trading'}, {'simulator': 'improved'}], shard_size=1)
+    _age(queue, first, 3600)
+    # 음수 임대: 방금 옮긴 샤드도 회수된다 (읽기 전에 샤드가 사라지는 경우)
+    reaped = _reap_after_rename(monkeypatch, queue, lease_seconds=-1)
+
+    claimed, shard = queue.claim()
+
+    assert reaped == [[first]]
+    assert claimed == second
+    assert shard['jobs'] == [{'simulator': 'improved'}]
+
+
+def test_claim_returns_none_when_only_shard_reaped(tmp_path, monkeypatch):
+    queue = JobQueue(str(tmp_path))
+    shard_id, = queue.submit([{'simulator': 'trading'}])
+    _age(queue, shard_id, 3600)
+    reaped = _reap_after_rename(monkeypatch, queue, lease_seconds=-1)
+
+    assert queue.claim() == (None, None)
+    assert reaped == [[shard_id]]
+    # 회수된 샤드는 다음 claim 에서 다시 가져갈 수 있다
+    monkeypatch.undo()
+    assert queue.claim()[0] == shard_id
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""
+진화 탐색의 단계 실행(스냅샷 이어 실행)과 낙폭 중단, 시행 기록 이어 탐색
+"""
+
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+from market_generator import MarketGenerator  # noqa: E402
+from optimizer import (EvolutionarySearch, Objective, SearchSpace, evaluate, parse_dimension,  # noqa: E402
+                       stage_ends)
+from range_runner import run_range, simulator_warmup, slice_with_warmup  # noqa: E402
+
+START = pd.Timestamp('2023-01-02')
+BUY_ALWAYS = {'up_buy': 0.5, 'down_buy': 2.0}
+
+
+@pytest.fixture(scope='module')
+def window():
+    market = MarketGenerator(n_bars=400, seed=1, start='2022-09-01').frame()
+    end = market['date'].iloc[-1]
+    data, _ = slice_with_warmup(market, START, end, simulator_warmup('rules', BUY_ALWAYS))
+    return data, end
+
+
+@pytest.mark.parametrize('name, params', [('rules', BUY_ALWAYS), ('trading', {'position_size': 5})])
+def test_staged_run_matches_full_run(window, name, params):
+    data, end = window
+    _, full = run_range(name, data, START, end, params, quiet=True)
+
+    result = evaluate(name, data, START, end, params, stages=4)
+
+    assert result['status'] == 'complete'
+    assert result['stage'] == result['stages'] == 4
+    assert result['total_trades'] == full['total_trades'] > 0
+    assert result['final_value'] == pytest.approx(full['final_value'], rel=1e-12)
+    assert result['max_drawdown_pct'] == pytest.approx(full['max_drawdown_pct'], rel=1e-12)
+    assert result['score'] == pytest.approx(full['total_return_pct'], rel=1e-12)
+
+
+def test_drawdown_limit_prunes_early(window):
+    data, end = window
+    first_end = stage_ends(data, START, end, 4)[0]
+    _, first = run_range('rules', data, START, first_end, BUY_ALWAYS, quiet=True)
+    assert first['max_drawdown_pct'] > 0
+
+    result = evaluate('rules', data, START, end, BUY_ALWAYS, stages=4,
+                      max_drawdown=first['max_drawdown_pct'] / 2)
+
+    assert result['status'] == 'pruned'
+    assert result['stage'] == 1
+    assert result['score'] is None
+    assert pd.Timestamp(result['end_date']) == first_end
+
+
+def test_stage_ends_split_window(window):
+    data, end = window
+    ends = stage_ends(data, START, end, 4)
+    assert len(ends) == 4
+    assert ends[-1] == end
+    assert list(ends) == sorted(ends)
+
+
+def test_study_resumes_without_reevaluating(window, tmp_path):
+    data, end = window
+    space = SearchSpace({'up_buy': parse_dimension('0.3,0.5,0.7'), 'down_buy': parse_dimension('1.5,2.0')})
+    objective = Objective('rules', data, START, end, stages=2)
+    study = str(tmp_path / 'study.jsonl')
+
+    first = EvolutionarySearch(space, objective, population=3, elite=2, seed=1, study_path=study)
+    first.run(generations=1, max_workers=1)
+    assert len(first.trials) == 3
+
+    resumed = EvolutionarySearch(space, objective, population=3, elite=2, seed=1, study_path=study)
+    assert len(resumed.trials) == 3
+    resumed.run(generations=1, max_workers=1)
+    keys = [tuple(sorted(t['params'].items())) for t in resumed.trials]
+    assert len(keys) == len(set(keys)) == 6  # 격자 6개를 중복 없이 모두 평가
+    assert resumed.trials[-1]['generation'] == 1
+
+    with pytest.raises(ValueError):
+        EvolutionarySearch(space, Objective('rules', data, START, end, stages=3), study_path=study)
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""
+결과 저장소 기록 → 조회 (지표 순위, 인자/지표 조건, 자산 곡선 복원)
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+from dataset import content_hash  # noqa: E402
+from market_generator import MarketGenerator  # noqa: E402
+from range_runner import equity_curve, run_range  # noqa: E402
+from results_db import ResultsStore, make_run  # noqa: E402
+
+START = '2023-01-02'
+UP_BUYS = [0.3, 0.5, 0.7]
+
+
+@pytest.fixture(scope='module')
+def market():
+    return MarketGenerator(n_bars=400, seed=1, start='2022-09-01').frame()
+
+
+@pytest.fixture
+def store(tmp_path, market):
+    """up_buy 만 다른 규칙 실행 세 개를 기록한 저장소"""
+    end = market['date'].iloc[-1]
+    dataset = content_hash(market, indicators=False)
+    runs, simulators = [], []
+    for up_buy in UP_BUYS:
+        params = {'up_buy': up_buy, 'down_buy': 2.0}
+        simulator, summary = run_range('rules', market, START, end, params, quiet=True)
+        runs.append(make_run('rules', simulator, summary, params, dataset))
+        simulators.append(simulator)
+    with ResultsStore(str(tmp_path)) as store:
+        ids = store.add_runs(runs)
+        yield store, ids, runs, simulators
+
+
+def test_insert_assigns_consecutive_ids(store):
+    store, ids, runs, _ = store
+    assert ids == list(range(ids[0], ids[0] + len(runs)))
+    assert len(store) == len(runs)
+
+    record = store.get(ids[1])
+    assert record['params'] == runs[1]['params']
+    assert record['strategy'] == 'january_v2'
+    assert record['final_value'] == pytest.approx(runs[1]['summary']['final_value'])
+    assert record['dataset'] == runs[1]['dataset']
+    assert store.get(ids[-1] + 100) is None
+
+
+def test_top_orders_by_metric(store):
+    store, ids, runs, _ = store
+    top = store.top('final_value', limit=2)
+    expected = sorted(zip(ids, runs), key=lambda item: -item[1]['summary']['final_value'])[:2]
+    assert top['id'].tolist() == [run_id for run_id, _ in expected]
+
+    bottom = store.top('final_value', limit=1, ascending=True)
+    assert bottom['final_value'].iloc[0] == min(run['summary']['final_value'] for run in runs)
+
+
+def test_where_conditions(store):
+    store, ids, runs, _ = store
+    assert store.count(where=['up_buy>=0.5']) == 2
+    assert store.count(where=['up_buy=0.3']) == 1
+    assert store.count(strategy='outline') == 0
+    threshold = runs[0]['summary']['total_trades']
+    expected = sum(run['summary']['total_trades'] >= threshold for run in runs)
+    assert store.count(where=[f'total_trades>={threshold}']) == expected
+    with pytest.raises(ValueError):
+        store.count(where=['up_buy'])
+
+
+def test_series_round_trip(store):
+    store, ids, _, simulators = store
+    dates, values = equity_curve(simulators[0])
+    equity, trades = store.load_series(ids[0])
+    assert (equity['value'].to_numpy() == np.asarray(values)).all()
+    assert len(trades) == len(simulators[0].trades)
+
+    start, end = dates[10], dates[50]
+    curves = store.load_curves(ids, start, end)
+    assert list(curves.columns) == ids
+    assert len(curves) == 41
+    assert (curves[ids[0]].to_numpy() == np.asarray(values[10:51])).all()
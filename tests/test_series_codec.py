@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""
+자산 곡선/거래 기록 압축 형식 왕복 (실제 실행 결과, 조각 단위 기간 읽기, 특수 값)
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+from market_generator import MarketGenerator  # noqa: E402
+from range_runner import equity_curve, run_range  # noqa: E402
+from series_codec import pack_series, read_curve, read_trades, unpack_series  # noqa: E402
+
+
+@pytest.fixture(scope='module')
+def run():
+    df = MarketGenerator(n_bars=400, seed=1, start='2022-09-01').frame()
+    simulator, _ = run_range('rules', df, '2023-01-02', df['date'].iloc[-1],
+                             {'up_buy': 0.5, 'down_buy': 2.0}, quiet=True)
+    dates, values = equity_curve(simulator)
+    assert len(simulator.trades) > 0
+    return np.asarray(dates, dtype='datetime64[ns]'), np.asarray(values), simulator.trades
+
+
+@pytest.mark.parametrize('chunk_bars', [16, 1 << 16])
+def test_round_trip_is_exact(run, chunk_bars):
+    dates, values, trades = run
+    blob = pack_series(dates, values, trades, chunk_bars=chunk_bars)
+
+    equity, trade_frame = unpack_series(blob)
+    assert (equity['date'].to_numpy() == dates).all()
+    assert equity['value'].to_numpy().tobytes() == values.tobytes()
+    assert len(trade_frame) == len(trades)
+    assert read_trades(blob) == trades
+
+
+def test_read_curve_window(run):
+    dates, values, trades = run
+    blob = pack_series(dates, values, trades, chunk_bars=16)
+    start, end = dates[40], dates[97]
+
+    window_dates, window_values = read_curve(blob, start, end)
+    mask = (dates >= start) & (dates <= end)
+    assert (window_dates == dates[mask]).all()
+    assert (window_values == values[mask]).all()
+
+    empty_dates, _ = read_curve(blob, dates[-1] + np.timedelta64(1, 'D'), None)
+    assert len(empty_dates) == 0
+
+
+def test_special_values_and_no_trades():
+    dates = pd.bdate_range('2024-01-01', periods=7).to_numpy()
+    values = np.array([10000.0, 10000.123456789, np.nan, np.inf, -0.0, 1e-300, 12345.67])
+    blob = pack_series(dates, values)
+
+    equity, trade_frame = unpack_series(blob)
+    assert equity['value'].to_numpy().tobytes() == values.tobytes()
+    assert trade_frame.empty
+    assert read_trades(blob) == []
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+스냅샷 저장 → 복원 → 재개가 한 번에 실행한 결과와 같은지, 분기 재정의가 반영되는지
+"""
+
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+from market_generator import MarketGenerator  # noqa: E402
+from range_runner import equity_curve, run_range  # noqa: E402
+from snapshot import (fork_variants, restore_snapshot, resume, simulator_frame,  # noqa: E402
+                      take_snapshot)
+
+START = pd.Timestamp('2023-01-02')
+CURSOR = pd.Timestamp('2023-02-28')
+
+# 규칙 전략이 거의 매 봉 매수하도록 (계좌가 채워진 상태의 스냅샷)
+BUY_ALWAYS = {'up_buy': 0.5, 'down_buy': 2.0}
+
+CASES = [('trading', {}), ('rules', BUY_ALWAYS), ('rules', {'rules': 'outline'})]
+
+
+@pytest.fixture(scope='module')
+def market():
+    return MarketGenerator(n_bars=400, seed=1, start='2022-09-01').frame()
+
+
+def _split_run(name, df, sim_kwargs, end_date, **overrides):
+    """CURSOR 까지 실행 → 스냅샷 → 복원(생성 인자는 스냅샷에서) → end_date 까지 재개"""
+    simulator, _ = run_range(name, df, START, CURSOR, sim_kwargs, quiet=True)
+    blob = take_snapshot(simulator, simulator_frame(simulator, df, START, CURSOR))
+    restored, header = restore_snapshot(blob, **overrides)
+    resume(restored, header, df, end_date)
+    return restored
+
+
+@pytest.mark.parametrize('drop_ma', [False, True])
+@pytest.mark.parametrize('name, sim_kwargs', CASES)
+def test_resume_matches_uninterrupted_run(market, name, sim_kwargs, drop_ma):
+    # MA 컬럼이 없으면 이평선을 잘라낸 구간에서 다시 계산한다 (시작 봉이 같아야 결과가 같다)
+    df = market.drop(columns=['MA20', 'MA60']) if drop_ma else market
+    end_date = df['date'].iloc[-1]
+    full, _ = run_range(name, df, START, end_date, sim_kwargs, quiet=True)
+
+    resumed = _split_run(name, df, sim_kwargs, end_date)
+
+    assert len(full.trades) > 0
+    assert resumed.trades == full.trades
+    assert equity_curve(resumed) == equity_curve(full)
+
+
+@pytest.mark.parametrize('name, sim_kwargs', CASES)
+def test_fork_override_changes_result(market, name, sim_kwargs):
+    simulator, _ = run_range(name, market, START, CURSOR, sim_kwargs, quiet=True)
+    blob = take_snapshot(simulator, simulator_frame(simulator, market, START, CURSOR))
+    if name == 'trading':
+        variant = {'position_size': 5}
+    else:
+        variant = {'up_buy': 2.0, 'down_buy': 2.0}  # 규칙 인자만 바꾸고 나머지는 스냅샷의 규칙 그대로
+
+    results = fork_variants(blob, market, [{}, variant], max_workers=1)
+
+    parent, forked = results.to_dict('records')
+    assert forked['final_value'] != parent['final_value']
+
+
+def test_position_size_override_rejected_with_filled_accounts(market):
+    simulator, _ = run_range('rules', market, START, CURSOR, BUY_ALWAYS, quiet=True)
+    assert simulator.book.filled.any()
+    blob = take_snapshot(simulator, simulator_frame(simulator, market, START, CURSOR))
+
+    with pytest.raises(ValueError):
+        restore_snapshot(blob, position_size=5)
+
+
+def test_initial_capital_override_rejected_after_progress(market):
+    simulator, _ = run_range('trading', market, START, CURSOR, quiet=True)
+    blob = take_snapshot(simulator, simulator_frame(simulator, market, START, CURSOR))
+
+    with pytest.raises(ValueError):
+        restore_snapshot(blob, initial_capital=50000)
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""
+분할 수 / 초기 자본 일괄 실행이 조합마다 따로 실행한 분할 엔진 결과와 같은지
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+from market_generator import MarketGenerator  # noqa: E402
+from range_runner import equity_curve, run_range, slice_with_warmup, warmup_bars  # noqa: E402
+from split_sweep import SplitSweep, parse_list  # noqa: E402
+from strategies import RuleStrategy  # noqa: E402
+
+START = pd.Timestamp('2023-01-02')
+CONFIGS = [(10000, 1), (10000, 5), (10000, 20), (50000, 7)]
+
+
+@pytest.fixture(scope='module')
+def market():
+    return MarketGenerator(n_bars=400, seed=1, start='2022-09-01').frame()
+
+
+@pytest.mark.parametrize('rules, params', [
+    ('january_v2', {'up_buy': 0.5, 'down_buy': 2.0}),
+    ('outline', {}),
+])
+def test_sweep_matches_individual_runs(market, rules, params):
+    end = market['date'].iloc[-1]
+    strategy = RuleStrategy(rules, **params)
+    data, _ = slice_with_warmup(market, START, end, warmup_bars(strategy))
+    sweep = SplitSweep(CONFIGS, strategy)
+    sweep.execute_trading(data, START, end)
+    results = sweep.results(START, end)
+
+    for k, (capital, splits) in enumerate(CONFIGS):
+        simulator, summary = run_range('rules', market, START, end,
+                                       dict(params, rules=rules, initial_capital=capital,
+                                            position_size=splits), quiet=True)
+        dates, values = equity_curve(simulator)
+        assert summary['total_trades'] > 0
+        assert (sweep.dates == np.asarray(dates, dtype=sweep.dates.dtype)).all()
+        np.testing.assert_allclose(sweep.values[:, k], values, rtol=1e-12)
+        row = results.iloc[k]
+        assert row['total_trades'] == summary['total_trades']
+        assert row['final_value'] == pytest.approx(summary['final_value'], rel=1e-12)
+
+
+def test_parse_list():
+    assert parse_list('5:20:5', int) == [5, 10, 15, 20]
+    assert parse_list('10000,50000') == [10000.0, 50000.0]